@@ -0,0 +1,230 @@
+import abc
+import atexit
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.db import DatabaseError, connections, transaction
+
+from .models import ActivityLog
+
+logger = logging.getLogger(__name__)
+
+
+# Nơi ghi nhật ký hoạt động (sink), chọn qua settings.ACTIVITY_LOG['MODE']:
+# - 'sync':      INSERT ngay trong request như trước; lỗi ghi được ném ra cho request.
+# - 'buffered':  gom entry trong bộ nhớ mỗi worker, bulk_create khi đủ BUFFER_SIZE,
+#                sau FLUSH_INTERVAL giây, hoặc cuối request nếu FLUSH_ON_REQUEST_END.
+#                Buffer dùng chung giữa các request: request đang trong transaction (vd: TaskBulkView) chỉ
+#                flush sau khi transaction commit, để rollback không kéo theo entry của request khác.
+# - 'on_commit': chỉ ghi sau khi transaction bao quanh commit thành công.
+
+DEFAULTS = {
+    'MODE': 'sync',
+    'BUFFER_SIZE': 100,
+    'FLUSH_INTERVAL': 2.0,
+    'FLUSH_ON_REQUEST_END': False,
+    'MAX_BUFFER': 10000,
+}
+
+
+class SinkStats:
+    """
+    Bộ đếm để tinh chỉnh sink: số entry đã ghi/bị bỏ, số lần flush và độ trễ flush (ms).
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        self.written = 0
+        self.dropped = 0
+        self.flushes = 0
+        self.last_flush_ms = 0.0
+        self.max_flush_ms = 0.0
+        self.total_flush_ms = 0.0
+
+    def record_flush(self, written, dropped, elapsed_ms):
+        with self._lock:
+            self.written += written
+            self.dropped += dropped
+            self.flushes += 1
+            self.last_flush_ms = elapsed_ms
+            self.max_flush_ms = max(self.max_flush_ms, elapsed_ms)
+            self.total_flush_ms += elapsed_ms
+
+    def record_dropped(self, dropped):
+        with self._lock:
+            self.dropped += dropped
+
+    def as_dict(self):
+        with self._lock:
+            return {
+                'written': self.written,
+                'dropped': self.dropped,
+                'flushes': self.flushes,
+                'last_flush_ms': round(self.last_flush_ms, 3),
+                'max_flush_ms': round(self.max_flush_ms, 3),
+                'avg_flush_ms': round(self.total_flush_ms / self.flushes, 3) if self.flushes else 0.0,
+            }
+
+
+class BaseSink(abc.ABC):
+    def __init__(self, config):
+        self.config = config
+        self.stats = SinkStats()
+
+    @abc.abstractmethod
+    def write(self, entries):
+        ...
+
+    def flush(self):
+        pass
+
+    # Ghi một lô; lỗi cả lô (vd: FK tới task đã bị xóa) thì ghi lại từng dòng và đếm số bị bỏ.
+    # strict: ném lỗi ra cho nơi gọi thay vì bỏ entry
+    def _persist(self, entries, strict=False):
+        if not entries:
+            return
+        started = time.perf_counter()
+        written = dropped = 0
+        try:
+            with transaction.atomic():
+                ActivityLog.objects.bulk_create(entries)
+            written = len(entries)
+        except DatabaseError:
+            if strict:
+                raise
+            for entry in entries:
+                entry.pk = None
+                try:
+                    with transaction.atomic():
+                        entry.save(force_insert=True)
+                    written += 1
+                except DatabaseError:
+                    dropped += 1
+            if dropped:
+                logger.warning("ActivityLog: bỏ %d entry không ghi được.", dropped)
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        self.stats.record_flush(written, dropped, elapsed_ms)
+        logger.debug("ActivityLog flush: %d entry, %.2f ms", written, elapsed_ms)
+
+
+class SyncSink(BaseSink):
+    # Ghi trong request: lỗi CSDL đến tay view như khi gọi ActivityLog.objects.create() trực tiếp
+    def write(self, entries):
+        self._persist(list(entries), strict=True)
+
+
+class OnCommitSink(BaseSink):
+    def write(self, entries):
+        entries = list(entries)
+        transaction.on_commit(lambda: self._persist(entries))
+
+
+class BufferedSink(BaseSink):
+    def __init__(self, config):
+        super().__init__(config)
+        self._buffer = []
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._last_flush = time.monotonic()
+        self._flusher = None
+
+    def write(self, entries):
+        with self._lock:
+            self._buffer.extend(entries)
+            overflow = len(self._buffer) - self.config['MAX_BUFFER']
+            if overflow > 0:
+                # Buffer đầy (DB chậm/lỗi kéo dài): bỏ entry cũ nhất thay vì làm phình bộ nhớ
+                del self._buffer[:overflow]
+                self.stats.record_dropped(overflow)
+            due = (
+                len(self._buffer) >= self.config['BUFFER_SIZE']
+                or time.monotonic() - self._last_flush >= self.config['FLUSH_INTERVAL']
+            )
+        self._ensure_flusher()
+        if not due:
+            return
+        if transaction.get_connection().in_atomic_block:
+            transaction.on_commit(self.flush)
+        else:
+            self.flush()
+
+    def flush(self):
+        with self._flush_lock:
+            with self._lock:
+                entries, self._buffer = self._buffer, []
+                self._last_flush = time.monotonic()
+            self._persist(entries)
+
+    # Thread nền flush theo thời gian khi worker rảnh (không có write mới để kích hoạt flush)
+    def _ensure_flusher(self):
+        if self._flusher is not None and self._flusher.is_alive():
+            return
+        self._flusher = threading.Thread(target=self._run_flusher, name='activity-log-flusher', daemon=True)
+        self._flusher.start()
+
+    def _run_flusher(self):
+        interval = self.config['FLUSH_INTERVAL']
+        while True:
+            time.sleep(interval)
+            if not self._buffer:
+                continue
+            try:
+                self.flush()
+            except Exception:
+                logger.exception("ActivityLog: flush nền thất bại.")
+            finally:
+                connections.close_all()
+
+
+SINKS = {
+    'sync': SyncSink,
+    'buffered': BufferedSink,
+    'on_commit': OnCommitSink,
+}
+
+_sink = None
+_sink_lock = threading.Lock()
+
+
+def get_sink():
+    global _sink
+    if _sink is None:
+        with _sink_lock:
+            if _sink is None:
+                config = {**DEFAULTS, **getattr(settings, 'ACTIVITY_LOG', {})}
+                _sink = SINKS[config['MODE']](config)
+    return _sink
+
+
+def reset_sink():
+    global _sink
+    with _sink_lock:
+        if _sink is not None:
+            _sink.flush()
+        _sink = None
+
+
+def record(entries):
+    get_sink().write(entries)
+
+
+def flush():
+    if _sink is not None:
+        _sink.flush()
+
+
+def flush_on_request_end(**kwargs):
+    if _sink is not None and _sink.config['FLUSH_ON_REQUEST_END']:
+        _sink.flush()
+
+
+def get_stats():
+    sink = get_sink()
+    return {'mode': sink.config['MODE'], 'buffered': len(getattr(sink, '_buffer', ())), **sink.stats.as_dict()}
+
+
+atexit.register(flush)
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import User, Project, Task, Comment, Attachment, ActivityLog
+from .models import User, Project, Task, Comment, Attachment, ActivityLog, Blob, UploadSession
 
 # Đăng ký các model để hiển thị trong trang admin
 admin.site.register(User)
@@ -8,3 +8,5 @@ admin.site.register(Task)
 admin.site.register(Comment)
 admin.site.register(Attachment)
 admin.site.register(ActivityLog)
+admin.site.register(Blob)
+admin.site.register(UploadSession)
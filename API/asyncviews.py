@@ -0,0 +1,94 @@
+import functools
+
+from asgiref.sync import sync_to_async
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework import exceptions
+from rest_framework.request import Request
+from rest_framework.response import Response
+from rest_framework.views import exception_handler
+
+from . import perf
+from .authentication import CachedJWTAuthentication
+from .renderers import ORJSONRenderer
+
+
+# Đường đọc async cho các endpoint đọc nhiều nhất (view trong views.py, URL dưới /async/, cần chạy dưới ASGI):
+# - Cùng dữ liệu, cùng ETag/304, phân trang, ?fields=/?expand=, bộ lọc như bản đồng bộ cùng tên; chỉ GET/HEAD
+#   và luôn trả JSON (không có Browsable API).
+# - Trong khi chờ CSDL, request không giữ thread của server: xác thực, kiểm tra quyền thành viên và đọc dữ liệu
+#   đi qua async ORM (aget, aexists, aaggregate, async for); user/quyền trúng cache thì không chạm CSDL.
+# - Lỗi (401/403/404/400) có cùng nội dung JSON như APIView của DRF.
+
+ALLOWED_METHODS = ('GET', 'HEAD')
+
+_authenticator = CachedJWTAuthentication()
+_renderer = ORJSONRenderer()
+
+
+def async_api_view(handler):
+    """
+    Bọc `async def handler(request, **kwargs)` thành view async: xác thực JWT (bắt buộc), `request` là
+    rest_framework Request (query_params, user), kết quả Response của DRF được render thành JSON.
+    """
+    @csrf_exempt
+    @functools.wraps(handler)
+    async def view(request, **kwargs):
+        drf_request = Request(request)
+        try:
+            if request.method not in ALLOWED_METHODS:
+                raise exceptions.MethodNotAllowed(request.method)
+            with perf.timed('auth'):
+                authenticated = await _authenticator.aauthenticate(request)
+            if authenticated is None:
+                raise exceptions.NotAuthenticated()
+            drf_request.user, drf_request.auth = authenticated
+            response = await handler(drf_request, **kwargs)
+        except Exception as exc:
+            response = _handle_exception(request, exc)
+        return _render(response)
+    return view
+
+
+def _handle_exception(request, exc):
+    # Như APIView.handle_exception: lỗi xác thực -> 401 kèm WWW-Authenticate
+    if isinstance(exc, (exceptions.NotAuthenticated, exceptions.AuthenticationFailed)):
+        exc.auth_header = _authenticator.authenticate_header(request)
+    response = exception_handler(exc, {})
+    if response is None:
+        raise exc
+    if isinstance(exc, exceptions.MethodNotAllowed):
+        response['Allow'] = ', '.join(ALLOWED_METHODS)
+    return response
+
+
+def _render(response):
+    if isinstance(response, Response):
+        response.accepted_renderer = _renderer
+        response.accepted_media_type = _renderer.media_type
+        response.renderer_context = {}
+        response.render()
+    return response
+
+
+async def check_object_permissions(request, permission, obj):
+    """
+    Như APIView.check_object_permissions với bản async `ahas_object_permission` của permission.
+    """
+    with perf.timed('perm'):
+        allowed = await permission.ahas_object_permission(request, None, obj)
+    if not allowed:
+        raise exceptions.PermissionDenied(getattr(permission, 'message', None))
+
+
+async def filtered(filterset_class, request, queryset):
+    """
+    queryset sau FilterSet như ListView đồng bộ. ?search= có thể đọc cấu trúc CSDL (lần đầu) nên chạy ngoài event loop.
+    """
+    if 'search' in request.query_params:
+        return await sync_to_async(_filtered)(filterset_class, request, queryset)
+    return _filtered(filterset_class, request, queryset)
+
+
+def _filtered(filterset_class, request, queryset):
+    filterset = filterset_class(request.GET, queryset=queryset, request=request)
+    return filterset.qs if filterset.is_valid() else queryset
@@ -0,0 +1,218 @@
+import copy
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import DEFAULT_DB_ALIAS
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+from .caching import TTLCache
+
+
+# Giảm chi phí xác thực JWT mỗi request:
+# - CachedJWTAuthentication: user được lấy từ cache trong tiến trình (tùy chọn thêm Django cache dùng chung)
+#   theo user id và thế hệ (generation) của user thay vì SELECT mỗi request. Khi user được lưu/xóa (signals.py):
+#   chế độ một tiến trình xóa entry; chế độ dùng chung tăng thế hệ lưu trong cache chung nên mọi worker cùng bỏ
+#   bản cũ. Entry tự hết hạn sau USER_TTL giây (phòng khi user bị sửa bằng .update() không phát signal).
+#   Kiểm tra is_active và claim thu hồi (đổi mật khẩu) vẫn chạy trên user lấy từ cache.
+#   Trượt cache thì đọc user từ primary, không qua bản sao (replicas.py): bản sao trễ có thể trả user cũ
+#   (chưa khóa, mật khẩu cũ) và bản cũ đó sẽ nằm trong cache tới hết USER_TTL.
+# - Blacklist refresh token luôn kiểm tra bằng CSDL (simplejwt mặc định): làm mới token hiếm và vốn phải ghi
+#   CSDL, còn bộ lọc trong bộ nhớ của từng worker có thể chưa thấy token vừa bị thu hồi ở worker khác và
+#   để token đã xoay vòng được dùng lại.
+
+DEFAULTS = {
+    'USER_TTL': 60,
+    'MAX_ENTRIES': 10000,
+    'USE_DJANGO_CACHE': False,
+    'CACHE_ALIAS': 'default',
+}
+
+
+def _config():
+    return {**DEFAULTS, **getattr(settings, 'JWT_AUTH_CACHE', {})}
+
+
+_config_at_import = _config()
+_users = TTLCache(max_entries=_config_at_import['MAX_ENTRIES'], ttl=_config_at_import['USER_TTL'])
+
+
+class AuthStats:
+    """
+    Bộ đếm để đánh giá hiệu quả: số lần trúng/trượt cache user và thời gian tra CSDL khi trượt (ms).
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.hits = 0
+            self.misses = 0
+            self.miss_ms = 0.0
+            self.hit_ms = 0.0
+
+    def record(self, name, elapsed_ms=0.0):
+        with self._lock:
+            if name == 'hit':
+                self.hits += 1
+                self.hit_ms += elapsed_ms
+            elif name == 'miss':
+                self.misses += 1
+                self.miss_ms += elapsed_ms
+
+    def as_dict(self):
+        with self._lock:
+            lookup_ms = self.miss_ms / self.misses if self.misses else 0.0
+            cached_ms = self.hit_ms / self.hits if self.hits else 0.0
+            requests = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'db_lookup_ms': round(lookup_ms, 3),
+                'cached_lookup_ms': round(cached_ms, 3),
+                # Thời gian tiết kiệm trung bình mỗi request đã xác thực
+                'saved_ms_per_request': round(self.hits * (lookup_ms - cached_ms) / requests, 3) if requests else 0.0,
+            }
+
+
+auth_stats = AuthStats()
+
+
+def stats():
+    return auth_stats.as_dict()
+
+
+# -------- Cache user --------
+
+def _shared_cache(config):
+    return caches[config['CACHE_ALIAS']] if config['USE_DJANGO_CACHE'] else None
+
+
+def _key(user_id, generation):
+    return f'jwt-user:{user_id}:{generation}'
+
+
+def _generation_key(user_id):
+    return f'jwt-user:gen:{user_id}'
+
+
+def _generation(user_id, shared):
+    # Chỉ chế độ dùng chung cần thế hệ: một tiến trình thì invalidate_user xóa thẳng entry
+    return shared.get(_generation_key(user_id), 0) if shared is not None else 0
+
+
+# Claim user_id trong token có thể là chuỗi còn pk là số: luôn dùng chuỗi làm khóa
+def get_cached_user(user_id):
+    user_id = str(user_id)
+    shared = _shared_cache(_config())
+    key = _key(user_id, _generation(user_id, shared))
+    user = _users.get(key)
+    if user is None:
+        if shared is None:
+            return None
+        user = shared.get(key)
+        if user is None:
+            return None
+        _users.set(key, user)
+    # Mỗi request một bản sao: view có sửa request.user cũng không làm bẩn cache
+    return copy.copy(user)
+
+
+def cache_user(user):
+    config = _config()
+    cached = copy.copy(user)
+    shared = _shared_cache(config)
+    key = _key(str(user.pk), _generation(user.pk, shared))
+    _users.set(key, cached)
+    if shared is not None:
+        shared.set(key, cached, config['USER_TTL'])
+
+
+def invalidate_user(user_id):
+    shared = _shared_cache(_config())
+    _users.delete(_key(str(user_id), 0))
+    if shared is not None:
+        # Worker khác còn giữ user trong bộ nhớ của nó: đổi thế hệ để khóa cũ không còn được tra tới
+        generation_key = _generation_key(user_id)
+        shared.add(generation_key, 0, None)
+        shared.incr(generation_key)
+
+
+def clear():
+    _users.clear()
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """
+    JWTAuthentication nhưng lấy user từ cache (xem chú thích đầu module).
+    """
+    def get_user(self, validated_token):
+        started = time.perf_counter()
+        user_id = validated_token.get(api_settings.USER_ID_CLAIM)
+        user = get_cached_user(user_id) if user_id is not None else None
+        if user is None:
+            user = self._load_user(user_id)
+            self.check_user(user, validated_token)
+            auth_stats.record('miss', (time.perf_counter() - started) * 1000)
+            cache_user(user)
+            return user
+        self.check_user(user, validated_token)
+        auth_stats.record('hit', (time.perf_counter() - started) * 1000)
+        return user
+
+    def _load_user(self, user_id):
+        if user_id is None:
+            raise InvalidToken("Token contained no recognizable user identification")
+        try:
+            return self.user_model.objects.using(DEFAULT_DB_ALIAS).get(**{api_settings.USER_ID_FIELD: user_id})
+        except self.user_model.DoesNotExist:
+            raise AuthenticationFailed("User not found", code="user_not_found")
+
+    async def aauthenticate(self, request):
+        """
+        authenticate() cho view async: kiểm tra token không cần CSDL, chỉ khi trượt cache mới đọc user
+        bằng async ORM. Trả về (user, token) hoặc None nếu request không gửi token.
+        """
+        header = self.get_header(request)
+        if header is None:
+            return None
+        raw_token = self.get_raw_token(header)
+        if raw_token is None:
+            return None
+        validated_token = self.get_validated_token(raw_token)
+        return await self.aget_user(validated_token), validated_token
+
+    async def aget_user(self, validated_token):
+        started = time.perf_counter()
+        user_id = validated_token.get(api_settings.USER_ID_CLAIM)
+        if user_id is None:
+            raise InvalidToken("Token contained no recognizable user identification")
+        user = get_cached_user(user_id)
+        if user is None:
+            try:
+                user = await self.user_model.objects.using(DEFAULT_DB_ALIAS).aget(
+                    **{api_settings.USER_ID_FIELD: user_id})
+            except self.user_model.DoesNotExist:
+                raise AuthenticationFailed("User not found", code="user_not_found")
+            self.check_user(user, validated_token)
+            auth_stats.record('miss', (time.perf_counter() - started) * 1000)
+            cache_user(user)
+            return user
+        self.check_user(user, validated_token)
+        auth_stats.record('hit', (time.perf_counter() - started) * 1000)
+        return user
+
+    def check_user(self, user, validated_token):
+        # Cùng các kiểm tra JWTAuthentication.get_user làm sau khi đọc user từ CSDL
+        if api_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+            raise AuthenticationFailed("User is inactive", code="user_inactive")
+        if api_settings.CHECK_REVOKE_TOKEN and (
+            validated_token.get(api_settings.REVOKE_TOKEN_CLAIM) != get_md5_hash_password(user.password)
+        ):
+            raise AuthenticationFailed("The user's password has been changed.", code="password_changed")
@@ -0,0 +1,139 @@
+import threading
+
+from django.conf import settings
+from django.db import connections
+from django.db.models import BooleanField, IntegerField
+from django.db.models.functions import Lower
+from django.db.models.expressions import RawSQL
+
+from .caching import TTLCache
+from .models import User
+from .search import prefix_match
+
+
+# Gợi ý người dùng khi gõ (chọn thành viên dự án): khớp tiền tố trên username, họ, tên, email.
+# - Mỗi cột có index tiền tố riêng (xem search.PREFIX_INDEXES) nên truy vấn chỉ đọc các dòng khớp.
+# - Xếp hạng: trùng khớp username/email > tiền tố username > tiền tố họ/tên > tiền tố email.
+# - Kết quả các tiền tố vừa tra được giữ trong LRU + TTL ngắn; gõ thêm ký tự mà kết quả của tiền tố
+#   ngắn hơn đã đầy đủ (ít hơn MAX_RESULTS) thì lọc lại trong bộ nhớ, không cần hỏi CSDL.
+
+DEFAULTS = {
+    'DEFAULT_LIMIT': 10,
+    'MAX_RESULTS': 50,          # số dòng tối đa lấy từ CSDL cho một tiền tố (cũng là giới hạn ?limit=)
+    'MIN_LENGTH': 1,
+    'CACHE_TTL': 30,            # giây
+    'CACHE_ENTRIES': 2000,
+}
+
+FIELDS = ('id', 'username', 'first_name', 'last_name', 'email')
+NAME_FIELDS = ('first_name', 'last_name')
+
+
+def _config():
+    return {**DEFAULTS, **getattr(settings, 'USER_AUTOCOMPLETE', {})}
+
+
+_cache = TTLCache(max_entries=_config()['CACHE_ENTRIES'], ttl=_config()['CACHE_TTL'])
+_stats_lock = threading.Lock()
+_stats = {'hits': 0, 'derived': 0, 'misses': 0}
+
+
+def normalize(term):
+    return ' '.join(term.lower().split())
+
+
+def _count(name):
+    with _stats_lock:
+        _stats[name] += 1
+
+
+def stats():
+    with _stats_lock:
+        return {**_stats, 'entries': len(_cache)}
+
+
+def clear():
+    _cache.clear()
+
+
+def _rank(row, term, first):
+    values = {field: (row[field] or '').lower() for field in FIELDS[1:]}
+    if term in (values['username'], values['email']):
+        return 0
+    if values['username'].startswith(first):
+        return 1
+    if any(values[field].startswith(first) for field in NAME_FIELDS):
+        return 2
+    return 3
+
+
+def _matches(row, tokens):
+    values = [(row[field] or '').lower() for field in FIELDS[1:]]
+    return all(any(value.startswith(token) for value in values) for token in tokens)
+
+
+def _sort_key(term, first):
+    return lambda row: (_rank(row, term, first), row['username'].lower(), row['id'])
+
+
+def _query(term, tokens, fetch, using='default'):
+    connection = connections[using]
+    table = User._meta.db_table
+    queryset = User.objects.using(using).filter(is_active=True)
+    for token in tokens:
+        # Mỗi từ phải là tiền tố của ít nhất một cột
+        parts = [prefix_match(connection, table, column, token) for column in FIELDS[1:]]
+        queryset = queryset.filter(RawSQL(
+            '(' + ' OR '.join(part[0] for part in parts) + ')',
+            [param for part in parts for param in part[1]], output_field=BooleanField(),
+        ))
+
+    first = tokens[0]
+    username_sql, username_params = prefix_match(connection, table, 'username', first)
+    names = [prefix_match(connection, table, column, first) for column in NAME_FIELDS]
+    qn = connection.ops.quote_name
+    rank = RawSQL(
+        f"CASE WHEN LOWER({qn(table)}.{qn('username')}) = %s OR LOWER({qn(table)}.{qn('email')}) = %s THEN 0 "
+        f"WHEN {username_sql} THEN 1 WHEN {' OR '.join(part[0] for part in names)} THEN 2 ELSE 3 END",
+        [term, term, *username_params, *[param for part in names for param in part[1]]],
+        output_field=IntegerField(),
+    )
+    rows = (
+        queryset.annotate(autocomplete_rank=rank)
+        .order_by('autocomplete_rank', Lower('username'), 'id')
+        .values(*FIELDS)[:fetch]
+    )
+    return list(rows)
+
+
+def suggest(term, limit=None):
+    """
+    Tối đa `limit` user (dict id/username/first_name/last_name/email) khớp tiền tố `term`, tốt nhất trước.
+    """
+    config = _config()
+    # Số âm sẽ thành lát cắt rows[:-n] ("tất cả trừ n dòng cuối"): luôn lấy ít nhất một kết quả
+    limit = max(1, min(limit or config['DEFAULT_LIMIT'], config['MAX_RESULTS']))
+    term = normalize(term)
+    if len(term) < config['MIN_LENGTH']:
+        return []
+    tokens = term.split()
+    ttl = config['CACHE_TTL']
+
+    cached = _cache.get(term)
+    if cached is not None:
+        _count('hits')
+        return cached[0][:limit]
+
+    # Kết quả đầy đủ của một tiền tố ngắn hơn chứa mọi kết quả của tiền tố dài hơn
+    for cut in range(len(term) - 1, config['MIN_LENGTH'] - 1, -1):
+        shorter = _cache.get(term[:cut].rstrip())
+        if shorter is not None and shorter[1]:
+            rows = sorted((row for row in shorter[0] if _matches(row, tokens)), key=_sort_key(term, tokens[0]))
+            _cache.set(term, (rows, True), ttl)
+            _count('derived')
+            return rows[:limit]
+
+    _count('misses')
+    rows = _query(term, tokens, config['MAX_RESULTS'])
+    _cache.set(term, (rows, len(rows) < config['MAX_RESULTS']), ttl)
+    return rows[:limit]
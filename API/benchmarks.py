@@ -0,0 +1,371 @@
+import gc
+import io
+import json
+import math
+import os
+import statistics
+import tempfile
+import time
+
+from django.conf import settings
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection, transaction
+from django.db.models import Count
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.utils import timezone
+from PIL import Image
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken, RefreshToken
+
+from . import thumbnails, uploads
+from .models import Attachment, Comment, Project, Task, User
+from .urls import urlpatterns
+
+
+# Bộ đo hiệu năng cho mọi route trong API/urls.py (lệnh bench_endpoints):
+# - Dữ liệu do seed_data sinh ở các quy mô SCALES (user 'bench...'), chạy qua test client với JWT thật.
+# - Mỗi endpoint: 1 request làm nóng (đếm query, đo byte, ghi status) rồi REQUESTS request đo p50/p95.
+#   Request ghi dữ liệu chạy trong savepoint và được hoàn tác nên các lần đo như nhau.
+# - Báo cáo JSON so với baseline đã lưu (cùng quy mô và loại CSDL); vượt ngưỡng là hồi quy.
+#   Baseline trong repo chỉ giữ số liệu không phụ thuộc máy (status, số query, kích thước response);
+#   độ trễ so với latency-*.json do --update-baseline ghi trên chính máy đo (không commit).
+
+SCALES = {
+    '1k': {'users': 200, 'projects': 20, 'tasks': 1000},
+    '100k': {'users': 2000, 'projects': 200, 'tasks': 100000},
+    '1m': {'users': 10000, 'projects': 1000, 'tasks': 1000000},
+}
+
+PREFIX = 'bench'
+
+DEFAULTS = {
+    'DIR': None,                    # mặc định: <BASE_DIR>/benchmarks
+    'REQUESTS': 20,                 # số request đo cho mỗi endpoint
+    'LATENCY_THRESHOLD': 1.5,       # p95 mới / p95 baseline tối đa
+    'LATENCY_MIN_DELTA_MS': 10.0,   # chênh lệch p95 nhỏ hơn mức này coi là nhiễu
+    'QUERY_THRESHOLD': 0,           # số query được phép tăng
+    'BYTES_THRESHOLD': 1.1,         # kích thước response mới / baseline tối đa
+}
+
+# Trường được ghi vào baseline (tất định theo dữ liệu seed, không phụ thuộc máy đo)
+BASELINE_FIELDS = ('status', 'queries', 'bytes')
+LATENCY_FIELDS = ('p50_ms', 'p95_ms')
+
+# Route không đo được bằng request/response thông thường
+SKIPPED = {
+    'project-events': "luồng Server-Sent Events không kết thúc",
+}
+
+
+def _config():
+    return {**DEFAULTS, **getattr(settings, 'ENDPOINT_BENCHMARK', {})}
+
+
+def benchmark_dir(config=None):
+    config = config or _config()
+    return config['DIR'] or os.path.join(settings.BASE_DIR, 'benchmarks')
+
+
+def report_path(kind, scale, directory=None):
+    return os.path.join(directory or benchmark_dir(), f'{kind}-{scale}-{connection.vendor}.json')
+
+
+class Case:
+    """
+    Một phép đo: route (tên trong urls.py), phương thức, URL cụ thể và dữ liệu gửi lên.
+    - write: chạy trong savepoint rồi hoàn tác.
+    - prepare: hàm gọi trước mỗi request (khôi phục trạng thái ngoài CSDL, vd: tệp tạm).
+    - staff: gửi bằng tài khoản staff thay vì chủ dự án.
+    - sized: kích thước response tất định (False: nội dung phụ thuộc trạng thái tiến trình, vd: /metrics/).
+    """
+    def __init__(self, route, url, method='get', data=None, write=False, requests=None, prepare=None, staff=False,
+                 sized=True):
+        self.route = route
+        self.url = url
+        self.method = method
+        self.data = data
+        self.write = write
+        self.requests = requests
+        self.prepare = prepare
+        self.staff = staff
+        self.sized = sized
+
+    @property
+    def key(self):
+        return f'{self.method.upper()} {self.route}'
+
+
+# -------- Dữ liệu --------
+
+def dataset_size():
+    return {
+        'users': User.objects.filter(username__startswith=PREFIX).count(),
+        'projects': Project.objects.filter(owner__username__startswith=PREFIX).count(),
+        'tasks': Task.objects.filter(project__owner__username__startswith=PREFIX).count(),
+    }
+
+
+def ensure_dataset(size, stdout=None):
+    """
+    Sinh lại dữ liệu 'bench...' bằng seed_data nếu dữ liệu hiện có không đúng quy mô `size`.
+    """
+    current = dataset_size()
+    if current['users'] == size['users'] and current['tasks'] == size['tasks']:
+        return False
+    call_command(
+        'seed_data', '--clear', '--prefix', PREFIX, '--users', str(size['users']),
+        '--projects', str(size['projects']), '--tasks', str(size['tasks']), stdout=stdout or io.StringIO(),
+    )
+    return True
+
+
+def _image():
+    buffer = io.BytesIO()
+    Image.new('RGB', (640, 480), 'steelblue').save(buffer, 'PNG')
+    return buffer.getvalue()
+
+
+def build_fixture():
+    """
+    Các đối tượng mà URL trỏ tới: dự án nhiều task nhất, chủ dự án (user đo), task nhiều bình luận nhất,
+    một tệp đính kèm ảnh thật (có ảnh thu nhỏ) và một phiên tải lên. Gọi bên trong transaction sẽ hoàn tác.
+    """
+    project = (
+        Project.objects.filter(owner__username__startswith=PREFIX)
+        .annotate(task_count=Count('tasks')).order_by('-task_count', 'id').select_related('owner').first()
+    )
+    owner = project.owner
+    busiest = (
+        Comment.objects.filter(task__project=project).values('task')
+        .annotate(total=Count('id')).order_by('-total', 'task')[:1]
+    )
+    task = Task.objects.get(pk=busiest[0]['task']) if busiest else project.tasks.order_by('id').first()
+    comment = task.comments.order_by('id').first() or Comment.objects.create(task=task, author=owner, body='Bench')
+    member = project.members.exclude(pk=owner.pk).order_by('id').first() or owner
+    outsider = User.objects.exclude(projects=project).exclude(pk=project.owner_id).order_by('id').first()
+    attachment = Attachment.objects.create(
+        task=task, uploader=owner, file=SimpleUploadedFile('bench.png', _image()), filename='bench.png',
+    )
+    thumbnails.generate(attachment.pk)
+    # Phiên rỗng: đã "đủ" nên complete/ chạy trọn đường hoàn tất
+    upload = uploads.create_session(task, owner, 'bench.bin', 0)
+    staff = User.objects.create_user(f'{PREFIX}-staff', is_staff=True)
+    return {
+        'user': owner, 'staff': staff, 'project': project, 'task': task, 'comment': comment, 'member': member,
+        'outsider': outsider, 'attachment': attachment, 'upload': upload,
+    }
+
+
+def build_cases(fixture):
+    user, project, task = fixture['user'], fixture['project'], fixture['task']
+    base = f"/projects/{project.pk}"
+    task_base = f"{base}/tasks/{task.pk}"
+    attachment = f"{task_base}/attachments/{fixture['attachment'].pk}"
+    upload = f"{task_base}/attachments/uploads/{fixture['upload'].pk}"
+    password = 'password123'    # mật khẩu mặc định của seed_data
+    new_task = {'title': 'Bench', 'status': 'TODO', 'priority': 'MED'}
+    return [
+        Case('signup', '/signup/', 'post', {
+            'username': 'bench-signup', 'email': 'bench-signup@example.com', 'first_name': 'Bench',
+            'last_name': 'Signup', 'password': password, 'confirm_password': password,
+        }, write=True, requests=3),
+        Case('login', '/login/', 'post', {'username': user.username, 'password': password}, write=True, requests=3),
+        Case('token_refresh', '/token/refresh/', 'post', {'refresh': str(RefreshToken.for_user(user))}, write=True),
+        Case('user-list', '/users/?page_size=50'),
+        Case('user-autocomplete', f'/users/autocomplete/?q={user.first_name[:2]}'),
+        Case('user-detail', f'/users/{user.pk}/'),
+        Case('project-list', '/projects/?page_size=50'),
+        Case('project-list', '/projects/', 'post', {'name': 'Bench'}, write=True),
+        Case('project-detail', f'{base}/'),
+        Case('project-detail', f'{base}/', 'patch', {'description': 'Bench'}, write=True),
+        Case('project-stats', f'{base}/stats/'),
+        Case('project-export', f'{base}/export/?resource=tasks', requests=3),
+        Case('project-add-member', f'{base}/add_member/', 'post', {'user_id': fixture['outsider'].pk}, write=True),
+        Case('project-remove-member', f'{base}/remove_member/', 'post', {'user_id': fixture['member'].pk}, write=True),
+        Case('task-list', f'{base}/tasks/?page_size=50'),
+        Case('task-list', f'{base}/tasks/', 'post', new_task, write=True),
+        Case('task-bulk', f'{base}/tasks/bulk/', 'post', {
+            'create': [new_task] * 10, 'update': [{'id': task.pk, 'status': 'DONE'}],
+        }, write=True),
+        Case('task-detail', f'{task_base}/'),
+        Case('task-detail', f'{task_base}/', 'patch', {'status': 'DONE'}, write=True),
+        Case('comment-list', f'{task_base}/comments/?page_size=50'),
+        Case('comment-list', f'{task_base}/comments/', 'post', {'body': 'Bench'}, write=True),
+        Case('comment-detail', f"{task_base}/comments/{fixture['comment'].pk}/"),
+        Case('attachment-list', f'{task_base}/attachments/?page_size=50'),
+        Case('attachment-upload-list', f'{task_base}/attachments/uploads/', 'post',
+             {'filename': 'bench.bin', 'size': 1024}, write=True),
+        Case('attachment-upload', f'{upload}/'),
+        Case('attachment-upload-complete', f'{upload}/complete/', 'post', write=True,
+             prepare=lambda: open(uploads.part_path(fixture['upload']), 'wb').close()),
+        Case('attachment-detail', f'{attachment}/'),
+        Case('attachment-download', f'{attachment}/download/'),
+        Case('attachment-thumbnail', f'{attachment}/thumbnail/'),
+        Case('activity-project', f'{base}/activity/?page_size=50'),
+        Case('activity-task', f'{task_base}/activity/?page_size=50'),
+        Case('metrics', '/metrics/', staff=True, sized=False),
+        # Bản async của các endpoint đọc (test client chạy view async trong event loop riêng mỗi request)
+        Case('async-project-list', '/async/projects/?page_size=50'),
+        Case('async-project-detail', f'/async{base}/'),
+        Case('async-task-list', f'/async{base}/tasks/?page_size=50'),
+        Case('async-task-detail', f'/async{task_base}/'),
+        Case('async-comment-list', f'/async{task_base}/comments/?page_size=50'),
+        Case('async-comment-detail', f"/async{task_base}/comments/{fixture['comment'].pk}/"),
+        Case('async-activity-project', f'/async{base}/activity/?page_size=50'),
+        Case('async-activity-task', f'/async{task_base}/activity/?page_size=50'),
+    ]
+
+
+def uncovered_routes(cases):
+    # Route mới thêm vào urls.py mà chưa có case nào
+    covered = {case.route for case in cases} | set(SKIPPED)
+    return [pattern.name for pattern in urlpatterns if pattern.name not in covered]
+
+
+# -------- Đo --------
+
+def _send(client, case):
+    response = getattr(client, case.method)(case.url, case.data, format='json')
+    if response.streaming:
+        size = sum(len(chunk) for chunk in response.streaming_content)
+    else:
+        size = len(response.content)
+    return response.status_code, size
+
+
+def _request(client, case):
+    if case.prepare is not None:
+        case.prepare()
+    if not case.write:
+        return _send(client, case)
+    with transaction.atomic():
+        result = _send(client, case)
+        transaction.set_rollback(True)
+    return result
+
+
+def _percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(fraction * len(ordered)) - 1)]
+
+
+def measure(client, case, requests):
+    # Request làm nóng: đếm query, đo byte (đo thời gian riêng để không tính chi phí ghi lại SQL).
+    # Đếm ngay: mỗi request sau đó xóa log query của kết nối
+    with CaptureQueriesContext(connection) as queries:
+        status, size = _request(client, case)
+    query_count = len(queries)
+    timings = []
+    # Như timeit: tắt GC khi đo để p95 không phụ thuộc lúc bộ gom rác chạy
+    gc.collect()
+    gc.disable()
+    try:
+        for _ in range(case.requests or requests):
+            started = time.perf_counter()
+            _request(client, case)
+            timings.append((time.perf_counter() - started) * 1000)
+    finally:
+        gc.enable()
+    return {
+        'url': case.url,
+        'status': status,
+        'p50_ms': round(statistics.median(timings), 3),
+        'p95_ms': round(_percentile(timings, 0.95), 3),
+        'queries': query_count,
+        'bytes': size if case.sized else None,
+    }
+
+
+def run(scale, requests=None, stdout=None):
+    """
+    Đo mọi case trên dữ liệu hiện có; trả về báo cáo (dict). Dữ liệu phụ tạo ra được hoàn tác.
+    """
+    requests = requests or _config()['REQUESTS']
+    # Tệp đính kèm/ảnh thu nhỏ/phiên tải lên của lần đo nằm trong thư mục tạm
+    with tempfile.TemporaryDirectory() as media_root, override_settings(MEDIA_ROOT=media_root), transaction.atomic():
+        fixture = build_fixture()
+        cases = build_cases(fixture)
+        clients = {}
+        for staff in (False, True):
+            clients[staff] = APIClient()
+            token = AccessToken.for_user(fixture['staff' if staff else 'user'])
+            clients[staff].credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+        endpoints = {}
+        for case in cases:
+            endpoints[case.key] = measure(clients[case.staff], case, requests)
+            if stdout is not None:
+                result = endpoints[case.key]
+                stdout.write(
+                    f"  {case.key:<36} {result['status']:>3}  p50 {result['p50_ms']:8.2f} ms  "
+                    f"p95 {result['p95_ms']:8.2f} ms  {result['queries']:>3} query  {result['bytes'] or '-':>9} byte"
+                )
+        transaction.set_rollback(True)
+    return {
+        'scale': scale,
+        'database': connection.vendor,
+        'generated_at': timezone.now().isoformat(),
+        'requests': requests,
+        'dataset': dataset_size(),
+        'skipped': SKIPPED,
+        'uncovered': uncovered_routes(cases),
+        'endpoints': endpoints,
+    }
+
+
+# -------- Báo cáo và baseline --------
+
+def write_report(report, path):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as handle:
+        json.dump(report, handle, ensure_ascii=False, indent=2, sort_keys=True)
+        handle.write('\n')
+
+
+def read_report(path):
+    try:
+        with open(path, encoding='utf-8') as handle:
+            return json.load(handle)
+    except FileNotFoundError:
+        return None
+
+
+def select(report, fields):
+    """
+    Bản sao của `report` chỉ giữ `fields` cho mỗi endpoint (vd: BASELINE_FIELDS khi ghi baseline),
+    bỏ thời điểm đo để ghi lại baseline không đổi gì thì file cũng không đổi.
+    """
+    return {
+        **{name: value for name, value in report.items() if name != 'generated_at'},
+        'endpoints': {
+            key: {name: value for name, value in result.items() if name in fields}
+            for key, result in report['endpoints'].items()
+        },
+    }
+
+
+def compare(report, baseline, config=None):
+    """
+    Danh sách hồi quy (chuỗi mô tả) của `report` so với `baseline`: status đổi, p95 chậm hơn ngưỡng,
+    thêm query hoặc response lớn hơn ngưỡng. Endpoint chưa có trong baseline không tính;
+    trường baseline không có (vd: p95 trong baseline của repo) thì không so.
+    """
+    config = {**_config(), **(config or {})}
+    problems = []
+    for key, current in sorted(report['endpoints'].items()):
+        previous = baseline['endpoints'].get(key)
+        if previous is None:
+            continue
+        if 'status' in previous and current['status'] != previous['status']:
+            problems.append(f"{key}: status {previous['status']} -> {current['status']}")
+        if 'p95_ms' in previous:
+            slower = current['p95_ms'] - previous['p95_ms']
+            if (current['p95_ms'] > previous['p95_ms'] * config['LATENCY_THRESHOLD']
+                    and slower > config['LATENCY_MIN_DELTA_MS']):
+                problems.append(f"{key}: p95 {previous['p95_ms']:.2f} -> {current['p95_ms']:.2f} ms")
+        if 'queries' in previous and current['queries'] > previous['queries'] + config['QUERY_THRESHOLD']:
+            problems.append(f"{key}: {previous['queries']} -> {current['queries']} query")
+        sizes = (current['bytes'], previous.get('bytes'))
+        if None not in sizes and sizes[0] > sizes[1] * config['BYTES_THRESHOLD']:
+            problems.append(f"{key}: {previous['bytes']} -> {current['bytes']} byte")
+    return problems
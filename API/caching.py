@@ -0,0 +1,49 @@
+import threading
+import time
+from collections import OrderedDict
+
+
+# Bộ nhớ đệm LRU có thời hạn (TTL), an toàn khi dùng chung giữa các thread trong một worker
+class TTLCache:
+    """
+    - Giữ tối đa `max_entries` phần tử, bỏ phần tử ít dùng nhất khi đầy.
+    - Mỗi phần tử hết hạn sau `ttl` giây kể từ lúc ghi.
+    """
+    _missing = object()
+
+    def __init__(self, max_entries=10000, ttl=60):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            item = self._data.get(key, self._missing)
+            if item is self._missing:
+                return default
+            value, expires_at = item
+            if expires_at <= time.monotonic():
+                del self._data[key]
+                return default
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl=None):
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._data[key] = (value, expires_at)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
@@ -0,0 +1,119 @@
+import hashlib
+
+from django.db.models import Count, Max
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+from rest_framework import status
+from rest_framework.exceptions import APIException
+
+from .pagination import apaginated_or_full, paginated_or_full
+
+
+# GET có điều kiện (ETag / Last-Modified) và điều kiện tiên quyết cho thao tác ghi (If-Match).
+# Validator được tính trước khi serialize, từ cột thời gian sẵn có:
+# - Đối tượng: ETag mạnh từ (model, pk, updated_at) + Last-Modified.
+# - Danh sách: ETag yếu kèm path/query và user, tính từ:
+#   - trang keyset đang yêu cầu: (id, trường thời gian) của đúng các dòng trong trang, đọc bằng cùng truy vấn
+#     LIMIT của trang (qua index) thay vì gộp cả danh sách đã lọc;
+#   - danh sách không phân trang: max(trường thời gian) + count dưới đúng bộ lọc đang áp dụng.
+#   Không gửi Last-Modified cho danh sách vì xóa một dòng không làm max() thay đổi.
+# Thay đổi chỉ nằm ở bảng User (vd: đổi username) không làm đổi validator của dự án/công việc.
+
+
+class PreconditionFailed(APIException):
+    status_code = status.HTTP_412_PRECONDITION_FAILED
+    default_detail = "Tài nguyên đã bị thay đổi (If-Match/If-Unmodified-Since không khớp)."
+    default_code = 'precondition_failed'
+
+
+def _digest(*parts):
+    return hashlib.md5('|'.join(str(part) for part in parts).encode(), usedforsecurity=False).hexdigest()
+
+
+def object_validators(instance, field='updated_at'):
+    modified = getattr(instance, field)
+    etag = '"%s"' % _digest(instance._meta.label_lower, instance.pk, modified.isoformat())
+    return etag, modified
+
+
+def collection_validators(request, queryset, field='updated_at', paginator=None):
+    if paginator is not None:
+        page = paginator.paginate_queryset(_page_values(paginator, request, queryset, field), request)
+        if page is not None:
+            return _page_etag(request, paginator, page, field), None
+    summary = queryset.order_by().aggregate(last=Max(field), count=Count('pk'))
+    return _collection_etag(request, summary), None
+
+
+async def acollection_validators(request, queryset, field='updated_at', paginator=None):
+    if paginator is not None:
+        page = await paginator.apaginate_queryset(_page_values(paginator, request, queryset, field), request)
+        if page is not None:
+            return _page_etag(request, paginator, page, field), None
+    summary = await queryset.order_by().aaggregate(last=Max(field), count=Count('pk'))
+    return _collection_etag(request, summary), None
+
+
+def _page_values(paginator, request, queryset, field):
+    # Chỉ các cột cần cho validator và con trỏ của trang
+    return queryset.values(*dict.fromkeys(['id', field, paginator.get_ordering(request).lstrip('-')]))
+
+
+def _page_etag(request, paginator, page, field):
+    rows = [f"{row['id']}:{row[field].isoformat() if row[field] else ''}" for row in page]
+    return 'W/"%s"' % _digest(request.get_full_path(), request.user.pk, paginator.has_next, *rows)
+
+
+def _collection_etag(request, summary):
+    last = summary['last'].isoformat() if summary['last'] else ''
+    return 'W/"%s"' % _digest(request.get_full_path(), request.user.pk, last, summary['count'])
+
+
+def evaluate(request, etag=None, last_modified=None):
+    """
+    Trả về response 304 (GET/HEAD) hoặc 412 nếu header điều kiện của request đã quyết định kết quả, không thì None.
+    """
+    timestamp = int(last_modified.timestamp()) if last_modified else None
+    response = get_conditional_response(request._request, etag=etag, last_modified=timestamp)
+    if response is not None:
+        with_validators(response, etag, last_modified)
+    return response
+
+
+def check_write_preconditions(request, instance, field='updated_at'):
+    # Chỉ có tác dụng khi client gửi If-Match/If-Unmodified-Since
+    response = evaluate(request, *object_validators(instance, field))
+    if response is not None:
+        raise PreconditionFailed()
+
+
+def with_validators(response, etag=None, last_modified=None):
+    if etag:
+        response['ETag'] = etag
+    if last_modified:
+        response['Last-Modified'] = http_date(last_modified.timestamp())
+    # Trình duyệt được giữ bản sao nhưng phải hỏi lại server (kèm validator) trước khi dùng
+    response['Cache-Control'] = 'private, no-cache'
+    return response
+
+
+def conditional_list(paginator, queryset, request, serializer_class, field='updated_at'):
+    """
+    Như paginated_or_full, nhưng trả 304 (không query dữ liệu, không serialize) nếu danh sách chưa đổi.
+    """
+    etag, _ = collection_validators(request, queryset, field, paginator)
+    not_modified = evaluate(request, etag)
+    if not_modified is not None:
+        return not_modified
+    return with_validators(paginated_or_full(paginator, queryset, request, serializer_class), etag)
+
+
+async def aconditional_list(paginator, queryset, request, serializer_class, field='updated_at'):
+    """
+    Như conditional_list cho view async (async ORM).
+    """
+    etag, _ = await acollection_validators(request, queryset, field, paginator)
+    not_modified = evaluate(request, etag)
+    if not_modified is not None:
+        return not_modified
+    return with_validators(await apaginated_or_full(paginator, queryset, request, serializer_class), etag)
@@ -0,0 +1,161 @@
+import hashlib
+import mimetypes
+import os
+import re
+
+from django.conf import settings
+from django.http import FileResponse, HttpResponse
+from django.utils.http import content_disposition_header
+from rest_framework.exceptions import NotFound
+
+from . import conditional
+
+
+# Tải tệp đính kèm sau khi đã kiểm tra quyền.
+# - 'x-accel' (nginx) / 'x-sendfile' (Apache, lighttpd...): Django chỉ trả header, web server tự gửi tệp
+#   (kể cả Range) nên worker Python được giải phóng ngay.
+# - Mặc định: FileResponse; cả tệp thì đi qua wsgi.file_wrapper (sendfile, zero-copy nếu server hỗ trợ),
+#   Range một đoạn thì trả 206 và chỉ đọc đúng đoạn đó.
+# ETag mạnh: SHA-256 của blob (tệp cũ chưa có blob: tên + kích thước + mtime).
+# Dòng trỏ tới tệp không còn trong kho (dữ liệu cũ, seed_data) trả 404 thay vì 500.
+
+DEFAULTS = {
+    'BACKEND': None,                      # None | 'x-accel' | 'x-sendfile'
+    'X_ACCEL_PREFIX': '/protected-media/',  # location internal của nginx trỏ tới MEDIA_ROOT
+    'CACHE_CONTROL': 'private, max-age=3600',
+    'AS_ATTACHMENT': True,                # False: Content-Disposition inline (xem trực tiếp ảnh/PDF)
+}
+
+BLOCK_SIZE = 64 * 1024
+
+_RANGE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+def _config():
+    return {**DEFAULTS, **getattr(settings, 'ATTACHMENT_DOWNLOAD', {})}
+
+
+def file_etag(fieldfile):
+    storage = fieldfile.storage
+    try:
+        modified = storage.get_modified_time(fieldfile.name).timestamp()
+    except (NotImplementedError, OSError):
+        modified = ''
+    digest = hashlib.md5(f'{fieldfile.name}|{fieldfile.size}|{modified}'.encode(), usedforsecurity=False).hexdigest()
+    return f'"{digest}"'
+
+
+def attachment_etag(attachment):
+    if attachment.blob_id:
+        return f'"{attachment.blob.sha256}"'
+    return file_etag(attachment.file)
+
+
+def parse_range(header, size):
+    """
+    (start, end) cho header Range một đoạn; None nếu không có/không dùng được (gửi cả tệp);
+    ValueError nếu đoạn nằm ngoài tệp (416).
+    """
+    match = _RANGE.match(header.strip()) if header else None
+    if match is None:
+        return None
+    first, last = match.groups()
+    if not first and not last:
+        return None
+    if not first:
+        length = int(last)
+        if length == 0:
+            raise ValueError(header)
+        return max(size - length, 0), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or start > end:
+        raise ValueError(header)
+    return start, end
+
+
+class _RangeFile:
+    # File chỉ đọc được [start, end]; không có fileno() nên file_wrapper không gửi quá đoạn
+    def __init__(self, file, start, end):
+        self.file = file
+        self.file.seek(start)
+        self.remaining = end - start + 1
+
+    def read(self, size=-1):
+        if self.remaining <= 0:
+            return b''
+        size = self.remaining if size is None or size < 0 else min(size, self.remaining)
+        data = self.file.read(size)
+        self.remaining -= len(data)
+        return data
+
+    def close(self):
+        self.file.close()
+
+
+def serve(request, attachment, thumbnail=False):
+    """
+    Trả tệp gốc (hoặc ảnh thu nhỏ nếu thumbnail=True) của tệp đính kèm.
+    """
+    try:
+        if thumbnail:
+            fieldfile = attachment.thumbnail
+            return serve_file(request, fieldfile, file_etag(fieldfile), os.path.basename(fieldfile.name),
+                              as_attachment=False)
+        filename = attachment.filename or os.path.basename(attachment.file.name)
+        size = attachment.blob.size if attachment.blob_id else None
+        return serve_file(request, attachment.file, attachment_etag(attachment), filename, size)
+    except FileNotFoundError:
+        raise NotFound("Nội dung tệp không còn trên máy chủ.")
+
+
+def serve_file(request, fieldfile, etag, filename, size=None, as_attachment=None):
+    config = _config()
+    not_modified = conditional.evaluate(request, etag)
+    if not_modified is not None:
+        not_modified['Cache-Control'] = config['CACHE_CONTROL']
+        return not_modified
+
+    content_type = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+    as_attachment = config['AS_ATTACHMENT'] if as_attachment is None else as_attachment
+    name = fieldfile.name
+
+    if config['BACKEND'] in ('x-accel', 'x-sendfile'):
+        response = HttpResponse(content_type=content_type)
+        if config['BACKEND'] == 'x-accel':
+            response['X-Accel-Redirect'] = config['X_ACCEL_PREFIX'].rstrip('/') + '/' + name
+        else:
+            response['X-Sendfile'] = fieldfile.storage.path(name)
+    else:
+        response = _file_response(request, fieldfile, etag, content_type, fieldfile.size if size is None else size)
+
+    response['ETag'] = etag
+    response['Content-Disposition'] = content_disposition_header(as_attachment, filename)
+    response['Cache-Control'] = config['CACHE_CONTROL']
+    response['X-Content-Type-Options'] = 'nosniff'
+    return response
+
+
+def _file_response(request, fieldfile, etag, content_type, size):
+    header = request.META.get('HTTP_RANGE')
+    # If-Range: chỉ trả một đoạn nếu client vẫn giữ đúng phiên bản tệp
+    if header and request.META.get('HTTP_IF_RANGE', etag) != etag:
+        header = None
+    try:
+        byte_range = parse_range(header, size)
+    except ValueError:
+        response = HttpResponse(status=416)
+        response['Content-Range'] = f'bytes */{size}'
+        return response
+
+    source = fieldfile.storage.open(fieldfile.name, 'rb')
+    if byte_range is None:
+        response = FileResponse(source, content_type=content_type)
+    else:
+        start, end = byte_range
+        response = FileResponse(_RangeFile(source, start, end), status=206, content_type=content_type)
+        response['Content-Range'] = f'bytes {start}-{end}/{size}'
+        response['Content-Length'] = str(end - start + 1)
+    response.block_size = BLOCK_SIZE
+    response['Accept-Ranges'] = 'bytes'
+    return response
@@ -0,0 +1,130 @@
+import csv
+import json
+import zlib
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import F
+
+from .models import Task, Comment, Attachment, ActivityLog
+
+
+# Xuất toàn bộ dữ liệu dự án dạng NDJSON/CSV theo luồng (dùng cho endpoint export và lệnh export_project).
+# - Mỗi loại dữ liệu đọc bằng values() + iterator(chunk_size): PostgreSQL dùng server-side cursor,
+#   bộ nhớ không phụ thuộc kích thước dự án. (Nếu đi qua pgbouncer ở chế độ transaction
+#   thì cần DISABLE_SERVER_SIDE_CURSORS, khi đó Django đọc theo từng chunk phía client.)
+# - Các dòng được gom thành khối ~BLOCK_SIZE byte trước khi gửi đi; gzip (tùy chọn) nén trên đường đi.
+
+CHUNK_SIZE = 2000
+BLOCK_SIZE = 64 * 1024
+FORMATS = ('ndjson', 'csv')
+
+# Loại dữ liệu -> (hàm tạo queryset theo project_id, các cột xuất)
+RESOURCES = {
+    'tasks': (
+        lambda project_id: Task.objects.filter(project_id=project_id),
+        {
+            'id': 'id', 'title': 'title', 'description': 'description', 'status': 'status',
+            'priority': 'priority', 'assignee_id': 'assignee_id', 'assignee_username': 'assignee__username',
+            'due_date': 'due_date', 'created_at': 'created_at', 'updated_at': 'updated_at',
+        },
+    ),
+    'comments': (
+        lambda project_id: Comment.objects.filter(task__project_id=project_id),
+        {
+            'id': 'id', 'task_id': 'task_id', 'author_id': 'author_id', 'author_username': 'author__username',
+            'body': 'body', 'created_at': 'created_at', 'updated_at': 'updated_at',
+        },
+    ),
+    'attachments': (
+        lambda project_id: Attachment.objects.filter(task__project_id=project_id),
+        {
+            'id': 'id', 'task_id': 'task_id', 'uploader_id': 'uploader_id', 'uploader_username': 'uploader__username',
+            'file': 'file', 'description': 'description', 'uploaded_at': 'uploaded_at',
+        },
+    ),
+    'activity': (
+        lambda project_id: ActivityLog.objects.filter(project_id=project_id),
+        {
+            'id': 'id', 'task_id': 'task_id', 'actor_id': 'actor_id', 'actor_username': 'actor__username',
+            'action_description': 'action_description', 'timestamp': 'timestamp',
+        },
+    ),
+}
+
+
+def iter_rows(project_id, resource, chunk_size=CHUNK_SIZE):
+    queryset_for, columns = RESOURCES[resource]
+    expressions = {name: F(path) for name, path in columns.items() if name != path}
+    plain = [name for name, path in columns.items() if name == path]
+    rows = queryset_for(project_id).order_by('pk').values(*plain, **expressions)
+    for row in rows.iterator(chunk_size=chunk_size):
+        yield {name: row[name] for name in columns}
+
+
+def iter_ndjson(project, resources, chunk_size=CHUNK_SIZE):
+    encoder = DjangoJSONEncoder(ensure_ascii=False)
+    yield encoder.encode({
+        'type': 'project', 'id': project.pk, 'name': project.name, 'description': project.description,
+        'owner_id': project.owner_id, 'created_at': project.created_at, 'updated_at': project.updated_at,
+    }) + '\n'
+    for resource in resources:
+        singular = resource.rstrip('s')
+        for row in iter_rows(project.pk, resource, chunk_size):
+            yield encoder.encode({'type': singular, **row}) + '\n'
+
+
+class _Echo:
+    # "File" giả cho csv.writer: trả lại chuỗi vừa ghi thay vì lưu lại
+    def write(self, value):
+        return value
+
+
+def iter_csv(project, resource, chunk_size=CHUNK_SIZE):
+    writer = csv.writer(_Echo())
+    columns = list(RESOURCES[resource][1])
+    yield writer.writerow(columns)
+    for row in iter_rows(project.pk, resource, chunk_size):
+        yield writer.writerow([_csv_value(row[name]) for name in columns])
+
+
+def _csv_value(value):
+    if value is None:
+        return ''
+    if hasattr(value, 'isoformat'):
+        return value.isoformat()
+    return value
+
+
+def iter_export(project, fmt='ndjson', resources=None, chunk_size=CHUNK_SIZE):
+    """
+    Sinh các dòng văn bản của bản xuất. NDJSON gồm nhiều loại (trường "type"); CSV chỉ một loại mỗi lần.
+    """
+    resources = list(resources or RESOURCES)
+    if fmt == 'csv':
+        return iter_csv(project, resources[0], chunk_size)
+    return iter_ndjson(project, resources, chunk_size)
+
+
+def iter_blocks(lines, compress=False, block_size=BLOCK_SIZE):
+    """
+    Gom các dòng thành khối byte ~block_size; compress=True thì nén gzip theo luồng.
+    """
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31) if compress else None
+    buffer, size = [], 0
+    for line in lines:
+        data = line.encode('utf-8')
+        buffer.append(data)
+        size += len(data)
+        if size >= block_size:
+            block = b''.join(buffer)
+            buffer, size = [], 0
+            if compressor is not None:
+                block = compressor.compress(block)
+                if not block:
+                    continue
+            yield block
+    block = b''.join(buffer)
+    if compressor is not None:
+        block = compressor.compress(block) + compressor.flush()
+    if block:
+        yield block
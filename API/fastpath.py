@@ -0,0 +1,260 @@
+import threading
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import models
+from django.utils import timezone
+from rest_framework import ISO_8601, relations, serializers
+from rest_framework.settings import api_settings
+
+from . import perf
+from .caching import TTLCache
+
+
+# Đường đọc nhanh cho các endpoint danh sách: thay vì dựng model instance rồi chạy từng Field của
+# serializer, đọc thẳng .values() và ánh xạ mỗi dòng bằng các hàm đã "biên dịch" sẵn từ serializer.
+# - Kết quả trùng từng byte với serializer gốc: cùng thứ tự khóa, cùng định dạng ngày giờ (ISO 8601,
+#   đổi sang múi giờ hiện tại, '+00:00' -> 'Z'), None cho quan hệ rỗng.
+# - Hỗ trợ: trường đơn giản (số, chuỗi, choice, bool), DateTimeField/DateField, khóa ngoại dạng pk,
+#   serializer lồng (FK, cột lấy bằng JOIN) và danh sách lồng many=True trên ManyToManyField (một truy vấn
+#   phụ vào bảng trung gian, thành viên xếp theo pk).
+# - Serializer có trường khác (SerializerMethodField, FileField, source có dấu chấm...) thì không biên dịch
+#   được và luôn đi đường cũ; FAST_READ_PATH['ENABLED'] = False tắt hẳn.
+
+DEFAULTS = {
+    'ENABLED': True,
+    'MAX_COMPILED': 512,            # số bản biên dịch giữ lại (mỗi serializer x tổ hợp fields/expand)
+}
+
+_SIMPLE_FIELDS = (serializers.IntegerField, serializers.CharField, serializers.ChoiceField, serializers.BooleanField)
+
+
+def _config():
+    return {**DEFAULTS, **getattr(settings, 'FAST_READ_PATH', {})}
+
+
+_compiled = TTLCache(max_entries=_config()['MAX_COMPILED'], ttl=24 * 3600)
+_lock = threading.Lock()
+_missing = object()
+
+
+class Unsupported(Exception):
+    pass
+
+
+def _column(path):
+    def get(row, tz):
+        return row[path]
+    return get
+
+
+def _converted(path, convert):
+    def get(row, tz):
+        value = row[path]
+        return None if value is None else convert(value, tz)
+    return get
+
+
+def _datetime_converter(field):
+    # Cùng kết quả DateTimeField.to_representation; trường hợp hiếm (format riêng, giá trị naive) thì gọi thẳng nó
+    to_representation = field.to_representation
+    output_format = getattr(field, 'format', api_settings.DATETIME_FORMAT)
+    if output_format is None or output_format.lower() != ISO_8601 or hasattr(field, 'timezone'):
+        return lambda value, tz: to_representation(value)
+
+    def convert(value, tz):
+        if tz is None or timezone.is_naive(value):
+            return to_representation(value)
+        text = value.astimezone(tz).isoformat()
+        return text[:-6] + 'Z' if text.endswith('+00:00') else text
+    return convert
+
+
+def _date_converter(field):
+    to_representation = field.to_representation
+    output_format = getattr(field, 'format', api_settings.DATE_FORMAT)
+    if output_format is None or output_format.lower() != ISO_8601:
+        return lambda value, tz: to_representation(value)
+    return lambda value, tz: value.isoformat()
+
+
+def _model_of(serializer):
+    model = getattr(getattr(serializer, 'Meta', None), 'model', None)
+    if model is None:
+        raise Unsupported(f"{type(serializer).__name__} không phải ModelSerializer")
+    return model
+
+
+def _compile_fields(serializer, prefix):
+    """
+    (cột cần lấy bằng values(), [(tên khóa, getter)], [danh sách lồng many=True]) cho các trường đọc được.
+    """
+    columns, getters, nested_lists = [], [], []
+    for field in serializer._readable_fields:
+        source = field.source
+        if source == '*' or '.' in source:
+            raise Unsupported(f"trường '{field.field_name}' có source '{source}'")
+        path = prefix + source
+
+        if isinstance(field, serializers.ListSerializer):
+            if prefix:
+                raise Unsupported(f"danh sách lồng '{field.field_name}' nằm trong serializer lồng")
+            key = f'_fast_{field.field_name}'
+            nested_lists.append((key, source, field.child))
+            getters.append((field.field_name, _column(key)))
+        elif (isinstance(field, relations.ManyRelatedField)
+              and isinstance(field.child_relation, relations.PrimaryKeyRelatedField)
+              and field.child_relation.pk_field is None):
+            # Danh sách id (vd: ?fields=members không kèm ?expand=members): chỉ đọc bảng trung gian
+            if prefix:
+                raise Unsupported(f"danh sách id '{field.field_name}' nằm trong serializer lồng")
+            key = f'_fast_{field.field_name}'
+            nested_lists.append((key, source, None))
+            getters.append((field.field_name, _column(key)))
+        elif isinstance(field, serializers.BaseSerializer):
+            pk_path = f'{path}__{_model_of(field)._meta.pk.name}'
+            nested_columns, nested_getters, deeper = _compile_fields(field, path + '__')
+            if deeper:
+                raise Unsupported(f"danh sách lồng bên trong '{field.field_name}'")
+            columns += [pk_path] + nested_columns
+            getters.append((field.field_name, _nested(pk_path, nested_getters)))
+        elif isinstance(field, relations.PrimaryKeyRelatedField) and field.pk_field is None:
+            # values('project') trả về project_id, đúng giá trị PrimaryKeyRelatedField hiển thị
+            columns.append(path)
+            getters.append((field.field_name, _column(path)))
+        elif isinstance(field, serializers.DateTimeField):
+            columns.append(path)
+            getters.append((field.field_name, _converted(path, _datetime_converter(field))))
+        elif isinstance(field, serializers.DateField):
+            columns.append(path)
+            getters.append((field.field_name, _converted(path, _date_converter(field))))
+        elif type(field).to_representation in {cls.to_representation for cls in _SIMPLE_FIELDS}:
+            # Giá trị đọc từ CSDL đã đúng kiểu: to_representation của các trường này không đổi gì
+            columns.append(path)
+            getters.append((field.field_name, _column(path)))
+        else:
+            raise Unsupported(f"trường '{field.field_name}' ({type(field).__name__})")
+    return list(dict.fromkeys(columns)), getters, nested_lists
+
+
+def _nested(pk_path, getters):
+    def get(row, tz):
+        if row[pk_path] is None:
+            return None
+        return {name: getter(row, tz) for name, getter in getters}
+    return get
+
+
+class _ManyLoader:
+    """
+    Nạp danh sách lồng many=True (vd: ProjectSerializer.members) cho cả trang bằng một truy vấn
+    vào bảng trung gian, gắn vào từng dòng dưới khóa `key`. `child` None: chỉ lấy danh sách id.
+    """
+    def __init__(self, model, key, source, child):
+        field = model._meta.get_field(source)
+        if not isinstance(field, models.ManyToManyField):
+            raise Unsupported(f"'{source}' không phải ManyToManyField")
+        self.key = key
+        self.through = field.remote_field.through
+        self.owner = field.m2m_field_name()
+        target = field.m2m_reverse_field_name()
+        if child is None:
+            self.target_pk = target
+            self.columns = [self.owner, target]
+            self.represent = lambda link, tz: link[target]
+            return
+        self.target_pk = f'{target}__{field.related_model._meta.pk.name}'
+        columns, getters, deeper = _compile_fields(child, target + '__')
+        if deeper:
+            raise Unsupported(f"danh sách lồng bên trong '{source}'")
+        self.columns = list(dict.fromkeys([self.owner, self.target_pk, *columns]))
+        self.represent = lambda link, tz: {name: getter(link, tz) for name, getter in getters}
+
+    def load(self, rows, pk_name, using, tz):
+        ids = [row[pk_name] for row in rows]
+        links = list(self._links(ids, using)) if ids else []
+        self._attach(rows, pk_name, links, tz)
+
+    async def aload(self, rows, pk_name, using, tz):
+        ids = [row[pk_name] for row in rows]
+        links = [link async for link in self._links(ids, using)] if ids else []
+        self._attach(rows, pk_name, links, tz)
+
+    def _links(self, ids, using):
+        return self.through._default_manager.using(using).filter(**{f'{self.owner}__in': ids}).values(*self.columns)
+
+    def _attach(self, rows, pk_name, links, tz):
+        groups = defaultdict(list)
+        for link in sorted(links, key=lambda link: link[self.target_pk]):
+            groups[link[self.owner]].append(self.represent(link, tz))
+        for row in rows:
+            row[self.key] = groups.get(row[pk_name], [])
+
+
+class FastSerializer:
+    """
+    Bản biên dịch của một ModelSerializer (khởi tạo với `options`, vd: fields/expand) cho đường đọc danh sách:
+    - values(queryset): queryset .values() chỉ gồm các cột cần thiết (cộng `extra`, vd: trường phân trang).
+    - represent(rows, using): danh sách dict giống hệt serializer_class(instances, many=True).data.
+    - arepresent(rows, using): như represent, danh sách lồng đọc bằng async ORM (`rows` đã nạp sẵn).
+    """
+    def __init__(self, serializer_class, **options):
+        serializer = serializer_class(**options)
+        self.model = _model_of(serializer)
+        self.pk_name = self.model._meta.pk.name
+        columns, self.getters, nested_lists = _compile_fields(serializer, '')
+        self.columns = list(dict.fromkeys([self.pk_name, *columns]))
+        self.loaders = [_ManyLoader(self.model, key, source, child) for key, source, child in nested_lists]
+
+    def values(self, queryset, extra=()):
+        columns = list(dict.fromkeys([*self.columns, *extra]))
+        # select_related/prefetch_related không còn tác dụng: các cột lồng đã lấy bằng JOIN trong values()
+        return queryset.select_related(None).prefetch_related(None).values(*columns)
+
+    def represent(self, rows, using='default'):
+        rows = list(rows)
+        tz = timezone.get_current_timezone() if settings.USE_TZ else None
+        for loader in self.loaders:
+            loader.load(rows, self.pk_name, using, tz)
+        return self._map(rows, tz)
+
+    async def arepresent(self, rows, using=None):
+        # using None: bảng trung gian đọc theo router, như truy vấn chính của request
+        tz = timezone.get_current_timezone() if settings.USE_TZ else None
+        for loader in self.loaders:
+            await loader.aload(rows, self.pk_name, using, tz)
+        return self._map(rows, tz)
+
+    def _map(self, rows, tz):
+        getters = self.getters
+        return [{name: getter(row, tz) for name, getter in getters} for row in rows]
+
+
+def for_serializer(serializer_class, **options):
+    """
+    FastSerializer của `serializer_class`, hoặc None nếu đường nhanh bị tắt / serializer không biên dịch được.
+    """
+    if not _config()['ENABLED']:
+        return None
+    # fields/expand đến từ query string: cùng tập tên (khác thứ tự, lặp lại) dùng chung một bản biên dịch
+    key = (serializer_class, *((name, tuple(sorted(set(value)))) for name, value in sorted(options.items())))
+    with _lock:
+        fast = _compiled.get(key, _missing)
+        if fast is _missing:
+            try:
+                fast = FastSerializer(serializer_class, **options)
+            except Unsupported:
+                fast = None
+            _compiled.set(key, fast)
+        return fast
+
+
+def serialize(serializer_class, queryset, **options):
+    """
+    serializer_class(queryset, many=True, **options).data, qua đường nhanh nếu được.
+    """
+    fast = for_serializer(serializer_class, **options)
+    with perf.timed('serialize'):
+        if fast is None:
+            return serializer_class(queryset, many=True, **options).data
+        return fast.represent(fast.values(queryset), queryset.db)
@@ -1,12 +1,12 @@
 import django_filters
-from django.db.models import Q
 from .models import Task, Project, User
+from .search import search
 
 
 # Filter cho Task
 class TaskFilter(django_filters.FilterSet):
-    status = django_filters.CharFilter(field_name='status', lookup_expr='iexact')
-    priority = django_filters.CharFilter(field_name='priority', lookup_expr='iexact')
+    status = django_filters.CharFilter(field_name='status', method='filter_choice')
+    priority = django_filters.CharFilter(field_name='priority', method='filter_choice')
     assignee = django_filters.CharFilter(method='filter_assignee')
     search = django_filters.CharFilter(method='filter_search')
     due_date_after = django_filters.DateFilter(field_name='due_date', lookup_expr='gte')
@@ -16,6 +16,11 @@ class TaskFilter(django_filters.FilterSet):
         model = Task
         fields = ['status', 'priority', 'assignee', 'due_date_after', 'due_date_before']
     
+    # Lọc status/priority không phân biệt hoa thường: mã lựa chọn luôn viết hoa nên so sánh
+    # bằng (=) để dùng được index, thay cho iexact (UPPER(...)/LIKE)
+    def filter_choice(self, queryset, name, value):
+        return queryset.filter(**{name: value.upper()})
+
     # Lọc assignee: 'me' cho user hiện tại hoặc theo ID user
     def filter_assignee(self, queryset, name, value):
         user = self.request.user
@@ -25,9 +30,9 @@ class TaskFilter(django_filters.FilterSet):
             return queryset.filter(assignee__id=int(value))
         return queryset
 
-    # Lọc tìm kiếm theo tiêu đề công việc
+    # Tìm kiếm toàn văn theo tiêu đề và mô tả công việc, xếp theo độ liên quan
     def filter_search(self, queryset, name, value):
-        return queryset.filter(title__icontains=value)
+        return search(queryset, value)
 
 
 
@@ -39,9 +44,9 @@ class ProjectFilter(django_filters.FilterSet):
         model = Project
         fields = ['search', 'role']
 
-    # Lọc tìm kiếm theo tên dự án
+    # Tìm kiếm toàn văn theo tên và mô tả dự án
     def filter_search(self, queryset, name, value):
-        return queryset.filter(name__icontains=value)
+        return search(queryset, value)
 
     # Lọc theo vai trò: 'owner' hoặc 'member'
     def filter_role(self, queryset, name, value):
@@ -62,8 +67,6 @@ class UserFilter(django_filters.FilterSet):
         model = User
         fields = ['search']
 
-    # Lọc tìm kiếm theo username hoặc email
+    # Tìm kiếm toàn văn theo username, email, họ tên
     def filter_search(self, queryset, name, value):
-        return queryset.filter(
-            Q(username__icontains=value) | Q(email__icontains=value)
-        )
+        return search(queryset, value)
@@ -0,0 +1,299 @@
+import asyncio
+import io
+import math
+import statistics
+import sys
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from django.conf import settings
+from django.core.handlers.asgi import ASGIHandler
+from django.core.handlers.wsgi import WSGIHandler
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.db.models import Count
+from django.test.utils import override_settings
+from django.utils import timezone
+from rest_framework_simplejwt.tokens import AccessToken
+
+from .benchmarks import PREFIX, dataset_size
+from .models import Comment, Project
+
+
+# So sánh đường đọc đồng bộ (WSGI) với bản async (ASGI) dưới tải đồng thời (lệnh loadtest_reads):
+# - Chạy ngay trong tiến trình, không cần server: WSGIHandler trên một pool THREADS thread (như gunicorn
+#   gthread) và ASGIHandler trên một event loop (như uvicorn). CONCURRENCY client gửi request liên tiếp,
+#   độ trễ tính từ lúc client gửi (gồm cả thời gian chờ thread rảnh).
+# - Cùng các endpoint đọc (task/project/comment/activity) của user 'bench...' trên dữ liệu seed_data.
+# - DB_LATENCY_MS cộng độ trễ vào mỗi câu SQL để mô phỏng CSDL ở máy khác (CSDL cục bộ trả lời gần như tức thì,
+#   khi đó view đồng bộ hầu như không phải chờ và khác biệt giữa hai đường không lộ ra).
+# - Báo cáo: request/giây, p50/p95, số lỗi, số thread tối đa; "headroom" là mức đồng thời cao nhất mà p95
+#   vẫn dưới SLO_MS và không có lỗi.
+
+DEFAULTS = {
+    'CONCURRENCY': [1, 8, 32, 64],
+    'REQUESTS': 200,                # số request mỗi mức đồng thời, mỗi đường
+    'THREADS': 8,                   # số thread của server WSGI
+    'DB_LATENCY_MS': 0.0,
+    'SLO_MS': 250.0,
+}
+
+HOST = 'testserver'
+_db_latency = 0.0
+
+
+def _config():
+    return {**DEFAULTS, **getattr(settings, 'READ_LOADTEST', {})}
+
+
+def targets():
+    """
+    [(tên, đường dẫn, query string)] của các endpoint đọc, trên dự án nhiều task nhất của dữ liệu 'bench'.
+    """
+    project = (
+        Project.objects.filter(owner__username__startswith=PREFIX)
+        .annotate(task_count=Count('tasks')).order_by('-task_count', 'id').select_related('owner').first()
+    )
+    if project is None:
+        return None, []
+    busiest = (
+        Comment.objects.filter(task__project=project).values('task')
+        .annotate(total=Count('id')).order_by('-total', 'task')[:1]
+    )
+    task_id = busiest[0]['task'] if busiest else project.tasks.order_by('id').values_list('id', flat=True).first()
+    comment_id = Comment.objects.filter(task_id=task_id).order_by('id').values_list('id', flat=True).first()
+    base = f'/projects/{project.pk}'
+    task = f'{base}/tasks/{task_id}'
+    paths = [
+        ('project-list', '/projects/', 'page_size=50'),
+        ('project-detail', f'{base}/', ''),
+        ('task-list', f'{base}/tasks/', 'page_size=50'),
+        ('task-detail', f'{task}/', ''),
+        ('comment-list', f'{task}/comments/', 'page_size=50'),
+        ('activity-project', f'{base}/activity/', 'page_size=50'),
+    ]
+    if comment_id is not None:
+        paths.append(('comment-detail', f'{task}/comments/{comment_id}/', ''))
+    return project.owner, paths
+
+
+# -------- Độ trễ CSDL mô phỏng --------
+
+def _latency_hook(execute, sql, params, many, context):
+    if _db_latency:
+        time.sleep(_db_latency)
+    return execute(sql, params, many, context)
+
+
+def _install_latency_hook(sender, connection, **kwargs):
+    if _latency_hook not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_latency_hook)
+
+
+# -------- Gửi request --------
+
+def _wsgi_request(handler, path, query, authorization):
+    environ = {
+        'REQUEST_METHOD': 'GET', 'SCRIPT_NAME': '', 'PATH_INFO': path, 'QUERY_STRING': query,
+        'SERVER_NAME': HOST, 'SERVER_PORT': '80', 'SERVER_PROTOCOL': 'HTTP/1.1',
+        'HTTP_HOST': HOST, 'HTTP_AUTHORIZATION': authorization,
+        'wsgi.version': (1, 0), 'wsgi.url_scheme': 'http', 'wsgi.input': io.BytesIO(), 'wsgi.errors': sys.stderr,
+        'wsgi.multithread': True, 'wsgi.multiprocess': False, 'wsgi.run_once': False,
+    }
+    status = []
+    response = handler(environ, lambda line, headers, exc_info=None: status.append(int(line.split()[0])))
+    try:
+        for _ in response:
+            pass
+    finally:
+        # Như server WSGI: phát request_finished (đóng kết nối CSDL của thread theo CONN_MAX_AGE)
+        response.close()
+    return status[0]
+
+
+async def _asgi_request(app, path, query, authorization):
+    scope = {
+        'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1', 'method': 'GET', 'scheme': 'http',
+        'path': path, 'raw_path': path.encode(), 'query_string': query.encode(), 'root_path': '',
+        'headers': [(b'host', HOST.encode()), (b'authorization', authorization.encode())],
+        'client': ('127.0.0.1', 0), 'server': (HOST, 80),
+    }
+    finished = asyncio.Event()
+    received = False
+    status = []
+
+    async def receive():
+        nonlocal received
+        if not received:
+            received = True
+            return {'type': 'http.request', 'body': b'', 'more_body': False}
+        # Client chỉ ngắt kết nối sau khi nhận xong response
+        await finished.wait()
+        return {'type': 'http.disconnect'}
+
+    async def send(message):
+        if message['type'] == 'http.response.start':
+            status.append(message['status'])
+        elif message['type'] == 'http.response.body' and not message.get('more_body'):
+            finished.set()
+
+    await app(scope, receive, send)
+    finished.set()
+    return status[0]
+
+
+# -------- Đo --------
+
+class _ThreadSampler:
+    """
+    Số thread tối đa của tiến trình trong lúc đo (lấy mẫu mỗi 5 ms).
+    """
+    def __init__(self):
+        self.peak = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        while True:
+            # Không tính thread lấy mẫu
+            self.peak = max(self.peak, threading.active_count() - 1)
+            if self._stop.wait(0.005):
+                return
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+
+
+def _percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(fraction * len(ordered)) - 1)]
+
+
+def _summary(latencies, statuses, elapsed, peak_threads):
+    return {
+        'requests': len(latencies),
+        'rps': round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+        'p50_ms': round(statistics.median(latencies) * 1000, 2),
+        'p95_ms': round(_percentile(latencies, 0.95) * 1000, 2),
+        'errors': sum(1 for status in statuses if status >= 400),
+        'peak_threads': peak_threads,
+    }
+
+
+def run_wsgi(paths, authorization, concurrency, total, threads):
+    handler = WSGIHandler()
+    latencies, statuses = [], []
+    with _ThreadSampler() as sampler, ThreadPoolExecutor(threads, thread_name_prefix='wsgi') as pool:
+        pending = {}
+        issued = 0
+        started = time.perf_counter()
+
+        def submit():
+            nonlocal issued
+            name, path, query = paths[issued % len(paths)]
+            issued += 1
+            pending[pool.submit(_wsgi_request, handler, path, query, authorization)] = time.perf_counter()
+
+        for _ in range(min(concurrency, total)):
+            submit()
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                latencies.append(time.perf_counter() - pending.pop(future))
+                statuses.append(future.result())
+                if issued < total:
+                    submit()
+        elapsed = time.perf_counter() - started
+    return _summary(latencies, statuses, elapsed, sampler.peak)
+
+
+def run_asgi(paths, authorization, concurrency, total):
+    handler = ASGIHandler()
+    latencies, statuses = [], []
+    requests = iter(range(total))
+
+    async def client():
+        for index in requests:
+            name, path, query = paths[index % len(paths)]
+            started = time.perf_counter()
+            statuses.append(await _asgi_request(handler, '/async' + path, query, authorization))
+            latencies.append(time.perf_counter() - started)
+
+    async def main():
+        await asyncio.gather(*(client() for _ in range(min(concurrency, total))))
+
+    with _ThreadSampler() as sampler:
+        started = time.perf_counter()
+        asyncio.run(main())
+        elapsed = time.perf_counter() - started
+    return _summary(latencies, statuses, elapsed, sampler.peak)
+
+
+def headroom(levels, slo_ms):
+    # Mức đồng thời cao nhất (trong các mức đã đo) mà p95 <= SLO và không lỗi
+    passing = [level['concurrency'] for level in levels if level['p95_ms'] <= slo_ms and not level['errors']]
+    return max(passing, default=0)
+
+
+def run(concurrency=None, requests=None, threads=None, db_latency_ms=None, slo_ms=None, stdout=None):
+    """
+    Đo cả hai đường ở từng mức đồng thời trên dữ liệu 'bench' hiện có; trả về báo cáo (dict).
+    """
+    global _db_latency
+    config = _config()
+    concurrency = concurrency or config['CONCURRENCY']
+    requests = requests or config['REQUESTS']
+    threads = threads or config['THREADS']
+    db_latency_ms = config['DB_LATENCY_MS'] if db_latency_ms is None else db_latency_ms
+    slo_ms = slo_ms or config['SLO_MS']
+
+    user, paths = targets()
+    if user is None:
+        raise ValueError("Chưa có dữ liệu 'bench' (chạy seed_data hoặc bench_endpoints trước).")
+    authorization = f'Bearer {AccessToken.for_user(user)}'
+    # Làm nóng: nạp cache user/quyền, biên dịch đường đọc nhanh
+    run_wsgi(paths, authorization, 1, len(paths), 1)
+    run_asgi(paths, authorization, 1, len(paths))
+
+    _db_latency = db_latency_ms / 1000
+    connection_created.connect(_install_latency_hook, dispatch_uid='loadtest_db_latency')
+    for connection in connections.all(initialized_only=True):
+        _install_latency_hook(None, connection)
+    results = {'wsgi': [], 'asgi': []}
+    # Dưới tải gần như mọi request đều vượt ngưỡng "chậm": tắt log request chậm để khỏi làm nhiễu kết quả
+    metrics = {**getattr(settings, 'REQUEST_METRICS', {}), 'SLOW_REQUEST_MS': None}
+    try:
+        with override_settings(REQUEST_METRICS=metrics):
+            for level in concurrency:
+                for mode in ('wsgi', 'asgi'):
+                    if mode == 'wsgi':
+                        result = run_wsgi(paths, authorization, level, requests, threads)
+                    else:
+                        result = run_asgi(paths, authorization, level, requests)
+                    results[mode].append({'concurrency': level, **result})
+                    if stdout is not None:
+                        stdout.write(
+                            f"  {mode} c={level:<4} {result['rps']:8.1f} req/s  p50 {result['p50_ms']:8.2f} ms  "
+                            f"p95 {result['p95_ms']:8.2f} ms  lỗi {result['errors']:>3}  thread {result['peak_threads']:>3}"
+                        )
+    finally:
+        _db_latency = 0.0
+        connection_created.disconnect(dispatch_uid='loadtest_db_latency')
+    return {
+        'database': connections['default'].vendor,
+        'generated_at': timezone.now().isoformat(),
+        'dataset': dataset_size(),
+        'endpoints': [name for name, path, query in paths],
+        'requests': requests,
+        'threads': threads,
+        'db_latency_ms': db_latency_ms,
+        'slo_ms': slo_ms,
+        'results': results,
+        'headroom': {mode: headroom(levels, slo_ms) for mode, levels in results.items()},
+    }
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from API import retention
+
+
+class Command(BaseCommand):
+    help = "Chuyển nhật ký hoạt động cũ ra file NDJSON nén (kèm manifest.json) rồi xóa khỏi CSDL."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=None,
+                            help="Giữ lại N ngày gần nhất (mặc định: KEEP_DAYS).")
+        parser.add_argument('--dir', default=None, help="Thư mục lưu trữ (mặc định: ARCHIVE_DIR).")
+
+    def handle(self, *args, **options):
+        entries = retention.archive_older_than(options['days'], options['dir'])
+        for entry in entries:
+            self.stdout.write(f"{entry['file']}: {entry['count']} entry")
+        total = sum(entry['count'] for entry in entries)
+        self.stdout.write(self.style.SUCCESS(f"Đã lưu trữ {total} entry vào {len(entries)} tệp."))
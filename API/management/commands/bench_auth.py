@@ -0,0 +1,39 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.test import APIRequestFactory
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.tokens import AccessToken
+
+from API import authentication
+from API.models import User
+
+
+class Command(BaseCommand):
+    help = "Đo thời gian xác thực JWT mỗi request: JWTAuthentication gốc so với CachedJWTAuthentication."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', help="username dùng để tạo token (mặc định: user đầu tiên).")
+        parser.add_argument('--requests', type=int, default=2000)
+
+    def handle(self, *args, **options):
+        users = User.objects.order_by('pk')
+        user = users.filter(username=options['user']).first() if options['user'] else users.first()
+        if user is None:
+            raise CommandError("Không có user nào để tạo token.")
+        request = APIRequestFactory().get('/', HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(user)}')
+
+        authentication.clear()
+        authentication.auth_stats.reset()
+        results = {}
+        for name, backend in (('JWTAuthentication', JWTAuthentication()),
+                              ('CachedJWTAuthentication', authentication.CachedJWTAuthentication())):
+            backend.authenticate(request)   # làm nóng (kết nối CSDL, cache)
+            started = time.perf_counter()
+            for _ in range(options['requests']):
+                backend.authenticate(request)
+            results[name] = (time.perf_counter() - started) * 1000 / options['requests']
+            self.stdout.write(f"{name:<26} {results[name]:.4f} ms/request")
+
+        saved = results['JWTAuthentication'] - results['CachedJWTAuthentication']
+        self.stdout.write(self.style.SUCCESS(f"Tiết kiệm {saved:.4f} ms/request ({authentication.stats()})"))
@@ -0,0 +1,74 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.test.runner import DiscoverRunner
+
+from API import benchmarks
+
+
+class Command(BaseCommand):
+    help = (
+        "Đo p50/p95, số query và kích thước response của mọi route trong API/urls.py trên dữ liệu seed_data "
+        "ở các quy mô 1k/100k/1m task (CSDL test riêng), ghi báo cáo JSON và so với baseline: "
+        "endpoint hồi quy quá ngưỡng ENDPOINT_BENCHMARK thì lệnh báo lỗi."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scale', action='append', choices=sorted(benchmarks.SCALES),
+                            help="Quy mô dữ liệu (lặp lại để đo nhiều quy mô; mặc định 1k).")
+        parser.add_argument('--requests', type=int, default=None, help="Số request đo cho mỗi endpoint.")
+        parser.add_argument('--keepdb', action='store_true',
+                            help="Giữ CSDL test (và dữ liệu đã sinh) cho lần chạy sau.")
+        parser.add_argument('--update-baseline', action='store_true', help="Ghi kết quả làm baseline mới.")
+        parser.add_argument('--no-compare', action='store_true', help="Không so với baseline.")
+        parser.add_argument('--threshold', type=float, default=None, help="Ghi đè LATENCY_THRESHOLD (tỉ lệ p95).")
+
+    def handle(self, *args, **options):
+        if options['requests'] is not None and options['requests'] <= 0:
+            raise CommandError("--requests phải lớn hơn 0.")
+        overrides = {} if options['threshold'] is None else {'LATENCY_THRESHOLD': options['threshold']}
+        runner = DiscoverRunner(interactive=False, keepdb=options['keepdb'], verbosity=0)
+        runner.setup_test_environment()
+        old_config = runner.setup_databases()
+        problems = []
+        try:
+            for scale in options['scale'] or ['1k']:
+                problems += self._run(scale, options, overrides)
+        finally:
+            runner.teardown_databases(old_config)
+            runner.teardown_test_environment()
+        if problems:
+            raise CommandError("Hồi quy hiệu năng:\n  " + "\n  ".join(problems))
+
+    def _run(self, scale, options, overrides):
+        self.stdout.write(f"Quy mô {scale}: chuẩn bị dữ liệu...")
+        if benchmarks.ensure_dataset(benchmarks.SCALES[scale], stdout=self.stdout):
+            self.stdout.write("  đã sinh lại dữ liệu 'bench'.")
+        report = benchmarks.run(scale, requests=options['requests'], stdout=self.stdout)
+        if report['uncovered']:
+            self.stdout.write(self.style.WARNING(f"Route chưa được đo: {', '.join(report['uncovered'])}"))
+        path = benchmarks.report_path('report', scale)
+        benchmarks.write_report(report, path)
+        self.stdout.write(f"Đã ghi báo cáo {path}")
+
+        # baseline-*.json (commit): status, số query, byte; latency-*.json (không commit): p50/p95 của máy này
+        baseline_path = benchmarks.report_path('baseline', scale)
+        latency_path = benchmarks.report_path('latency', scale)
+        if options['update_baseline']:
+            benchmarks.write_report(benchmarks.select(report, benchmarks.BASELINE_FIELDS), baseline_path)
+            benchmarks.write_report(benchmarks.select(report, benchmarks.LATENCY_FIELDS), latency_path)
+            self.stdout.write(self.style.SUCCESS(f"Đã cập nhật baseline {baseline_path}, {latency_path}"))
+            return []
+        if options['no_compare']:
+            return []
+        problems = []
+        for reference_path, fields in ((baseline_path, benchmarks.BASELINE_FIELDS),
+                                       (latency_path, benchmarks.LATENCY_FIELDS)):
+            reference = benchmarks.read_report(reference_path)
+            if reference is None:
+                self.stdout.write(self.style.WARNING(
+                    f"Chưa có baseline {reference_path} (chạy với --update-baseline)."))
+                continue
+            found = benchmarks.compare(report, benchmarks.select(reference, fields), overrides)
+            problems += [f"[{scale}] {problem}" for problem in found]
+            if not found:
+                self.stdout.write(self.style.SUCCESS(f"Không có hồi quy so với {reference_path}"))
+        return problems
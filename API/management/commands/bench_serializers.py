@@ -0,0 +1,100 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Prefetch
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+
+from API import fastpath
+from API.models import ActivityLog, Project, Task, User
+from API.renderers import ORJSONRenderer, orjson
+from API.serializers import ActivityLogSerializer, ProjectSerializer, TaskSerializer
+
+
+class Command(BaseCommand):
+    help = (
+        "Đo thời gian đọc + serialize + render JSON cho mỗi 1000 dòng (task, dự án, nhật ký): "
+        "serializer + JSONRenderer so với đường nhanh values() + ORJSONRenderer. "
+        "Dữ liệu mẫu được tạo trong một transaction rồi hoàn tác."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=1000)
+        parser.add_argument('--repeat', type=int, default=5)
+
+    def handle(self, *args, **options):
+        if options['rows'] <= 0 or options['repeat'] <= 0:
+            raise CommandError("--rows và --repeat phải lớn hơn 0.")
+        if orjson is None:
+            self.stdout.write(self.style.WARNING("Chưa cài orjson: ORJSONRenderer dùng json chuẩn."))
+        with transaction.atomic():
+            querysets = self._seed(options['rows'])
+            for name, serializer_class, queryset, baseline_queryset in querysets:
+                self._compare(name, serializer_class, queryset, baseline_queryset, options)
+            transaction.set_rollback(True)
+
+    def _seed(self, rows):
+        now = timezone.now()
+        users = User.objects.bulk_create([
+            User(username=f'bench-serializer-{i}', email=f'bench{i}@example.com', first_name='Bến', last_name=f'Thử {i}')
+            for i in range(20)
+        ])
+        owner = users[0]
+        project = Project.objects.create(name='Bench', owner=owner)
+        projects = Project.objects.bulk_create([
+            Project(name=f'Dự án {i}', description='Mô tả ' * 5, owner=users[i % len(users)]) for i in range(rows)
+        ])
+        Project.members.through.objects.bulk_create([
+            Project.members.through(project_id=item.pk, user_id=users[(item.pk + k) % len(users)].pk)
+            for item in projects for k in range(3)
+        ])
+        Task.objects.bulk_create([
+            Task(title=f'Công việc {i}', description='Chi tiết ' * 10, project=project,
+                 assignee=users[i % len(users)] if i % 4 else None, due_date=now if i % 3 else None)
+            for i in range(rows)
+        ])
+        ActivityLog.objects.bulk_create([
+            ActivityLog(action_description=f'cập nhật công việc {i}', actor=users[i % len(users)], project=project)
+            for i in range(rows)
+        ])
+        ids = [item.pk for item in projects]
+        return [
+            ('tasks', TaskSerializer, Task.objects.filter(project=project).order_by('id'),
+             Task.objects.filter(project=project).order_by('id').select_related('assignee')),
+            ('projects', ProjectSerializer, Project.objects.filter(pk__in=ids).order_by('id'),
+             # Đường nhanh xếp thành viên theo pk: đường cũ cũng vậy để so sánh từng byte
+             Project.objects.filter(pk__in=ids).order_by('id').select_related('owner')
+             .prefetch_related(Prefetch('members', queryset=User.objects.order_by('pk')))),
+            ('activity', ActivityLogSerializer, ActivityLog.objects.filter(project=project).order_by('-timestamp', '-id'),
+             ActivityLog.objects.filter(project=project).order_by('-timestamp', '-id').select_related('actor')),
+        ]
+
+    def _compare(self, name, serializer_class, queryset, baseline_queryset, options):
+        fast = fastpath.FastSerializer(serializer_class)
+        renderers = (JSONRenderer(), ORJSONRenderer())
+
+        def baseline():
+            return renderers[0].render(serializer_class(list(baseline_queryset.all()), many=True).data)
+
+        def optimized():
+            return renderers[1].render(fast.represent(fast.values(queryset), queryset.db))
+
+        before, after = baseline(), optimized()
+        if before != after:
+            raise CommandError(f"{name}: kết quả đường nhanh khác serializer gốc.")
+        scale = 1000 / options['rows']
+        timings = []
+        for run in (baseline, optimized):
+            best = None
+            for _ in range(options['repeat']):
+                started = time.perf_counter()
+                run()
+                elapsed = (time.perf_counter() - started) * 1000 * scale
+                best = elapsed if best is None else min(best, elapsed)
+            timings.append(best)
+        self.stdout.write(
+            f"{name:<9} serializer+JSONRenderer {timings[0]:8.2f} ms/1k dòng   "
+            f"values+ORJSONRenderer {timings[1]:8.2f} ms/1k dòng   x{timings[0] / timings[1]:.1f} "
+            f"({len(after)} byte, trùng khớp)"
+        )
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from API import uploads
+
+
+class Command(BaseCommand):
+    help = "Xóa các phiên tải lên theo từng phần đã quá SESSION_TTL (kèm file tạm)."
+
+    def handle(self, *args, **options):
+        purged = uploads.purge_expired()
+        self.stdout.write(self.style.SUCCESS(f"Đã xóa {purged} phiên tải lên hết hạn."))
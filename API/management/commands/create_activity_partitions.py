@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from API import retention
+
+
+class Command(BaseCommand):
+    help = "Tạo trước phân vùng theo tháng cho bảng nhật ký hoạt động (PostgreSQL), nên chạy định kỳ."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--months', type=int, default=None,
+                            help="Số tháng tới cần có phân vùng (mặc định: PARTITION_MONTHS_AHEAD).")
+
+    def handle(self, *args, **options):
+        if not retention.is_partitioned():
+            self.stdout.write("Bảng nhật ký hoạt động không phân vùng trên CSDL này, bỏ qua.")
+            return
+        created = retention.ensure_partitions(options['months'])
+        self.stdout.write(self.style.SUCCESS(f"Đã tạo {len(created)} phân vùng: {', '.join(created) or '-'}"))
@@ -0,0 +1,39 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from API import export
+from API.models import Project
+
+
+class Command(BaseCommand):
+    help = "Xuất dữ liệu một dự án (công việc, bình luận, tệp đính kèm, nhật ký) dạng NDJSON/CSV theo luồng."
+
+    def add_arguments(self, parser):
+        parser.add_argument('project_id', type=int)
+        parser.add_argument('--fmt', choices=export.FORMATS, default='ndjson')
+        parser.add_argument('--resource', action='append', choices=list(export.RESOURCES),
+                            help="Loại dữ liệu cần xuất (lặp lại được; CSV chỉ nhận một). Mặc định: tất cả.")
+        parser.add_argument('--output', '-o', help="Đường dẫn file; mặc định ghi ra stdout.")
+        parser.add_argument('--gzip', action='store_true', help="Nén gzip khi ghi.")
+        parser.add_argument('--chunk-size', type=int, default=export.CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        try:
+            project = Project.objects.get(pk=options['project_id'])
+        except Project.DoesNotExist:
+            raise CommandError("Dự án không tồn tại.")
+        resources = options['resource'] or list(export.RESOURCES)
+        if options['fmt'] == 'csv' and len(resources) != 1:
+            raise CommandError("CSV chỉ xuất một loại dữ liệu mỗi lần (--resource).")
+
+        lines = export.iter_export(project, options['fmt'], resources, options['chunk_size'])
+        blocks = export.iter_blocks(lines, compress=options['gzip'])
+        if options['output']:
+            with open(options['output'], 'wb') as output:
+                for block in blocks:
+                    output.write(block)
+        else:
+            for block in blocks:
+                sys.stdout.buffer.write(block)
+            sys.stdout.buffer.flush()
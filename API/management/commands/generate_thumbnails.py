@@ -0,0 +1,53 @@
+import mimetypes
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from API import thumbnails
+from API.models import Attachment
+
+
+def _generate(attachment_id, force):
+    try:
+        return thumbnails.generate(attachment_id, force=force)
+    finally:
+        connection.close()
+
+
+class Command(BaseCommand):
+    help = "Sinh ảnh thu nhỏ còn thiếu cho các tệp đính kèm là ảnh, xử lý song song."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--force', action='store_true', help="Sinh lại cả ảnh đã có.")
+        parser.add_argument('--workers', type=int, default=4)
+        parser.add_argument('--batch-size', type=int, default=200,
+                            help="Số tệp đưa vào pool mỗi đợt (giới hạn bộ nhớ/hàng đợi).")
+
+    def handle(self, *args, **options):
+        queryset = Attachment.objects.order_by('pk')
+        if not options['force']:
+            queryset = queryset.filter(thumbnail='')
+        rows = queryset.values_list('pk', 'filename', 'file').iterator(chunk_size=options['batch_size'])
+
+        generated = skipped = 0
+        batch = []
+        with ThreadPoolExecutor(max_workers=options['workers'], thread_name_prefix='thumbnail') as pool:
+            for pk, filename, name in rows:
+                content_type = mimetypes.guess_type(filename or name)[0] or ''
+                if not content_type.startswith('image/'):
+                    continue
+                batch.append(pk)
+                if len(batch) >= options['batch_size']:
+                    results = self.process(pool, batch, options['force'])
+                    generated, skipped = generated + results[0], skipped + results[1]
+                    batch = []
+            results = self.process(pool, batch, options['force'])
+            generated, skipped = generated + results[0], skipped + results[1]
+
+        self.stdout.write(self.style.SUCCESS(f"Đã sinh {generated} ảnh thu nhỏ, bỏ qua {skipped} tệp."))
+
+    def process(self, pool, batch, force):
+        names = list(pool.map(_generate, batch, [force] * len(batch)))
+        generated = sum(1 for name in names if name)
+        return generated, len(names) - generated
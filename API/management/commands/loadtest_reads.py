@@ -0,0 +1,61 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.test.runner import DiscoverRunner
+
+from API import benchmarks, loadtest
+
+
+class Command(BaseCommand):
+    help = (
+        "So sánh request/giây, độ trễ và mức đồng thời chịu được của các endpoint đọc: đường đồng bộ (WSGI, "
+        "pool thread) với bản async dưới /async/ (ASGI, event loop), trên dữ liệu seed_data (CSDL test riêng)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scale', choices=sorted(benchmarks.SCALES), default='1k', help="Quy mô dữ liệu.")
+        parser.add_argument('--concurrency', type=int, action='append',
+                            help="Số client đồng thời (lặp lại để đo nhiều mức; mặc định READ_LOADTEST['CONCURRENCY']).")
+        parser.add_argument('--requests', type=int, default=None, help="Số request mỗi mức, mỗi đường.")
+        parser.add_argument('--threads', type=int, default=None, help="Số thread của server WSGI.")
+        parser.add_argument('--db-latency', type=float, default=None,
+                            help="Độ trễ cộng thêm vào mỗi câu SQL (ms), mô phỏng CSDL ở máy khác.")
+        parser.add_argument('--slo', type=float, default=None, help="Ngưỡng p95 (ms) để tính headroom.")
+        parser.add_argument('--keepdb', action='store_true', help="Giữ CSDL test (và dữ liệu đã sinh) cho lần chạy sau.")
+
+    def handle(self, *args, **options):
+        for name in ('requests', 'threads'):
+            if options[name] is not None and options[name] <= 0:
+                raise CommandError(f"--{name} phải lớn hơn 0.")
+        if any(level <= 0 for level in options['concurrency'] or ()):
+            raise CommandError("--concurrency phải lớn hơn 0.")
+        runner = DiscoverRunner(interactive=False, keepdb=options['keepdb'], verbosity=0)
+        runner.setup_test_environment()
+        old_config = runner.setup_databases()
+        try:
+            self.stdout.write(f"Quy mô {options['scale']}: chuẩn bị dữ liệu...")
+            if benchmarks.ensure_dataset(benchmarks.SCALES[options['scale']], stdout=self.stdout):
+                self.stdout.write("  đã sinh lại dữ liệu 'bench'.")
+            report = loadtest.run(
+                concurrency=options['concurrency'], requests=options['requests'], threads=options['threads'],
+                db_latency_ms=options['db_latency'], slo_ms=options['slo'], stdout=self.stdout,
+            )
+        finally:
+            runner.teardown_databases(old_config)
+            runner.teardown_test_environment()
+        report['scale'] = options['scale']
+        path = benchmarks.report_path('loadtest', options['scale'])
+        benchmarks.write_report(report, path)
+        self.stdout.write(f"Đã ghi báo cáo {path}")
+        self._summary(report)
+
+    def _summary(self, report):
+        wsgi, asgi = report['results']['wsgi'], report['results']['asgi']
+        for sync_level, async_level in zip(wsgi, asgi):
+            ratio = async_level['rps'] / sync_level['rps'] if sync_level['rps'] else 0.0
+            self.stdout.write(
+                f"  c={sync_level['concurrency']:<4} async/sync: {ratio:5.2f}x req/s, "
+                f"p95 {sync_level['p95_ms']:.1f} -> {async_level['p95_ms']:.1f} ms"
+            )
+        self.stdout.write(self.style.SUCCESS(
+            f"Headroom (p95 <= {report['slo_ms']:g} ms, không lỗi): WSGI {report['threads']} thread: "
+            f"{report['headroom']['wsgi']} client, ASGI: {report['headroom']['asgi']} client"
+        ))
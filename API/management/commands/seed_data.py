@@ -0,0 +1,308 @@
+import io
+import random
+import time
+from datetime import datetime, timedelta, timezone as dt_timezone
+from itertools import accumulate
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from API import autocomplete, membership, retention, stats
+from API.models import ActivityLog, Attachment, Comment, Project, Task, User
+
+
+# Sinh dữ liệu giả lập quy mô lớn để đo hiệu năng:
+# - Tất định: cùng --seed và cùng tham số thì cùng nội dung (id có thể khác tùy dữ liệu sẵn có),
+#   mốc thời gian tính từ --start chứ không phải thời điểm chạy.
+# - Phân bố lệch như dữ liệu thật: số thành viên mỗi dự án theo Pareto, user "nổi tiếng" tham gia nhiều dự án,
+#   số task mỗi dự án và người được giao trong dự án theo Zipf, bình luận/đính kèm/nhật ký dồn vào task "nóng".
+# - Ghi thẳng bằng SQL theo lô --chunk-size dòng: PostgreSQL dùng COPY, CSDL khác executemany.
+#   Không qua model.save()/bulk_create nên giữ được created_at/updated_at lịch sử và không phát signal
+#   (cache thành viên, autocomplete, thống kê được làm mới ở cuối lệnh).
+# - User sinh ra có username <prefix><số> và cùng mật khẩu --password; --clear xóa dữ liệu của lần seed trước.
+
+VERBS = ['Sửa', 'Thêm', 'Cập nhật', 'Kiểm tra', 'Tối ưu', 'Viết', 'Thiết kế', 'Review', 'Triển khai', 'Dọn dẹp']
+NOUNS = [
+    'trang đăng nhập', 'API công việc', 'báo cáo tuần', 'giao diện dashboard', 'truy vấn thống kê',
+    'tài liệu hướng dẫn', 'kiểm thử tích hợp', 'quyền thành viên', 'thông báo email', 'bộ lọc tìm kiếm',
+]
+FIRST_NAMES = ['An', 'Bình', 'Chi', 'Dũng', 'Giang', 'Hà', 'Hải', 'Hương', 'Khánh', 'Lan', 'Minh', 'Nam',
+               'Ngọc', 'Phương', 'Quân', 'Sơn', 'Thảo', 'Trang', 'Tuấn', 'Vy']
+LAST_NAMES = ['Nguyễn', 'Trần', 'Lê', 'Phạm', 'Hoàng', 'Huỳnh', 'Phan', 'Vũ', 'Võ', 'Đặng', 'Bùi', 'Đỗ']
+COMMENTS = ['Đã xem, ổn.', 'Cần thêm thông tin.', 'Mình nhận việc này.', 'Đã sửa, nhờ kiểm tra lại.',
+            'Bị chặn bởi task khác.', 'Xong phần backend.']
+ACTIONS = ['đã cập nhật trạng thái', 'đã đổi người được giao', 'đã sửa mô tả', 'đã đổi hạn chót',
+           'đã bình luận', 'đã đính kèm tệp']
+
+STATUSES = [(Task.Status.DONE, 50), (Task.Status.TODO, 30), (Task.Status.IN_PROGRESS, 20)]
+PRIORITIES = [(Task.Priority.MEDIUM, 55), (Task.Priority.LOW, 25), (Task.Priority.HIGH, 20)]
+
+
+def _zipf_weights(count, exponent):
+    return list(accumulate(1 / (rank + 1) ** exponent for rank in range(count)))
+
+
+def _weighted(choices):
+    values = [value for value, weight in choices]
+    return values, list(accumulate(weight for value, weight in choices))
+
+
+class _Writer:
+    """
+    Chèn dòng thô vào bảng của model: COPY trên PostgreSQL, executemany trên CSDL khác.
+    """
+    def __init__(self, conn):
+        self.connection = conn
+        self.postgres = conn.vendor == 'postgresql'
+
+    def reserve_ids(self, model, count):
+        table = model._meta.db_table
+        with self.connection.cursor() as cursor:
+            if self.postgres:
+                # Lấy id từ sequence: an toàn khi có tiến trình khác cùng ghi
+                cursor.execute(
+                    'SELECT nextval(pg_get_serial_sequence(%s, %s)) FROM generate_series(1, %s)',
+                    [self.connection.ops.quote_name(table), model._meta.pk.column, count],
+                )
+                return [row[0] for row in cursor.fetchall()]
+            cursor.execute(f'SELECT COALESCE(MAX({self.connection.ops.quote_name(model._meta.pk.column)}), 0) '
+                           f'FROM {self.connection.ops.quote_name(table)}')
+            start = cursor.fetchone()[0] + 1
+        return list(range(start, start + count))
+
+    def insert(self, model, fields, rows):
+        if not rows:
+            return
+        qn = self.connection.ops.quote_name
+        columns = [model._meta.get_field(name).column for name in fields]
+        table = qn(model._meta.db_table)
+        with self.connection.cursor() as cursor:
+            if self.postgres:
+                buffer = io.StringIO()
+                for row in rows:
+                    buffer.write('\t'.join(self._copy_value(value) for value in row))
+                    buffer.write('\n')
+                buffer.seek(0)
+                cursor.cursor.copy_expert(
+                    f"COPY {table} ({', '.join(qn(column) for column in columns)}) FROM STDIN", buffer,
+                )
+                return
+            adapt = self.connection.ops.adapt_datetimefield_value
+            rows = [tuple(adapt(value) if isinstance(value, datetime) else value for value in row) for row in rows]
+            cursor.executemany(
+                f"INSERT INTO {table} ({', '.join(qn(column) for column in columns)}) "
+                f"VALUES ({', '.join(['%s'] * len(columns))})", rows,
+            )
+
+    @staticmethod
+    def _copy_value(value):
+        if value is None:
+            return '\\N'
+        if isinstance(value, str):
+            if value.isprintable() and '\\' not in value:
+                return value
+            return value.replace('\\', '\\\\').replace('\t', '\\t').replace('\n', '\\n').replace('\r', '\\r')
+        return str(value)
+
+
+class Command(BaseCommand):
+    help = (
+        "Sinh dữ liệu giả lập tất định (user, dự án, task, bình luận, đính kèm, nhật ký) với phân bố lệch, "
+        "vd: --users 10000 --projects 1000 --tasks 1000000."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--projects', type=int, default=100)
+        parser.add_argument('--tasks', type=int, default=100000)
+        parser.add_argument('--comments-per-task', type=float, default=1.0)
+        parser.add_argument('--attachments-per-task', type=float, default=0.1)
+        parser.add_argument('--activity-per-task', type=float, default=2.0)
+        parser.add_argument('--max-members', type=int, default=500, help="số thành viên tối đa mỗi dự án")
+        parser.add_argument('--start', default='2025-01-01', help="ngày bắt đầu của dữ liệu (YYYY-MM-DD)")
+        parser.add_argument('--days', type=int, default=365, help="số ngày dữ liệu trải ra kể từ --start")
+        parser.add_argument('--chunk-size', type=int, default=20000)
+        parser.add_argument('--prefix', default='seed', help="tiền tố username của user sinh ra")
+        parser.add_argument('--password', default='password123')
+        parser.add_argument('--clear', action='store_true', help="xóa dữ liệu của lần seed trước (cùng --prefix)")
+
+    def handle(self, *args, **options):
+        if min(options['users'], options['projects'], options['chunk_size']) <= 0 or options['tasks'] < 0:
+            raise CommandError("--users, --projects, --chunk-size phải lớn hơn 0 và --tasks không âm.")
+        try:
+            self.start = datetime.strptime(options['start'], '%Y-%m-%d').replace(tzinfo=dt_timezone.utc)
+        except ValueError:
+            raise CommandError("--start phải có dạng YYYY-MM-DD.")
+        self.span = timedelta(days=max(options['days'], 1)).total_seconds()
+        self.rng = random.Random(options['seed'])
+        self.options = options
+        self.writer = _Writer(connection)
+
+        seeded = User.objects.filter(username__startswith=options['prefix'])
+        if options['clear']:
+            self._clear(seeded)
+        elif seeded.exists():
+            raise CommandError(f"Đã có user '{options['prefix']}...' từ lần seed trước: thêm --clear hoặc đổi --prefix.")
+
+        started = time.perf_counter()
+        with transaction.atomic():
+            self._ensure_partitions()
+            users = self._phase('users', self._users)
+            projects = self._phase('projects', lambda: self._projects(users))
+            self._phase('tasks', lambda: self._tasks(projects))
+
+        # Dữ liệu ghi thẳng bằng SQL không phát signal: làm mới các cache phụ thuộc
+        membership.clear()
+        autocomplete.clear()
+        if stats.is_cached():
+            for project_id, members, weights in projects:
+                stats.invalidate(project_id)
+        self.stdout.write(self.style.SUCCESS(f"Hoàn tất sau {time.perf_counter() - started:.1f}s."))
+
+    def _phase(self, name, run):
+        started = time.perf_counter()
+        result = run()
+        self.stdout.write(f"{name:<9} {time.perf_counter() - started:8.1f}s")
+        return result
+
+    def _report(self, counts, started):
+        elapsed = time.perf_counter() - started
+        total = sum(counts.values())
+        self.stdout.write('  ' + ', '.join(f'{name}: {count}' for name, count in counts.items())
+                          + f" ({total / elapsed if elapsed else 0:.0f} dòng/s)")
+
+    def _moment(self, after=None):
+        # Thời điểm ngẫu nhiên trong khoảng dữ liệu (sau `after` nếu có)
+        low = (after - self.start).total_seconds() if after else 0
+        return self.start + timedelta(seconds=int(self.rng.uniform(low, self.span)))
+
+    def _ensure_partitions(self):
+        # Nhật ký có timestamp trong quá khứ: tạo sẵn phân vùng tháng cho cả khoảng dữ liệu (PostgreSQL)
+        if not retention.is_partitioned():
+            return
+        month = retention.month_start(self.start)
+        end = self.start + timedelta(seconds=self.span)
+        while month <= end:
+            retention.ensure_partition(month)
+            month = retention.next_month(month)
+
+    def _users(self):
+        started = time.perf_counter()
+        count, prefix, rng = self.options['users'], self.options['prefix'], self.rng
+        password = make_password(self.options['password'])
+        ids = self.writer.reserve_ids(User, count)
+        rows = []
+        for index, pk in enumerate(ids):
+            first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+            joined = self._moment()
+            rows.append((pk, password, False, f'{prefix}{index:06d}', first, last,
+                         f'{prefix}{index:06d}@example.com', False, True, joined))
+        fields = ['id', 'password', 'is_superuser', 'username', 'first_name', 'last_name',
+                  'email', 'is_staff', 'is_active', 'date_joined']
+        for offset in range(0, len(rows), self.options['chunk_size']):
+            self.writer.insert(User, fields, rows[offset:offset + self.options['chunk_size']])
+        self._report({'users': count}, started)
+        # User xếp theo độ "nổi tiếng": user đầu danh sách tham gia nhiều dự án hơn
+        return ids
+
+    def _projects(self, users):
+        started = time.perf_counter()
+        rng, count = self.rng, self.options['projects']
+        popularity = _zipf_weights(len(users), 0.8)
+        ids = self.writer.reserve_ids(Project, count)
+        rows, links, projects = [], [], []
+        for index, pk in enumerate(ids):
+            size = min(len(users), self.options['max_members'], max(1, int(rng.paretovariate(1.2) * 3)))
+            members = list(dict.fromkeys(rng.choices(users, cum_weights=popularity, k=size * 2)))[:size]
+            created = self._moment()
+            rows.append((pk, f'{rng.choice(NOUNS).capitalize()} {index}', f'Dự án mẫu số {index}',
+                         created, self._moment(created), members[0]))
+            links += [(pk, user) for user in members]
+            # Trong dự án, người được giao lệch về vài thành viên chủ chốt
+            projects.append((pk, members, _zipf_weights(len(members), 1.1)))
+        self.writer.insert(Project, ['id', 'name', 'description', 'created_at', 'updated_at', 'owner'], rows)
+        through = Project.members.through
+        for offset in range(0, len(links), self.options['chunk_size']):
+            self.writer.insert(through, ['project', 'user'], links[offset:offset + self.options['chunk_size']])
+        self._report({'projects': count, 'memberships': len(links)}, started)
+        return projects
+
+    def _tasks(self, projects):
+        rng, options = self.rng, self.options
+        started = time.perf_counter()
+        project_weights = _zipf_weights(len(projects), 1.1)
+        statuses, status_weights = _weighted(STATUSES)
+        priorities, priority_weights = _weighted(PRIORITIES)
+        totals = dict.fromkeys(['tasks', 'comments', 'attachments', 'activity'], 0)
+
+        for offset in range(0, options['tasks'], options['chunk_size']):
+            count = min(options['chunk_size'], options['tasks'] - offset)
+            ids = self.writer.reserve_ids(Task, count)
+            picked = rng.choices(projects, cum_weights=project_weights, k=count)
+            rows, tasks = [], []
+            for number, (pk, (project_id, members, weights)) in enumerate(zip(ids, picked), start=offset):
+                assignee = rng.choices(members, cum_weights=weights)[0] if rng.random() < 0.85 else None
+                created = self._moment()
+                due = created + timedelta(days=rng.randint(1, 60)) if rng.random() < 0.7 else None
+                rows.append((
+                    pk, f'{rng.choice(VERBS)} {rng.choice(NOUNS)} #{number}',
+                    f'Mô tả chi tiết cho công việc #{number}.' if rng.random() < 0.6 else None,
+                    rng.choices(statuses, cum_weights=status_weights)[0],
+                    rng.choices(priorities, cum_weights=priority_weights)[0],
+                    due, project_id, assignee, created, self._moment(created),
+                ))
+                tasks.append((pk, project_id, members, weights, created))
+            self.writer.insert(Task, ['id', 'title', 'description', 'status', 'priority', 'due_date', 'project',
+                                      'assignee', 'created_at', 'updated_at'], rows)
+            totals['tasks'] += count
+
+            # Bình luận/đính kèm/nhật ký dồn vào một số task "nóng"
+            hotness = list(accumulate(rng.paretovariate(1.5) for _ in tasks))
+            totals['comments'] += self._children(Comment, tasks, hotness, options['comments_per_task'],
+                                                 ['task', 'author', 'body', 'created_at', 'updated_at'],
+                                                 lambda task, author, at: (rng.choice(COMMENTS), at, at))
+            totals['attachments'] += self._children(
+                Attachment, tasks, hotness, options['attachments_per_task'],
+                ['task', 'uploader', 'file', 'filename', 'thumbnail', 'description', 'uploaded_at'],
+                lambda task, author, at: (f'attachments/seed/{task[0]}.txt', f'tep-{task[0]}.txt', '', None, at),
+            )
+            totals['activity'] += self._children(
+                ActivityLog, tasks, hotness, options['activity_per_task'],
+                ['task', 'actor', 'action_description', 'timestamp', 'project'],
+                lambda task, author, at: (f'{rng.choice(ACTIONS)} #{task[0]}', at, task[1]),
+            )
+        self._report(totals, started)
+
+    def _children(self, model, tasks, hotness, per_task, fields, values):
+        rng = self.rng
+        count = round(len(tasks) * per_task)
+        rows = []
+        for task in rng.choices(tasks, cum_weights=hotness, k=count):
+            pk, project_id, members, weights, created = task
+            author = rng.choices(members, cum_weights=weights)[0]
+            rows.append((pk, author, *values(task, author, self._moment(created))))
+        self.writer.insert(model, fields, rows)
+        return count
+
+    def _clear(self, seeded):
+        # Xóa thẳng bằng SQL theo thứ tự phụ thuộc (Collector của Django sẽ nạp từng dòng vào bộ nhớ)
+        started = time.perf_counter()
+        with transaction.atomic():
+            users = seeded.values('pk')
+            projects = Project.objects.filter(owner__in=users).values('pk')
+            tasks = Task.objects.filter(project__in=projects).values('pk')
+            for queryset in (
+                ActivityLog.objects.filter(project__in=projects),
+                ActivityLog.objects.filter(task__in=tasks),
+                Attachment.objects.filter(task__in=tasks),
+                Comment.objects.filter(task__in=tasks),
+                Task.objects.filter(project__in=projects),
+                Project.members.through.objects.filter(project__in=projects),
+                Project.objects.filter(pk__in=projects),
+            ):
+                queryset._raw_delete(queryset.db)
+            # User seed có thể còn được tham chiếu ở dữ liệu thật (vd: được thêm vào dự án khác): để CASCADE/SET_NULL xử lý
+            seeded.delete()
+        self.stdout.write(f"Đã xóa dữ liệu seed cũ sau {time.perf_counter() - started:.1f}s.")
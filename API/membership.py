@@ -0,0 +1,189 @@
+import threading
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import DEFAULT_DB_ALIAS
+from django.db.models import Q
+
+from . import perf
+from .caching import TTLCache
+from .models import Project
+
+
+# Tầng phân giải quyền thành viên dự án: "user U có phải owner/member của project P?"
+# - Tra cứu DB đúng một lần qua index (unique (project_id, user_id) của bảng members).
+# - Kết quả được cache trong tiến trình (LRU + TTL) và tùy chọn trong Django cache.
+# - Bị vô hiệu hóa qua signals (xem signals.py) mỗi khi danh sách thành viên thay đổi: thế hệ (generation) của
+#   dự án tăng lên (lưu trong Django cache ở chế độ dùng chung) nên entry cũ ở mọi worker đều hết hiệu lực.
+#   Thế hệ chỉ đổi sau khi transaction commit; khóa cache lấy thế hệ trước khi tra CSDL nên kết quả đọc
+#   trước commit chỉ nằm dưới thế hệ cũ.
+# - USE_DJANGO_CACHE=False: thế hệ chỉ nằm trong bộ nhớ tiến trình, worker khác vẫn dùng entry cũ tới hết TTL.
+#   Chạy nhiều worker thì bật USE_DJANGO_CACHE với cache dùng chung (Redis/Memcached).
+# - Kết quả đưa vào cache luôn đọc từ primary: bản sao (replicas.py) còn trễ sau add/remove_member sẽ
+#   cho kết quả cũ nằm trong cache tới hết TTL.
+
+DEFAULTS = {
+    'MAX_ENTRIES': 10000,
+    'TTL': 60,
+    'USE_DJANGO_CACHE': False,
+    'CACHE_ALIAS': 'default',
+}
+
+
+def _config():
+    return {**DEFAULTS, **getattr(settings, 'PROJECT_MEMBERSHIP_CACHE', {})}
+
+
+_config_at_import = _config()
+_local = TTLCache(max_entries=_config_at_import['MAX_ENTRIES'], ttl=_config_at_import['TTL'])
+# Thế hệ (generation) của từng dự án: tăng lên để bỏ toàn bộ entry cũ của dự án đó
+_generations = {}
+_generations_lock = threading.Lock()
+
+
+def _shared_cache(config):
+    if not config['USE_DJANGO_CACHE']:
+        return None
+    return caches[config['CACHE_ALIAS']]
+
+
+def _generation(project_id, shared):
+    if shared is not None:
+        return shared.get(f'membership:gen:{project_id}', 0)
+    return _generations.get(project_id, 0)
+
+
+def _key(project_id, user_id, generation):
+    return f'membership:{project_id}:{generation}:{user_id}'
+
+
+def _query(user_id, project):
+    known = _known(user_id, project)
+    return known if known is not None else _membership_queryset(user_id, project).exists()
+
+
+async def _aquery(user_id, project):
+    known = _known(user_id, project)
+    return known if known is not None else await _membership_queryset(user_id, project).aexists()
+
+
+# Trượt cache: (kết quả, có được cache không); tra CSDL thì đọc từ primary, members đã prefetch từ bản sao
+# thì chỉ dùng cho request hiện tại
+def _fill(user_id, project):
+    known = _known(user_id, project)
+    if known is not None:
+        return known, project._state.db == DEFAULT_DB_ALIAS
+    return _membership_queryset(user_id, project).using(DEFAULT_DB_ALIAS).exists(), True
+
+
+async def _afill(user_id, project):
+    known = _known(user_id, project)
+    if known is not None:
+        return known, project._state.db == DEFAULT_DB_ALIAS
+    return await _membership_queryset(user_id, project).using(DEFAULT_DB_ALIAS).aexists(), True
+
+
+def _known(user_id, project):
+    # Đã prefetch members (vd: ProjectDetailView) thì không cần query thêm
+    if isinstance(project, Project):
+        if project.owner_id == user_id:
+            return True
+        prefetched = getattr(project, '_prefetched_objects_cache', {}).get('members')
+        if prefetched is not None:
+            return any(member.pk == user_id for member in prefetched)
+    return None
+
+
+def _membership_queryset(user_id, project):
+    if isinstance(project, Project):
+        return Project.members.through.objects.filter(project_id=project.pk, user_id=user_id)
+    return Project.objects.filter(pk=project).filter(Q(owner_id=user_id) | Q(members__id=user_id))
+
+
+def is_project_member(user, project, use_cache=True):
+    """
+    True nếu `user` là owner hoặc member của `project` (instance Project hoặc id).
+    """
+    # Tính vào phần 'perm' của Server-Timing (API/perf.py)
+    with perf.timed('perm'):
+        return _is_member(user, project, use_cache)
+
+
+async def ais_project_member(user, project, use_cache=True):
+    """
+    is_project_member cho view async: cache như bản đồng bộ, trượt cache thì hỏi CSDL bằng async ORM.
+    """
+    with perf.timed('perm'):
+        user_id = getattr(user, 'pk', None)
+        if user_id is None:
+            return False
+        if isinstance(project, Project) and project.owner_id == user_id:
+            return True
+        if not use_cache:
+            return await _aquery(user_id, project)
+        key, result = _cached(user_id, project)
+        if result is None:
+            result, cacheable = await _afill(user_id, project)
+            if cacheable:
+                _remember(key, result)
+        return result
+
+
+def _is_member(user, project, use_cache):
+    user_id = getattr(user, 'pk', None)
+    if user_id is None:
+        return False
+    if isinstance(project, Project) and project.owner_id == user_id:
+        return True
+    if not use_cache:
+        return _query(user_id, project)
+    key, result = _cached(user_id, project)
+    if result is None:
+        result, cacheable = _fill(user_id, project)
+        if cacheable:
+            _remember(key, result)
+    return result
+
+
+def _cached(user_id, project):
+    # (khóa cache, kết quả đã cache hoặc None)
+    project_id = project.pk if isinstance(project, Project) else int(project)
+    shared = _shared_cache(_config())
+    key = _key(project_id, user_id, _generation(project_id, shared))
+    result = _local.get(key)
+    if result is None and shared is not None:
+        result = shared.get(key)
+        if result is not None:
+            _local.set(key, result)
+    return key, result
+
+
+def _remember(key, result):
+    config = _config()
+    _local.set(key, result)
+    shared = _shared_cache(config)
+    if shared is not None:
+        shared.set(key, result, config['TTL'])
+
+
+def invalidate_membership(project_id, user_id):
+    # Worker khác có thể đã chép kết quả cũ vào bộ nhớ của nó (_local): xóa khóa ở đây không tới được,
+    # nên đổi thế hệ của cả dự án (thay đổi thành viên hiếm, các entry khác của dự án chỉ phải tra lại)
+    invalidate_project(project_id)
+
+
+def invalidate_project(project_id):
+    config = _config()
+    shared = _shared_cache(config)
+    with _generations_lock:
+        _generations[project_id] = _generations.get(project_id, 0) + 1
+    if shared is not None:
+        gen_key = f'membership:gen:{project_id}'
+        shared.add(gen_key, 0, None)
+        shared.incr(gen_key)
+
+
+def clear():
+    _local.clear()
+    with _generations_lock:
+        _generations.clear()
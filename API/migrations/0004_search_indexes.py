@@ -0,0 +1,139 @@
+from django.db import migrations
+
+# Tìm kiếm toàn văn (xem API/search.py). SQL được chép cố định vào đây thay vì gọi code của app:
+# migration phải cho cùng một lược đồ dù API/search.py sau này có đổi.
+
+POSTGRESQL_INSTALL = [
+    'ALTER TABLE "API_task" ADD COLUMN IF NOT EXISTS "search_vector" tsvector GENERATED ALWAYS AS ('
+    "setweight(to_tsvector('simple', coalesce(\"title\", '')), 'A') || "
+    "setweight(to_tsvector('simple', coalesce(\"description\", '')), 'B')) STORED",
+    'CREATE INDEX IF NOT EXISTS "API_task_search_gin" ON "API_task" USING GIN ("search_vector")',
+    'ALTER TABLE "API_project" ADD COLUMN IF NOT EXISTS "search_vector" tsvector GENERATED ALWAYS AS ('
+    "setweight(to_tsvector('simple', coalesce(\"name\", '')), 'A') || "
+    "setweight(to_tsvector('simple', coalesce(\"description\", '')), 'B')) STORED",
+    'CREATE INDEX IF NOT EXISTS "API_project_search_gin" ON "API_project" USING GIN ("search_vector")',
+    'ALTER TABLE "API_user" ADD COLUMN IF NOT EXISTS "search_vector" tsvector GENERATED ALWAYS AS ('
+    "setweight(to_tsvector('simple', coalesce(\"username\", '')), 'A') || "
+    "setweight(to_tsvector('simple', coalesce(\"email\", '')), 'A') || "
+    "setweight(to_tsvector('simple', coalesce(\"first_name\", '')), 'B') || "
+    "setweight(to_tsvector('simple', coalesce(\"last_name\", '')), 'B')) STORED",
+    'CREATE INDEX IF NOT EXISTS "API_user_search_gin" ON "API_user" USING GIN ("search_vector")',
+]
+
+# Index trigram khớp đúng biểu thức Django sinh cho __icontains: UPPER(col::text) LIKE UPPER(...)
+POSTGRESQL_TRIGRAM = [
+    'CREATE EXTENSION IF NOT EXISTS pg_trgm',
+    'CREATE INDEX IF NOT EXISTS "API_task_title_trgm" ON "API_task" USING GIN ((UPPER("title"::text)) gin_trgm_ops)',
+    'CREATE INDEX IF NOT EXISTS "API_project_name_trgm" ON "API_project" USING GIN ((UPPER("name"::text)) gin_trgm_ops)',
+    'CREATE INDEX IF NOT EXISTS "API_user_username_trgm" ON "API_user" '
+    'USING GIN ((UPPER("username"::text)) gin_trgm_ops)',
+    'CREATE INDEX IF NOT EXISTS "API_user_email_trgm" ON "API_user" USING GIN ((UPPER("email"::text)) gin_trgm_ops)',
+]
+
+POSTGRESQL_UNINSTALL = [
+    'DROP INDEX IF EXISTS "API_task_title_trgm"',
+    'DROP INDEX IF EXISTS "API_task_search_gin"',
+    'ALTER TABLE "API_task" DROP COLUMN IF EXISTS "search_vector"',
+    'DROP INDEX IF EXISTS "API_project_name_trgm"',
+    'DROP INDEX IF EXISTS "API_project_search_gin"',
+    'ALTER TABLE "API_project" DROP COLUMN IF EXISTS "search_vector"',
+    'DROP INDEX IF EXISTS "API_user_username_trgm"',
+    'DROP INDEX IF EXISTS "API_user_email_trgm"',
+    'DROP INDEX IF EXISTS "API_user_search_gin"',
+    'ALTER TABLE "API_user" DROP COLUMN IF EXISTS "search_vector"',
+]
+
+# Bảng ảo FTS5 (external content) đồng bộ bằng trigger
+SQLITE_INSTALL = [
+    'CREATE VIRTUAL TABLE IF NOT EXISTS "API_task_fts" USING fts5("title", "description", content="API_task", '
+    "content_rowid='id', tokenize='unicode61 remove_diacritics 2')",
+    'INSERT INTO "API_task_fts"("API_task_fts") VALUES (\'rebuild\')',
+    'CREATE TRIGGER IF NOT EXISTS "API_task_fts_ai" AFTER INSERT ON "API_task" BEGIN '
+    'INSERT INTO "API_task_fts"(rowid, "title", "description") VALUES (new.id, new."title", new."description"); END',
+    'CREATE TRIGGER IF NOT EXISTS "API_task_fts_ad" AFTER DELETE ON "API_task" BEGIN '
+    'INSERT INTO "API_task_fts"("API_task_fts", rowid, "title", "description") '
+    'VALUES (\'delete\', old.id, old."title", old."description"); END',
+    'CREATE TRIGGER IF NOT EXISTS "API_task_fts_au" AFTER UPDATE ON "API_task" BEGIN '
+    'INSERT INTO "API_task_fts"("API_task_fts", rowid, "title", "description") '
+    'VALUES (\'delete\', old.id, old."title", old."description"); '
+    'INSERT INTO "API_task_fts"(rowid, "title", "description") VALUES (new.id, new."title", new."description"); END',
+
+    'CREATE VIRTUAL TABLE IF NOT EXISTS "API_project_fts" USING fts5("name", "description", content="API_project", '
+    "content_rowid='id', tokenize='unicode61 remove_diacritics 2')",
+    'INSERT INTO "API_project_fts"("API_project_fts") VALUES (\'rebuild\')',
+    'CREATE TRIGGER IF NOT EXISTS "API_project_fts_ai" AFTER INSERT ON "API_project" BEGIN '
+    'INSERT INTO "API_project_fts"(rowid, "name", "description") VALUES (new.id, new."name", new."description"); END',
+    'CREATE TRIGGER IF NOT EXISTS "API_project_fts_ad" AFTER DELETE ON "API_project" BEGIN '
+    'INSERT INTO "API_project_fts"("API_project_fts", rowid, "name", "description") '
+    'VALUES (\'delete\', old.id, old."name", old."description"); END',
+    'CREATE TRIGGER IF NOT EXISTS "API_project_fts_au" AFTER UPDATE ON "API_project" BEGIN '
+    'INSERT INTO "API_project_fts"("API_project_fts", rowid, "name", "description") '
+    'VALUES (\'delete\', old.id, old."name", old."description"); '
+    'INSERT INTO "API_project_fts"(rowid, "name", "description") VALUES (new.id, new."name", new."description"); END',
+
+    'CREATE VIRTUAL TABLE IF NOT EXISTS "API_user_fts" USING fts5("username", "email", "first_name", "last_name", '
+    "content=\"API_user\", content_rowid='id', tokenize='unicode61 remove_diacritics 2')",
+    'INSERT INTO "API_user_fts"("API_user_fts") VALUES (\'rebuild\')',
+    'CREATE TRIGGER IF NOT EXISTS "API_user_fts_ai" AFTER INSERT ON "API_user" BEGIN '
+    'INSERT INTO "API_user_fts"(rowid, "username", "email", "first_name", "last_name") '
+    'VALUES (new.id, new."username", new."email", new."first_name", new."last_name"); END',
+    'CREATE TRIGGER IF NOT EXISTS "API_user_fts_ad" AFTER DELETE ON "API_user" BEGIN '
+    'INSERT INTO "API_user_fts"("API_user_fts", rowid, "username", "email", "first_name", "last_name") '
+    'VALUES (\'delete\', old.id, old."username", old."email", old."first_name", old."last_name"); END',
+    'CREATE TRIGGER IF NOT EXISTS "API_user_fts_au" AFTER UPDATE ON "API_user" BEGIN '
+    'INSERT INTO "API_user_fts"("API_user_fts", rowid, "username", "email", "first_name", "last_name") '
+    'VALUES (\'delete\', old.id, old."username", old."email", old."first_name", old."last_name"); '
+    'INSERT INTO "API_user_fts"(rowid, "username", "email", "first_name", "last_name") '
+    'VALUES (new.id, new."username", new."email", new."first_name", new."last_name"); END',
+]
+
+SQLITE_UNINSTALL = [
+    'DROP TRIGGER IF EXISTS "API_task_fts_ai"',
+    'DROP TRIGGER IF EXISTS "API_task_fts_ad"',
+    'DROP TRIGGER IF EXISTS "API_task_fts_au"',
+    'DROP TABLE IF EXISTS "API_task_fts"',
+    'DROP TRIGGER IF EXISTS "API_project_fts_ai"',
+    'DROP TRIGGER IF EXISTS "API_project_fts_ad"',
+    'DROP TRIGGER IF EXISTS "API_project_fts_au"',
+    'DROP TABLE IF EXISTS "API_project_fts"',
+    'DROP TRIGGER IF EXISTS "API_user_fts_ai"',
+    'DROP TRIGGER IF EXISTS "API_user_fts_ad"',
+    'DROP TRIGGER IF EXISTS "API_user_fts_au"',
+    'DROP TABLE IF EXISTS "API_user_fts"',
+]
+
+
+# pg_trgm là extension contrib, có bản cài PostgreSQL không kèm: khi đó chỉ dùng tsvector
+def _trigram_available(schema_editor):
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute("SELECT 1 FROM pg_available_extensions WHERE name = 'pg_trgm'")
+        return cursor.fetchone() is not None
+
+
+def install(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        statements = POSTGRESQL_INSTALL + (POSTGRESQL_TRIGRAM if _trigram_available(schema_editor) else [])
+    elif vendor == 'sqlite':
+        statements = SQLITE_INSTALL
+    else:
+        return
+    for sql in statements:
+        schema_editor.execute(sql)
+
+
+def uninstall(apps, schema_editor):
+    statements = {'postgresql': POSTGRESQL_UNINSTALL, 'sqlite': SQLITE_UNINSTALL}
+    for sql in statements.get(schema_editor.connection.vendor, []):
+        schema_editor.execute(sql)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('API', '0003_activitylog_timestamp_default'),
+    ]
+
+    operations = [
+        migrations.RunPython(install, uninstall),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.7 on 2026-10-18 17:11
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('API', '0006_chunked_uploads'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='attachment',
+            name='thumbnail',
+            field=models.FileField(blank=True, max_length=255, upload_to='', verbose_name='Ảnh thu nhỏ'),
+        ),
+    ]
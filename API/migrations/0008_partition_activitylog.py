@@ -0,0 +1,100 @@
+# Generated by Django 5.2.7 on 2026-10-18 18:02
+
+from django.db import migrations
+
+# Chuyển API_activitylog thành bảng phân vùng theo tháng (xem API/retention.py). SQL chép cố định vào
+# đây, không gọi code của app; kết quả chỉ phụ thuộc dữ liệu đang có (không phụ thuộc giờ chạy hay settings):
+# - Khóa chính thành (id, timestamp) vì PostgreSQL yêu cầu khóa phân vùng nằm trong khóa chính;
+#   id vẫn duy nhất nhờ sequence.
+# - Mỗi tháng đã có dữ liệu một phân vùng, phần còn lại vào phân vùng DEFAULT. Phân vùng cho các tháng
+#   tới do lệnh create_activity_partitions tạo.
+
+TABLE = 'API_activitylog'
+DEFAULT_PARTITION = 'API_activitylog_default'
+
+
+def _table_definition(cursor, index_filter, params=()):
+    # (index, khóa ngoại) hiện có của bảng, để tạo lại sau khi thay bảng
+    cursor.execute(f"SELECT indexname, indexdef FROM pg_indexes WHERE tablename = %s AND {index_filter}", [TABLE, *params])
+    indexes = cursor.fetchall()
+    cursor.execute(
+        "SELECT conname, pg_get_constraintdef(oid) FROM pg_constraint WHERE conrelid = to_regclass(%s) AND contype = 'f'",
+        [f'"{TABLE}"'],
+    )
+    return indexes, cursor.fetchall()
+
+
+def _next_month(month):
+    return month.replace(year=month.year + 1, month=1) if month.month == 12 else month.replace(month=month.month + 1)
+
+
+def partition_activitylog(apps, schema_editor):
+    # Chỉ PostgreSQL hỗ trợ phân vùng khai báo; SQLite giữ bảng thường
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    with schema_editor.connection.cursor() as cursor:
+        indexes, foreign_keys = _table_definition(
+            cursor,
+            "indexname NOT IN (SELECT conname FROM pg_constraint WHERE conrelid = to_regclass(%s) AND contype IN ('p', 'u'))",
+            [f'"{TABLE}"'],
+        )
+        cursor.execute(f'SELECT coalesce(max(id), 0) FROM "{TABLE}"')
+        max_id = cursor.fetchone()[0]
+        cursor.execute(
+            f"SELECT DISTINCT date_trunc('month', timestamp AT TIME ZONE 'UTC')::date FROM \"{TABLE}\" ORDER BY 1"
+        )
+        months = [row[0] for row in cursor.fetchall()]
+
+    schema_editor.execute(
+        f'CREATE TABLE "{TABLE}_partitioned" (LIKE "{TABLE}" INCLUDING DEFAULTS, PRIMARY KEY (id, timestamp)) '
+        f'PARTITION BY RANGE (timestamp)'
+    )
+    schema_editor.execute(f'CREATE SEQUENCE "{TABLE}_id_seq_partitioned" START WITH {max_id + 1}')
+    schema_editor.execute(
+        f'ALTER TABLE "{TABLE}_partitioned" ALTER COLUMN id SET DEFAULT nextval(\'"{TABLE}_id_seq_partitioned"\')'
+    )
+    schema_editor.execute(f'CREATE TABLE "{DEFAULT_PARTITION}" PARTITION OF "{TABLE}_partitioned" DEFAULT')
+    for month in months:
+        schema_editor.execute(
+            f'CREATE TABLE "{TABLE}_p{month:%Y%m}" PARTITION OF "{TABLE}_partitioned" '
+            f"FOR VALUES FROM ('{month.isoformat()}T00:00:00+00:00') TO ('{_next_month(month).isoformat()}T00:00:00+00:00')"
+        )
+    schema_editor.execute(f'INSERT INTO "{TABLE}_partitioned" SELECT * FROM "{TABLE}"')
+    schema_editor.execute(f'DROP TABLE "{TABLE}"')
+    schema_editor.execute(f'ALTER TABLE "{TABLE}_partitioned" RENAME TO "{TABLE}"')
+    schema_editor.execute(f'ALTER SEQUENCE "{TABLE}_id_seq_partitioned" OWNED BY "{TABLE}".id')
+    for name, definition in indexes:
+        schema_editor.execute(definition)
+    for name, definition in foreign_keys:
+        schema_editor.execute(f'ALTER TABLE "{TABLE}" ADD CONSTRAINT "{name}" {definition}')
+
+
+def unpartition_activitylog(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    with schema_editor.connection.cursor() as cursor:
+        indexes, foreign_keys = _table_definition(cursor, 'indexname NOT LIKE %s', ['%pkey'])
+        cursor.execute(f'SELECT coalesce(max(id), 0) FROM "{TABLE}"')
+        max_id = cursor.fetchone()[0]
+    schema_editor.execute(f'CREATE TABLE "{TABLE}_plain" (LIKE "{TABLE}", PRIMARY KEY (id))')
+    schema_editor.execute(f'INSERT INTO "{TABLE}_plain" SELECT * FROM "{TABLE}"')
+    schema_editor.execute(f'DROP TABLE "{TABLE}" CASCADE')
+    schema_editor.execute(f'ALTER TABLE "{TABLE}_plain" RENAME TO "{TABLE}"')
+    schema_editor.execute(
+        f'ALTER TABLE "{TABLE}" ALTER COLUMN id ADD GENERATED BY DEFAULT AS IDENTITY (START WITH {max_id + 1})'
+    )
+    for name, definition in indexes:
+        schema_editor.execute(definition.replace(' ONLY ', ' '))
+    for name, definition in foreign_keys:
+        schema_editor.execute(f'ALTER TABLE "{TABLE}" ADD CONSTRAINT "{name}" {definition}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('API', '0007_attachment_thumbnail'),
+    ]
+
+    operations = [
+        migrations.RunPython(partition_activitylog, unpartition_activitylog),
+    ]
@@ -0,0 +1,42 @@
+from django.db import migrations
+
+# Index tiền tố cho autocomplete (xem API/search.py: prefix_match). SQL chép cố định vào đây để
+# migration không phụ thuộc code hiện tại của app.
+COLUMNS = ['username', 'first_name', 'last_name', 'email']
+
+INSTALL = {
+    # btree trên LOWER(cột) với text_pattern_ops, dùng được cho LOWER(cột) LIKE 'abc%'
+    'postgresql': [
+        f'CREATE INDEX IF NOT EXISTS "API_user_{column}_prefix" ON "API_user" (LOWER("{column}") text_pattern_ops)'
+        for column in COLUMNS
+    ],
+    # index biểu thức lower(cột); truy vấn dùng khoảng lower(cột) >= 'abc' AND < 'abd'
+    'sqlite': [
+        f'CREATE INDEX IF NOT EXISTS "API_user_{column}_prefix" ON "API_user" (lower("{column}"))'
+        for column in COLUMNS
+    ],
+}
+
+UNINSTALL = [f'DROP INDEX IF EXISTS "API_user_{column}_prefix"' for column in COLUMNS]
+
+
+def install(apps, schema_editor):
+    for sql in INSTALL.get(schema_editor.connection.vendor, []):
+        schema_editor.execute(sql)
+
+
+def uninstall(apps, schema_editor):
+    if schema_editor.connection.vendor in INSTALL:
+        for sql in UNINSTALL:
+            schema_editor.execute(sql)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('API', '0008_partition_activitylog'),
+    ]
+
+    operations = [
+        migrations.RunPython(install, uninstall),
+    ]
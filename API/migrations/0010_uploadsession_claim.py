@@ -0,0 +1,23 @@
+# Generated by Django 5.2.7 on 2026-10-18 18:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('API', '0009_user_prefix_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='uploadsession',
+            name='claimed_at',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Bắt đầu ghi lúc'),
+        ),
+        migrations.AddField(
+            model_name='uploadsession',
+            name='writer',
+            field=models.UUIDField(blank=True, editable=False, null=True, verbose_name='Mã request đang ghi'),
+        ),
+    ]
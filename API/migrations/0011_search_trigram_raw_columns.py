@@ -0,0 +1,58 @@
+from django.db import migrations
+
+# Index trigram của 0004 dựng trên UPPER(cột::text), trong khi search() so khớp `cột % term` và
+# similarity(cột, term) trên cột gốc: không index nào khớp, nhánh trigram (OR với tsvector) quét cả bảng.
+# Dựng lại trên cột gốc để PostgreSQL ghép được BitmapOr giữa index GIN tsvector và index trigram.
+# Chỉ áp dụng khi 0004 đã cài được pg_trgm.
+
+INSTALL = [
+    'DROP INDEX IF EXISTS "API_task_title_trgm"',
+    'DROP INDEX IF EXISTS "API_project_name_trgm"',
+    'DROP INDEX IF EXISTS "API_user_username_trgm"',
+    'DROP INDEX IF EXISTS "API_user_email_trgm"',
+    'CREATE INDEX IF NOT EXISTS "API_task_title_trgm" ON "API_task" USING GIN ("title" gin_trgm_ops)',
+    'CREATE INDEX IF NOT EXISTS "API_project_name_trgm" ON "API_project" USING GIN ("name" gin_trgm_ops)',
+    'CREATE INDEX IF NOT EXISTS "API_user_username_trgm" ON "API_user" USING GIN ("username" gin_trgm_ops)',
+]
+
+UNINSTALL = [
+    'DROP INDEX IF EXISTS "API_task_title_trgm"',
+    'DROP INDEX IF EXISTS "API_project_name_trgm"',
+    'DROP INDEX IF EXISTS "API_user_username_trgm"',
+    'CREATE INDEX IF NOT EXISTS "API_task_title_trgm" ON "API_task" USING GIN ((UPPER("title"::text)) gin_trgm_ops)',
+    'CREATE INDEX IF NOT EXISTS "API_project_name_trgm" ON "API_project" USING GIN ((UPPER("name"::text)) gin_trgm_ops)',
+    'CREATE INDEX IF NOT EXISTS "API_user_username_trgm" ON "API_user" '
+    'USING GIN ((UPPER("username"::text)) gin_trgm_ops)',
+    'CREATE INDEX IF NOT EXISTS "API_user_email_trgm" ON "API_user" USING GIN ((UPPER("email"::text)) gin_trgm_ops)',
+]
+
+
+def _trigram_installed(schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return False
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute("SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'")
+        return cursor.fetchone() is not None
+
+
+def install(apps, schema_editor):
+    if _trigram_installed(schema_editor):
+        for sql in INSTALL:
+            schema_editor.execute(sql)
+
+
+def uninstall(apps, schema_editor):
+    if _trigram_installed(schema_editor):
+        for sql in UNINSTALL:
+            schema_editor.execute(sql)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('API', '0010_uploadsession_claim'),
+    ]
+
+    operations = [
+        migrations.RunPython(install, uninstall),
+    ]
@@ -1,6 +1,9 @@
+import uuid
+
 from django.db import models
 from django.contrib.auth.models import AbstractUser
 from django.conf import settings # Best practice: Dùng settings.AUTH_USER_MODEL
+from django.utils import timezone
 
 # MODEL USER (người dùng)
 class User(AbstractUser):
@@ -43,6 +46,19 @@ class Task(models.Model):
     assignee = models.ForeignKey(settings.AUTH_USER_MODEL, related_name='assigned_tasks', on_delete=models.SET_NULL, null=True, blank=True, verbose_name="Người được giao")    
     created_at = models.DateTimeField(auto_now_add=True, verbose_name="Ngày tạo")
     updated_at = models.DateTimeField(auto_now=True, verbose_name="Ngày cập nhật")
+
+    class Meta:
+        # Index theo đúng các truy vấn của TaskFilter và phân trang keyset (project + cột lọc/sắp xếp)
+        indexes = [
+            models.Index(fields=['project', 'status'], name='task_project_status_idx'),
+            models.Index(fields=['project', 'priority'], name='task_project_priority_idx'),
+            models.Index(fields=['project', 'assignee'], name='task_project_assignee_idx'),
+            models.Index(fields=['project', 'created_at', 'id'], name='task_project_created_idx'),
+            models.Index(fields=['project', 'due_date', 'id'], name='task_project_due_idx'),
+            # Task chưa xong có hạn chót: dùng cho đếm quá hạn
+            models.Index(fields=['project', 'due_date'], condition=~models.Q(status='DONE'),
+                         name='task_project_open_due_idx'),
+        ]
     
     def __str__(self):
         return self.title
@@ -54,28 +70,77 @@ class Comment(models.Model):
     body = models.TextField(verbose_name="Nội dung bình luận")
     created_at = models.DateTimeField(auto_now_add=True, verbose_name="Ngày tạo")
     updated_at = models.DateTimeField(auto_now=True, verbose_name="Ngày cập nhật")
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['task', 'created_at', 'id'], name='comment_task_created_idx'),
+        ]
     
     def __str__(self):
         return f'Comment by {self.author.username} on {self.task.title}'
 
+# MODEL BLOB (nội dung tập tin lưu theo SHA-256, dùng chung giữa các tập tin đính kèm trùng nội dung)
+class Blob(models.Model):
+    sha256 = models.CharField(max_length=64, unique=True, verbose_name="SHA-256")
+    file = models.FileField(max_length=255, verbose_name="Tập tin")
+    size = models.BigIntegerField(verbose_name="Kích thước (byte)")
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name="Ngày tạo")
+
+    def __str__(self):
+        return self.sha256
+
 # MODEL ATTACHMENT (các tập tin đính kèm)
 class Attachment(models.Model):
     task = models.ForeignKey(Task, related_name='attachments', on_delete=models.CASCADE, verbose_name="Công việc")
     file = models.FileField(upload_to='attachments/', verbose_name="Tập tin")
+    blob = models.ForeignKey(Blob, related_name='attachments', on_delete=models.PROTECT, null=True, blank=True, verbose_name="Nội dung")
+    filename = models.CharField(max_length=255, blank=True, verbose_name="Tên tập tin gốc")
+    thumbnail = models.FileField(max_length=255, blank=True, verbose_name="Ảnh thu nhỏ")
     description = models.CharField(max_length=255, blank=True, null=True, verbose_name="Mô tả tập tin")   
     uploader = models.ForeignKey(settings.AUTH_USER_MODEL, related_name='attachments', on_delete=models.SET_NULL, null=True, verbose_name="Người tải lên")    
     uploaded_at = models.DateTimeField(auto_now_add=True, verbose_name="Ngày tải lên")
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['task', 'uploaded_at', 'id'], name='attachment_task_uploaded_idx'),
+        ]
     
     def __str__(self):
         return f'Attachment for {self.task.title}'
 
+# MODEL UPLOADSESSION (phiên tải lên theo từng phần, có thể tiếp tục khi rớt kết nối)
+class UploadSession(models.Model):
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    task = models.ForeignKey(Task, related_name='upload_sessions', on_delete=models.CASCADE, verbose_name="Công việc")
+    uploader = models.ForeignKey(settings.AUTH_USER_MODEL, related_name='upload_sessions', on_delete=models.CASCADE, verbose_name="Người tải lên")
+    filename = models.CharField(max_length=255, verbose_name="Tên tập tin")
+    description = models.CharField(max_length=255, blank=True, null=True, verbose_name="Mô tả tập tin")
+    size = models.BigIntegerField(verbose_name="Kích thước (byte)")
+    offset = models.BigIntegerField(default=0, verbose_name="Số byte đã nhận")
+    # Request đang ghi đoạn/hoàn tất phiên (xem API/uploads.py)
+    writer = models.UUIDField(null=True, blank=True, editable=False, verbose_name="Mã request đang ghi")
+    claimed_at = models.DateTimeField(null=True, blank=True, verbose_name="Bắt đầu ghi lúc")
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name="Ngày tạo")
+    updated_at = models.DateTimeField(auto_now=True, verbose_name="Ngày cập nhật")
+
+    def __str__(self):
+        return f'Upload {self.filename} ({self.offset}/{self.size})'
+
 # MODEL ACTIVITYLOG (nhật ký hoạt động)
 class ActivityLog(models.Model):
     action_description = models.CharField(max_length=255, verbose_name="Hành động")   
     actor = models.ForeignKey(settings.AUTH_USER_MODEL, related_name='activity_logs', on_delete=models.SET_NULL, null=True, verbose_name="Người thực hiện")
     project = models.ForeignKey(Project, related_name='activity_logs', on_delete=models.SET_NULL, null=True, verbose_name="Dự án")
     task = models.ForeignKey(Task, related_name='activity_logs', on_delete=models.SET_NULL, null=True, blank=True, verbose_name="Công việc")
-    timestamp = models.DateTimeField(auto_now_add=True, verbose_name="Thời gian")
+    # Dùng default thay cho auto_now_add để giữ đúng thời điểm xảy ra khi entry được ghi trễ theo lô
+    timestamp = models.DateTimeField(default=timezone.now, editable=False, verbose_name="Thời gian")
+
+    class Meta:
+        # Nhật ký luôn đọc theo project hoặc task, mới nhất trước (quét ngược index)
+        indexes = [
+            models.Index(fields=['project', 'timestamp', 'id'], name='activity_project_time_idx'),
+            models.Index(fields=['task', 'timestamp', 'id'], name='activity_task_time_idx'),
+        ]
    
     def __str__(self):
         return f'{self.actor.username} {self.action_description} at {self.timestamp.strftime("%Y-%m-%d %H:%M")}'
\ No newline at end of file
@@ -0,0 +1,205 @@
+import contextvars
+import logging
+import os
+import random
+import re
+import traceback
+import warnings
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core import mail
+
+logger = logging.getLogger(__name__)
+
+
+# Phát hiện N+1: lấy "dấu vân tay" của mọi câu SQL trong một request (bỏ giá trị cụ thể: số, chuỗi, tham số,
+# danh sách IN), câu nào chạy quá THRESHOLD lần thì báo kèm stack Python (phần code của dự án) đã gọi nó.
+# - MODE 'auto': đang chạy test -> 'raise' (request lỗi NPlusOneError, test thất bại); DEBUG -> 'warn'
+#   (NPlusOneWarning); còn lại -> 'log' (chỉ theo dõi SAMPLE_RATE request, ghi log API.nplusone).
+# - Cho phép có chủ đích: ALLOWLIST theo tên URL ({'task-bulk': ['INSERT INTO "API_activitylog"'], 'x': ['*']})
+#   hoặc thuộc tính nplusone_allowlist trên view; mỗi mục là một đoạn của dấu vân tay.
+
+DEFAULTS = {
+    'MODE': 'auto',             # 'auto' | 'raise' | 'warn' | 'log' | None (tắt)
+    'THRESHOLD': 5,             # một dấu vân tay chạy quá số lần này trong một request là N+1
+    'SAMPLE_RATE': 0.01,        # chế độ 'log': tỉ lệ request được theo dõi
+    'ALLOWLIST': {},            # {tên URL: [đoạn dấu vân tay | '*']}
+    'STACK_LIMIT': 12,          # số frame tối đa trong báo cáo
+}
+
+_current = contextvars.ContextVar('nplusone_tracker', default=None)
+
+_IGNORED = re.compile(r'^\s*(SAVEPOINT|RELEASE SAVEPOINT|ROLLBACK TO SAVEPOINT|BEGIN|COMMIT|ROLLBACK)\b', re.I)
+_NORMALIZE = (
+    (re.compile(r"'(?:[^']|'')*'"), '?'),                          # chuỗi
+    (re.compile(r'%s|%\(\w+\)s|\?'), '?'),                         # tham số
+    (re.compile(r'(?<![\w"])-?\d+(?:\.\d+)?(?![\w"])'), '?'),      # số
+    (re.compile(r'\(\s*\?(?:\s*,\s*\?)*\s*\)'), '(...)'),          # IN (?, ?, ...) / VALUES (?, ?)
+    (re.compile(r'(\(\.\.\.\))(?:\s*,\s*\(\.\.\.\))+'), r'\1'),    # nhiều dòng VALUES
+    (re.compile(r'\s+'), ' '),
+)
+
+_PROJECT_DIR = os.path.normcase(os.path.abspath(str(settings.BASE_DIR)))
+_INSTRUMENTATION = ('perf.py', 'nplusone.py')
+
+
+class NPlusOneError(AssertionError):
+    pass
+
+
+class NPlusOneWarning(UserWarning):
+    pass
+
+
+def _config():
+    return {**DEFAULTS, **getattr(settings, 'NPLUSONE', {})}
+
+
+def _mode(config):
+    mode = config['MODE']
+    if mode != 'auto':
+        return mode
+    if hasattr(mail, 'outbox'):     # setup_test_environment() đang có hiệu lực
+        return 'raise'
+    return 'warn' if settings.DEBUG else 'log'
+
+
+def fingerprint(sql):
+    for pattern, replacement in _NORMALIZE:
+        sql = pattern.sub(replacement, sql)
+    return sql.strip()
+
+
+def _project_stack(limit):
+    frames = traceback.extract_stack()
+    # Chỉ giữ code của dự án, bỏ middleware/hook đo đạc (perf, nplusone)
+    own = [
+        frame for frame in frames
+        if os.path.normcase(os.path.abspath(frame.filename)).startswith(_PROJECT_DIR)
+        and 'site-packages' not in frame.filename and os.path.basename(frame.filename) not in _INSTRUMENTATION
+    ]
+    return traceback.format_list((own or frames)[-limit:])
+
+
+class Tracker:
+    """
+    Đếm số lần chạy của từng dấu vân tay SQL trong một request.
+    """
+    def __init__(self, threshold, stack_limit):
+        self.threshold = threshold
+        self.stack_limit = stack_limit
+        self.counts = {}
+        self.examples = {}      # dấu vân tay -> (câu SQL mẫu, stack lúc vượt ngưỡng)
+
+    def record(self, sql):
+        if _IGNORED.match(sql):
+            return
+        key = fingerprint(sql)
+        count = self.counts.get(key, 0) + 1
+        self.counts[key] = count
+        if count == self.threshold + 1:
+            self.examples[key] = (sql, _project_stack(self.stack_limit))
+
+    def problems(self, allowlist):
+        return [
+            (key, self.counts[key], *self.examples[key]) for key in self.examples
+            if not any(allowed == '*' or allowed in key for allowed in allowlist)
+        ]
+
+
+def execute_hook(execute, sql, params, many, context):
+    tracker = _current.get()
+    if tracker is not None:
+        tracker.record(sql)
+    return execute(sql, params, many, context)
+
+
+def install_db_hook(sender, connection, **kwargs):
+    if execute_hook not in connection.execute_wrappers:
+        connection.execute_wrappers.append(execute_hook)
+
+
+def _allowlist(request, config):
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return []
+    view_class = getattr(match.func, 'view_class', None)
+    return [
+        *config['ALLOWLIST'].get(match.view_name, ()),
+        *config['ALLOWLIST'].get('*', ()),
+        *getattr(view_class, 'nplusone_allowlist', ()),
+    ]
+
+
+def report(request, problems):
+    match = getattr(request, 'resolver_match', None)
+    lines = [f"N+1 query trong {request.method} {request.get_full_path()} ({match.view_name if match else '?'}):"]
+    for key, count, sql, stack in problems:
+        lines.append(f"- {count} lần: {key}")
+        lines.append(f"  Ví dụ: {sql}")
+        lines.append("  Gọi từ:")
+        lines += ['    ' + line.rstrip('\n').replace('\n', '\n    ') for line in stack]
+    return '\n'.join(lines)
+
+
+class NPlusOneMiddleware:
+    """
+    Theo dõi SQL của request, báo N+1 theo NPLUSONE['MODE'] sau khi view trả response.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        config = _config()
+        mode = _mode(config)
+        if not self._tracked(mode, config):
+            return self.get_response(request)
+        tracker = Tracker(config['THRESHOLD'], config['STACK_LIMIT'])
+        token = _current.set(tracker)
+        try:
+            response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        self._check(request, tracker, mode, config)
+        return response
+
+    async def __acall__(self, request):
+        config = _config()
+        mode = _mode(config)
+        if not self._tracked(mode, config):
+            return await self.get_response(request)
+        tracker = Tracker(config['THRESHOLD'], config['STACK_LIMIT'])
+        token = _current.set(tracker)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current.reset(token)
+        self._check(request, tracker, mode, config)
+        return response
+
+    def _tracked(self, mode, config):
+        if mode not in ('raise', 'warn', 'log'):
+            return False
+        return mode != 'log' or random.random() < config['SAMPLE_RATE']
+
+    def _check(self, request, tracker, mode, config):
+        if not tracker.examples:
+            return
+        problems = tracker.problems(_allowlist(request, config))
+        if not problems:
+            return
+        message = report(request, problems)
+        if mode == 'raise':
+            raise NPlusOneError(message)
+        if mode == 'warn':
+            warnings.warn(message, NPlusOneWarning, stacklevel=2)
+        else:
+            logger.warning(message)
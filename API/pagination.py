@@ -0,0 +1,225 @@
+import base64
+import json
+from datetime import datetime
+
+from django.db.models import F, Q
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+from . import fastpath, perf
+
+
+# Phân trang keyset (cursor) cho các ListView
+class KeysetPagination(BasePagination):
+    """
+    Phân trang theo con trỏ (keyset) trên cặp (trường sắp xếp, id):
+    - Chỉ bật khi client gửi ?cursor= hoặc ?page_size=, không thì trả về danh sách như cũ.
+    - Mỗi trang chỉ lọc "sau vị trí con trỏ" nên chi phí không phụ thuộc độ sâu (không dùng OFFSET).
+    - Trường cho phép NULL (vd: due_date) luôn xếp cuối, đọc thành hai đoạn riêng để giữ được index.
+    """
+    page_size = 50
+    max_page_size = 500
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+    ordering_query_param = 'ordering'
+    invalid_cursor_message = "Cursor không hợp lệ."
+
+    def __init__(self, ordering_fields=('created_at',), default_ordering=None):
+        self.ordering_fields = tuple(ordering_fields)
+        self.default_ordering = default_ordering or self.ordering_fields[0]
+
+    def is_requested(self, request):
+        params = request.query_params
+        return self.cursor_query_param in params or self.page_size_query_param in params
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if not self.is_requested(request):
+            return None
+        plan = self._plan(queryset, request)
+        return self._page(self._fetch(queryset, *plan, self.page_size + 1), plan[0])
+
+    async def apaginate_queryset(self, queryset, request):
+        """
+        Như paginate_queryset, đọc bằng async ORM (view async).
+        """
+        if not self.is_requested(request):
+            return None
+        plan = self._plan(queryset, request)
+        return self._page(await self._afetch(queryset, *plan, self.page_size + 1), plan[0])
+
+    # (trường sắp xếp, giảm dần, cho phép NULL, vị trí con trỏ)
+    def _plan(self, queryset, request):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        self.ordering = self.get_ordering(request)
+        field, descending = self.ordering.lstrip('-'), self.ordering.startswith('-')
+        nullable = field != 'id' and queryset.model._meta.get_field(field).null
+        return field, descending, nullable, self.decode_cursor(request)
+
+    def _page(self, rows, field):
+        self.has_next = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+        self.next_position = self._position(rows[-1], field) if self.has_next else None
+        return rows
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'results': data,
+        })
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params.get(self.page_size_query_param, self.page_size))
+        except (TypeError, ValueError):
+            return self.page_size
+        if size <= 0:
+            return self.page_size
+        return min(size, self.max_page_size)
+
+    def get_ordering(self, request):
+        ordering = request.query_params.get(self.ordering_query_param, self.default_ordering)
+        if ordering.lstrip('-') not in self.ordering_fields:
+            return self.default_ordering
+        return ordering
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(self.next_position))
+
+    def get_previous_link(self):
+        return None
+
+    # Đọc tối đa `limit` dòng nằm sau vị trí con trỏ
+    def _fetch(self, queryset, field, descending, nullable, position, limit):
+        rows = []
+        section = self._leading_section(queryset, field, descending, nullable, position)
+        if section is not None:
+            rows = list(section[:limit])
+        if nullable and len(rows) < limit:
+            rows += list(self._null_section(queryset, descending, field, position)[:limit - len(rows)])
+        return rows
+
+    async def _afetch(self, queryset, field, descending, nullable, position, limit):
+        rows = []
+        section = self._leading_section(queryset, field, descending, nullable, position)
+        if section is not None:
+            rows = [row async for row in section[:limit]]
+        if nullable and len(rows) < limit:
+            rows += [row async for row in self._null_section(queryset, descending, field, position)[:limit - len(rows)]]
+        return rows
+
+    # Đoạn giá trị khác NULL (hoặc toàn bộ nếu trường không cho phép NULL), None nếu con trỏ đã qua đoạn này
+    def _leading_section(self, queryset, field, descending, nullable, position):
+        tiebreak = '-id' if descending else 'id'
+        if field == 'id':
+            queryset = queryset.order_by(tiebreak)
+            if position is not None:
+                lookup = 'id__lt' if descending else 'id__gt'
+                queryset = queryset.filter(**{lookup: position[1]})
+            return queryset
+        if position is not None and position[0] is None:
+            return None
+        section = queryset.filter(**{f'{field}__isnull': False}) if nullable else queryset
+        if position is not None:
+            section = section.filter(self._after(field, descending, *position))
+        order = F(field).desc() if descending else F(field).asc()
+        return section.order_by(order, tiebreak)
+
+    def _null_section(self, queryset, descending, field, position):
+        section = queryset.filter(**{f'{field}__isnull': True})
+        if position is not None and position[0] is None:
+            lookup = 'id__lt' if descending else 'id__gt'
+            section = section.filter(**{lookup: position[1]})
+        return section.order_by('-id' if descending else 'id')
+
+    # Điều kiện "sau (value, pk)": cận đầu đặt trên riêng cột sắp xếp để DB dùng được index range
+    def _after(self, field, descending, value, pk):
+        if descending:
+            return Q(**{f'{field}__lte': value}) & (Q(**{f'{field}__lt': value}) | Q(id__lt=pk))
+        return Q(**{f'{field}__gte': value}) & (Q(**{f'{field}__gt': value}) | Q(id__gt=pk))
+
+    def _position(self, row, field):
+        get = row.get if isinstance(row, dict) else lambda name: getattr(row, name)
+        return (get(field) if field != 'id' else None, get('id'))
+
+    def encode_cursor(self, position):
+        value, pk = position
+        if isinstance(value, datetime):
+            value = value.isoformat()
+        payload = json.dumps({'o': self.ordering, 'v': value, 'id': pk}, separators=(',', ':'))
+        return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            padded = encoded + '=' * (-len(encoded) % 4)
+            payload = json.loads(base64.urlsafe_b64decode(padded.encode()).decode())
+            ordering, value, pk = payload['o'], payload['v'], payload['id']
+            # Cursor do client gửi lên có thể bị sửa: kiểm tra kiểu trước khi đưa vào truy vấn
+            if not isinstance(ordering, str) or type(pk) is not int or not 0 <= pk < 2 ** 63:
+                raise ValueError(pk)
+            if value is not None and ordering.lstrip('-') != 'id':
+                value = parse_datetime(value)
+        except (TypeError, ValueError, KeyError):
+            raise NotFound(self.invalid_cursor_message)
+        # Cursor chỉ hợp lệ với đúng kiểu sắp xếp đã sinh ra nó
+        if ordering != self.ordering or (value is None and payload['v'] is not None):
+            raise NotFound(self.invalid_cursor_message)
+        return (value, pk)
+
+
+def paginated_or_full(paginator, queryset, request, serializer_class):
+    """
+    Trả về Response đã phân trang nếu client yêu cầu, không thì serialize toàn bộ queryset như cũ.
+    Serializer có SparseFieldsMixin nhận thêm ?fields= / ?expand= và chỉ đọc các quan hệ được yêu cầu.
+    """
+    queryset, options, fast = _read_plan(paginator, queryset, request, serializer_class)
+    page = paginator.paginate_queryset(queryset, request)
+    with perf.timed('serialize'):
+        rows = queryset if page is None else page
+        if fast is not None:
+            data = fast.represent(rows, queryset.db)
+        else:
+            data = serializer_class(rows, many=True, **options).data
+    if page is None:
+        return Response(data)
+    return paginator.get_paginated_response(data)
+
+
+async def apaginated_or_full(paginator, queryset, request, serializer_class):
+    """
+    Như paginated_or_full cho view async: dữ liệu đọc bằng async ORM, serialize trên dữ liệu đã nạp sẵn.
+    """
+    queryset, options, fast = _read_plan(paginator, queryset, request, serializer_class)
+    page = await paginator.apaginate_queryset(queryset, request)
+    rows = [row async for row in queryset] if page is None else page
+    with perf.timed('serialize'):
+        if fast is not None:
+            data = await fast.arepresent(rows)
+        else:
+            data = serializer_class(rows, many=True, **options).data
+    if page is None:
+        return Response(data)
+    return paginator.get_paginated_response(data)
+
+
+def _read_plan(paginator, queryset, request, serializer_class):
+    # (queryset cần đọc, options ?fields=/?expand=, FastSerializer hoặc None)
+    options = {}
+    if hasattr(serializer_class, 'read_options'):
+        options = serializer_class.read_options(request)
+        queryset = serializer_class.prepare_queryset(queryset, **options)
+
+    fast = fastpath.for_serializer(serializer_class, **options)
+    if fast is not None:
+        # Đường đọc nhanh (API/fastpath.py): .values() + ánh xạ biên dịch sẵn, kết quả như serializer
+        queryset = fast.values(queryset, extra=getattr(paginator, 'ordering_fields', ()))
+    return queryset, options, fast
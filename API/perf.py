@@ -0,0 +1,382 @@
+import contextvars
+import heapq
+import hmac
+import logging
+import random
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from rest_framework.views import APIView
+
+logger = logging.getLogger(__name__)
+
+
+# Đo hiệu năng từng request (PerformanceMiddleware + InstrumentedAPIView):
+# - Thời gian theo phần: db (SQL, đo qua connection.execute_wrapper), auth (xác thực JWT), perm (kiểm tra quyền,
+#   gồm cả membership), serialize, render (Response -> byte) và app (phần còn lại của view). Mỗi phần tính riêng
+#   (đã trừ SQL và các phần lồng bên trong) nên cộng lại bằng tổng thời gian request.
+# - Trả về qua header Server-Timing (DevTools của trình duyệt hiển thị được).
+# - Gộp theo route (tên URL) thành histogram/bộ đếm dạng Prometheus ở GET /metrics/ (mỗi tiến trình một bộ số liệu).
+# - Request chậm hơn SLOW_REQUEST_MS được ghi log (lấy mẫu theo SLOW_SAMPLE_RATE) kèm các câu SQL chậm nhất.
+
+DEFAULTS = {
+    'ENABLED': True,
+    'SERVER_TIMING': True,          # header Server-Timing
+    'METRICS': True,                # gộp số liệu cho /metrics/
+    'METRICS_TOKEN': None,          # Prometheus gửi Authorization: Bearer <token>; None: chỉ staff (JWT)
+    'DURATION_BUCKETS': (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0),   # giây
+    'QUERY_BUCKETS': (0, 1, 2, 5, 10, 20, 50, 100),
+    'SLOW_REQUEST_MS': 500,         # None: không ghi log request chậm
+    'SLOW_SAMPLE_RATE': 1.0,        # tỉ lệ request được giữ lại SQL để ghi log nếu chậm
+    'SLOW_SQL_COUNT': 10,           # số câu SQL chậm nhất trong log
+}
+
+PHASES = ('db', 'auth', 'perm', 'serialize', 'render', 'app')
+# Nhãn method của /metrics/: method lạ (client tự đặt) gộp vào 'other' để số chuỗi số liệu không tăng mãi
+METHODS = ('GET', 'HEAD', 'POST', 'PUT', 'PATCH', 'DELETE', 'OPTIONS')
+
+_current = contextvars.ContextVar('perf_recorder', default=None)
+
+
+def _config():
+    return {**DEFAULTS, **getattr(settings, 'REQUEST_METRICS', {})}
+
+
+class Recorder:
+    """
+    Số liệu của một request. Thời gian của một phần không gồm SQL và các phần lồng bên trong nó.
+    """
+    def __init__(self, capture_sql=0):
+        self.started = time.perf_counter()
+        self.db = 0.0
+        self.queries = 0
+        self.phases = defaultdict(float)
+        self.capture_sql = capture_sql
+        self.slowest_sql = []       # heap (thời gian, thứ tự, sql), giữ capture_sql câu chậm nhất
+        self._stack = []            # [bắt đầu, thời gian cần trừ] của các phần đang đo
+
+    def start(self):
+        frame = [time.perf_counter(), 0.0]
+        self._stack.append(frame)
+        return frame
+
+    def stop(self, name, frame):
+        if frame not in self._stack:
+            return
+        while self._stack.pop() is not frame:
+            pass
+        wall = time.perf_counter() - frame[0]
+        self.phases[name] += wall - frame[1]
+        if self._stack:
+            self._stack[-1][1] += wall
+
+    def record_query(self, sql, elapsed):
+        self.db += elapsed
+        self.queries += 1
+        if self._stack:
+            self._stack[-1][1] += elapsed
+        if self.capture_sql:
+            item = (elapsed, self.queries, sql)
+            if len(self.slowest_sql) < self.capture_sql:
+                heapq.heappush(self.slowest_sql, item)
+            else:
+                heapq.heappushpop(self.slowest_sql, item)
+
+    def timings(self, total):
+        """
+        {phần: giây}, 'app' là phần còn lại của tổng thời gian.
+        """
+        result = {'db': self.db, **self.phases}
+        result['app'] = max(0.0, total - sum(result.values()))
+        return result
+
+
+@contextmanager
+def timed(name):
+    """
+    Đo một đoạn code vào phần `name` của request hiện tại (không làm gì nếu không có request đang đo).
+    """
+    recorder = _current.get()
+    if recorder is None:
+        yield
+        return
+    frame = recorder.start()
+    try:
+        yield
+    finally:
+        recorder.stop(name, frame)
+
+
+def execute_hook(execute, sql, params, many, context):
+    recorder = _current.get()
+    if recorder is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        recorder.record_query(sql, time.perf_counter() - started)
+
+
+def install_db_hook(sender, connection, **kwargs):
+    """
+    connection_created: gắn execute_hook một lần cho mỗi kết nối (cả kết nối mở trong sync_to_async).
+    """
+    if execute_hook not in connection.execute_wrappers:
+        connection.execute_wrappers.append(execute_hook)
+
+
+# -------- Gộp số liệu theo route --------
+
+class Histogram:
+    def __init__(self, buckets):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * len(self.buckets)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.sum += value
+        self.count += 1
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+
+
+class Registry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        self.requests = defaultdict(int)        # (route, method, status) -> số request
+        self.durations = {}                     # (route, method) -> Histogram (giây)
+        self.queries = {}                       # (route, method) -> Histogram (số query)
+        self.phases = defaultdict(float)        # (route, method, phần) -> tổng giây
+
+    def observe(self, route, method, status, total, timings, queries, config):
+        key = (route, method)
+        with self._lock:
+            self.requests[(route, method, str(status))] += 1
+            if key not in self.durations:
+                self.durations[key] = Histogram(config['DURATION_BUCKETS'])
+                self.queries[key] = Histogram(config['QUERY_BUCKETS'])
+            self.durations[key].observe(total)
+            self.queries[key].observe(queries)
+            for phase, seconds in timings.items():
+                self.phases[(route, method, phase)] += seconds
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                'requests': dict(self.requests),
+                'durations': {key: _copy(histogram) for key, histogram in self.durations.items()},
+                'queries': {key: _copy(histogram) for key, histogram in self.queries.items()},
+                'phases': dict(self.phases),
+            }
+
+
+def _copy(histogram):
+    copy = Histogram(histogram.buckets)
+    copy.counts, copy.sum, copy.count = list(histogram.counts), histogram.sum, histogram.count
+    return copy
+
+
+registry = Registry()
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(**labels):
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in labels.items()) + '}'
+
+
+def _number(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def _histogram_lines(name, histograms):
+    lines = []
+    for (route, method), histogram in sorted(histograms.items()):
+        cumulative = 0
+        for bound, count in zip(histogram.buckets, histogram.counts):
+            cumulative += count
+            lines.append(f'{name}_bucket{_labels(route=route, method=method, le=_number(bound))} {cumulative}')
+        lines.append(f'{name}_bucket{_labels(route=route, method=method, le="+Inf")} {histogram.count}')
+        lines.append(f'{name}_sum{_labels(route=route, method=method)} {_number(histogram.sum)}')
+        lines.append(f'{name}_count{_labels(route=route, method=method)} {histogram.count}')
+    return lines
+
+
+def render_metrics():
+    """
+    Số liệu của tiến trình hiện tại theo định dạng text của Prometheus (version 0.0.4).
+    """
+    from . import activity, authentication
+
+    data = registry.snapshot()
+    lines = [
+        '# HELP taskmanager_http_requests_total Số request theo route, phương thức và status.',
+        '# TYPE taskmanager_http_requests_total counter',
+    ]
+    for (route, method, status), count in sorted(data['requests'].items()):
+        lines.append(f'taskmanager_http_requests_total{_labels(route=route, method=method, status=status)} {count}')
+    lines += [
+        '# HELP taskmanager_http_request_duration_seconds Thời gian xử lý request (không gồm gửi nội dung streaming).',
+        '# TYPE taskmanager_http_request_duration_seconds histogram',
+        *_histogram_lines('taskmanager_http_request_duration_seconds', data['durations']),
+        '# HELP taskmanager_http_request_queries Số câu SQL mỗi request.',
+        '# TYPE taskmanager_http_request_queries histogram',
+        *_histogram_lines('taskmanager_http_request_queries', data['queries']),
+        '# HELP taskmanager_http_request_phase_seconds_total Tổng thời gian theo phần: ' + ', '.join(PHASES) + '.',
+        '# TYPE taskmanager_http_request_phase_seconds_total counter',
+    ]
+    for (route, method, phase), seconds in sorted(data['phases'].items()):
+        labels = _labels(route=route, method=method, phase=phase)
+        lines.append(f'taskmanager_http_request_phase_seconds_total{labels} {_number(seconds)}')
+
+    # Bộ đếm sẵn có của cache xác thực JWT và sink nhật ký hoạt động
+    auth = authentication.stats()
+    sink = activity.get_stats()
+    lines += [
+        '# HELP taskmanager_jwt_user_cache_total Tra user khi xác thực JWT: trúng/trượt cache.',
+        '# TYPE taskmanager_jwt_user_cache_total counter',
+        f'taskmanager_jwt_user_cache_total{_labels(result="hit")} {auth["hits"]}',
+        f'taskmanager_jwt_user_cache_total{_labels(result="miss")} {auth["misses"]}',
+        '# HELP taskmanager_activity_log_entries_total Entry nhật ký hoạt động đã ghi / bị bỏ.',
+        '# TYPE taskmanager_activity_log_entries_total counter',
+        f'taskmanager_activity_log_entries_total{_labels(result="written")} {sink["written"]}',
+        f'taskmanager_activity_log_entries_total{_labels(result="dropped")} {sink["dropped"]}',
+        '# HELP taskmanager_activity_log_buffered Entry đang chờ ghi trong bộ nhớ (chế độ buffered).',
+        '# TYPE taskmanager_activity_log_buffered gauge',
+        f'taskmanager_activity_log_buffered {sink["buffered"]}',
+    ]
+    return '\n'.join(lines) + '\n'
+
+
+def metrics_token_matches(request):
+    token = _config()['METRICS_TOKEN']
+    header = request.META.get('HTTP_AUTHORIZATION', '')
+    return bool(token) and hmac.compare_digest(header.encode(), f'Bearer {token}'.encode())
+
+
+# -------- Middleware và view --------
+
+def _route(request):
+    match = getattr(request, 'resolver_match', None)
+    return match.view_name if match is not None else 'unmatched'
+
+
+def _method(request):
+    return request.method if request.method in METHODS else 'other'
+
+
+def _server_timing(timings, total, queries):
+    parts = []
+    for phase in PHASES:
+        seconds = timings.get(phase, 0.0)
+        if phase == 'db':
+            parts.append(f'db;dur={seconds * 1000:.2f};desc="{queries} query"')
+        elif seconds:
+            parts.append(f'{phase};dur={seconds * 1000:.2f}')
+    parts.append(f'total;dur={total * 1000:.2f}')
+    return ', '.join(parts)
+
+
+class PerformanceMiddleware:
+    """
+    Đo mỗi request: header Server-Timing, số liệu cho /metrics/, log request chậm.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        config = _config()
+        if not config['ENABLED']:
+            return self.get_response(request)
+        recorder, token = self._begin(config)
+        try:
+            response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        self._finish(request, response, recorder, config)
+        return response
+
+    async def __acall__(self, request):
+        config = _config()
+        if not config['ENABLED']:
+            return await self.get_response(request)
+        recorder, token = self._begin(config)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current.reset(token)
+        self._finish(request, response, recorder, config)
+        return response
+
+    def process_template_response(self, request, response):
+        # Response của DRF được render sau bước này: đo từ đây đến post-render callback
+        recorder = _current.get()
+        if recorder is not None:
+            frame = recorder.start()
+            response.add_post_render_callback(lambda rendered: recorder.stop('render', frame))
+        return response
+
+    def _begin(self, config):
+        sample = config['SLOW_REQUEST_MS'] is not None and random.random() < config['SLOW_SAMPLE_RATE']
+        recorder = Recorder(capture_sql=config['SLOW_SQL_COUNT'] if sample else 0)
+        return recorder, _current.set(recorder)
+
+    def _finish(self, request, response, recorder, config):
+        total = time.perf_counter() - recorder.started
+        timings = recorder.timings(total)
+        if config['SERVER_TIMING']:
+            response['Server-Timing'] = _server_timing(timings, total, recorder.queries)
+        route = _route(request)
+        if config['METRICS']:
+            registry.observe(route, _method(request), response.status_code, total, timings, recorder.queries, config)
+        if recorder.capture_sql and total * 1000 >= config['SLOW_REQUEST_MS']:
+            self._log_slow(request, route, response, recorder, timings, total)
+
+    def _log_slow(self, request, route, response, recorder, timings, total):
+        statements = ''.join(
+            f'\n  {elapsed * 1000:8.2f} ms  {sql}' for elapsed, _, sql in sorted(recorder.slowest_sql, reverse=True)
+        )
+        logger.warning(
+            "Request chậm: %s %s (%s) -> %s sau %.1f ms; %d query / %.1f ms SQL; %s%s",
+            request.method, request.get_full_path(), route, response.status_code, total * 1000,
+            recorder.queries, recorder.db * 1000,
+            ', '.join(f'{phase} {timings.get(phase, 0.0) * 1000:.1f} ms' for phase in PHASES[1:]),
+            statements,
+        )
+
+
+class InstrumentedAPIView(APIView):
+    """
+    APIView có đo thời gian xác thực và kiểm tra quyền cho Server-Timing.
+    """
+    def perform_authentication(self, request):
+        with timed('auth'):
+            super().perform_authentication(request)
+
+    def check_permissions(self, request):
+        with timed('perm'):
+            super().check_permissions(request)
+
+    def check_object_permissions(self, request, obj):
+        with timed('perm'):
+            super().check_object_permissions(request, obj)
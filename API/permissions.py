@@ -1,6 +1,6 @@
 from rest_framework.permissions import BasePermission, SAFE_METHODS
-from django.db.models import Q
 from .models import Project, Task
+from .membership import ais_project_member, is_project_member
 
 
 # Phân quyền ProjectList 
@@ -17,7 +17,10 @@ class CanViewProjectList(BasePermission):
         user = request.user
         if user.is_staff:
             return Project.objects.all()
-        return Project.objects.filter(Q(owner=user) | Q(members=user)).distinct()
+        # UNION hai truy vấn theo index (members.user_id, owner_id) thay cho OR + JOIN + DISTINCT
+        member_of = Project.members.through.objects.filter(user_id=user.pk).values('project_id')
+        owned = Project.objects.filter(owner_id=user.pk).values('id')
+        return Project.objects.filter(pk__in=member_of.union(owned))
 
 
 # Phân quyền ProjectDetail
@@ -31,8 +34,15 @@ class IsProjectOwnerOrMember(BasePermission):
         if request.user.is_staff:
             return True
         if request.method in SAFE_METHODS:
-            return request.user in obj.members.all() or request.user == obj.owner
-        return request.user == obj.owner
+            return is_project_member(request.user, obj)
+        return request.user.pk == obj.owner_id
+
+    async def ahas_object_permission(self, request, view, obj):
+        if request.user.is_staff:
+            return True
+        if request.method in SAFE_METHODS:
+            return await ais_project_member(request.user, obj)
+        return request.user.pk == obj.owner_id
 
 
 # Phân quyền TaskList
@@ -47,10 +57,15 @@ class CanViewTaskList(BasePermission):
 
     def filter_queryset(self, request, project_pk):
         user = request.user
-        if user.is_staff:
+        if user.is_staff or is_project_member(user, project_pk):
+            return Task.objects.filter(project_id=project_pk)
+        return Task.objects.none()
+
+    async def afilter_queryset(self, request, project_pk):
+        user = request.user
+        if user.is_staff or await ais_project_member(user, project_pk):
             return Task.objects.filter(project_id=project_pk)
-        return Task.objects.filter(Q(project__id=project_pk,
-            project__members=user) | Q(project__id=project_pk, project__owner=user)).distinct()
+        return Task.objects.none()
 
 
 # Phân quyền TaskDetail
@@ -66,14 +81,26 @@ class IsTaskPermission(BasePermission):
             return True
 
         project = obj.project
-        is_owner = user == project.owner
-        is_member = user in project.members.all()
-        is_assignee = user == obj.assignee
+        is_owner = user.pk == project.owner_id
+        is_assignee = user.pk == obj.assignee_id
 
-        if request.method in SAFE_METHODS:
-            return is_owner or is_member or is_assignee
-        if request.method in ['PUT', 'PATCH']:
-            return is_owner or is_member or is_assignee
+        if request.method in SAFE_METHODS or request.method in ['PUT', 'PATCH']:
+            return is_owner or is_assignee or is_project_member(user, project)
+        if request.method == 'DELETE':
+            return is_owner
+        return False
+
+    async def ahas_object_permission(self, request, view, obj):
+        user = request.user
+        if user.is_staff:
+            return True
+
+        project = obj.project
+        is_owner = user.pk == project.owner_id
+        is_assignee = user.pk == obj.assignee_id
+
+        if request.method in SAFE_METHODS or request.method in ['PUT', 'PATCH']:
+            return is_owner or is_assignee or await ais_project_member(user, project)
         if request.method == 'DELETE':
             return is_owner
         return False
@@ -103,12 +130,25 @@ class IsCommentOrAttachmentOwner(BasePermission):
         if user.is_staff:
             return True
         project = obj.task.project
-        is_owner = user == project.owner
-        is_member = user in project.members.all()
-        author_or_uploader = getattr(obj, 'author', None) or getattr(obj, 'uploader', None)
-        is_author = user == author_or_uploader
+        is_owner = user.pk == project.owner_id
+        author_or_uploader_id = getattr(obj, 'author_id', None) or getattr(obj, 'uploader_id', None)
+        is_author = user.pk == author_or_uploader_id
+        if request.method in SAFE_METHODS:
+            return is_owner or is_project_member(user, project)
+        if request.method == 'DELETE' and is_owner:
+            return True
+        return is_author
+
+    async def ahas_object_permission(self, request, view, obj):
+        user = request.user
+        if user.is_staff:
+            return True
+        project = obj.task.project
+        is_owner = user.pk == project.owner_id
+        author_or_uploader_id = getattr(obj, 'author_id', None) or getattr(obj, 'uploader_id', None)
+        is_author = user.pk == author_or_uploader_id
         if request.method in SAFE_METHODS:
-            return is_owner or is_member
+            return is_owner or await ais_project_member(user, project)
         if request.method == 'DELETE' and is_owner:
             return True
         return is_author
@@ -131,4 +171,4 @@ class IsProjectOwnerOnly(BasePermission):
     def has_object_permission(self, request, view, obj):
         if request.user.is_staff:
             return True
-        return request.user == obj.owner
\ No newline at end of file
+        return request.user.pk == obj.owner_id
\ No newline at end of file
@@ -0,0 +1,50 @@
+import re
+
+from django.db import connections, transaction
+
+
+# Kiểm tra kế hoạch thực thi (EXPLAIN) của câu SQL: báo lỗi nếu phải quét toàn bảng
+# hoặc sắp xếp tường minh thay vì đọc theo thứ tự của index.
+
+_SQLITE_SCAN = re.compile(r'\bSCAN (?!CONSTANT ROW)(\S+)')
+_SQLITE_SORT = re.compile(r'USE TEMP B-TREE FOR (RIGHT PART OF )?ORDER BY')
+_POSTGRES_SEQ_SCAN = re.compile(r'Seq Scan on (\S+)')
+# Nút Sort thật; dòng "Sort Key:" của Merge Append (gộp các phân vùng đã có thứ tự) thì không tính
+_POSTGRES_SORT = re.compile(r'(?:->\s+|^)Sort\b(?!\s+Key:)')
+
+
+def explain(sql, params=(), using='default'):
+    """
+    Trả về các dòng kế hoạch thực thi của `sql`.
+    Trên PostgreSQL tắt seqscan/sort để chỉ còn thấy chúng khi không có index nào dùng được.
+    """
+    connection = connections[using]
+    with transaction.atomic(using=using), connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            cursor.execute('SET LOCAL enable_seqscan = off')
+            cursor.execute('SET LOCAL enable_sort = off')
+            # params rỗng thì không truyền: psycopg2 sẽ không diễn giải '%' trong câu SQL đã nội suy (LIKE 'ab%')
+            cursor.execute(f'EXPLAIN {sql}', params or None)
+            return [row[0] for row in cursor.fetchall()]
+        if connection.vendor == 'sqlite':
+            cursor.execute(f'EXPLAIN QUERY PLAN {sql}', params)
+            return [row[-1] for row in cursor.fetchall()]
+    raise NotImplementedError(f'EXPLAIN chưa hỗ trợ cho {connection.vendor}')
+
+
+def plan_problems(sql, params=(), using='default'):
+    vendor = connections[using].vendor
+    problems = []
+    for line in explain(sql, params, using):
+        if vendor == 'sqlite':
+            scan = _SQLITE_SCAN.search(line)
+            if scan and not scan.group(1).endswith('_fts'):
+                problems.append(f'full scan: {line.strip()}')
+            if _SQLITE_SORT.search(line):
+                problems.append(f'sort: {line.strip()}')
+        else:
+            if _POSTGRES_SEQ_SCAN.search(line):
+                problems.append(f'full scan: {line.strip()}')
+            if _POSTGRES_SORT.search(line.strip()):
+                problems.append(f'sort: {line.strip()}')
+    return problems
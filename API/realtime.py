@@ -0,0 +1,272 @@
+import asyncio
+import json
+import threading
+import time
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.utils import timezone
+from django.utils.module_loading import import_string
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
+
+from .authentication import CachedJWTAuthentication
+
+
+# Luồng sự kiện realtime theo dự án (Server-Sent Events, cần chạy dưới ASGI: uvicorn/daphne...):
+# - Các view ghi dữ liệu gọi publish(); sự kiện chỉ được phát sau khi transaction commit.
+# - Mỗi sự kiện được định dạng sẵn thành một khung SSE một lần rồi chuyển qua broker tới mọi subscriber.
+# - InProcessBroker (mặc định) chỉ phát trong tiến trình hiện tại; nhiều worker/tiến trình thì
+#   dùng RedisBroker (Redis pub/sub, cần gói `redis`) hoặc một lớp tự viết cùng giao diện.
+
+DEFAULTS = {
+    'BROKER': 'API.realtime.InProcessBroker',
+    'REDIS_URL': 'redis://localhost:6379/0',
+    'CHANNEL_PREFIX': 'tms:project:',
+    'HEARTBEAT': 15,                # giây: gửi comment giữ kết nối + kiểm tra lại quyền thành viên
+    'QUEUE_SIZE': 256,              # sự kiện chờ tối đa mỗi subscriber; tràn thì gửi 'resync'
+    'RETRY': 3000,                  # ms, client EventSource tự kết nối lại sau khoảng này
+    'QUERY_TOKEN': True,            # cho phép ?token= (EventSource không gửi được header Authorization)
+}
+
+RESYNC = 'event: resync\ndata: {}\n\n'
+
+_broker = None
+_broker_lock = threading.Lock()
+
+
+def _config():
+    return {**DEFAULTS, **getattr(settings, 'REALTIME', {})}
+
+
+def format_event(event, data):
+    return f'event: {event}\ndata: {json.dumps(data, cls=DjangoJSONEncoder, ensure_ascii=False)}\n\n'
+
+
+class _Subscription:
+    def __init__(self, broker, project_id, loop, size):
+        self.broker = broker
+        self.project_id = project_id
+        self.loop = loop
+        self.queue = asyncio.Queue(maxsize=size)
+
+    def deliver(self, frame):
+        # Gọi từ thread bất kỳ (thường là thread chạy view đồng bộ)
+        try:
+            self.loop.call_soon_threadsafe(self._put, frame)
+        except RuntimeError:
+            # Event loop đã đóng: subscriber sẽ tự hủy đăng ký
+            pass
+
+    def _put(self, frame):
+        if self.queue.full():
+            # Client đọc không kịp: bỏ các sự kiện đang chờ, báo client tải lại dữ liệu
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            frame = RESYNC
+        self.queue.put_nowait(frame)
+
+    async def get(self, timeout):
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    def discard(self):
+        self.broker.unsubscribe(self)
+
+    async def close(self):
+        self.discard()
+
+
+class InProcessBroker:
+    """
+    Broker trong bộ nhớ của một tiến trình: publish từ thread đồng bộ, subscriber là các hàng đợi asyncio.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscribers = defaultdict(set)
+
+    def publish(self, project_id, frame):
+        with self._lock:
+            subscribers = list(self._subscribers.get(project_id, ()))
+        for subscription in subscribers:
+            subscription.deliver(frame)
+
+    def subscribe(self, project_id):
+        subscription = _Subscription(self, project_id, asyncio.get_running_loop(), _config()['QUEUE_SIZE'])
+        with self._lock:
+            self._subscribers[project_id].add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            subscribers = self._subscribers.get(subscription.project_id)
+            if subscribers is not None:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._subscribers[subscription.project_id]
+
+    def subscriber_count(self, project_id):
+        with self._lock:
+            return len(self._subscribers.get(project_id, ()))
+
+
+class _RedisSubscription:
+    def __init__(self, url, channel):
+        self.url = url
+        self.channel = channel
+        self.client = None
+        self.pubsub = None
+        self.closed = False
+
+    async def get(self, timeout):
+        if self.closed:
+            return None
+        if self.pubsub is None:
+            from redis import asyncio as redis_asyncio
+            self.client = redis_asyncio.Redis.from_url(self.url)
+            self.pubsub = self.client.pubsub()
+            await self.pubsub.subscribe(self.channel)
+        message = await self.pubsub.get_message(ignore_subscribe_messages=True, timeout=timeout)
+        if message is None:
+            return None
+        data = message['data']
+        return data.decode() if isinstance(data, bytes) else data
+
+    def discard(self):
+        # Không đóng được kết nối async từ ngữ cảnh đồng bộ: chỉ ngừng nhận, kết nối đóng khi bị thu gom
+        self.closed = True
+
+    async def close(self):
+        if self.pubsub is not None:
+            await self.pubsub.unsubscribe(self.channel)
+            await self.pubsub.aclose()
+            await self.client.aclose()
+            self.pubsub = None
+
+
+class RedisBroker:
+    """
+    Broker qua Redis pub/sub: mọi tiến trình cùng REDIS_URL nhận được sự kiện của nhau.
+    """
+    def __init__(self):
+        try:
+            import redis
+        except ImportError as exc:
+            raise ImproperlyConfigured("RedisBroker cần cài gói 'redis' (pip install redis).") from exc
+        config = _config()
+        self.url = config['REDIS_URL']
+        self.prefix = config['CHANNEL_PREFIX']
+        self.client = redis.Redis.from_url(self.url)
+
+    def publish(self, project_id, frame):
+        self.client.publish(f'{self.prefix}{project_id}', frame)
+
+    def subscribe(self, project_id):
+        return _RedisSubscription(self.url, f'{self.prefix}{project_id}')
+
+
+def get_broker():
+    global _broker
+    with _broker_lock:
+        if _broker is None:
+            _broker = import_string(_config()['BROKER'])()
+    return _broker
+
+
+def reset_broker():
+    global _broker
+    with _broker_lock:
+        _broker = None
+
+
+def publish(project_id, event, data):
+    """
+    Phát sự kiện `event` (vd: 'task.updated') tới subscriber của dự án sau khi transaction commit.
+    """
+    frame = format_event(event, {'project': project_id, **data, 'at': timezone.now()})
+    transaction.on_commit(lambda: get_broker().publish(project_id, frame))
+
+
+# -------- Payload gọn cho từng loại sự kiện --------
+
+def task_payload(task):
+    return {'task': {
+        'id': task.pk, 'title': task.title, 'status': task.status, 'priority': task.priority,
+        'assignee_id': task.assignee_id, 'due_date': task.due_date, 'updated_at': task.updated_at,
+    }}
+
+
+def comment_payload(comment):
+    return {'comment': {
+        'id': comment.pk, 'task_id': comment.task_id, 'author_id': comment.author_id, 'created_at': comment.created_at,
+    }}
+
+
+def member_payload(user):
+    return {'member': {'id': user.pk, 'username': user.username}}
+
+
+# -------- Subscriber --------
+
+def authenticate(request):
+    """
+    User từ access token SimpleJWT (header Authorization hoặc ?token=); None nếu không hợp lệ.
+    """
+    authentication = CachedJWTAuthentication()
+    header = authentication.get_header(request)
+    raw_token = authentication.get_raw_token(header) if header is not None else None
+    if raw_token is None and _config()['QUERY_TOKEN']:
+        raw_token = request.GET.get('token')
+    if not raw_token:
+        return None
+    try:
+        user = authentication.get_user(authentication.get_validated_token(raw_token))
+    except (InvalidToken, TokenError, AuthenticationFailed):
+        return None
+    return user if user.is_active else None
+
+
+class EventStream:
+    """
+    Các khung SSE cho một subscriber. `still_allowed` (coroutine) được gọi lại sau mỗi HEARTBEAT giây dù sự kiện
+    vẫn đến liên tục, và ngay khi có sự kiện 'member.removed': user bị xóa khỏi dự án thì luồng kết thúc trước khi
+    nhận thêm sự kiện. Django gọi close() khi đóng response (kể cả khi client ngắt kết nối) nên subscriber luôn
+    được hủy đăng ký.
+    """
+    def __init__(self, project_id, still_allowed):
+        self.project_id = project_id
+        self.still_allowed = still_allowed
+        self.subscription = None
+
+    def __aiter__(self):
+        return self._frames()
+
+    async def _frames(self):
+        config = _config()
+        heartbeat = config['HEARTBEAT']
+        self.subscription = get_broker().subscribe(self.project_id)
+        try:
+            yield f"retry: {config['RETRY']}\n\n"
+            next_check = time.monotonic() + heartbeat
+            while True:
+                frame = await self.subscription.get(max(next_check - time.monotonic(), 0))
+                due = time.monotonic() >= next_check
+                if due or (frame is not None and frame.startswith('event: member.removed\n')):
+                    if not await self.still_allowed():
+                        return
+                    next_check = time.monotonic() + heartbeat
+                if frame is not None:
+                    yield frame
+                elif due:
+                    yield ': ping\n\n'
+        finally:
+            await self.subscription.close()
+
+    def close(self):
+        if self.subscription is not None:
+            self.subscription.discard()
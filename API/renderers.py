@@ -0,0 +1,54 @@
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.settings import api_settings
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:     # gói tùy chọn: thiếu thì dùng json của thư viện chuẩn như DRF
+    orjson = None
+
+
+# Renderer/parser JSON dùng orjson (nhanh hơn json chuẩn nhiều lần khi trả danh sách lớn).
+# - Kết quả trùng từng byte với JSONRenderer của DRF (gọn, không escape Unicode, escape U+2028/U+2029);
+#   kiểu orjson không tự xử lý (Decimal, lazy string...) và datetime đi qua encoder của DRF. Khác biệt duy nhất:
+#   số thực dạng mũ viết 1e16 thay vì 1e+16 (cùng giá trị; các endpoint hiện không trả số thực).
+# - Yêu cầu thụt lề (Accept: application/json; indent=4, Browsable API), COMPACT_JSON/UNICODE_JSON tắt
+#   hoặc không cài orjson thì dùng lại JSONRenderer/JSONParser gốc.
+
+_LINE_SEPARATORS = (b'\xe2\x80\xa8', b'\xe2\x80\xa9')
+
+
+class ORJSONRenderer(JSONRenderer):
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if orjson is None or not self.compact or self.ensure_ascii:
+            return super().render(data, accepted_media_type, renderer_context)
+        if data is None:
+            return b''
+        if self.get_indent(accepted_media_type, renderer_context or {}) is not None:
+            return super().render(data, accepted_media_type, renderer_context)
+
+        try:
+            ret = orjson.dumps(
+                data, default=self.encoder_class().default,
+                option=orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME,
+            )
+        except orjson.JSONEncodeError:
+            # Trường hợp orjson từ chối (số nguyên quá 64 bit...): để json chuẩn xử lý như cũ
+            return super().render(data, accepted_media_type, renderer_context)
+        if b'\xe2\x80' in ret:
+            ret = ret.replace(_LINE_SEPARATORS[0], b'\\u2028').replace(_LINE_SEPARATORS[1], b'\\u2029')
+        return ret
+
+
+class ORJSONParser(JSONParser):
+    renderer_class = ORJSONRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        if orjson is None:
+            return super().parse(stream, media_type, parser_context)
+        try:
+            return orjson.loads(stream.read())
+        except orjson.JSONDecodeError as exc:
+            raise ParseError('JSON parse error - %s' % str(exc))
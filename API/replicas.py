@@ -0,0 +1,179 @@
+import base64
+import contextvars
+import json
+import logging
+import random
+import threading
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.cache import caches
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connections
+from django.utils.connection import ConnectionDoesNotExist
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+
+logger = logging.getLogger(__name__)
+
+
+# Đọc từ bản sao (read replica) cho request GET/HEAD/OPTIONS (ReplicaRouter + PrimaryPinMiddleware):
+# - Ghi, đọc trong transaction do request mở và mọi truy vấn ngoài request (lệnh quản trị, thread nền) dùng 'default'.
+# - Đọc được dữ liệu vừa ghi: sau một request ghi, client bị "ghim" vào primary PIN_SECONDS giây, nhận biết qua
+#   cookie (trình duyệt) hoặc theo user (client API không giữ cookie; pin lưu ở cache). Pin theo user chỉ được
+#   đặt cho user đã xác thực xong (request.user); lúc đọc, user_id lấy từ payload token chưa kiểm tra chữ ký,
+#   giả mạo chỉ khiến chính request đó đọc từ primary.
+# - Bản sao không kết nối được bị bỏ qua RETRY_AFTER giây, request đọc từ primary.
+# - Mỗi request dùng một bản sao cố định để các truy vấn trong request nhất quán với nhau.
+
+DEFAULTS = {
+    'ALIASES': [],                  # alias trong DATABASES của các bản sao; rỗng: tắt
+    'PIN_SECONDS': 5,               # lớn hơn độ trễ sao chép tối đa
+    'COOKIE_NAME': 'primary_pin',
+    'CACHE_ALIAS': 'default',       # nhiều worker: cache dùng chung (Redis/Memcached) để pin theo user có hiệu lực
+    'RETRY_AFTER': 30,              # giây
+}
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+_current = contextvars.ContextVar('replica_read_state', default=None)
+_down = {}          # alias -> thời điểm thử lại
+_down_lock = threading.Lock()
+
+
+def _config():
+    return {**DEFAULTS, **getattr(settings, 'READ_REPLICAS', {})}
+
+
+def _available(alias, config):
+    with _down_lock:
+        if _down.get(alias, 0) > time.monotonic():
+            return False
+    try:
+        connections[alias].ensure_connection()
+    except (ConnectionDoesNotExist, DatabaseError) as exc:
+        with _down_lock:
+            _down[alias] = time.monotonic() + config['RETRY_AFTER']
+        logger.warning("Bản sao '%s' không dùng được (%s), đọc từ primary trong %ss.", alias, exc, config['RETRY_AFTER'])
+        return False
+    return True
+
+
+def reset():
+    with _down_lock:
+        _down.clear()
+
+
+class ReadState:
+    """
+    Nơi đọc của một request: bản sao được chọn khi có truy vấn đọc đầu tiên.
+    """
+    def __init__(self, config):
+        self.config = config
+        self._alias = None
+        # Transaction đã mở trước request (vd. TestCase) không tính là transaction của request
+        self.depth = len(connections[DEFAULT_DB_ALIAS].atomic_blocks)
+
+    def alias(self):
+        if self._alias is None:
+            candidates = list(self.config['ALIASES'])
+            random.shuffle(candidates)
+            self._alias = next((alias for alias in candidates if _available(alias, self.config)), DEFAULT_DB_ALIAS)
+        return self._alias
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        state = _current.get()
+        if state is None or len(connections[DEFAULT_DB_ALIAS].atomic_blocks) > state.depth:
+            return DEFAULT_DB_ALIAS
+        return state.alias()
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {DEFAULT_DB_ALIAS, *_config()['ALIASES']}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Bản sao nhận schema qua cơ chế sao chép của CSDL
+        return False if db in _config()['ALIASES'] else None
+
+
+# -------- Ghim vào primary sau khi ghi --------
+
+def _token_user_id(request):
+    # Chỉ giải mã phần payload (không kiểm tra chữ ký): chỉ dùng để tra pin, không bao giờ dùng để đặt pin
+    header = request.META.get('HTTP_AUTHORIZATION', '').split()
+    if len(header) != 2 or header[0] not in jwt_settings.AUTH_HEADER_TYPES:
+        return None
+    try:
+        payload = header[1].split('.')[1]
+        claims = json.loads(base64.urlsafe_b64decode(payload + '=' * (-len(payload) % 4)))
+    except (IndexError, ValueError):
+        return None
+    return claims.get(jwt_settings.USER_ID_CLAIM) if isinstance(claims, dict) else None
+
+
+def _pin_key(user_id):
+    return f'replicas:pin:{user_id}'
+
+
+def _pinned(request, user_id, config):
+    if request.COOKIES.get(config['COOKIE_NAME']):
+        return True
+    return user_id is not None and caches[config['CACHE_ALIAS']].get(_pin_key(user_id)) is not None
+
+
+def _pin(request, response, config):
+    response.set_cookie(config['COOKIE_NAME'], '1', max_age=config['PIN_SECONDS'], httponly=True, samesite='Lax')
+    user = getattr(request, 'user', None)      # DRF gán user đã xác thực vào request gốc
+    if user is not None and user.is_authenticated:
+        caches[config['CACHE_ALIAS']].set(_pin_key(user.pk), 1, config['PIN_SECONDS'])
+
+
+class PrimaryPinMiddleware:
+    """
+    Request đọc (không bị ghim) đọc từ bản sao; request ghi ghim client vào primary PIN_SECONDS giây.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        config = _config()
+        if not config['ALIASES']:
+            return self.get_response(request)
+        token = self._begin(request, config)
+        try:
+            response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        if request.method not in SAFE_METHODS:
+            _pin(request, response, config)
+        return response
+
+    async def __acall__(self, request):
+        config = _config()
+        if not config['ALIASES']:
+            return await self.get_response(request)
+        token = self._begin(request, config)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current.reset(token)
+        if request.method not in SAFE_METHODS:
+            _pin(request, response, config)
+        return response
+
+    def _begin(self, request, config):
+        replica = request.method in SAFE_METHODS and not _pinned(request, _token_user_id(request), config)
+        return _current.set(ReadState(config) if replica else None)
@@ -0,0 +1,271 @@
+import gzip
+import hashlib
+import json
+import os
+import threading
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connection, transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from rest_framework.fields import DateTimeField
+
+from .models import ActivityLog
+
+
+# Giữ bảng nhật ký hoạt động nhỏ:
+# - PostgreSQL: API_activitylog là bảng phân vùng theo tháng (RANGE trên timestamp) + phân vùng DEFAULT
+#   (migration 0008_partition_activitylog). Phân vùng cho các tháng tới được tạo trước bằng lệnh
+#   create_activity_partitions (chạy sau migrate và định kỳ).
+# - Mọi CSDL: lệnh archive_activity_logs chuyển entry cũ hơn KEEP_DAYS ngày ra file NDJSON nén gzip
+#   (mỗi tháng một file) kèm manifest.json; trên PostgreSQL tháng đã lưu trữ hết thì DROP cả phân vùng.
+#   SQLite không có phân vùng: bảng chính là tầng "nóng", các file lưu trữ là tầng "lạnh".
+# - Entry đã lưu trữ vẫn đọc được qua ?include_archived=1 của các endpoint nhật ký.
+
+DEFAULTS = {
+    'ARCHIVE_DIR': None,            # mặc định: <BASE_DIR>/archives/activity
+    'KEEP_DAYS': 180,
+    'PARTITION_MONTHS_AHEAD': 3,
+}
+
+TABLE = ActivityLog._meta.db_table
+DEFAULT_PARTITION = f'{TABLE}_default'
+MANIFEST = 'manifest.json'
+DELETE_BATCH = 900                  # dưới giới hạn tham số của SQLite cũ (999)
+
+_manifest_lock = threading.Lock()
+
+
+def _config():
+    return {**DEFAULTS, **getattr(settings, 'ACTIVITY_RETENTION', {})}
+
+
+def archive_dir():
+    directory = _config()['ARCHIVE_DIR'] or os.path.join(settings.BASE_DIR, 'archives', 'activity')
+    os.makedirs(directory, exist_ok=True)
+    return directory
+
+
+def month_start(value):
+    return value.astimezone(dt_timezone.utc).replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+
+def next_month(value):
+    return (value.replace(day=28) + timedelta(days=4)).replace(day=1)
+
+
+def partition_name(month):
+    return f'{TABLE}_p{month:%Y%m}'
+
+
+# -------- Phân vùng (PostgreSQL) --------
+
+def is_partitioned(conn=connection):
+    if conn.vendor != 'postgresql':
+        return False
+    with conn.cursor() as cursor:
+        cursor.execute("SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass(%s)", [f'"{TABLE}"'])
+        return cursor.fetchone() is not None
+
+
+def existing_partitions(conn=connection):
+    with conn.cursor() as cursor:
+        cursor.execute(
+            "SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+            "WHERE i.inhparent = to_regclass(%s)", [f'"{TABLE}"'],
+        )
+        return {row[0] for row in cursor.fetchall()}
+
+
+def ensure_partition(month, conn=connection):
+    """
+    Tạo phân vùng cho tháng `month` (nếu chưa có). Entry của tháng đó đang nằm trong phân vùng
+    DEFAULT được chuyển sang trước khi ATTACH, nếu không PostgreSQL sẽ từ chối.
+    """
+    name = partition_name(month)
+    if name in existing_partitions(conn):
+        return False
+    qn = conn.ops.quote_name
+    bounds = [month, next_month(month)]
+    with transaction.atomic(using=conn.alias), conn.cursor() as cursor:
+        cursor.execute(f'CREATE TABLE {qn(name)} (LIKE {qn(TABLE)} INCLUDING DEFAULTS)')
+        cursor.execute(
+            f'WITH moved AS (DELETE FROM {qn(DEFAULT_PARTITION)} WHERE timestamp >= %s AND timestamp < %s RETURNING *) '
+            f'INSERT INTO {qn(name)} SELECT * FROM moved', bounds,
+        )
+        cursor.execute(
+            f"ALTER TABLE {qn(TABLE)} ATTACH PARTITION {qn(name)} FOR VALUES FROM ('{bounds[0].isoformat()}') TO ('{bounds[1].isoformat()}')"
+        )
+    return True
+
+
+def ensure_partitions(months_ahead=None, conn=connection):
+    months_ahead = _config()['PARTITION_MONTHS_AHEAD'] if months_ahead is None else months_ahead
+    month = month_start(timezone.now())
+    created = []
+    for _ in range(months_ahead + 1):
+        if ensure_partition(month, conn):
+            created.append(partition_name(month))
+        month = next_month(month)
+    return created
+
+
+# -------- Lưu trữ ra file --------
+
+def _archive_rows(start, end):
+    timestamp = DateTimeField()
+    rows = (
+        ActivityLog.objects.filter(timestamp__gte=start, timestamp__lt=end)
+        .order_by('timestamp', 'id')
+        .values('id', 'action_description', 'project_id', 'task_id', 'timestamp', 'actor_id',
+                'actor__username', 'actor__email', 'actor__first_name', 'actor__last_name')
+    )
+    for row in rows.iterator(chunk_size=2000):
+        actor = None
+        if row['actor_id'] is not None:
+            actor = {
+                'id': row['actor_id'], 'username': row['actor__username'], 'email': row['actor__email'],
+                'first_name': row['actor__first_name'], 'last_name': row['actor__last_name'],
+            }
+        # Cùng dạng với ActivityLogSerializer để endpoint trả về được ngay
+        yield {
+            'id': row['id'], 'action_description': row['action_description'], 'actor': actor,
+            'project': row['project_id'], 'task': row['task_id'],
+            'timestamp': timestamp.to_representation(row['timestamp']),
+        }
+
+
+def read_manifest(directory=None):
+    path = os.path.join(directory or archive_dir(), MANIFEST)
+    if not os.path.exists(path):
+        return {'files': []}
+    with open(path, encoding='utf-8') as manifest:
+        return json.load(manifest)
+
+
+def _write_manifest(manifest, directory):
+    path = os.path.join(directory, MANIFEST)
+    with open(path + '.tmp', 'w', encoding='utf-8') as output:
+        json.dump(manifest, output, ensure_ascii=False, indent=2)
+        output.flush()
+        os.fsync(output.fileno())
+    os.replace(path + '.tmp', path)
+
+
+def archive_range(start, end, directory=None):
+    """
+    Ghi các entry trong [start, end) ra một file .ndjson.gz, thêm vào manifest rồi mới xóa khỏi CSDL.
+    Nếu bị ngắt giữa chừng, chạy lại có thể ghi trùng entry: phía đọc bỏ trùng theo id.
+    """
+    directory = directory or archive_dir()
+    os.makedirs(directory, exist_ok=True)
+    stamp = timezone.now().strftime('%Y%m%dT%H%M%S%f')
+    filename = f'activity-{start:%Y%m%d}-{end:%Y%m%d}-{stamp}.ndjson.gz'
+    path = os.path.join(directory, filename)
+    encoder = DjangoJSONEncoder(ensure_ascii=False)
+    ids, projects, tasks = [], set(), set()
+    digest = hashlib.sha256()
+    with gzip.open(path + '.tmp', 'wb') as output:
+        for record in _archive_rows(start, end):
+            line = (encoder.encode(record) + '\n').encode('utf-8')
+            output.write(line)
+            digest.update(line)
+            ids.append(record['id'])
+            if record['project'] is not None:
+                projects.add(record['project'])
+            if record['task'] is not None:
+                tasks.add(record['task'])
+    if not ids:
+        os.remove(path + '.tmp')
+        return None
+    os.replace(path + '.tmp', path)
+
+    entry = {
+        'file': filename, 'from': start.isoformat(), 'to': end.isoformat(), 'count': len(ids),
+        'max_id': max(ids), 'sha256': digest.hexdigest(),
+        'projects': sorted(projects), 'tasks': sorted(tasks),
+    }
+    with _manifest_lock:
+        manifest = read_manifest(directory)
+        manifest['files'].append(entry)
+        _write_manifest(manifest, directory)
+
+    _delete_range(start, end, ids)
+    return entry
+
+
+# Chỉ xóa đúng các entry đã ghi ra file: transaction lấy id nhỏ hơn nhưng commit sau khi _archive_rows đọc
+# tháng đó vẫn có entry nằm trong khoảng [start, end) chưa được lưu trữ
+def _delete_range(start, end, ids):
+    conn = connection
+    month = month_start(start)
+    whole_month = start == month and end == next_month(month)
+    if whole_month and is_partitioned(conn) and partition_name(month) in existing_partitions(conn):
+        qn = conn.ops.quote_name
+        with transaction.atomic(), conn.cursor() as cursor:
+            # DETACH chờ các transaction đang ghi vào phân vùng kết thúc, sau đó bảng tách ra không đổi nữa.
+            # Entry chưa có trong file được trả về bảng chính (phân vùng DEFAULT), lần lưu trữ sau sẽ xử lý
+            cursor.execute(f'ALTER TABLE {qn(TABLE)} DETACH PARTITION {qn(partition_name(month))}')
+            cursor.execute(
+                f'INSERT INTO {qn(TABLE)} SELECT * FROM {qn(partition_name(month))} AS detached '
+                f'WHERE NOT EXISTS (SELECT 1 FROM unnest(%s::bigint[]) AS archived(id) WHERE archived.id = detached.id)',
+                [ids],
+            )
+            cursor.execute(f'DROP TABLE {qn(partition_name(month))}')
+        return
+    for offset in range(0, len(ids), DELETE_BATCH):
+        ActivityLog.objects.filter(
+            timestamp__gte=start, timestamp__lt=end, id__in=ids[offset:offset + DELETE_BATCH]).delete()
+
+
+def archive_older_than(days=None, directory=None):
+    """
+    Lưu trữ mọi entry cũ hơn `days` ngày, theo từng tháng; trả về danh sách entry manifest mới.
+    """
+    days = _config()['KEEP_DAYS'] if days is None else days
+    cutoff = timezone.now() - timedelta(days=days)
+    oldest = ActivityLog.objects.filter(timestamp__lt=cutoff).order_by('timestamp').values_list('timestamp', flat=True).first()
+    entries = []
+    if oldest is None:
+        return entries
+    month = month_start(oldest)
+    while month < cutoff:
+        end = min(next_month(month), cutoff)
+        entry = archive_range(month, end, directory)
+        if entry:
+            entries.append(entry)
+        month = next_month(month)
+    return entries
+
+
+def read_archived(project_id=None, task_id=None, since=None, until=None, directory=None):
+    """
+    Đọc các entry đã lưu trữ của một dự án/công việc (mới nhất trước). Manifest cho biết file nào
+    có liên quan nên chỉ những file đó được giải nén.
+    """
+    directory = directory or archive_dir()
+    records = {}
+    for entry in read_manifest(directory)['files']:
+        if project_id is not None and project_id not in entry['projects']:
+            continue
+        if task_id is not None and task_id not in entry['tasks']:
+            continue
+        if since and parse_datetime(entry['to']) <= since:
+            continue
+        if until and parse_datetime(entry['from']) >= until:
+            continue
+        with gzip.open(os.path.join(directory, entry['file']), 'rt', encoding='utf-8') as archive:
+            for line in archive:
+                record = json.loads(line)
+                if project_id is not None and record['project'] != project_id:
+                    continue
+                if task_id is not None and record['task'] != task_id:
+                    continue
+                timestamp = parse_datetime(record['timestamp'])
+                if (since and timestamp < since) or (until and timestamp >= until):
+                    continue
+                records[record['id']] = (timestamp, record)
+    ordered = sorted(records.values(), key=lambda item: (item[0], item[1]['id']), reverse=True)
+    return [record for timestamp, record in ordered]
@@ -0,0 +1,128 @@
+import re
+
+from django.db import connections
+from django.db.models import BooleanField, FloatField, Q
+from django.db.models.expressions import RawSQL
+
+
+# Tìm kiếm toàn văn cho Task/Project/User, dùng từ tham số ?search= của các FilterSet.
+# - PostgreSQL: cột tsvector sinh tự động (GENERATED ... STORED) + index GIN, cộng thêm
+#   index trigram (pg_trgm) trên cột chính để chịu được lỗi gõ sai; xếp hạng ts_rank + similarity.
+# - SQLite: bảng ảo FTS5 (external content) đồng bộ bằng trigger; xếp hạng bm25.
+# - CSDL khác hoặc chưa có index: quay về __icontains như trước.
+# Cột/index/trigger được tạo bằng SQL chép cố định trong migration 0004_search_indexes; index trigram
+# dựng trên cột gốc (0011) để khớp `cột % term` trong search().
+# Lưu ý SQLite: migration nào "remake" bảng gốc (AlterField...) sẽ làm mất trigger,
+# khi đó cần chép lại các lệnh CREATE TRIGGER của 0004 vào migration đó.
+
+SEARCH_CONFIG = 'simple'
+VECTOR_COLUMN = 'search_vector'
+
+# Bảng -> (danh sách (cột, trọng số), cột dùng cho trigram); phải khớp với migration 0004
+SEARCH_INDEXES = {
+    'API_task': ([('title', 'A'), ('description', 'B')], 'title'),
+    'API_project': ([('name', 'A'), ('description', 'B')], 'name'),
+    'API_user': ([('username', 'A'), ('email', 'A'), ('first_name', 'B'), ('last_name', 'B')], 'username'),
+}
+
+# Trọng số cột cho bm25 trên SQLite, tương ứng setweight A/B trên PostgreSQL
+BM25_WEIGHTS = {'A': '10.0', 'B': '1.0'}
+
+_installed = {}
+
+
+def fts_table(table):
+    return f'{table}_fts'
+
+
+def tokenize(term):
+    return re.findall(r'\w+', term.lower())
+
+
+# Trả về (có index toàn văn, có pg_trgm) cho bảng trên kết nối này; kết quả được nhớ lại
+def _installed_features(connection, table):
+    key = (connection.alias, table)
+    if key not in _installed:
+        with connection.cursor() as cursor:
+            if connection.vendor == 'postgresql':
+                columns = connection.introspection.get_table_description(cursor, table)
+                cursor.execute("SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'")
+                _installed[key] = (any(column.name == VECTOR_COLUMN for column in columns), cursor.fetchone() is not None)
+            elif connection.vendor == 'sqlite':
+                _installed[key] = (fts_table(table) in connection.introspection.table_names(cursor), False)
+            else:
+                _installed[key] = (False, False)
+    return _installed[key]
+
+
+def _fallback(queryset, columns, term):
+    condition = Q()
+    for column, weight in columns:
+        condition |= Q(**{f'{column}__icontains': term})
+    return queryset.filter(condition)
+
+
+def search(queryset, term):
+    """
+    Lọc `queryset` theo `term` và xếp theo độ liên quan (annotation `search_rank`, cao trước).
+    """
+    table = queryset.model._meta.db_table
+    columns, trigram_column = SEARCH_INDEXES[table]
+    tokens = tokenize(term)
+    connection = connections[queryset.db]
+    indexed, trigram_enabled = _installed_features(connection, table)
+    if not tokens or not indexed:
+        return _fallback(queryset, columns, term)
+
+    qn = connection.ops.quote_name
+    if connection.vendor == 'postgresql':
+        # Mỗi từ khớp theo tiền tố (gõ tới đâu tìm tới đó), các từ nối bằng AND
+        tsquery = ' & '.join(f'{token}:*' for token in tokens)
+        vector = f'{qn(table)}.{qn(VECTOR_COLUMN)}'
+        trigram = f'{qn(table)}.{qn(trigram_column)}'
+        if trigram_enabled:
+            match = RawSQL(
+                f"({vector} @@ to_tsquery('{SEARCH_CONFIG}', %s) OR {trigram} %% %s)",
+                [tsquery, term], output_field=BooleanField(),
+            )
+            rank = RawSQL(
+                f"ts_rank({vector}, to_tsquery('{SEARCH_CONFIG}', %s)) + similarity({trigram}, %s)",
+                [tsquery, term], output_field=FloatField(),
+            )
+        else:
+            match = RawSQL(f"{vector} @@ to_tsquery('{SEARCH_CONFIG}', %s)", [tsquery], output_field=BooleanField())
+            rank = RawSQL(f"ts_rank({vector}, to_tsquery('{SEARCH_CONFIG}', %s))", [tsquery], output_field=FloatField())
+        return queryset.filter(match).annotate(search_rank=rank).order_by('-search_rank', '-id')
+
+    fts = qn(fts_table(table))
+    fts_query = ' '.join(f'"{token}"*' for token in tokens)
+    weights = ', '.join(BM25_WEIGHTS[weight] for column, weight in columns)
+    matched = RawSQL(f'SELECT rowid FROM {fts} WHERE {fts} MATCH %s', [fts_query])
+    rank = RawSQL(
+        f'(SELECT -bm25({fts}, {weights}) FROM {fts} WHERE {fts} MATCH %s AND rowid = {qn(table)}.{qn("id")})',
+        [fts_query], output_field=FloatField(),
+    )
+    return queryset.filter(id__in=matched).annotate(search_rank=rank).order_by('-search_rank', '-id')
+
+
+# Index tiền tố cho autocomplete (API/autocomplete.py): khớp "bắt đầu bằng" không phân biệt hoa thường.
+# - PostgreSQL: btree trên LOWER(cột) với text_pattern_ops, dùng được cho LOWER(cột) LIKE 'abc%'.
+# - SQLite: index biểu thức lower(cột); truy vấn dùng khoảng lower(cột) >= 'abc' AND < 'abd'.
+# Index được tạo bằng SQL chép cố định trong migration 0009_user_prefix_indexes (tên <bảng>_<cột>_prefix).
+PREFIX_INDEXES = {
+    'API_user': ['username', 'first_name', 'last_name', 'email'],
+}
+
+
+def prefix_match(connection, table, column, prefix):
+    """
+    (sql, params) của điều kiện "LOWER(cột) bắt đầu bằng `prefix`" dạng dùng được index tiền tố.
+    `prefix` phải đã viết thường.
+    """
+    qn = connection.ops.quote_name
+    target = f'LOWER({qn(table)}.{qn(column)})'
+    if connection.vendor == 'sqlite':
+        upper = prefix[:-1] + chr(ord(prefix[-1]) + 1)
+        return f'({target} >= %s AND {target} < %s)', [prefix, upper]
+    escaped = prefix.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+    return f'{target} LIKE %s', [escaped + '%']
@@ -1,6 +1,8 @@
 from rest_framework import serializers
-from .models import User, Project, Task, Comment, Attachment, ActivityLog
+from .models import User, Project, Task, Comment, Attachment, ActivityLog, UploadSession
+from . import perf
 from rest_framework.validators import UniqueValidator
+from django.urls import reverse
 
 class SignupSerializer(serializers.ModelSerializer):
     first_name = serializers.CharField(required=True)
@@ -33,6 +35,88 @@ class SignupSerializer(serializers.ModelSerializer):
             ) 
         return user
 
+class SparseFieldsMixin:
+    """
+    Chọn trường khi đọc: ?fields=id,name và nhúng quan hệ theo yêu cầu: ?expand=owner,members
+    - Không có ?fields=: giữ nguyên như cũ (mọi quan hệ lồng đều nhúng object).
+    - Có ?fields=: chỉ trả các trường được liệt kê; quan hệ lồng có trong fields nhưng không có trong
+      expand trả về id (hoặc danh sách id), có trong expand thì nhúng object (expand tự thêm vào fields).
+    - Quan hệ không được yêu cầu không được đọc: prepare_queryset() chỉ JOIN/prefetch phần cần thiết.
+    """
+    def __init__(self, *args, fields=None, expand=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        if fields is None:
+            return
+        expand = set(expand or ())
+        keep = set(fields) | expand
+        for name, field in list(self.fields.items()):
+            if field.write_only:
+                continue
+            if name not in keep:
+                self.fields.pop(name)
+            elif isinstance(field, serializers.BaseSerializer) and name not in expand:
+                self.fields[name] = serializers.PrimaryKeyRelatedField(
+                    read_only=True, many=isinstance(field, serializers.ListSerializer),
+                    **({'source': field.source} if field.source != name else {}),
+                )
+
+    @property
+    def data(self):
+        with perf.timed('serialize'):
+            return super().data
+
+    @classmethod
+    def read_options(cls, request):
+        """
+        {'fields': [...], 'expand': [...]} từ query string (rỗng nếu không chọn trường); tên sai -> 400.
+        """
+        params = request.query_params
+        fields = [name for name in params.get('fields', '').split(',') if name.strip()]
+        expand = [name for name in params.get('expand', '').split(',') if name.strip()]
+        if not fields and not expand:
+            return {}
+        # Thứ tự khóa trong kết quả theo serializer: bỏ trùng và sắp xếp để mỗi lựa chọn chỉ có một dạng
+        # (khóa cache của đường đọc nhanh, xem fastpath.for_serializer)
+        fields, expand = sorted({name.strip() for name in fields}), sorted({name.strip() for name in expand})
+        readable = {name: field for name, field in cls().fields.items() if not field.write_only}
+        unknown = [name for name in fields if name not in readable]
+        if unknown:
+            raise serializers.ValidationError({'fields': f"Trường không hợp lệ: {', '.join(unknown)}."})
+        unknown = [name for name in expand if not isinstance(readable.get(name), serializers.BaseSerializer)]
+        if unknown:
+            raise serializers.ValidationError({'expand': f"Không thể mở rộng: {', '.join(unknown)}."})
+        # Chỉ có ?expand=: mặc định mọi quan hệ đã được nhúng
+        return {'fields': fields, 'expand': expand} if fields else {}
+
+    @classmethod
+    def prepare_queryset(cls, queryset, **options):
+        """
+        select_related/prefetch_related đúng các quan hệ mà bản serializer với `options` sẽ đọc.
+        """
+        for field in cls(**options)._readable_fields:
+            if isinstance(field, (serializers.ListSerializer, serializers.ManyRelatedField)):
+                queryset = queryset.prefetch_related(field.source)
+            elif isinstance(field, serializers.BaseSerializer):
+                queryset = queryset.select_related(field.source)
+        return queryset
+
+    @classmethod
+    def select(cls, data, fields=None, expand=None):
+        """
+        Áp dụng `options` lên một dict đã serialize đầy đủ (vd: nhật ký đọc từ file lưu trữ).
+        """
+        if fields is None:
+            return data
+        keep = set(fields) | set(expand or ())
+        return {
+            name: (
+                value if name in (expand or ()) or not isinstance(value, (dict, list))
+                else [item['id'] for item in value] if isinstance(value, list) else value['id']
+            )
+            for name, value in data.items() if name in keep
+        }
+
+
 class UserSerializer(serializers.ModelSerializer):
     # Serializer để hiển thị thông tin User một cách an toàn.
     class Meta:
@@ -44,7 +128,7 @@ class UserBasicSerializer(serializers.ModelSerializer):
         model = User
         fields = ['id', 'username', 'first_name', 'last_name', 'email']
 
-class ProjectSerializer(serializers.ModelSerializer):
+class ProjectSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     owner = UserSerializer(read_only=True)
     members = UserSerializer(many=True, read_only=True)
     
@@ -58,9 +142,22 @@ class ProjectSerializer(serializers.ModelSerializer):
         fields = ['id', 'name', 'description', 'owner', 'members', 'member_ids', 'created_at', 'updated_at']
         read_only_fields = ['owner']
 
-class TaskSerializer(serializers.ModelSerializer):
+class PreloadedUserField(serializers.PrimaryKeyRelatedField):
+    # Ưu tiên user đã nạp sẵn trong context['users'] (vd: bulk endpoint) thay vì query từng id
+    def to_internal_value(self, data):
+        users = self.context.get('users')
+        if users is not None and not isinstance(data, bool):
+            try:
+                user = users.get(int(data))
+            except (TypeError, ValueError):
+                user = None
+            if user is not None:
+                return user
+        return super().to_internal_value(data)
+
+class TaskSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     assignee = UserSerializer(read_only=True)
-    assignee_id = serializers.PrimaryKeyRelatedField(
+    assignee_id = PreloadedUserField(
         write_only=True, queryset=User.objects.all(), source='assignee', allow_null=True, required=False
     )
 
@@ -72,7 +169,7 @@ class TaskSerializer(serializers.ModelSerializer):
         ]
         read_only_fields = ['project']
 
-class CommentSerializer(serializers.ModelSerializer):
+class CommentSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     author = UserSerializer(read_only=True)
 
     class Meta:
@@ -82,13 +179,39 @@ class CommentSerializer(serializers.ModelSerializer):
 
 class AttachmentSerializer(serializers.ModelSerializer):
     uploader = UserSerializer(read_only=True)
+    download_url = serializers.SerializerMethodField()
+    thumbnail_url = serializers.SerializerMethodField()
 
     class Meta:
         model = Attachment
-        fields = ['id', 'file', 'description', 'uploader', 'task', 'uploaded_at']
-        read_only_fields = ['uploader', 'task']
+        fields = ['id', 'file', 'filename', 'description', 'uploader', 'task', 'uploaded_at', 'download_url', 'thumbnail_url']
+        read_only_fields = ['filename', 'uploader', 'task']
+        # file chỉ dùng khi tải lên: đường dẫn lưu trữ không trả về cho client, tải qua download_url
+        extra_kwargs = {'file': {'write_only': True}}
+
+    # Đường dẫn tải có kiểm tra quyền
+    def get_download_url(self, obj):
+        return reverse('attachment-download', kwargs={
+            'project_pk': obj.task.project_id, 'task_pk': obj.task_id, 'pk': obj.pk,
+        })
+
+    # None khi tệp không phải ảnh hoặc ảnh thu nhỏ chưa sinh xong
+    def get_thumbnail_url(self, obj):
+        if not obj.thumbnail:
+            return None
+        return reverse('attachment-thumbnail', kwargs={
+            'project_pk': obj.task.project_id, 'task_pk': obj.task_id, 'pk': obj.pk,
+        })
+
+class UploadSessionSerializer(serializers.ModelSerializer):
+    size = serializers.IntegerField(min_value=0)
+
+    class Meta:
+        model = UploadSession
+        fields = ['id', 'filename', 'description', 'size', 'offset', 'created_at', 'updated_at']
+        read_only_fields = ['offset']
 
-class ActivityLogSerializer(serializers.ModelSerializer):
+class ActivityLogSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     actor = UserSerializer(read_only=True)
 
     class Meta:
@@ -0,0 +1,116 @@
+from django.core.signals import request_finished
+from django.db import transaction
+from django.db.backends.signals import connection_created
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from . import activity, authentication, autocomplete, membership, nplusone, perf, stats, thumbnails
+from .models import Attachment, Project, Task, User
+
+
+# Thay đổi thành viên dự án (add/remove/set/clear, từ cả hai phía quan hệ) -> bỏ cache membership.
+# Đổi thế hệ sau khi commit: làm trước thì request khác có thể đọc lại danh sách cũ (chưa commit)
+# và cache nó dưới thế hệ mới cho tới hết TTL. Transaction rollback thì không cần bỏ gì.
+@receiver(m2m_changed, sender=Project.members.through)
+def invalidate_membership_on_change(sender, instance, action, reverse, pk_set, **kwargs):
+    if action in ('post_add', 'post_remove'):
+        pairs = [(pk, instance.pk) if reverse else (instance.pk, pk) for pk in pk_set]
+    elif action == 'post_clear' and not reverse:
+        project_id = instance.pk
+        transaction.on_commit(lambda: membership.invalidate_project(project_id))
+        return
+    elif action == 'pre_clear' and reverse:
+        pairs = [(project_id, instance.pk) for project_id in instance.projects.values_list('pk', flat=True)]
+    else:
+        return
+    transaction.on_commit(lambda: [membership.invalidate_membership(*pair) for pair in pairs])
+
+
+# Danh sách thành viên là một phần nội dung dự án: cập nhật updated_at để ETag/Last-Modified đổi theo
+@receiver(m2m_changed, sender=Project.members.through)
+def touch_project_on_member_change(sender, instance, action, reverse, pk_set, **kwargs):
+    if action in ('post_add', 'post_remove') and pk_set:
+        project_ids = pk_set if reverse else [instance.pk]
+    elif action == 'post_clear' and not reverse:
+        project_ids = [instance.pk]
+    elif action == 'pre_clear' and reverse:
+        project_ids = list(instance.projects.values_list('pk', flat=True))
+    else:
+        return
+    Project.objects.filter(pk__in=project_ids).update(updated_at=timezone.now())
+
+
+@receiver(post_delete, sender=Project)
+def invalidate_membership_on_project_delete(sender, instance, **kwargs):
+    project_id = instance.pk
+    transaction.on_commit(lambda: membership.invalidate_project(project_id))
+    stats.invalidate(project_id)
+
+
+# Giữ bộ đếm thống kê dự án (chế độ cache) khớp với từng lần tạo/sửa/xóa task.
+# Chênh lệch chỉ cộng vào cache sau khi transaction commit: thay đổi bị rollback không làm lệch bộ đếm.
+# bulk_create/bulk_update không phát signal: TaskBulkView tự gọi stats.invalidate().
+@receiver(pre_save, sender=Task)
+def remember_task_stats_snapshot(sender, instance, **kwargs):
+    if not stats.is_cached() or instance.pk is None:
+        return
+    previous = Task.objects.filter(pk=instance.pk).values_list('project_id', 'status', 'priority', 'assignee_id').first()
+    instance._stats_previous = previous
+
+
+@receiver(post_save, sender=Task)
+def update_stats_on_task_save(sender, instance, created, **kwargs):
+    if not stats.is_cached():
+        return
+    previous = getattr(instance, '_stats_previous', None)
+    instance._stats_previous = None
+    new = stats.task_snapshot(instance)
+    if previous is None or previous[0] == instance.project_id:
+        changes = [(instance.project_id, previous[1:] if previous else None, new)]
+    else:
+        changes = [(previous[0], previous[1:], None), (instance.project_id, None, new)]
+    transaction.on_commit(lambda: [stats.apply_task_change(*change) for change in changes])
+
+
+@receiver(post_delete, sender=Task)
+def update_stats_on_task_delete(sender, instance, **kwargs):
+    if stats.is_cached():
+        project_id, old = instance.project_id, stats.task_snapshot(instance)
+        transaction.on_commit(lambda: stats.apply_task_change(project_id, old, None))
+
+
+# Tệp đính kèm mới là ảnh -> sinh ảnh thu nhỏ sau khi commit, ngoài luồng request
+@receiver(post_save, sender=Attachment)
+def schedule_thumbnail(sender, instance, created, **kwargs):
+    if created:
+        thumbnails.schedule(instance)
+
+
+# Tên/email user thay đổi: bỏ các gợi ý autocomplete đã cache trong tiến trình
+# (bỏ qua các lần lưu chỉ cập nhật last_login khi đăng nhập)
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def clear_autocomplete_on_user_change(sender, update_fields=None, **kwargs):
+    if update_fields and not set(update_fields) & {'username', 'first_name', 'last_name', 'email', 'is_active'}:
+        return
+    autocomplete.clear()
+
+
+# User thay đổi (khóa tài khoản, đổi quyền, đổi mật khẩu...) hoặc bị xóa: bỏ user khỏi cache xác thực JWT
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_cached_auth_user(sender, instance, update_fields=None, **kwargs):
+    if update_fields and set(update_fields) <= {'last_login'}:
+        return
+    authentication.invalidate_user(instance.pk)
+
+
+# Flush nhật ký hoạt động đang gom (chế độ buffered) khi request kết thúc
+request_finished.connect(activity.flush_on_request_end, dispatch_uid='activity_flush_on_request_end')
+
+# Đo thời gian SQL của từng request (API/perf.py)
+connection_created.connect(perf.install_db_hook, dispatch_uid='perf_install_db_hook')
+
+# Phát hiện N+1 query theo từng request (API/nplusone.py)
+connection_created.connect(nplusone.install_db_hook, dispatch_uid='nplusone_install_db_hook')
@@ -0,0 +1,174 @@
+import threading
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import DEFAULT_DB_ALIAS
+from django.db.models import Count, Q
+from django.utils import timezone
+
+from .models import Task, User
+
+
+# Thống kê công việc của dự án cho dashboard (projects/<pk>/stats/).
+# - Mặc định: một truy vấn GROUP BY assignee với các COUNT có điều kiện, cộng dồn ra số liệu toàn dự án.
+# - CACHED: giữ bộ đếm status/priority theo assignee trong Django cache, cập nhật theo từng lần
+#   tạo/sửa/xóa task (signals.py). "Quá hạn" phụ thuộc thời điểm đọc nên luôn đếm lại, nhưng chỉ
+#   đọc các task quá hạn qua index một phần task_project_open_due_idx.
+#   Nhiều worker cùng ghi có thể làm lệch bộ đếm; TIMEOUT giới hạn thời gian lệch.
+#   Bộ đếm đưa vào cache đọc từ primary: bản sao (replicas.py) trễ sẽ thiếu các thay đổi vừa cộng/trừ vào cache.
+
+DEFAULTS = {
+    'CACHED': False,
+    'TIMEOUT': 300,
+    'CACHE_ALIAS': 'default',
+}
+
+STATUSES = Task.Status.values
+PRIORITIES = Task.Priority.values
+
+_lock = threading.Lock()
+
+
+def _config():
+    return {**DEFAULTS, **getattr(settings, 'PROJECT_STATS', {})}
+
+
+def _cache_key(project_id):
+    return f'project-stats:{project_id}'
+
+
+def _overdue_filter(now):
+    return Q(due_date__lt=now) & ~Q(status=Task.Status.DONE)
+
+
+def _empty_counters():
+    return {'username': None, 'status': dict.fromkeys(STATUSES, 0), 'priority': dict.fromkeys(PRIORITIES, 0)}
+
+
+# Một truy vấn duy nhất: mỗi dòng là một assignee (NULL = chưa giao) với đủ các bộ đếm
+def _aggregate(project_id, now, with_overdue=True, using=None):
+    counters = {f'status_{value}': Count('id', filter=Q(status=value)) for value in STATUSES}
+    counters.update({f'priority_{value}': Count('id', filter=Q(priority=value)) for value in PRIORITIES})
+    if with_overdue:
+        counters['overdue'] = Count('id', filter=_overdue_filter(now))
+    rows = (
+        Task.objects.using(using).filter(project_id=project_id)
+        .values('assignee_id', 'assignee__username')
+        .annotate(**counters)
+        .order_by()
+    )
+    result = {}
+    for row in rows:
+        result[row['assignee_id']] = {
+            'username': row['assignee__username'],
+            'status': {value: row[f'status_{value}'] for value in STATUSES},
+            'priority': {value: row[f'priority_{value}'] for value in PRIORITIES},
+            'overdue': row.get('overdue', 0),
+        }
+    return result
+
+
+def _overdue_by_assignee(project_id, now):
+    rows = (
+        Task.objects.filter(Q(project_id=project_id) & _overdue_filter(now))
+        .values('assignee_id')
+        .annotate(overdue=Count('id'))
+        .order_by()
+    )
+    return {row['assignee_id']: row['overdue'] for row in rows}
+
+
+def _cached_counters(project_id, config):
+    cache = caches[config['CACHE_ALIAS']]
+    counters = cache.get(_cache_key(project_id))
+    if counters is None:
+        counters = _aggregate(project_id, timezone.now(), with_overdue=False, using=DEFAULT_DB_ALIAS)
+        cache.set(_cache_key(project_id), counters, config['TIMEOUT'])
+    return counters
+
+
+def get_project_stats(project, user):
+    config = _config()
+    now = timezone.now()
+    if config['CACHED']:
+        per_assignee = _cached_counters(project.pk, config)
+        overdue = _overdue_by_assignee(project.pk, now)
+        for assignee_id, counters in per_assignee.items():
+            counters['overdue'] = overdue.get(assignee_id, 0)
+    else:
+        per_assignee = _aggregate(project.pk, now)
+
+    by_status = dict.fromkeys(STATUSES, 0)
+    by_priority = dict.fromkeys(PRIORITIES, 0)
+    overdue_total = 0
+    for counters in per_assignee.values():
+        for value, count in counters['status'].items():
+            by_status[value] += count
+        for value, count in counters['priority'].items():
+            by_priority[value] += count
+        overdue_total += counters['overdue']
+
+    # Assignee mới xuất hiện qua bộ đếm cache chưa có username
+    missing = [pk for pk, counters in per_assignee.items() if pk is not None and counters['username'] is None]
+    if missing:
+        usernames = dict(User.objects.filter(pk__in=missing).values_list('pk', 'username'))
+        for pk in missing:
+            per_assignee[pk]['username'] = usernames.get(pk)
+    by_assignee = [
+        {
+            'id': assignee_id,
+            'username': counters['username'],
+            'total': sum(counters['status'].values()),
+            'by_status': counters['status'],
+            'overdue': counters['overdue'],
+        }
+        for assignee_id, counters in sorted(per_assignee.items(), key=lambda item: (item[0] is None, item[0] or 0))
+        if assignee_id is not None and sum(counters['status'].values())
+    ]
+    mine = per_assignee.get(user.pk)
+    unassigned = per_assignee.get(None)
+    return {
+        'project': project.pk,
+        'total': sum(by_status.values()),
+        'by_status': by_status,
+        'by_priority': by_priority,
+        'overdue': overdue_total,
+        'assigned_to_me': sum(mine['status'].values()) if mine else 0,
+        'unassigned': sum(unassigned['status'].values()) if unassigned else 0,
+        'by_assignee': by_assignee,
+        'cached': config['CACHED'],
+    }
+
+
+def is_cached():
+    return _config()['CACHED']
+
+
+def task_snapshot(task):
+    return (task.status, task.priority, task.assignee_id)
+
+
+# Cộng/trừ bộ đếm đã cache khi một task đổi trạng thái; không có cache thì bỏ qua (lần đọc sau tự tính)
+def apply_task_change(project_id, old=None, new=None):
+    config = _config()
+    if not config['CACHED'] or old == new:
+        return
+    cache = caches[config['CACHE_ALIAS']]
+    with _lock:
+        counters = cache.get(_cache_key(project_id))
+        if counters is None:
+            return
+        for snapshot, delta in ((old, -1), (new, 1)):
+            if snapshot is None:
+                continue
+            status, priority, assignee_id = snapshot
+            entry = counters.setdefault(assignee_id, _empty_counters())
+            entry['status'][status] = entry['status'].get(status, 0) + delta
+            entry['priority'][priority] = entry['priority'].get(priority, 0) + delta
+        cache.set(_cache_key(project_id), counters, config['TIMEOUT'])
+
+
+def invalidate(project_id):
+    config = _config()
+    if config['CACHED']:
+        caches[config['CACHE_ALIAS']].delete(_cache_key(project_id))
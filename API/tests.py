@@ -1,3 +1,1684 @@
-from django.test import TestCase
+import asyncio
+import base64
+import csv
+import hashlib
+import io
+import gzip
+import json
+import os
+import tempfile
+import time
+import warnings
+from datetime import timedelta
+from decimal import Decimal
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+from asgiref.sync import sync_to_async
+from django.core.cache import caches
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import IntegrityError, connection, transaction
+from django.http import HttpResponse
+from django.test import AsyncClient, RequestFactory, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from PIL import Image
+from rest_framework.exceptions import ErrorDetail
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+from rest_framework_simplejwt.tokens import AccessToken, RefreshToken
+
+from . import (
+    activity, authentication, autocomplete, benchmarks, fastpath, loadtest, membership, nplusone, perf, realtime, replicas,
+    retention, stats, uploads,
+)
+from .queryplans import plan_problems
+from .renderers import ORJSONRenderer
+from .serializers import ActivityLogSerializer, AttachmentSerializer, ProjectSerializer, TaskSerializer
+from .models import User, Project, Task, Comment, Attachment, ActivityLog, Blob, UploadSession
+
+
+# Kiểm tra số câu SQL của từng endpoint: không được tăng theo số dòng trả về (chặn N+1)
+# (danh sách có ETag tốn thêm một query validator: max/count, hoặc đọc (id, updated_at) của trang)
+class QueryCountTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create_user('owner', 'owner@example.com', 'password123')
+        cls.member = User.objects.create_user('member', 'member@example.com', 'password123')
+        cls.project = Project.objects.create(name='Dự án', owner=cls.owner)
+        cls.project.members.add(cls.owner, cls.member)
+        cls.task = Task.objects.create(title='Công việc', project=cls.project, assignee=cls.member)
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.member)
+
+    def add_rows(self, count):
+        for i in range(count):
+            user = User.objects.create_user(f'user{User.objects.count()}')
+            project = Project.objects.create(name=f'Dự án {i}', owner=user)
+            project.members.add(user, self.member)
+            self.project.members.add(user)
+            task = Task.objects.create(title=f'Công việc {i}', project=self.project, assignee=user)
+            Comment.objects.create(task=self.task, author=user, body='Bình luận')
+            Attachment.objects.create(task=self.task, uploader=user, file='attachments/test.txt')
+            ActivityLog.objects.create(actor=user, action_description='test', project=self.project, task=self.task)
+            ActivityLog.objects.create(actor=user, action_description='test', project=project, task=task)
+
+    def count_queries(self, url):
+        membership.clear()
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200, url)
+        return len(context.captured_queries)
+
+    def assertQueryCeiling(self, url, ceiling):
+        self.add_rows(2)
+        small = self.count_queries(url)
+        self.add_rows(8)
+        large = self.count_queries(url)
+        self.assertEqual(small, large, f'{url}: số query tăng theo số dòng ({small} -> {large})')
+        self.assertLessEqual(large, ceiling, f'{url}: {large} query > trần {ceiling}')
+
+    def test_user_list(self):
+        self.assertQueryCeiling('/users/', 1)
+
+    def test_project_list(self):
+        self.assertQueryCeiling('/projects/', 3)
+
+    def test_project_list_paginated(self):
+        self.assertQueryCeiling('/projects/?page_size=5', 3)
+
+    def test_project_detail(self):
+        self.assertQueryCeiling(f'/projects/{self.project.pk}/', 2)
+
+    def test_task_list(self):
+        self.assertQueryCeiling(f'/projects/{self.project.pk}/tasks/', 3)
+
+    def test_task_detail(self):
+        self.assertQueryCeiling(f'/projects/{self.project.pk}/tasks/{self.task.pk}/', 2)
+
+    def test_comment_list(self):
+        self.assertQueryCeiling(f'/projects/{self.project.pk}/tasks/{self.task.pk}/comments/', 3)
+
+    def test_attachment_list(self):
+        self.assertQueryCeiling(f'/projects/{self.project.pk}/tasks/{self.task.pk}/attachments/', 2)
+
+    def test_activity_project(self):
+        self.assertQueryCeiling(f'/projects/{self.project.pk}/activity/', 3)
+
+    def test_activity_task(self):
+        self.assertQueryCeiling(f'/projects/{self.project.pk}/tasks/{self.task.pk}/activity/', 3)
+
+
+# Phân trang keyset: đi hết mọi kiểu sắp xếp (kể cả đoạn NULL và giá trị trùng) không trùng, không sót;
+# cursor hỏng hoặc bị sửa -> 404
+class KeysetPaginationTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create_user('owner')
+        cls.project = Project.objects.create(name='Dự án', owner=cls.owner)
+        base = timezone.now().replace(microsecond=0)
+        for i in range(13):
+            Task.objects.create(title=f'Task {i}', project=cls.project)
+        tasks = list(Task.objects.filter(project=cls.project).order_by('id'))
+        for index, task in enumerate(tasks):
+            # Nhóm 3 task cùng created_at; due_date: trùng theo cặp, một phần ba để NULL
+            Task.objects.filter(pk=task.pk).update(
+                created_at=base - timedelta(hours=index // 3),
+                due_date=None if index % 3 == 0 else base + timedelta(days=index // 2),
+            )
+        cls.url = f'/projects/{cls.project.pk}/tasks/'
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.owner)
+
+    def walk(self, url):
+        ids, pages = [], 0
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            ids += [row['id'] for row in response.json()['results']]
+            url = response.json()['next']
+            pages += 1
+        return ids, pages
+
+    def expected(self, ordering):
+        field, descending = ordering.lstrip('-'), ordering.startswith('-')
+        rows = list(Task.objects.filter(project=self.project).values_list('id', field))
+        present = sorted((row for row in rows if row[1] is not None), key=lambda row: (row[1], row[0]),
+                         reverse=descending)
+        missing = sorted((row for row in rows if row[1] is None), key=lambda row: row[0], reverse=descending)
+        return [pk for pk, value in present + missing]
+
+    def test_walk_every_ordering(self):
+        for ordering in ('created_at', '-created_at', 'due_date', '-due_date'):
+            for page_size in (1, 2, 4, 13):
+                with self.subTest(ordering=ordering, page_size=page_size):
+                    ids, pages = self.walk(f'{self.url}?ordering={ordering}&page_size={page_size}')
+                    self.assertEqual(ids, self.expected(ordering))
+                    self.assertEqual(pages, -(-13 // page_size))
+
+    def test_walk_by_id(self):
+        users = [User.objects.create_user(f'user{i}').pk for i in range(4)]
+        ids, pages = self.walk('/users/?page_size=2')
+        self.assertEqual(ids, sorted([self.owner.pk, *users]))
+
+    def test_malformed_cursor(self):
+        def encode(payload):
+            raw = payload if isinstance(payload, str) else json.dumps(payload)
+            return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+        cursors = [
+            'không-phải-base64', encode('không phải json'), encode([]), encode('"x"'), encode({'o': 'created_at'}),
+            encode({'o': 1, 'v': None, 'id': 1}),
+            encode({'o': 'created_at', 'v': 'không phải ngày', 'id': 1}),
+            encode({'o': 'created_at', 'v': 123, 'id': 1}),
+            encode({'o': 'created_at', 'v': '2020-01-01T00:00:00Z', 'id': 'x'}),
+            encode({'o': 'created_at', 'v': '2020-01-01T00:00:00Z', 'id': 10 ** 30}),
+            encode({'o': 'created_at', 'v': '2020-01-01T00:00:00Z', 'id': True}),
+            encode({'o': 'due_date', 'v': '2020-01-01T00:00:00Z', 'id': 1}),
+        ]
+        for cursor in cursors:
+            with self.subTest(cursor=cursor):
+                self.assertEqual(self.client.get(self.url, {'cursor': cursor}).status_code, 404)
+        valid = encode({'o': 'created_at', 'v': '2020-01-01T00:00:00+00:00', 'id': 1})
+        self.assertEqual(self.client.get(self.url, {'cursor': valid}).status_code, 200)
+
+
+# Cache membership phải được làm mới khi thêm/xóa thành viên
+class MembershipCacheTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create_user('owner')
+        cls.user = User.objects.create_user('user')
+        cls.project = Project.objects.create(name='Dự án', owner=cls.owner)
+        cls.project.members.add(cls.owner)
+
+    def setUp(self):
+        membership.clear()
+        self.owner_client = APIClient()
+        self.owner_client.force_authenticate(self.owner)
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_cached_lookup_hits_database_once(self):
+        with CaptureQueriesContext(connection) as context:
+            self.assertFalse(membership.is_project_member(self.user, self.project.pk))
+            self.assertFalse(membership.is_project_member(self.user, self.project.pk))
+        self.assertEqual(len(context.captured_queries), 1)
+
+    def test_add_and_remove_member_invalidate(self):
+        url = f'/projects/{self.project.pk}/'
+        self.assertEqual(self.client.get(url).status_code, 403)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.owner_client.post(f'{url}add_member/', {'user_id': self.user.pk})
+        self.assertEqual(self.client.get(url).status_code, 200)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.owner_client.post(f'{url}remove_member/', {'user_id': self.user.pk})
+        self.assertEqual(self.client.get(url).status_code, 403)
+
+    def test_project_delete_invalidates(self):
+        project_pk = self.project.pk
+        self.assertTrue(membership.is_project_member(self.owner, project_pk))
+        with self.captureOnCommitCallbacks(execute=True):
+            self.project.delete()
+        self.assertFalse(membership.is_project_member(self.owner, project_pk))
+
+    def test_invalidation_waits_for_commit(self):
+        self.assertFalse(membership.is_project_member(self.user, self.project.pk))
+        with self.captureOnCommitCallbacks(execute=True):
+            self.project.members.add(self.user)
+            # Chưa commit: request khác còn thấy danh sách cũ, thế hệ chưa được đổi
+            self.assertEqual(membership._generation(self.project.pk, None), 0)
+        self.assertEqual(membership._generation(self.project.pk, None), 1)
+        self.assertTrue(membership.is_project_member(self.user, self.project.pk))
+
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            with self.assertRaises(RuntimeError), transaction.atomic():
+                self.project.members.remove(self.user)
+                raise RuntimeError
+        self.assertEqual(callbacks, [])
+        self.assertEqual(membership._generation(self.project.pk, None), 1)
+
+    @override_settings(PROJECT_MEMBERSHIP_CACHE={'USE_DJANGO_CACHE': True})
+    def test_removal_reaches_other_workers(self):
+        caches['default'].clear()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.project.members.add(self.user)
+        self.assertTrue(membership.is_project_member(self.user, self.project.pk))
+        key, cached = membership._cached(self.user.pk, self.project.pk)
+        self.assertTrue(cached)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.project.members.remove(self.user)
+        # Bộ nhớ của worker khác vẫn giữ entry cũ: khóa phải đổi theo thế hệ mới trong cache chung
+        membership._local.set(key, True)
+        self.assertFalse(membership.is_project_member(self.user, self.project.pk))
+
+
+# Sink buffered: gom nhiều entry rồi ghi bằng một bulk_create
+class ActivityLogSinkTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('owner')
+        cls.project = Project.objects.create(name='Dự án', owner=cls.user)
+
+    def tearDown(self):
+        activity.reset_sink()
+
+    @override_settings(ACTIVITY_LOG={'MODE': 'buffered', 'BUFFER_SIZE': 5, 'FLUSH_INTERVAL': 60})
+    def test_buffered_flushes_on_size(self):
+        activity.reset_sink()
+        for i in range(4):
+            activity.record([ActivityLog(actor=self.user, action_description=f'a{i}', project=self.project)])
+        self.assertEqual(ActivityLog.objects.count(), 0)
+
+        with CaptureQueriesContext(connection) as context, self.captureOnCommitCallbacks(execute=True):
+            activity.record([ActivityLog(actor=self.user, action_description='a4', project=self.project)])
+        self.assertEqual(ActivityLog.objects.count(), 5)
+        inserts = [q for q in context.captured_queries if q['sql'].startswith('INSERT')]
+        self.assertEqual(len(inserts), 1)
+        self.assertEqual(activity.get_stats()['written'], 5)
+
+    @override_settings(ACTIVITY_LOG={'MODE': 'buffered', 'BUFFER_SIZE': 100, 'FLUSH_INTERVAL': 2})
+    def test_buffered_flushes_on_interval(self):
+        activity.reset_sink()
+        now = time.monotonic()
+        with mock.patch('API.activity.time.monotonic', return_value=now), \
+                mock.patch.object(activity.BufferedSink, '_ensure_flusher'):
+            activity.record([ActivityLog(actor=self.user, action_description='a0', project=self.project)])
+            self.assertEqual(ActivityLog.objects.count(), 0)
+        with mock.patch('API.activity.time.monotonic', return_value=now + 2.5), \
+                mock.patch.object(activity.BufferedSink, '_ensure_flusher'), \
+                self.captureOnCommitCallbacks(execute=True):
+            activity.record([ActivityLog(actor=self.user, action_description='a1', project=self.project)])
+        self.assertEqual(ActivityLog.objects.count(), 2)
+
+    @override_settings(ACTIVITY_LOG={'MODE': 'buffered', 'BUFFER_SIZE': 3, 'FLUSH_INTERVAL': 60})
+    def test_buffered_flush_waits_for_callers_transaction(self):
+        activity.reset_sink()
+        activity.record([ActivityLog(actor=self.user, action_description=f'khác {i}', project=self.project)
+                         for i in range(2)])
+        # Request đang trong transaction làm buffer đầy rồi rollback: entry của request khác không mất theo
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            with self.assertRaises(RuntimeError), transaction.atomic():
+                activity.record([ActivityLog(actor=self.user, action_description='bulk', project=self.project)])
+                self.assertEqual(ActivityLog.objects.count(), 0)
+                raise RuntimeError
+        self.assertEqual(callbacks, [])
+        activity.flush()
+        self.assertEqual(ActivityLog.objects.count(), 3)
+        self.assertEqual(activity.get_stats()['dropped'], 0)
+
+    @override_settings(ACTIVITY_LOG={'MODE': 'on_commit'})
+    def test_on_commit_writes_only_after_commit(self):
+        activity.reset_sink()
+        with self.captureOnCommitCallbacks(execute=True):
+            with transaction.atomic():
+                activity.record([ActivityLog(actor=self.user, action_description='commit', project=self.project)])
+                self.assertEqual(ActivityLog.objects.count(), 0)
+        self.assertEqual(list(ActivityLog.objects.values_list('action_description', flat=True)), ['commit'])
+
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            with self.assertRaises(ValueError), transaction.atomic():
+                activity.record([ActivityLog(actor=self.user, action_description='rollback', project=self.project)])
+                raise ValueError
+        self.assertEqual(callbacks, [])
+        self.assertFalse(ActivityLog.objects.filter(action_description='rollback').exists())
+
+    def test_sync_propagates_write_errors(self):
+        activity.reset_sink()
+        with self.assertRaises(IntegrityError):
+            activity.record([ActivityLog(actor=self.user, action_description=None, project=self.project)])
+        self.assertEqual(activity.get_stats()['dropped'], 0)
+
+
+# Flush nền theo thời gian: worker rảnh (không có write mới) vẫn ghi buffer sau FLUSH_INTERVAL
+class ActivityLogFlusherTests(TransactionTestCase):
+
+    def tearDown(self):
+        activity.reset_sink()
+
+    @override_settings(ACTIVITY_LOG={'MODE': 'buffered', 'BUFFER_SIZE': 100, 'FLUSH_INTERVAL': 0.05})
+    def test_background_flush(self):
+        user = User.objects.create_user('owner')
+        activity.reset_sink()
+        activity.record([ActivityLog(actor=user, action_description='nền')])
+        deadline = time.monotonic() + 5
+        while not ActivityLog.objects.exists() and time.monotonic() < deadline:
+            time.sleep(0.02)
+        self.assertEqual(list(ActivityLog.objects.values_list('action_description', flat=True)), ['nền'])
+
+
+# Bulk endpoint: lỗi từng phần tử không chặn các phần tử hợp lệ, số query không tăng theo số task
+class TaskBulkTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create_user('owner')
+        cls.member = User.objects.create_user('member')
+        cls.project = Project.objects.create(name='Dự án', owner=cls.owner)
+        cls.project.members.add(cls.owner, cls.member)
+
+    def setUp(self):
+        membership.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.member)
+        self.url = f'/projects/{self.project.pk}/tasks/bulk/'
+
+    def test_create_update_with_partial_failures(self):
+        task = Task.objects.create(title='Cũ', project=self.project)
+        creates = [{'title': f'Mới {i}', 'assignee_id': self.member.pk} for i in range(20)] + [{'status': 'DONE'}]
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.post(self.url, {
+                'create': creates,
+                'update': [{'id': task.pk, 'status': 'DONE'}, {'id': 0}],
+            }, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertLess(len(context.captured_queries), 15)
+
+        created = response.json()['created']
+        self.assertEqual([item['status'] for item in created].count(201), 20)
+        self.assertEqual(created[-1]['status'], 400)
+        self.assertEqual([item['status'] for item in response.json()['updated']], [200, 404])
+        self.assertEqual(Task.objects.get(pk=task.pk).status, 'DONE')
+        self.assertEqual(ActivityLog.objects.filter(project=self.project).count(), 21)
+
+    def test_delete_requires_owner(self):
+        task = Task.objects.create(title='Cũ', project=self.project)
+        response = self.client.post(self.url, {'delete': [task.pk]}, format='json')
+        self.assertEqual(response.json()['deleted'][0]['status'], 403)
+        self.assertTrue(Task.objects.filter(pk=task.pk).exists())
+
+    def test_malformed_ids_are_item_errors(self):
+        task = Task.objects.create(title='Cũ', project=self.project)
+        response = self.client.post(self.url, {
+            'create': [{'title': 'A', 'assignee_id': [1]}, {'title': 'B', 'assignee_id': {}}, {'title': 'C', 'assignee_id': True}],
+            'update': [{'id': task.pk, 'assignee_id': [self.member.pk]}, {'id': True, 'status': 'DONE'}],
+        }, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([item['status'] for item in response.json()['created']], [400, 400, 400])
+        self.assertIn('assignee_id', response.json()['created'][0]['errors'])
+        self.assertEqual([item['status'] for item in response.json()['updated']], [400, 400])
+        self.assertFalse(Task.objects.exclude(pk=task.pk).exists())
+
+    def test_duplicate_and_bool_delete_ids_reported(self):
+        task = Task.objects.create(title='Cũ', project=self.project)
+        client = APIClient()
+        client.force_authenticate(self.owner)
+        response = client.post(self.url, {'delete': [task.pk, task.pk, True]}, format='json')
+        self.assertEqual([item['status'] for item in response.json()['deleted']], [204, 400, 400])
+        self.assertFalse(Task.objects.filter(pk=task.pk).exists())
+
+
+# Tìm kiếm toàn văn qua ?search=: khớp tiền tố, khớp cả mô tả, kết quả khớp tiêu đề xếp trước
+class SearchTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create_user('owner', first_name='Minh')
+        cls.project = Project.objects.create(name='Website bán hàng', owner=cls.owner)
+        cls.project.members.add(cls.owner)
+        cls.in_title = Task.objects.create(title='Thiết kế giao diện', project=cls.project)
+        cls.in_description = Task.objects.create(title='Viết tài liệu', description='Mô tả giao diện', project=cls.project)
+        for title in ('Triển khai máy chủ', 'Sao lưu dữ liệu', 'Kiểm thử thanh toán'):
+            Task.objects.create(title=title, project=cls.project)
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.owner)
+
+    def test_task_search_ranked(self):
+        response = self.client.get(f'/projects/{self.project.pk}/tasks/', {'search': 'giao di'})
+        self.assertEqual([task['id'] for task in response.json()], [self.in_title.pk, self.in_description.pk])
+
+    def test_search_follows_updates(self):
+        Task.objects.filter(pk=self.in_title.pk).update(title='Thiết kế logo')
+        self.in_description.delete()
+        response = self.client.get(f'/projects/{self.project.pk}/tasks/', {'search': 'giao'})
+        self.assertEqual(response.json(), [])
+
+    def test_project_and_user_search(self):
+        self.assertEqual(len(self.client.get('/projects/', {'search': 'bán'}).json()), 1)
+        self.assertEqual([user['username'] for user in self.client.get('/users/', {'search': 'minh'}).json()], ['owner'])
+
+
+# Thống kê dự án: một query tổng hợp; chế độ cache phải khớp với số liệu tính lại từ đầu
+class ProjectStatsTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create_user('owner')
+        cls.member = User.objects.create_user('member')
+        cls.project = Project.objects.create(name='Dự án', owner=cls.owner)
+        cls.project.members.add(cls.owner, cls.member)
+        yesterday = timezone.now() - timedelta(days=1)
+        Task.objects.create(title='A', project=cls.project, assignee=cls.member, status='DONE', due_date=yesterday)
+        Task.objects.create(title='B', project=cls.project, assignee=cls.member, priority='HIGH', due_date=yesterday)
+        Task.objects.create(title='C', project=cls.project, status='INPR')
+
+    def setUp(self):
+        membership.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.member)
+        self.url = f'/projects/{self.project.pk}/stats/'
+
+    def test_breakdowns_in_one_aggregate_query(self):
+        with CaptureQueriesContext(connection) as context:
+            data = self.client.get(self.url).json()
+        self.assertEqual(sum('GROUP BY' in query['sql'] for query in context.captured_queries), 1)
+        self.assertLessEqual(len(context.captured_queries), 3)
+        self.assertEqual((data['total'], data['overdue'], data['assigned_to_me'], data['unassigned']), (3, 1, 2, 1))
+        self.assertEqual(data['by_status'], {'TODO': 1, 'INPR': 1, 'DONE': 1})
+        self.assertEqual(data['by_priority']['HIGH'], 1)
+        self.assertEqual(data['by_assignee'], [{
+            'id': self.member.pk, 'username': 'member', 'total': 2,
+            'by_status': {'TODO': 1, 'INPR': 0, 'DONE': 1}, 'overdue': 1,
+        }])
+
+    @override_settings(PROJECT_STATS={'CACHED': True}, CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'stats-tests'}})
+    def test_cached_counters_follow_writes(self):
+        self.client.get(self.url)
+        self.client.force_authenticate(self.owner)
+        with self.captureOnCommitCallbacks(execute=True):
+            task = self.client.post(f'/projects/{self.project.pk}/tasks/', {'title': 'D', 'assignee_id': self.owner.pk}).json()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.patch(f'/projects/{self.project.pk}/tasks/{task["id"]}/', {'status': 'DONE', 'assignee_id': self.member.pk})
+        with self.captureOnCommitCallbacks(execute=True):
+            Task.objects.get(title='C').delete()
+
+        cached = self.client.get(self.url).json()
+        stats.invalidate(self.project.pk)
+        with override_settings(PROJECT_STATS={'CACHED': False}):
+            fresh = self.client.get(self.url).json()
+        self.assertTrue(cached.pop('cached'))
+        self.assertFalse(fresh.pop('cached'))
+        self.assertEqual(cached, fresh)
+        self.assertEqual(fresh['by_status'], {'TODO': 1, 'INPR': 0, 'DONE': 2})
+
+    @override_settings(PROJECT_STATS={'CACHED': True}, CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'stats-rollback-tests'}})
+    def test_rolled_back_writes_leave_counters_alone(self):
+        before = self.client.get(self.url).json()
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            with self.assertRaises(RuntimeError), transaction.atomic():
+                task = Task.objects.create(title='D', project=self.project, assignee=self.member)
+                task.status = 'DONE'
+                task.save()
+                Task.objects.get(title='C').delete()
+                raise RuntimeError
+        self.assertEqual(callbacks, [])
+        self.assertEqual(self.client.get(self.url).json(), before)
+
+
+# GET có điều kiện: 304 khi validator khớp, đổi khi dữ liệu đổi; If-Match sai -> 412
+class ConditionalRequestTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create_user('owner')
+        cls.other = User.objects.create_user('other')
+        cls.project = Project.objects.create(name='Dự án', owner=cls.owner)
+        cls.project.members.add(cls.owner)
+        cls.task = Task.objects.create(title='Công việc', project=cls.project)
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.owner)
+
+    def test_list_not_modified_until_change(self):
+        url = f'/projects/{self.project.pk}/tasks/?status=todo'
+        etag = self.client.get(url)['ETag']
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertFalse(any('"title"' in query['sql'] for query in context.captured_queries))
+
+        Task.objects.create(title='Mới', project=self.project)
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_page_validator_covers_only_the_page(self):
+        other = Task.objects.create(title='Trang sau', project=self.project)
+        url = f'/projects/{self.project.pk}/tasks/?page_size=1&ordering=created_at'
+        etag = self.client.get(url)['ETag']
+        with CaptureQueriesContext(connection) as context:
+            self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        # Không gộp max/count trên cả danh sách, chỉ đọc trang bằng LIMIT
+        self.assertFalse(any('MAX(' in query['sql'] or 'COUNT(' in query['sql'] for query in context.captured_queries))
+
+        # Dòng ở trang khác đổi thì trang này vẫn 304; dòng trong trang đổi hoặc bị xóa thì 200
+        other.title = 'Đã sửa'
+        other.save()
+        Task.objects.create(title='Thêm', project=self.project)
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        self.task.title = 'Đã sửa'
+        self.task.save()
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+        etag = self.client.get(url)['ETag']
+        self.task.delete()
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_detail_validators_and_member_change(self):
+        url = f'/projects/{self.project.pk}/'
+        response = self.client.get(url)
+        etag = response['ETag']
+        self.assertEqual(self.client.get(url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified']).status_code, 304)
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        self.project.members.add(self.other)
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_if_match_guards_writes(self):
+        url = f'/projects/{self.project.pk}/tasks/{self.task.pk}/'
+        etag = self.client.get(url)['ETag']
+        response = self.client.patch(url, {'status': 'DONE'}, HTTP_IF_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertEqual(self.client.patch(url, {'status': 'TODO'}, HTTP_IF_MATCH=etag).status_code, 412)
+        self.assertEqual(self.client.delete(url, HTTP_IF_MATCH=etag).status_code, 412)
+        self.assertEqual(Task.objects.get(pk=self.task.pk).status, 'DONE')
+
+
+# Xuất dữ liệu dự án theo luồng: NDJSON nhiều loại, CSV một loại, gzip tùy chọn
+class ProjectExportTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create_user('owner')
+        cls.project = Project.objects.create(name='Dự án', owner=cls.owner)
+        cls.project.members.add(cls.owner)
+        for i in range(3):
+            task = Task.objects.create(title=f'Công việc, "{i}"', project=cls.project, assignee=cls.owner)
+            Comment.objects.create(task=task, author=cls.owner, body='Bình luận')
+            ActivityLog.objects.create(actor=cls.owner, action_description='test', project=cls.project, task=task)
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.owner)
+        self.url = f'/projects/{self.project.pk}/export/'
+
+    def test_ndjson_gzip(self):
+        response = self.client.get(self.url, {'gzip': '1'})
+        self.assertTrue(response.streaming)
+        records = [json.loads(line) for line in gzip.decompress(b''.join(response.streaming_content)).splitlines()]
+        types = [record['type'] for record in records]
+        self.assertEqual(types, ['project'] + ['task'] * 3 + ['comment'] * 3 + ['activity'] * 3)
+        self.assertEqual(records[1]['assignee_username'], 'owner')
+
+    def test_csv_and_command(self):
+        response = self.client.get(self.url, {'fmt': 'csv', 'resource': 'tasks'})
+        body = b''.join(response.streaming_content).decode()
+        self.assertEqual(len(list(csv.reader(StringIO(body)))), 4)
+        self.assertEqual(self.client.get(self.url, {'fmt': 'csv'}).status_code, 400)
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'comments.ndjson')
+            call_command('export_project', self.project.pk, '--resource', 'comments', '--output', path)
+            with open(path, encoding='utf-8') as output:
+                self.assertEqual(len(output.read().splitlines()), 4)
+
+
+# Tải lên theo từng phần: offset sai -> 409, nội dung trùng dùng chung một blob
+class ChunkedUploadTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create_user('owner')
+        cls.project = Project.objects.create(name='Dự án', owner=cls.owner)
+        cls.project.members.add(cls.owner)
+        cls.task = Task.objects.create(title='Công việc', project=cls.project)
+
+    def setUp(self):
+        media = tempfile.TemporaryDirectory()
+        self.addCleanup(media.cleanup)
+        settings_override = override_settings(MEDIA_ROOT=media.name)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.client = APIClient()
+        self.client.force_authenticate(self.owner)
+        self.base = f'/projects/{self.project.pk}/tasks/{self.task.pk}/attachments/'
+
+    def put_chunk(self, url, data, start, total):
+        return self.client.put(url, data, content_type='application/octet-stream',
+                               HTTP_CONTENT_RANGE=f'bytes {start}-{start + len(data) - 1}/{total}')
+
+    def test_resumable_upload_and_dedup(self):
+        content = b'0123456789'
+        session = self.client.post(self.base + 'uploads/', {'filename': 'a.txt', 'size': 10}, format='json').json()
+        url = f"{self.base}uploads/{session['id']}/"
+        self.assertEqual(self.put_chunk(url, content[:4], 0, 10).json()['offset'], 4)
+        conflict = self.put_chunk(url, content[6:], 6, 10)
+        self.assertEqual((conflict.status_code, conflict.json()['offset']), (409, 4))
+        self.assertEqual(self.client.get(url).json()['offset'], 4)
+        self.put_chunk(url, content[4:], 4, 10)
+        response = self.client.post(url + 'complete/')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json()['filename'], 'a.txt')
+
+        # Tải lại cùng nội dung qua multipart: chỉ thêm metadata
+        duplicate = self.client.post(self.base, {'file': SimpleUploadedFile('b.txt', content)}, format='multipart')
+        self.assertEqual(duplicate.status_code, 201)
+        blob = Blob.objects.get()
+        self.assertEqual(blob.sha256, hashlib.sha256(content).hexdigest())
+        self.assertEqual(blob.attachments.count(), 2)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.delete(f"{self.base}{response.json()['id']}/")
+            self.assertTrue(default_storage.exists(blob.file.name))
+            self.client.delete(f"{self.base}{duplicate.json()['id']}/")
+        self.assertFalse(Blob.objects.exists())
+        self.assertFalse(default_storage.exists(blob.file.name))
+
+    def create_session(self, size=10):
+        return UploadSession.objects.get(
+            pk=self.client.post(self.base + 'uploads/', {'filename': 'a.txt', 'size': size}, format='json').json()['id'])
+
+    def test_chunk_io_runs_outside_transaction(self):
+        session = self.create_session()
+        depth = len(connection.atomic_blocks)
+        seen = []
+
+        class Stream:
+            def read(self, size):
+                # Trong lúc đọc từ client: không mở transaction, request song song vào cùng phiên bị từ chối
+                seen.append((len(connection.atomic_blocks), uploads._claim(session.pk, 0)))
+                return b'' if len(seen) > 1 else b'0123'
+
+        with self.assertRaises(uploads.UploadError) as raised:
+            uploads.append_chunk(session.pk, 0, Stream(), 10)
+        self.assertEqual(raised.exception.offset, 4)
+        self.assertEqual(seen, [(depth, None), (depth, None)])
+        session.refresh_from_db()
+        self.assertEqual((session.offset, session.writer), (4, None))
+
+    def test_busy_and_expired_claims(self):
+        session = self.create_session()
+        url = f"{self.base}uploads/{session.pk}/"
+        self.assertIsNotNone(uploads._claim(session.pk, 0))
+        busy = self.put_chunk(url, b'0123', 0, 10)
+        self.assertEqual((busy.status_code, busy.json()['offset']), (409, 0))
+        # Request giữ claim đã chết: sau CLAIM_TIMEOUT request khác được ghi
+        UploadSession.objects.filter(pk=session.pk).update(claimed_at=timezone.now() - timedelta(hours=2))
+        self.assertEqual(self.put_chunk(url, b'0123', 0, 10).json()['offset'], 4)
+
+    def test_complete_twice_creates_one_attachment(self):
+        session = self.create_session(4)
+        url = f"{self.base}uploads/{session.pk}/"
+        self.put_chunk(url, b'abcd', 0, 4)
+        session.refresh_from_db()
+        self.assertEqual(self.client.post(url + 'complete/').status_code, 201)
+        # Request hoàn tất thứ hai (đã đọc phiên trước khi request đầu xóa nó)
+        with self.assertRaises(uploads.UploadError):
+            uploads.finalize(session)
+        self.assertEqual(Attachment.objects.count(), 1)
+
+    def test_failed_complete_can_be_retried(self):
+        session = self.create_session(4)
+        url = f"{self.base}uploads/{session.pk}/"
+        self.put_chunk(url, b'abcd', 0, 4)
+        session.refresh_from_db()
+        with mock.patch.object(Attachment.objects, 'create', side_effect=RuntimeError):
+            with self.captureOnCommitCallbacks(execute=True), self.assertRaises(RuntimeError):
+                uploads.finalize(session)
+        # Transaction lỗi: file tạm còn nguyên, không để lại blob hay tệp blob mồ côi
+        self.assertTrue(os.path.exists(uploads.part_path(session)))
+        self.assertFalse(Blob.objects.exists())
+        self.assertFalse(default_storage.exists(uploads.blob_name(hashlib.sha256(b'abcd').hexdigest())))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(self.client.post(url + 'complete/').status_code, 201)
+        self.assertFalse(os.path.exists(uploads.part_path(session)))
+        self.assertTrue(default_storage.exists(Blob.objects.get().file.name))
+
+    def test_complete_reuses_locked_blob(self):
+        first = self.client.post(self.base, {'file': SimpleUploadedFile('a.txt', b'abcd')}, format='multipart').json()
+        session = self.create_session(4)
+        url = f"{self.base}uploads/{session.pk}/"
+        self.put_chunk(url, b'abcd', 0, 4)
+        with CaptureQueriesContext(connection) as context:
+            self.assertEqual(self.client.post(url + 'complete/').status_code, 201)
+        if connection.features.has_select_for_update:
+            self.assertTrue(any('FOR UPDATE' in query['sql'] and '"API_blob"' in query['sql']
+                                for query in context.captured_queries))
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.delete(f"{self.base}{first['id']}/")
+        blob = Blob.objects.get()
+        self.assertEqual(blob.attachments.count(), 1)
+        self.assertTrue(default_storage.exists(blob.file.name))
+
+    def test_download_ranges_and_offload(self):
+        attachment = self.client.post(self.base, {'file': SimpleUploadedFile('a.txt', b'0123456789')}, format='multipart').json()
+        url = attachment['download_url']
+        response = self.client.get(url)
+        self.assertEqual((response.status_code, b''.join(response.streaming_content)), (200, b'0123456789'))
+        etag = response['ETag']
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        partial = self.client.get(url, HTTP_RANGE='bytes=2-4')
+        self.assertEqual((partial.status_code, partial['Content-Range']), (206, 'bytes 2-4/10'))
+        self.assertEqual(b''.join(partial.streaming_content), b'234')
+        self.assertEqual(b''.join(self.client.get(url, HTTP_RANGE='bytes=-3').streaming_content), b'789')
+        self.assertEqual(self.client.get(url, HTTP_RANGE='bytes=20-').status_code, 416)
+        self.assertEqual(self.client.get(url, HTTP_RANGE='bytes=2-4', HTTP_IF_RANGE='"old"').status_code, 200)
+
+        with override_settings(ATTACHMENT_DOWNLOAD={'BACKEND': 'x-accel'}):
+            offloaded = self.client.get(url)
+        self.assertTrue(offloaded['X-Accel-Redirect'].startswith('/protected-media/blobs/'))
+        self.assertIsNone(attachment['thumbnail_url'])
+        self.assertNotIn('file', attachment)
+
+    def test_missing_file_is_not_found(self):
+        # Dòng cũ chưa có blob (vd: seed_data) trỏ tới tệp không có trong kho
+        attachment = Attachment.objects.create(task=self.task, uploader=self.owner, file='attachments/seed/1.txt',
+                                               filename='tep-1.txt')
+        response = self.client.get(f'{self.base}{attachment.pk}/download/')
+        self.assertEqual(response.status_code, 404)
+        self.assertNotIn('file', self.client.get(self.base).json()[0])
+
+    @override_settings(THUMBNAILS={'BACKGROUND': False})
+    def test_image_thumbnail(self):
+        image = io.BytesIO()
+        Image.new('RGB', (1600, 1200), 'red').save(image, 'JPEG')
+        with self.captureOnCommitCallbacks(execute=True):
+            created = self.client.post(self.base, {'file': SimpleUploadedFile('photo.jpg', image.getvalue())}, format='multipart')
+        attachment = self.client.get(f"{self.base}{created.json()['id']}/").json()
+        response = self.client.get(attachment['thumbnail_url'])
+        with Image.open(io.BytesIO(b''.join(response.streaming_content))) as thumbnail:
+            self.assertEqual((thumbnail.format, thumbnail.size), ('WEBP', (320, 240)))
+
+
+# Xác thực JWT: user lấy từ cache (bỏ cache khi user thay đổi), token đã xoay vòng không dùng lại được
+class CachedAuthenticationTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('alice', password='secret')
+
+    def setUp(self):
+        authentication.clear()
+        authentication.auth_stats.reset()
+
+    def test_user_cached_until_changed(self):
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(self.user)}')
+        url = f'/users/{self.user.pk}/'
+        with CaptureQueriesContext(connection) as first:
+            self.assertEqual(client.get(url).status_code, 200)
+        with self.assertNumQueries(len(first) - 1):
+            self.assertEqual(client.get(url).status_code, 200)
+        self.assertEqual(authentication.stats()['hits'], 1)
+
+        self.user.is_active = False
+        self.user.save()
+        self.assertEqual(client.get(url).status_code, 401)
+
+    def test_rotated_refresh_token_rejected(self):
+        refresh = str(RefreshToken.for_user(self.user))
+        response = self.client.post('/token/refresh/', {'refresh': refresh})
+        self.assertEqual(response.status_code, 200)
+        # Token cũ đã bị blacklist khi xoay vòng, kể cả khi dòng blacklist do tiến trình khác ghi
+        self.assertEqual(self.client.post('/token/refresh/', {'refresh': refresh}).status_code, 401)
+        other = RefreshToken.for_user(self.user)
+        BlacklistedToken.objects.bulk_create([
+            BlacklistedToken(token=OutstandingToken.objects.get(jti=other['jti'])),
+        ])
+        self.assertEqual(self.client.post('/token/refresh/', {'refresh': str(other)}).status_code, 401)
+        self.assertEqual(self.client.post('/token/refresh/', {'refresh': response.json()['refresh']}).status_code, 200)
+
+        call_command('bench_auth', '--requests', '20', stdout=StringIO())
+
+    @override_settings(JWT_AUTH_CACHE={'USE_DJANGO_CACHE': True})
+    def test_shared_invalidation_reaches_other_workers(self):
+        shared = caches['default']
+        shared.clear()
+        authentication.invalidate_user(self.user.pk)
+        authentication.cache_user(self.user)
+        key = authentication._key(str(self.user.pk), shared.get(authentication._generation_key(self.user.pk)))
+        self.assertIsNotNone(authentication.get_cached_user(self.user.pk))
+        # Worker này chỉ xóa được entry của chính nó; worker khác (entry gen hiện tại vẫn trong bộ nhớ) bỏ qua nhờ
+        # thế hệ mới trong cache chung
+        authentication.invalidate_user(self.user.pk)
+        self.assertIsNotNone(authentication._users.get(key))
+        self.assertIsNone(authentication.get_cached_user(self.user.pk))
+
+
+# Gợi ý người dùng: khớp tiền tố, xếp hạng, giới hạn số kết quả và lọc lại từ cache
+class UserAutocompleteTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.viewer = User.objects.create_user('viewer')
+        User.objects.create_user('nguyen', email='nguyen@example.com')
+        User.objects.create_user('nguyenvan', email='nv@example.com')
+        User.objects.create_user('ann', first_name='Nguyen', last_name='Van')
+        User.objects.create_user('bob', email='nguyen.bob@example.com')
+        User.objects.create_user('ng_old', is_active=False)
+        for i in range(12):
+            User.objects.create_user(f'ngo{i:02d}')
+
+    def setUp(self):
+        autocomplete.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.viewer)
+
+    def usernames(self, **params):
+        return [user['username'] for user in self.client.get('/users/autocomplete/', params).json()]
+
+    def test_prefix_ranking_and_limit(self):
+        self.assertEqual(self.usernames(q='NGUYEN'), ['nguyen', 'nguyenvan', 'ann', 'bob'])
+        self.assertEqual(self.usernames(q='nguyen van'), ['ann'])
+        self.assertEqual(len(self.usernames(q='ng')), 10)
+        self.assertEqual(len(self.usernames(q='ng', limit=100)), 16)
+        self.assertEqual(self.usernames(q='guyen'), [])
+
+    def test_invalid_limit_rejected(self):
+        for limit in ('-5', '0', 'abc'):
+            with self.subTest(limit=limit):
+                self.assertEqual(self.client.get('/users/autocomplete/', {'q': 'ng', 'limit': limit}).status_code, 400)
+        self.assertEqual(len(autocomplete.suggest('ng', -5)), 1)
+
+    def test_longer_prefix_served_from_cache(self):
+        self.usernames(q='ng', limit=50)
+        with self.assertNumQueries(0):
+            self.assertEqual(self.usernames(q='ngo0')[:2], ['ngo00', 'ngo01'])
+        self.assertEqual(autocomplete.stats()['derived'], 1)
+        User.objects.create_user('ngo0z')
+        self.assertIn('ngo0z', self.usernames(q='ngo0', limit=50))
+
+
+# Luồng sự kiện SSE: chỉ thành viên có token hợp lệ, nhận sự kiện sau khi ghi dữ liệu
+class ProjectEventsTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create_user('owner')
+        cls.member = User.objects.create_user('member')
+        cls.outsider = User.objects.create_user('outsider')
+        cls.project = Project.objects.create(name='Dự án', owner=cls.owner)
+        cls.project.members.add(cls.owner, cls.member)
+        cls.url = f'/projects/{cls.project.pk}/events/'
+
+    def setUp(self):
+        membership.clear()
+        realtime.reset_broker()
+
+    def test_requires_member_token(self):
+        self.assertEqual(self.client.get(self.url).status_code, 401)
+        self.assertEqual(self.client.get(self.url, {'token': 'x'}).status_code, 401)
+        token = str(AccessToken.for_user(self.outsider))
+        self.assertEqual(self.client.get(self.url, {'token': token}).status_code, 403)
+
+    def create_task(self):
+        client = APIClient()
+        client.force_authenticate(self.owner)
+        with self.captureOnCommitCallbacks(execute=True):
+            client.post(f'/projects/{self.project.pk}/tasks/', {'title': 'Mới'}, format='json')
+
+    async def test_stream_receives_events(self):
+        token = str(AccessToken.for_user(self.member))
+        response = await self.async_client.get(self.url, headers={'Authorization': f'Bearer {token}'})
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        stream = aiter(response.streaming_content)
+        self.assertTrue((await anext(stream)).startswith(b'retry:'))
+
+        await sync_to_async(self.create_task)()
+        frame = (await asyncio.wait_for(anext(stream), 5)).decode()
+        self.assertTrue(frame.startswith('event: task.created\n'))
+        self.assertEqual(json.loads(frame.split('data: ', 1)[1])['task']['title'], 'Mới')
+
+        await sync_to_async(response.close)()
+        self.assertEqual(realtime.get_broker().subscriber_count(self.project.pk), 0)
+
+    @override_settings(REALTIME={'HEARTBEAT': 0.05})
+    async def test_removed_member_stream_closes_while_events_flow(self):
+        allowed = True
+
+        async def still_allowed():
+            return allowed
+
+        frames = aiter(realtime.EventStream(self.project.pk, still_allowed))
+        self.assertTrue((await anext(frames)).startswith('retry:'))
+        broker = realtime.get_broker()
+
+        async def flood():
+            while True:
+                broker.publish(self.project.pk, realtime.format_event('task.updated', {}))
+                await asyncio.sleep(0.005)
+
+        flooding = asyncio.create_task(flood())
+        try:
+            for _ in range(5):
+                self.assertTrue((await anext(frames)).startswith('event: task.updated'))
+            allowed = False
+            # Sự kiện vẫn đến liên tục (không có heartbeat rảnh) nhưng quyền vẫn được kiểm tra lại
+            rest = await asyncio.wait_for(self.drain(frames), 2)
+        finally:
+            flooding.cancel()
+        self.assertLess(len(rest), 100)
+        self.assertEqual(broker.subscriber_count(self.project.pk), 0)
+
+    async def test_member_removed_event_closes_stream(self):
+        allowed = True
+
+        async def still_allowed():
+            return allowed
+
+        frames = aiter(realtime.EventStream(self.project.pk, still_allowed))
+        await anext(frames)
+        broker = realtime.get_broker()
+        broker.publish(self.project.pk, realtime.format_event('member.removed', {'member': {'id': self.member.pk}}))
+        self.assertTrue((await anext(frames)).startswith('event: member.removed'))
+        allowed = False
+        broker.publish(self.project.pk, realtime.format_event('member.removed', {'member': {'id': self.member.pk}}))
+        broker.publish(self.project.pk, realtime.format_event('task.updated', {}))
+        # HEARTBEAT mặc định 15 giây: luồng phải đóng ngay khi nhận member.removed, không đợi nhịp kiểm tra
+        self.assertEqual(await asyncio.wait_for(self.drain(frames), 1), [])
+
+    @staticmethod
+    async def drain(frames):
+        return [frame async for frame in frames]
+
+
+# Lưu trữ nhật ký cũ ra file: CSDL chỉ còn entry mới, ?include_archived=1 đọc lại phần đã lưu trữ
+class ActivityRetentionTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create_user('owner')
+        cls.project = Project.objects.create(name='Dự án', owner=cls.owner)
+        cls.project.members.add(cls.owner)
+        cls.task = Task.objects.create(title='Công việc', project=cls.project)
+        now = timezone.now()
+        for days in (400, 90, 60, 1):
+            ActivityLog.objects.create(actor=cls.owner, action_description=f'{days} ngày', project=cls.project,
+                                       task=cls.task, timestamp=now - timedelta(days=days))
+
+    def test_archive_and_read_back(self):
+        if connection.vendor == 'postgresql':
+            self.assertTrue(retention.is_partitioned())
+            # Dữ liệu trong test chưa commit: kiểm tra FK ngay để được phép ALTER TABLE
+            with connection.cursor() as cursor:
+                cursor.execute('SET CONSTRAINTS ALL IMMEDIATE')
+            # Phân vùng của tháng đã có dữ liệu: entry được chuyển khỏi phân vùng DEFAULT
+            self.assertTrue(retention.ensure_partition(retention.month_start(timezone.now() - timedelta(days=400))))
+
+        client = APIClient()
+        client.force_authenticate(self.owner)
+        url = f'/projects/{self.project.pk}/activity/'
+        before = client.get(url, {'include_archived': '1'}).json()
+
+        with tempfile.TemporaryDirectory() as directory, self.settings(ACTIVITY_RETENTION={'ARCHIVE_DIR': directory}):
+            call_command('archive_activity_logs', '--days', '30', stdout=StringIO())
+            manifest = retention.read_manifest()
+            self.assertEqual(sum(entry['count'] for entry in manifest['files']), 3)
+            self.assertEqual(ActivityLog.objects.count(), 1)
+
+            live = client.get(url).json()
+            self.assertEqual([entry['action_description'] for entry in live], ['1 ngày'])
+            self.assertEqual(client.get(url, {'include_archived': '1'}).json(), before)
+            task_url = f'/projects/{self.project.pk}/tasks/{self.task.pk}/activity/'
+            since = (timezone.now() - timedelta(days=100)).isoformat()
+            response = client.get(task_url, {'include_archived': '1', 'since': since})
+            self.assertEqual([entry['action_description'] for entry in response.json()], ['1 ngày', '60 ngày', '90 ngày'])
+
+    def test_rows_missed_by_the_archive_read_are_kept(self):
+        old = ActivityLog.objects.get(action_description='400 ngày')
+        ActivityLog.objects.create(actor=self.owner, action_description='cùng tháng', project=self.project,
+                                   timestamp=old.timestamp)
+        if connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                cursor.execute('SET CONSTRAINTS ALL IMMEDIATE')
+            # Cả tháng có phân vùng riêng: đi qua nhánh DETACH + DROP
+            self.assertTrue(retention.ensure_partition(retention.month_start(old.timestamp)))
+        archive_rows = retention._archive_rows
+
+        def unseen(start, end):
+            # Transaction lấy id nhỏ hơn nhưng commit sau khi tháng đã được đọc
+            return (record for record in archive_rows(start, end) if record['id'] != old.pk)
+
+        with tempfile.TemporaryDirectory() as directory, self.settings(ACTIVITY_RETENTION={'ARCHIVE_DIR': directory}):
+            with mock.patch.object(retention, '_archive_rows', side_effect=unseen):
+                retention.archive_older_than(30)
+            self.assertEqual(set(ActivityLog.objects.values_list('action_description', flat=True)), {'400 ngày', '1 ngày'})
+            retention.archive_older_than(30)
+            self.assertEqual(sum(entry['count'] for entry in retention.read_manifest()['files']), 4)
+            self.assertEqual(list(ActivityLog.objects.values_list('action_description', flat=True)), ['1 ngày'])
+
+
+# Sinh dữ liệu giả lập: tất định theo seed, ghi đúng số dòng, --clear xóa lần seed trước
+class SeedDataTests(TestCase):
+
+    def seed(self, *args):
+        call_command('seed_data', '--users', '30', '--projects', '5', '--tasks', '200', '--chunk-size', '64',
+                     *args, stdout=StringIO())
+        return list(Task.objects.order_by('title').values_list('title', 'status', 'priority', 'due_date', 'created_at'))
+
+    def test_deterministic_and_clearable(self):
+        first = self.seed()
+        self.assertEqual(len(first), 200)
+        self.assertEqual(User.objects.filter(username__startswith='seed').count(), 30)
+        self.assertEqual(Comment.objects.count(), 200)
+        self.assertEqual(ActivityLog.objects.count(), 400)
+        # Người được giao luôn là thành viên của dự án
+        links = set(Project.members.through.objects.values_list('project_id', 'user_id'))
+        assigned = Task.objects.exclude(assignee=None).values_list('project_id', 'assignee_id')
+        self.assertTrue(assigned and all(pair in links for pair in assigned))
+        self.assertTrue(all(created.year == 2025 for *_, created in first))
+
+        with self.assertRaises(CommandError):
+            self.seed()
+        self.assertEqual(self.seed('--clear'), first)
+        self.assertEqual(Task.objects.count(), 200)
+        self.assertNotEqual(self.seed('--clear', '--seed', '7'), first)
+
+
+# Chọn trường (?fields=) và mở rộng quan hệ (?expand=): mặc định giữ nguyên, quan hệ không yêu cầu không được đọc
+class SparseFieldsTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create_user('owner')
+        cls.member = User.objects.create_user('member')
+        cls.project = Project.objects.create(name='Dự án', owner=cls.owner)
+        cls.project.members.add(cls.owner, cls.member)
+        cls.task = Task.objects.create(title='Việc', project=cls.project, assignee=cls.member)
+        ActivityLog.objects.create(actor=cls.owner, action_description='tạo', project=cls.project, task=cls.task)
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.owner)
+
+    def get(self, url):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200, response.content)
+        # Đường đọc nhanh và serializer cho cùng kết quả với mọi tổ hợp fields/expand
+        with override_settings(FAST_READ_PATH={'ENABLED': False}):
+            self.assertEqual(self.client.get(url).content, response.content)
+        return response.json()
+
+    def test_projects(self):
+        self.assertEqual(self.get('/projects/?fields=id,name'), [{'id': self.project.pk, 'name': 'Dự án'}])
+        project = self.get('/projects/?fields=id,owner,members')[0]
+        self.assertEqual((project['owner'], project['members']), (self.owner.pk, [self.owner.pk, self.member.pk]))
+        project = self.get('/projects/?fields=name&expand=members')[0]
+        self.assertEqual(list(project), ['name', 'members'])
+        self.assertEqual(project['members'][1]['username'], 'member')
+        self.assertEqual(self.get(f'/projects/{self.project.pk}/?fields=id,owner&expand=owner')['owner']['id'], self.owner.pk)
+        self.assertEqual(self.get('/projects/?expand=owner'), self.get('/projects/'))
+
+        with CaptureQueriesContext(connection) as context:
+            self.client.get('/projects/?fields=id,name')
+        self.assertFalse(any('"API_user"' in query['sql'] for query in context.captured_queries))
+
+    def test_tasks_comments_activity(self):
+        base = f'/projects/{self.project.pk}/tasks/'
+        self.assertEqual(self.get(f'{base}?fields=title,assignee'), [{'title': 'Việc', 'assignee': self.member.pk}])
+        self.assertEqual(self.get(f'{base}{self.task.pk}/?fields=assignee&expand=assignee')['assignee']['username'], 'member')
+        self.assertEqual(self.get(f'{base}{self.task.pk}/comments/?fields=id,body'), [])
+        logs = self.get(f'/projects/{self.project.pk}/activity/?fields=action_description,actor&include_archived=1')
+        self.assertEqual(logs, [{'action_description': 'tạo', 'actor': self.owner.pk}])
+        self.assertEqual(
+            ActivityLogSerializer.select({'id': 1, 'actor': None, 'task': 2}, fields=['actor', 'task']),
+            {'actor': None, 'task': 2},
+        )
+
+    def test_invalid_names(self):
+        self.assertEqual(self.client.get('/projects/?fields=id,secret').status_code, 400)
+        self.assertEqual(self.client.get(f'/projects/{self.project.pk}/tasks/?expand=title').status_code, 400)
+
+
+# Đường đọc nhanh: danh sách dựng từ values() và render bằng orjson phải trùng từng byte với serializer + JSONRenderer
+class FastReadPathTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create_user('owner', 'owner@example.com', first_name='Chủ', last_name='Dự\u2028Án')
+        cls.member = User.objects.create_user('member')
+        cls.project = Project.objects.create(name='Dự án "một"', description=None, owner=cls.owner)
+        cls.project.members.add(cls.owner, cls.member)
+        Project.objects.create(name='Trống', owner=cls.owner)
+        Task.objects.create(title='Có hạn', project=cls.project, assignee=cls.member, due_date=timezone.now())
+        Task.objects.create(title='Không người nhận\u2029', description='Mô tả', project=cls.project)
+        Comment.objects.create(task=Task.objects.first(), author=cls.member, body='Bình luận')
+        ActivityLog.objects.create(actor=None, action_description='hệ thống', project=cls.project)
+        ActivityLog.objects.create(actor=cls.owner, action_description='sửa', project=cls.project,
+                                   task=Task.objects.first())
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.owner)
+
+    def test_same_bytes_as_serializers(self):
+        task = Task.objects.first()
+        base = f'/projects/{self.project.pk}'
+        urls = [
+            '/projects/', '/projects/?page_size=1', f'{base}/tasks/', f'{base}/tasks/?page_size=1&ordering=due_date',
+            f'{base}/tasks/{task.pk}/comments/', f'{base}/activity/', f'{base}/tasks/{task.pk}/activity/',
+            f'{base}/activity/?include_archived=1', '/users/',
+        ]
+        for url in urls:
+            with self.subTest(url=url):
+                fast = self.client.get(url)
+                with override_settings(FAST_READ_PATH={'ENABLED': False}):
+                    slow = self.client.get(url)
+                self.assertEqual(fast.status_code, 200)
+                self.assertEqual(fast.content, slow.content)
+
+    def test_unsupported_serializer_falls_back(self):
+        self.assertIsNone(fastpath.for_serializer(AttachmentSerializer))
+        self.assertEqual(fastpath.for_serializer(TaskSerializer).columns[:2], ['id', 'title'])
+
+    def test_orjson_renderer_matches_drf(self):
+        data = {
+            'decimal': Decimal('1.50'), 'when': timezone.now(), 'day': timezone.now().date(),
+            'text': 'a\u2028b\u2029c\x1f é', 'error': ErrorDetail('lỗi'), 1: [None, True, 2 ** 70],
+        }
+        self.assertEqual(ORJSONRenderer().render(data), JSONRenderer().render(data))
+        self.assertEqual(
+            ORJSONRenderer().render(data, 'application/json; indent=2'),
+            JSONRenderer().render(data, 'application/json; indent=2'),
+        )
+        response = self.client.post('/projects/', '{"name": ', content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+
+    def test_benchmark_command(self):
+        output = StringIO()
+        call_command('bench_serializers', '--rows', '20', '--repeat', '1', stdout=output)
+        self.assertEqual(output.getvalue().count('trùng khớp'), 3)
+
+    def test_field_selection_variants_share_one_compiled_serializer(self):
+        fastpath._compiled.clear()
+        expected = self.client.get('/projects/?fields=id,name').content
+        for query in ('name,id', 'id,id,name,name', ' name , id ,id'):
+            with self.subTest(query=query):
+                self.assertEqual(self.client.get(f'/projects/?fields={query}').content, expected)
+        self.assertEqual(len(fastpath._compiled), 1)
+
+
+# Đo hiệu năng endpoint: đo đủ mọi route, không để lại dữ liệu, so baseline phát hiện hồi quy
+class EndpointBenchmarkTests(TestCase):
+
+    def test_run_and_compare(self):
+        benchmarks.ensure_dataset({'users': 30, 'projects': 3, 'tasks': 100})
+        self.assertFalse(benchmarks.ensure_dataset({'users': 30, 'projects': 3, 'tasks': 100}))
+        counts = (Task.objects.count(), Attachment.objects.count(), ActivityLog.objects.count())
+        report = benchmarks.run('test', requests=1)
+        self.assertEqual((Task.objects.count(), Attachment.objects.count(), ActivityLog.objects.count()), counts)
+        self.assertEqual(report['uncovered'], [])
+        for key, result in report['endpoints'].items():
+            with self.subTest(endpoint=key):
+                self.assertLess(result['status'], 300)
+                self.assertGreater(result['queries'], 0)
+        self.assertEqual(benchmarks.compare(report, report), [])
+
+        baseline = json.loads(json.dumps(report))
+        baseline['endpoints']['GET task-list'].update(queries=1, p95_ms=0.001)
+        baseline['endpoints']['GET task-detail']['status'] = 304
+        problems = benchmarks.compare(report, baseline, {'LATENCY_MIN_DELTA_MS': 0})
+        self.assertEqual(len(problems), 3)
+        self.assertEqual(benchmarks.compare(report, baseline, {'LATENCY_THRESHOLD': 10 ** 9, 'QUERY_THRESHOLD': 100}),
+                         ['GET task-detail: status 304 -> 200'])
+        # Baseline của repo không có độ trễ: chỉ so status, số query, kích thước
+        committed = benchmarks.select(baseline, benchmarks.BASELINE_FIELDS)
+        self.assertNotIn('p95_ms', committed['endpoints']['GET task-list'])
+        self.assertEqual(len(benchmarks.compare(report, committed, {'LATENCY_MIN_DELTA_MS': 0})), 2)
+        latency = benchmarks.select(baseline, benchmarks.LATENCY_FIELDS)
+        self.assertEqual(benchmarks.compare(report, latency, {'LATENCY_MIN_DELTA_MS': 0}),
+                         [f"GET task-list: p95 0.00 -> {report['endpoints']['GET task-list']['p95_ms']:.2f} ms"])
+
+
+# Đo hiệu năng từng request: Server-Timing đếm đúng số query, /metrics/ chỉ cho staff/token, log request chậm kèm SQL
+class RequestMetricsTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create_user('owner')
+        cls.admin = User.objects.create_user('admin', is_staff=True)
+        cls.project = Project.objects.create(name='Dự án', owner=cls.owner)
+        cls.project.members.add(cls.owner)
+        Task.objects.create(title='Việc', project=cls.project)
+
+    def setUp(self):
+        perf.registry.reset()
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(self.owner)}')
+
+    def test_server_timing(self):
+        url = f'/projects/{self.project.pk}/tasks/'
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url)
+        timing = dict(part.split(';', 1) for part in response['Server-Timing'].split(', '))
+        self.assertIn(f'desc="{len(context)} query"', timing['db'])
+        self.assertTrue({'auth', 'serialize', 'render', 'total'} <= set(timing))
+        phases = [float(value.split('dur=')[1].split(';')[0]) for name, value in timing.items() if name != 'total']
+        self.assertAlmostEqual(sum(phases), float(timing['total'].split('=')[1]), delta=0.1)
+
+        with override_settings(REQUEST_METRICS={'SERVER_TIMING': False}):
+            self.assertNotIn('Server-Timing', self.client.get(url))
+
+    def test_metrics_endpoint(self):
+        self.client.get(f'/projects/{self.project.pk}/tasks/')
+        self.assertEqual(APIClient().get('/metrics/').status_code, 401)
+        self.assertEqual(self.client.get('/metrics/').status_code, 403)
+        with override_settings(REQUEST_METRICS={'METRICS_TOKEN': 'scrape-secret'}):
+            self.assertEqual(APIClient().get('/metrics/', HTTP_AUTHORIZATION='Bearer sai').status_code, 401)
+            response = APIClient().get('/metrics/', HTTP_AUTHORIZATION='Bearer scrape-secret')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response['Content-Type'].startswith('text/plain; version=0.0.4'))
+        body = response.content.decode()
+        self.assertIn('taskmanager_http_requests_total{route="task-list",method="GET",status="200"} 1', body)
+        self.assertIn('taskmanager_http_request_duration_seconds_count{route="task-list",method="GET"} 1', body)
+        self.assertIn('taskmanager_http_request_phase_seconds_total{route="task-list",method="GET",phase="db"}', body)
+        self.assertIn('taskmanager_jwt_user_cache_total{result="hit"}', body)
+
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(self.admin)}')
+        self.assertEqual(self.client.get('/metrics/').status_code, 200)
+
+    def test_unknown_methods_share_one_label(self):
+        url = f'/projects/{self.project.pk}/tasks/'
+        for method in ('FOO', 'BAR', 'PROPFIND'):
+            self.client.generic(method, url)
+        self.client.get(url)
+        self.assertEqual({key[1] for key in perf.registry.snapshot()['requests']}, {'other', 'GET'})
+
+    def test_slow_request_log(self):
+        with override_settings(REQUEST_METRICS={'SLOW_REQUEST_MS': 0, 'SLOW_SQL_COUNT': 2}), \
+                self.assertLogs('API.perf', 'WARNING') as logs:
+            self.client.get(f'/projects/{self.project.pk}/tasks/')
+        self.assertIn('(task-list) -> 200', logs.output[0])
+        self.assertEqual(logs.output[0].count('SELECT'), 2)
+
+        with override_settings(REQUEST_METRICS={'SLOW_REQUEST_MS': 0, 'SLOW_SAMPLE_RATE': 0}), \
+                self.assertNoLogs('API.perf', 'WARNING'):
+            self.client.get(f'/projects/{self.project.pk}/tasks/')
+
+
+# Phát hiện N+1: serializer thiếu prefetch -> lỗi khi chạy test (kèm stack), allowlist theo view, các chế độ warn/log
+@override_settings(FAST_READ_PATH={'ENABLED': False})
+class NPlusOneTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('user')
+        for i in range(8):
+            project = Project.objects.create(name=f'Dự án {i}', owner=User.objects.create_user(f'owner{i}'))
+            project.members.add(cls.user)
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        # Giả lập quên select_related/prefetch_related cho danh sách dự án
+        patcher = mock.patch.object(ProjectSerializer, 'prepare_queryset', classmethod(lambda cls, queryset, **o: queryset))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_fingerprint(self):
+        self.assertEqual(
+            nplusone.fingerprint('SELECT "a"."id" FROM "a" WHERE "a"."id" IN (%s, %s) AND "a"."n" = \'x\'\'y\' LIMIT 21'),
+            'SELECT "a"."id" FROM "a" WHERE "a"."id" IN (...) AND "a"."n" = ? LIMIT ?',
+        )
+        self.assertEqual(nplusone.fingerprint('INSERT INTO "t1" ("a") VALUES (%s), (%s)'), 'INSERT INTO "t1" ("a") VALUES (...)')
+
+    def test_raises_in_tests_with_stack(self):
+        with self.assertRaises(nplusone.NPlusOneError) as context:
+            self.client.get('/projects/')
+        message = str(context.exception)
+        self.assertIn('(project-list)', message)
+        self.assertIn('8 lần: SELECT', message)
+        self.assertIn('"API_project_members"."project_id" = ?', message)
+        self.assertIn('API/pagination.py', message)
+        self.assertNotIn('perf.py', message)
+        # Danh sách nhỏ hơn ngưỡng thì không báo
+        self.assertEqual(self.client.get('/projects/?page_size=5').status_code, 200)
+
+    def test_allowlist(self):
+        with override_settings(NPLUSONE={'ALLOWLIST': {'project-list': ['FROM "API_user"']}}):
+            self.assertEqual(self.client.get('/projects/').status_code, 200)
+        with override_settings(NPLUSONE={'ALLOWLIST': {'project-list': ['"API_project_members"."project_id"']}}):
+            with self.assertRaises(nplusone.NPlusOneError):
+                self.client.get('/projects/')
+
+    def test_warn_and_log_modes(self):
+        with override_settings(NPLUSONE={'MODE': 'warn'}), warnings.catch_warnings(record=True) as caught:
+            warnings.simplefilter('always')
+            self.assertEqual(self.client.get('/projects/').status_code, 200)
+        self.assertTrue(any(issubclass(item.category, nplusone.NPlusOneWarning) for item in caught))
+        with override_settings(NPLUSONE={'MODE': 'log', 'SAMPLE_RATE': 1.0}), self.assertLogs('API.nplusone') as logs:
+            self.client.get('/projects/')
+        self.assertIn('N+1 query', logs.output[0])
+        with override_settings(NPLUSONE={'MODE': 'log', 'SAMPLE_RATE': 0}), self.assertNoLogs('API.nplusone'):
+            self.client.get('/projects/')
+
+
+# Đọc từ bản sao: GET vào bản sao, ghi/transaction vào primary, ghim primary sau khi ghi, bản sao lỗi -> primary
+@override_settings(READ_REPLICAS={'ALIASES': ['replica'], 'PIN_SECONDS': 5})
+class ReplicaRoutingTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('user')
+
+    def setUp(self):
+        replicas.reset()
+        self.addCleanup(replicas.reset)
+        self.factory = RequestFactory()
+        self.router = replicas.ReplicaRouter()
+
+    def route(self, request, available=True, user=None):
+        # Nơi đọc/ghi mà router chọn bên trong request (không chạy truy vấn thật trên bản sao)
+        seen = {}
+
+        def view(request):
+            if user is not None:
+                request.user = user     # như DRF gán user đã xác thực vào request gốc
+            seen['read'] = self.router.db_for_read(Task)
+            seen['write'] = self.router.db_for_write(Task)
+            return HttpResponse()
+
+        with mock.patch.object(replicas, '_available', return_value=available):
+            response = replicas.PrimaryPinMiddleware(view)(request)
+        return seen, response
+
+    def bearer(self):
+        return {'HTTP_AUTHORIZATION': f'Bearer {AccessToken.for_user(self.user)}'}
+
+    def test_reads_use_replica_writes_use_primary(self):
+        seen, _ = self.route(self.factory.get('/projects/'))
+        self.assertEqual(seen, {'read': 'replica', 'write': 'default'})
+        seen, _ = self.route(self.factory.post('/projects/'))
+        self.assertEqual(seen, {'read': 'default', 'write': 'default'})
+        # Ngoài request (lệnh quản trị, thread nền) luôn dùng primary
+        self.assertEqual(self.router.db_for_read(Task), 'default')
+        with override_settings(READ_REPLICAS={'ALIASES': []}):
+            self.assertEqual(self.route(self.factory.get('/projects/'))[0]['read'], 'default')
+
+    def test_atomic_block_reads_primary(self):
+        def view(request):
+            with transaction.atomic():
+                return HttpResponse(self.router.db_for_read(Task))
+
+        with mock.patch.object(replicas, '_available', return_value=True):
+            response = replicas.PrimaryPinMiddleware(view)(self.factory.get('/projects/'))
+        self.assertEqual(response.content, b'default')
+
+    def test_pin_after_write_by_cookie_and_token(self):
+        _, response = self.route(self.factory.post('/projects/', **self.bearer()), user=self.user)
+        cookie = response.cookies['primary_pin']
+        self.assertEqual(cookie['max-age'], 5)
+        # Trình duyệt gửi lại cookie
+        request = self.factory.get('/projects/')
+        request.COOKIES['primary_pin'] = cookie.value
+        self.assertEqual(self.route(request)[0]['read'], 'default')
+        # Client API không giữ cookie: nhận ra qua claim user_id trong token
+        self.assertEqual(self.route(self.factory.get('/projects/', **self.bearer()))[0]['read'], 'default')
+        # User khác và request không token vẫn đọc từ bản sao
+        other = {'HTTP_AUTHORIZATION': f'Bearer {AccessToken.for_user(User.objects.create_user("other"))}'}
+        self.assertEqual(self.route(self.factory.get('/projects/', **other))[0]['read'], 'replica')
+        self.assertEqual(self.route(self.factory.get('/projects/'))[0]['read'], 'replica')
+
+    def test_unauthenticated_write_does_not_pin_token_user(self):
+        # Token giả mạo (hoặc hết hạn) mang user_id của người khác: request không xác thực được thì không ghim ai
+        _, response = self.route(self.factory.post('/projects/', **self.bearer()))
+        self.assertIn('primary_pin', response.cookies)
+        self.assertEqual(self.route(self.factory.get('/projects/', **self.bearer()))[0]['read'], 'replica')
+
+    @override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'replica-tests'}})
+    def test_cache_fills_read_primary(self):
+        member = User.objects.create_user('member')
+        outsider = User.objects.create_user('outsider')
+        project = Project.objects.create(name='Dự án', owner=self.user)
+        project.members.add(member)
+        prefetched = Project.objects.prefetch_related('members').get(pk=project.pk)
+        prefetched._state.db = 'replica'
+        membership.clear()
+        authentication.clear()
+        seen = {}
+
+        def view(request):
+            # Truy vấn đi qua router sẽ vào alias 'replica' (không có khi chạy test) và báo lỗi
+            seen['user'] = authentication.CachedJWTAuthentication().get_user(AccessToken.for_user(member))
+            seen['member'] = membership.is_project_member(member, project.pk)
+            seen['stats'] = stats._cached_counters(project.pk, stats._config())
+            seen['prefetched'] = membership.is_project_member(outsider, prefetched)
+            return HttpResponse()
+
+        with mock.patch.object(replicas, '_available', return_value=True):
+            replicas.PrimaryPinMiddleware(view)(self.factory.get('/projects/'))
+        self.assertEqual((seen['user'], seen['member'], seen['prefetched']), (member, True, False))
+        self.assertEqual(list(seen['stats']), [])
+        # Kết quả tính từ members đọc trên bản sao không được cache
+        with self.assertNumQueries(1):
+            self.assertFalse(membership.is_project_member(outsider, project.pk))
+
+    def test_pin_expires(self):
+        with override_settings(READ_REPLICAS={'ALIASES': ['replica'], 'PIN_SECONDS': 1}):
+            self.route(self.factory.post('/projects/', **self.bearer()), user=self.user)
+            with mock.patch('django.core.cache.backends.locmem.time.time', return_value=time.time() + 2):
+                self.assertEqual(self.route(self.factory.get('/projects/', **self.bearer()))[0]['read'], 'replica')
+
+    def test_unavailable_replica_falls_back_to_primary(self):
+        # Alias 'replica' không có trong DATABASES khi chạy test: request vẫn thành công, đọc từ primary
+        client = APIClient()
+        client.force_authenticate(self.user)
+        with self.assertLogs('API.replicas', 'WARNING') as logs:
+            self.assertEqual(client.get('/projects/').status_code, 200)
+        self.assertIn("'replica'", logs.output[0])
+        # Không thử lại cho tới hết RETRY_AFTER
+        with self.assertNoLogs('API.replicas', 'WARNING'):
+            self.assertEqual(client.get('/projects/').status_code, 200)
+
+    def test_replica_not_migrated(self):
+        self.assertIs(self.router.allow_migrate('replica', 'API'), False)
+        self.assertIsNone(self.router.allow_migrate('default', 'API'))
+
+
+# Endpoint đọc async (/async/...): cùng nội dung với bản đồng bộ, cùng quyền và lỗi, không truy cập CSDL đồng bộ
+class AsyncReadViewTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create_user('owner')
+        cls.member = User.objects.create_user('member')
+        cls.outsider = User.objects.create_user('outsider')
+        cls.project = Project.objects.create(name='Dự án', owner=cls.owner)
+        cls.project.members.add(cls.owner, cls.member)
+        Project.objects.create(name='Khác', owner=cls.outsider)
+        cls.task = Task.objects.create(title='Viết báo cáo', project=cls.project, assignee=cls.member)
+        Task.objects.create(title='Không hạn', project=cls.project, status='DONE', due_date=timezone.now().date())
+        Task.objects.create(title='Thứ ba', project=cls.project)
+        cls.comment = Comment.objects.create(task=cls.task, author=cls.member, body='Bình luận')
+        Comment.objects.create(task=cls.task, author=cls.owner, body='Trả lời')
+        ActivityLog.objects.create(actor=cls.owner, action_description='tạo', project=cls.project, task=cls.task)
+        ActivityLog.objects.create(actor=None, action_description='hệ thống', project=cls.project)
+
+    def setUp(self):
+        membership.clear()
+        authentication.clear()
+        self.client = self.client_for(self.member)
+
+    def client_for(self, user):
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(user)}')
+        return client
+
+    def test_same_responses_as_sync_views(self):
+        base = f'/projects/{self.project.pk}'
+        task = f'{base}/tasks/{self.task.pk}'
+        urls = [
+            '/projects/', '/projects/?page_size=1', '/projects/?role=owner', f'{base}/', f'{base}/?fields=id,members',
+            f'{base}/tasks/', f'{base}/tasks/?page_size=2&ordering=due_date', f'{base}/tasks/?status=done',
+            f'{base}/tasks/?assignee=me&fields=id,title', f'{base}/tasks/?search=báo', f'{task}/', f'{task}/?expand=assignee&fields=id',
+            f'{task}/comments/', f'{task}/comments/?page_size=1', f'{task}/comments/{self.comment.pk}/',
+            f'{base}/activity/', f'{base}/activity/?include_archived=1', f'{task}/activity/?page_size=1',
+            f'{base}/tasks/0/', f'{base}/tasks/0/comments/', '/projects/0/activity/', f'{base}/?fields=nope',
+        ]
+        for url in urls:
+            with self.subTest(url=url):
+                sync = self.client.get(url)
+                response = self.client.get('/async' + url)
+                self.assertEqual(response.status_code, sync.status_code)
+                self.assertEqual(response.content, sync.content.replace(b'testserver/projects/', b'testserver/async/projects/'))
+                self.assertEqual(response.has_header('ETag'), sync.has_header('ETag'))
+                self.assertEqual(response.get('Cache-Control'), sync.get('Cache-Control'))
+        # Trang sau theo link 'next' của chính endpoint async
+        next_page = self.client.get(f'/async{base}/tasks/?page_size=2').json()['next']
+        self.assertEqual([task['title'] for task in self.client.get(next_page).json()['results']], ['Thứ ba'])
+
+    def test_permissions_and_errors(self):
+        base = f'/async/projects/{self.project.pk}'
+        outsider = self.client_for(self.outsider)
+        self.assertEqual(outsider.get(f'{base}/').status_code, 403)
+        self.assertEqual(outsider.get(f'{base}/tasks/{self.task.pk}/').status_code, 403)
+        self.assertEqual(outsider.get(f'{base}/tasks/{self.task.pk}/comments/{self.comment.pk}/').status_code, 403)
+        self.assertEqual(outsider.get(f'{base}/tasks/').json(), [])
+        self.assertEqual(self.client_for(self.member).get(f'{base}/').status_code, 200)
+
+        anonymous = APIClient().get(f'{base}/')
+        self.assertEqual(anonymous.status_code, 401)
+        self.assertEqual(anonymous['WWW-Authenticate'], 'Bearer realm="api"')
+        invalid = APIClient(HTTP_AUTHORIZATION='Bearer abc').get(f'{base}/')
+        self.assertEqual(invalid.status_code, 401)
+        self.assertEqual(invalid.json()['code'], 'token_not_valid')
+
+        response = self.client.post(f'{base}/tasks/', {'title': 'x'}, format='json')
+        self.assertEqual(response.status_code, 405)
+        self.assertEqual(response['Allow'], 'GET, HEAD')
+
+    def test_conditional_get(self):
+        url = f'/async/projects/{self.project.pk}/tasks/{self.task.pk}/'
+        etag = self.client.get(url)['ETag']
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        etag = self.client.get('/async/projects/')['ETag']
+        self.assertEqual(self.client.get('/async/projects/', HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+    def test_cached_reads_use_few_queries(self):
+        url = f'/async/projects/{self.project.pk}/tasks/{self.task.pk}/'
+        self.client.get(url)
+        # User và quyền thành viên lấy từ cache: chỉ còn truy vấn đọc công việc
+        with self.assertNumQueries(1):
+            self.assertEqual(self.client.get(url).status_code, 200)
+
+    async def test_async_client(self):
+        token = await sync_to_async(AccessToken.for_user)(self.member)
+        response = await AsyncClient().get(
+            f'/async/projects/{self.project.pk}/tasks/?page_size=2', headers={'Authorization': f'Bearer {token}'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()['results']), 2)
+        self.assertIn('db;dur=', response['Server-Timing'])
+
+
+# So sánh tải WSGI/ASGI: hai đường cùng trả lời không lỗi từ các thread server thật (dữ liệu phải được commit)
+class ReadLoadTestTests(TransactionTestCase):
+
+    def test_run(self):
+        benchmarks.ensure_dataset({'users': 30, 'projects': 3, 'tasks': 100})
+        report = loadtest.run(concurrency=[1, 4], requests=14, threads=2, db_latency_ms=1, slo_ms=10 ** 6)
+        self.assertEqual(len(report['endpoints']), 7)
+        for mode in ('wsgi', 'asgi'):
+            with self.subTest(mode=mode):
+                self.assertEqual([level['concurrency'] for level in report['results'][mode]], [1, 4])
+                for level in report['results'][mode]:
+                    self.assertEqual((level['requests'], level['errors']), (14, 0))
+                self.assertEqual(report['headroom'][mode], 4)
+        self.assertEqual(connection.execute_wrappers.count(loadtest._latency_hook), 1)
+        self.assertEqual(loadtest._db_latency, 0.0)
+
+    def test_headroom(self):
+        levels = [
+            {'concurrency': 1, 'p95_ms': 5, 'errors': 0},
+            {'concurrency': 8, 'p95_ms': 40, 'errors': 0},
+            {'concurrency': 32, 'p95_ms': 20, 'errors': 3},
+            {'concurrency': 64, 'p95_ms': 300, 'errors': 0},
+        ]
+        self.assertEqual(loadtest.headroom(levels, 50), 8)
+        self.assertEqual(loadtest.headroom(levels[3:], 50), 0)
+
+
+# Kế hoạch thực thi (EXPLAIN) của mọi SELECT mà các endpoint chính phát ra:
+# không được quét toàn bảng hay sắp xếp tường minh
+class QueryPlanTests(TestCase):
+    # Danh sách dự án của một user phải sắp xếp trên tập dự án của chính user đó (không có index nào
+    # vừa lọc theo thành viên vừa có sẵn thứ tự) nên được phép sort. Autocomplete cũng vậy: sắp theo
+    # hạng trên tập đã lọc bằng index tiền tố.
+    allowed = {'/projects/?page_size=10': {'sort'}, '/users/autocomplete/?q=user': {'sort'}}
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.users = [User.objects.create_user(f'user{i}') for i in range(5)]
+        for i in range(4):
+            project = Project.objects.create(name=f'Dự án {i}', owner=cls.users[i % 2])
+            project.members.add(*cls.users[:3])
+            for j in range(30):
+                task = Task.objects.create(title=f'Công việc {j}', project=project, assignee=cls.users[j % 3],
+                                           status=Task.Status.values[j % 3])
+                if j < 5:
+                    Comment.objects.create(task=task, author=cls.users[0], body='Bình luận')
+                    Attachment.objects.create(task=task, uploader=cls.users[0], file='attachments/test.txt')
+                    ActivityLog.objects.create(actor=cls.users[0], action_description='test', project=project, task=task)
+        cls.project = project
+        cls.task = project.tasks.order_by('id').first()
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.users[2])
+
+    def assertIndexedPlans(self, url, allowed=None):
+        membership.clear()
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200, url)
+        allowed = self.allowed.get(url, set()) if allowed is None else allowed
+        for query in context.captured_queries:
+            if not query['sql'].startswith('SELECT'):
+                continue
+            problems = [p for p in plan_problems(query['sql']) if p.split(':')[0] not in allowed]
+            self.assertEqual(problems, [], f'{url}\n{query["sql"]}')
+        return response
+
+    def test_endpoint_plans(self):
+        p, t = self.project.pk, self.task.pk
+        urls = [
+            '/projects/?page_size=10',
+            f'/projects/{p}/',
+            f'/projects/{p}/tasks/',
+            f'/projects/{p}/tasks/?page_size=10',
+            f'/projects/{p}/tasks/?page_size=10&ordering=-created_at',
+            f'/projects/{p}/tasks/?page_size=10&ordering=due_date',
+            f'/projects/{p}/tasks/?page_size=10&ordering=-due_date',
+            f'/projects/{p}/tasks/?status=todo&page_size=10',
+            f'/projects/{p}/tasks/?priority=high',
+            f'/projects/{p}/tasks/?assignee=me',
+            f'/projects/{p}/tasks/{t}/',
+            f'/projects/{p}/tasks/{t}/comments/?page_size=10',
+            f'/projects/{p}/tasks/{t}/attachments/?page_size=10',
+            f'/projects/{p}/activity/',
+            f'/projects/{p}/activity/?page_size=10',
+            f'/projects/{p}/tasks/{t}/activity/?page_size=10',
+            '/users/autocomplete/?q=user',
+        ]
+        for url in urls:
+            self.assertIndexedPlans(url)
+
+    def test_search_plans(self):
+        # ?search= lọc qua index toàn văn (GIN tsvector + trigram / FTS5); sắp theo hạng nên được phép sort
+        for url in ['/users/?search=user1', '/projects/?search=án', f'/projects/{self.project.pk}/tasks/?search=việc']:
+            # Lần đầu search() đọc cấu trúc bảng để biết đã có index chưa (nhớ lại cho cả tiến trình)
+            self.client.get(url)
+            response = self.assertIndexedPlans(url, allowed={'sort'})
+            self.assertTrue(response.json(), url)
+
+    def test_cursor_pages(self):
+        # Trang sau (có cursor) cũng phải đi theo index, kể cả danh sách user sắp theo id
+        for url in ['/users/?page_size=2', f'/projects/{self.project.pk}/tasks/?page_size=7&ordering=-due_date',
+                    f'/projects/{self.project.pk}/activity/?page_size=2']:
+            next_url = self.client.get(url).json()['next']
+            self.assertIndexedPlans(next_url.replace('http://testserver', ''))
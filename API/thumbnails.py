@@ -0,0 +1,125 @@
+import io
+import logging
+import mimetypes
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import connection, transaction
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+from .models import Attachment
+
+logger = logging.getLogger(__name__)
+
+
+# Ảnh thu nhỏ cho tệp đính kèm là ảnh, sinh ngoài luồng request:
+# - Sau khi Attachment được tạo (commit xong), việc sinh ảnh được đẩy vào ThreadPoolExecutor của worker
+#   (Pillow nhả GIL khi giải mã/thu nhỏ nên các thread chạy song song được).
+# - Ảnh lưu cạnh tệp gốc: <tên tệp gốc>.thumb.webp; các tệp đính kèm dùng chung blob dùng chung ảnh.
+# - Lệnh generate_thumbnails sinh lại hàng loạt các ảnh còn thiếu.
+
+DEFAULTS = {
+    'ENABLED': True,
+    'BACKGROUND': True,         # False: sinh ngay sau commit trong request (dùng cho test)
+    'SIZE': (320, 320),         # khung tối đa, giữ tỉ lệ
+    'FORMAT': 'WEBP',           # 'WEBP' | 'JPEG'
+    'QUALITY': 80,
+    'WORKERS': 2,
+    'MAX_PIXELS': 50_000_000,   # bỏ qua ảnh quá lớn (tránh ngốn bộ nhớ / decompression bomb)
+}
+
+EXTENSIONS = {'WEBP': 'webp', 'JPEG': 'jpg'}
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _config():
+    return {**DEFAULTS, **getattr(settings, 'THUMBNAILS', {})}
+
+
+def is_image(attachment):
+    content_type = mimetypes.guess_type(attachment.filename or attachment.file.name)[0] or ''
+    return content_type.startswith('image/') and content_type != 'image/svg+xml'
+
+
+def thumbnail_name(source_name, config=None):
+    config = config or _config()
+    return f"{source_name}.thumb.{EXTENSIONS[config['FORMAT']]}"
+
+
+def render(source, config=None):
+    """
+    Đọc ảnh từ file-like `source`, trả về bytes của ảnh thu nhỏ.
+    """
+    config = config or _config()
+    with Image.open(source) as image:
+        if image.width * image.height > config['MAX_PIXELS']:
+            raise ValueError(f'Ảnh quá lớn: {image.width}x{image.height}')
+        # JPEG: giải mã luôn ở độ phân giải thấp (nhanh hơn và ít bộ nhớ hơn nhiều với ảnh điện thoại)
+        image.draft('RGB', config['SIZE'])
+        image = ImageOps.exif_transpose(image)
+        image.thumbnail(config['SIZE'], Image.Resampling.LANCZOS)
+        if config['FORMAT'] == 'JPEG' or image.mode not in ('RGB', 'RGBA'):
+            transparent = 'A' in image.getbands() or 'transparency' in image.info
+            image = image.convert('RGBA' if config['FORMAT'] == 'WEBP' and transparent else 'RGB')
+        output = io.BytesIO()
+        image.save(output, config['FORMAT'], quality=config['QUALITY'], optimize=config['FORMAT'] == 'JPEG')
+    return output.getvalue()
+
+
+def generate(attachment_id, force=False):
+    """
+    Sinh (hoặc dùng lại) ảnh thu nhỏ cho một tệp đính kèm; trả về tên tệp ảnh hoặc None.
+    """
+    config = _config()
+    attachment = Attachment.objects.filter(pk=attachment_id).first()
+    if attachment is None or not attachment.file or not is_image(attachment):
+        return None
+    if attachment.thumbnail and not force:
+        return attachment.thumbnail.name
+
+    storage = attachment.file.storage
+    name = thumbnail_name(attachment.file.name, config)
+    if force or not storage.exists(name):
+        try:
+            with storage.open(attachment.file.name, 'rb') as source:
+                data = render(source, config)
+        except (OSError, ValueError, UnidentifiedImageError, Image.DecompressionBombError) as exc:
+            logger.warning("Không sinh được ảnh thu nhỏ cho attachment %s: %s", attachment_id, exc)
+            return None
+        if storage.exists(name):
+            storage.delete(name)
+        name = storage.save(name, ContentFile(data))
+    # Cập nhật mọi tệp đính kèm cùng nội dung trong một câu lệnh
+    Attachment.objects.filter(file=attachment.file.name).update(thumbnail=name)
+    return name
+
+
+def _run(attachment_id):
+    try:
+        generate(attachment_id)
+    except Exception:
+        logger.exception("Lỗi sinh ảnh thu nhỏ cho attachment %s", attachment_id)
+    finally:
+        connection.close()
+
+
+def get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=_config()['WORKERS'], thread_name_prefix='thumbnail')
+    return _executor
+
+
+def schedule(attachment):
+    config = _config()
+    if not config['ENABLED'] or not attachment.file or not is_image(attachment):
+        return
+    if config['BACKGROUND']:
+        transaction.on_commit(lambda: get_executor().submit(_run, attachment.pk))
+    else:
+        transaction.on_commit(lambda: generate(attachment.pk))
@@ -0,0 +1,267 @@
+import hashlib
+import os
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .caching import TTLCache
+from .models import Attachment, Blob, UploadSession
+
+
+# Tải tệp đính kèm theo từng phần (tạo phiên -> PUT từng đoạn theo offset -> hoàn tất) và lưu nội dung
+# theo địa chỉ SHA-256 (blobs/ab/cd/<sha256>): tệp trùng nội dung chỉ thêm một dòng Attachment trỏ vào blob cũ.
+# - Đoạn được ghi thẳng xuống file tạm <TEMP_DIR>/<session>.part, không giữ cả tệp trong bộ nhớ.
+# - SHA-256 được cập nhật dần theo từng đoạn trong tiến trình; nếu các đoạn đi qua nhiều worker
+#   (hoặc worker khởi động lại) thì băm lại file tạm khi hoàn tất.
+# - Mỗi lần ghi đoạn "giành" phiên bằng một câu UPDATE có điều kiện (writer trống, offset đúng) rồi mới
+#   đọc dữ liệu từ client: không giữ transaction hay khóa dòng trong lúc chờ client chậm; request song song vào
+#   cùng phiên nhận 409. Claim của worker chết giữa chừng hết hiệu lực sau CLAIM_TIMEOUT giây.
+# - Hoàn tất khóa dòng phiên và dòng blob trong transaction tạo tệp đính kèm: không tạo trùng tệp đính kèm,
+#   và release_blob không xóa được blob dùng chung ngay trước khi tệp đính kèm mới trỏ tới.
+# - File tạm được chép vào kho (không chuyển) và chỉ bị xóa sau commit, nên hoàn tất lỗi có thể gọi lại.
+
+DEFAULTS = {
+    'TEMP_DIR': None,                       # mặc định: <MEDIA_ROOT>/uploads/incoming
+    'MAX_SIZE': 2 * 1024 ** 3,              # byte, kích thước tối đa một tệp
+    'MAX_CHUNK_SIZE': 64 * 1024 ** 2,       # byte, kích thước tối đa một lần PUT
+    'SESSION_TTL': 24 * 3600,               # giây, phiên không hoạt động quá lâu sẽ bị dọn (cleanup_uploads)
+    'CLAIM_TIMEOUT': 3600,                  # giây, lâu hơn thời gian gửi một đoạn lớn nhất
+}
+
+READ_SIZE = 1024 * 1024
+
+_hashers = TTLCache(max_entries=1000, ttl=DEFAULTS['SESSION_TTL'])
+
+
+class UploadError(Exception):
+    def __init__(self, message, offset=None):
+        super().__init__(message)
+        self.offset = offset
+
+
+def _config():
+    return {**DEFAULTS, **getattr(settings, 'ATTACHMENT_UPLOADS', {})}
+
+
+def temp_dir():
+    directory = _config()['TEMP_DIR'] or os.path.join(settings.MEDIA_ROOT, 'uploads', 'incoming')
+    os.makedirs(directory, exist_ok=True)
+    return directory
+
+
+def part_path(session):
+    return os.path.join(temp_dir(), f'{session.pk}.part')
+
+
+def blob_name(digest):
+    return f'blobs/{digest[:2]}/{digest[2:4]}/{digest}'
+
+
+def create_session(task, uploader, filename, size, description=None):
+    if size < 0 or size > _config()['MAX_SIZE']:
+        raise UploadError(f"Kích thước tệp phải từ 0 đến {_config()['MAX_SIZE']} byte.")
+    session = UploadSession.objects.create(
+        task=task, uploader=uploader, filename=os.path.basename(filename)[:255], size=size, description=description,
+    )
+    open(part_path(session), 'wb').close()
+    _hashers.set(session.pk, (0, hashlib.sha256()))
+    return session
+
+
+def _claim(session_id, offset):
+    """
+    Giành quyền ghi phiên đang ở `offset` bằng một câu UPDATE (tự commit); trả về mã claim, hoặc None nếu
+    request khác đang giữ phiên hay offset đã đổi.
+    """
+    token = uuid.uuid4()
+    now = timezone.now()
+    free = Q(writer__isnull=True) | Q(claimed_at__lt=now - timedelta(seconds=_config()['CLAIM_TIMEOUT']))
+    claimed = UploadSession.objects.filter(free, pk=session_id, offset=offset).update(writer=token, claimed_at=now)
+    return token if claimed else None
+
+
+def _claim_error(session, start):
+    session.refresh_from_db(fields=['offset'])
+    if session.offset != start:
+        return UploadError("Offset không khớp.", offset=session.offset)
+    return UploadError("Phiên đang được một request khác xử lý, hãy thử lại sau.", offset=session.offset)
+
+
+def append_chunk(session_id, start, stream, length):
+    """
+    Ghi `length` byte đọc từ `stream` vào vị trí `start` của phiên; trả về phiên đã cập nhật offset.
+    Rớt kết nối giữa chừng thì vẫn giữ phần đã nhận để client tiếp tục từ offset mới.
+    """
+    if length > _config()['MAX_CHUNK_SIZE']:
+        raise UploadError(f"Mỗi đoạn tối đa {_config()['MAX_CHUNK_SIZE']} byte.")
+    session = UploadSession.objects.get(pk=session_id)
+    if start != session.offset:
+        raise UploadError("Offset không khớp.", offset=session.offset)
+    if start + length > session.size:
+        raise UploadError("Đoạn vượt quá kích thước tệp đã khai báo.", offset=session.offset)
+    token = _claim(session.pk, start)
+    if token is None:
+        raise _claim_error(session, start)
+
+    cached = _hashers.get(session.pk)
+    hasher = cached[1] if cached and cached[0] == start else None
+    received = 0
+    try:
+        with open(part_path(session), 'r+b') as part:
+            part.seek(start)
+            part.truncate()
+            while received < length:
+                try:
+                    data = stream.read(min(READ_SIZE, length - received))
+                except OSError:
+                    break
+                if not data:
+                    break
+                part.write(data)
+                if hasher is not None:
+                    hasher.update(data)
+                received += len(data)
+    finally:
+        # Cập nhật offset và trả claim trong cùng một câu UPDATE; claim đã bị request khác lấy lại thì không ghi đè
+        session.offset = start + received
+        released = UploadSession.objects.filter(pk=session.pk, writer=token).update(
+            offset=session.offset, writer=None, claimed_at=None, updated_at=timezone.now())
+    if not released:
+        _hashers.delete(session.pk)
+        raise _claim_error(session, session.offset)
+    if hasher is not None:
+        _hashers.set(session.pk, (session.offset, hasher))
+    else:
+        _hashers.delete(session.pk)
+    if received < length:
+        raise UploadError("Đoạn chưa nhận đủ, hãy gửi tiếp từ offset hiện tại.", offset=session.offset)
+    return session
+
+
+def _digest_file(path):
+    hasher = hashlib.sha256()
+    with open(path, 'rb') as source:
+        for data in iter(lambda: source.read(READ_SIZE), b''):
+            hasher.update(data)
+    return hasher.hexdigest()
+
+
+def _store_blob(digest, size, content):
+    """
+    (blob, đã tạo mới?) cho nội dung `digest`; gọi trong transaction, cùng transaction tạo tệp đính kèm trỏ tới blob.
+    Blob sẵn có bị khóa dòng để release_blob không xóa được nó trước khi tệp đính kèm mới được commit.
+    """
+    blob = Blob.objects.select_for_update().filter(sha256=digest).first()
+    if blob is not None:
+        return blob, False
+    # Luôn lưu dưới tên còn trống: tệp cùng tên có thể đang chờ bị xóa bởi release_blob vừa commit
+    stored = default_storage.save(blob_name(digest), content)
+    try:
+        with transaction.atomic():
+            return Blob.objects.create(sha256=digest, file=stored, size=size), True
+    except IntegrityError:
+        # Một upload khác cùng nội dung vừa tạo blob trước
+        default_storage.delete(stored)
+        return Blob.objects.select_for_update().get(sha256=digest), False
+
+
+def blob_for_file(uploaded):
+    """
+    Blob cho một tệp đã nhận đủ (vd: multipart), dùng lại blob sẵn có nếu trùng nội dung. Gọi trong transaction
+    tạo tệp đính kèm (xem _store_blob).
+    """
+    hasher = hashlib.sha256()
+    for data in uploaded.chunks():
+        hasher.update(data)
+    uploaded.seek(0)
+    blob, created = _store_blob(hasher.hexdigest(), uploaded.size, uploaded)
+    return blob
+
+
+def finalize(session):
+    """
+    Tạo tệp đính kèm từ file tạm đã nhận đủ. Nội dung được chép (không chuyển) vào kho lưu trữ và file tạm chỉ bị
+    xóa sau khi commit: transaction lỗi thì phiên vẫn còn nguyên để client gọi hoàn tất lại, và tệp blob vừa lưu
+    bị xóa theo.
+    """
+    if session.offset != session.size:
+        raise UploadError("Tệp chưa tải lên đủ.", offset=session.offset)
+    path = part_path(session)
+    cached = _hashers.get(session.pk)
+    digest = cached[1].hexdigest() if cached and cached[0] == session.size else _digest_file(path)
+
+    stored = []
+    try:
+        with transaction.atomic():
+            # Khóa phiên: hai request hoàn tất song song thì request sau thấy phiên đã bị xóa
+            if UploadSession.objects.select_for_update().filter(pk=session.pk).only('pk').first() is None:
+                raise UploadError("Phiên tải lên đã được hoàn tất.", offset=session.offset)
+            with open(path, 'rb') as part:
+                blob, created = _store_blob(digest, session.size, File(part, name=path))
+            if created:
+                stored.append(blob.file.name)
+            attachment = Attachment.objects.create(
+                task=session.task, uploader=session.uploader, blob=blob, file=blob.file.name,
+                filename=session.filename, description=session.description,
+            )
+            session.delete()
+            transaction.on_commit(lambda: _discard(session.pk, path))
+    except Exception:
+        for name in stored:
+            default_storage.delete(name)
+        raise
+    return attachment
+
+
+def abort(session):
+    path = part_path(session)
+    session.delete()
+    _discard(session.pk, path)
+
+
+def _discard(session_id, path):
+    _hashers.delete(session_id)
+    if os.path.exists(path):
+        os.remove(path)
+
+
+def delete_attachment(attachment):
+    """
+    Xóa tệp đính kèm; blob dùng chung (và ảnh thu nhỏ của nó) chỉ bị xóa khi không còn tệp đính kèm nào trỏ tới.
+    """
+    blob = attachment.blob
+    thumbnail = attachment.thumbnail.name if attachment.thumbnail else None
+    if blob is None:
+        if attachment.file:
+            attachment.file.delete(save=False)
+        if thumbnail:
+            attachment.thumbnail.delete(save=False)
+    attachment.delete()
+    if blob is not None:
+        release_blob(blob, [thumbnail] if thumbnail else [])
+
+
+def release_blob(blob, extra_files=()):
+    with transaction.atomic():
+        locked = Blob.objects.select_for_update().filter(pk=blob.pk).first()
+        if locked is None or locked.attachments.exists():
+            return
+        # on_delete=PROTECT: nếu vừa có tệp đính kèm mới trỏ vào blob thì delete() sẽ báo lỗi thay vì mất dữ liệu
+        locked.delete()
+        names = [locked.file.name, *extra_files]
+        transaction.on_commit(lambda: [default_storage.delete(name) for name in names])
+
+
+def purge_expired():
+    cutoff = timezone.now() - timedelta(seconds=_config()['SESSION_TTL'])
+    purged = 0
+    for session in UploadSession.objects.filter(updated_at__lt=cutoff).iterator():
+        abort(session)
+        purged += 1
+    return purged
@@ -12,11 +12,15 @@ urlpatterns = [
 
     # Người dùng (Users)
     path('users/', views.UserListView.as_view(), name='user-list'),
+    path('users/autocomplete/', views.UserAutocompleteView.as_view(), name='user-autocomplete'),
     path('users/<int:pk>/', views.UserDetailView.as_view(), name='user-detail'),
 
     # Dự án (Projects)
     path('projects/', views.ProjectListView.as_view(), name='project-list'),
     path('projects/<int:pk>/', views.ProjectDetailView.as_view(), name='project-detail'),
+    path('projects/<int:pk>/stats/', views.ProjectStatsView.as_view(), name='project-stats'),
+    path('projects/<int:pk>/export/', views.ProjectExportView.as_view(), name='project-export'),
+    path('projects/<int:pk>/events/', views.project_events, name='project-events'),
 
     # Quản lý thành viên dự án
     path('projects/<int:pk>/add_member/', views.AddMemberView.as_view(), name='project-add-member'),
@@ -24,6 +28,7 @@ urlpatterns = [
 
     # Công việc (Tasks)
     path('projects/<int:pk>/tasks/', views.TaskListView.as_view(), name='task-list'),
+    path('projects/<int:pk>/tasks/bulk/', views.TaskBulkView.as_view(), name='task-bulk'),
     path('projects/<int:project_pk>/tasks/<int:pk>/', views.TaskDetailView.as_view(), name='task-detail'),
 
     # Bình luận (Comments)
@@ -32,9 +37,27 @@ urlpatterns = [
 
     # Tệp đính kèm (Attachments)
     path('projects/<int:project_pk>/tasks/<int:task_pk>/attachments/', views.AttachmentListView.as_view(), name='attachment-list'),
+    path('projects/<int:project_pk>/tasks/<int:task_pk>/attachments/uploads/', views.AttachmentUploadListView.as_view(), name='attachment-upload-list'),
+    path('projects/<int:project_pk>/tasks/<int:task_pk>/attachments/uploads/<uuid:upload_id>/', views.AttachmentUploadView.as_view(), name='attachment-upload'),
+    path('projects/<int:project_pk>/tasks/<int:task_pk>/attachments/uploads/<uuid:upload_id>/complete/', views.AttachmentUploadCompleteView.as_view(), name='attachment-upload-complete'),
     path('projects/<int:project_pk>/tasks/<int:task_pk>/attachments/<int:pk>/', views.AttachmentDetailView.as_view(), name='attachment-detail'),
+    path('projects/<int:project_pk>/tasks/<int:task_pk>/attachments/<int:pk>/download/', views.AttachmentDownloadView.as_view(), name='attachment-download'),
+    path('projects/<int:project_pk>/tasks/<int:task_pk>/attachments/<int:pk>/thumbnail/', views.AttachmentThumbnailView.as_view(), name='attachment-thumbnail'),
 
     # Nhật ký hoạt động (Activity Log)
     path('projects/<int:project_pk>/activity/', views.ActivityLogProjectView.as_view(), name='activity-project'),
     path('projects/<int:project_pk>/tasks/<int:task_pk>/activity/', views.ActivityLogTaskView.as_view(), name='activity-task'),
+
+    # Số liệu hiệu năng (Prometheus)
+    path('metrics/', views.metrics, name='metrics'),
+
+    # Bản async của các endpoint đọc (chạy dưới ASGI, xem API/asyncviews.py)
+    path('async/projects/', views.async_project_list, name='async-project-list'),
+    path('async/projects/<int:pk>/', views.async_project_detail, name='async-project-detail'),
+    path('async/projects/<int:pk>/tasks/', views.async_task_list, name='async-task-list'),
+    path('async/projects/<int:project_pk>/tasks/<int:pk>/', views.async_task_detail, name='async-task-detail'),
+    path('async/projects/<int:project_pk>/tasks/<int:task_pk>/comments/', views.async_comment_list, name='async-comment-list'),
+    path('async/projects/<int:project_pk>/tasks/<int:task_pk>/comments/<int:pk>/', views.async_comment_detail, name='async-comment-detail'),
+    path('async/projects/<int:project_pk>/activity/', views.async_activity_project, name='async-activity-project'),
+    path('async/projects/<int:project_pk>/tasks/<int:task_pk>/activity/', views.async_activity_task, name='async-activity-task'),
 ]
@@ -1,18 +1,26 @@
-from rest_framework.views import APIView
+import re
+
 from rest_framework.response import Response
 from rest_framework import status
 from rest_framework.permissions import IsAuthenticated, AllowAny
 from rest_framework_simplejwt.views import TokenObtainPairView
-from rest_framework.exceptions import PermissionDenied, NotFound
+from rest_framework.exceptions import PermissionDenied, NotFound, ValidationError
 from rest_framework.parsers import MultiPartParser, FormParser
 from rest_framework.exceptions import PermissionDenied
 from django_filters.rest_framework import DjangoFilterBackend
 from django.shortcuts import render
+from asgiref.sync import sync_to_async
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
 
-from .models import User, Project, Task, Comment, Attachment, ActivityLog
+from . import activity, autocomplete, conditional, downloads, export, fastpath, perf, realtime, retention, stats, uploads
+from .asyncviews import async_api_view, check_object_permissions, filtered
+from .models import User, Project, Task, Comment, Attachment, ActivityLog, UploadSession
 from .serializers import (
     SignupSerializer, UserSerializer, ProjectSerializer, UserBasicSerializer,
-    TaskSerializer, CommentSerializer, AttachmentSerializer, ActivityLogSerializer
+    TaskSerializer, CommentSerializer, AttachmentSerializer, ActivityLogSerializer, UploadSessionSerializer
 )
 from .permissions import (
     CanViewProjectList,
@@ -25,20 +33,23 @@ from .permissions import (
     IsProjectOwnerOnly,
 )
 from .filters import TaskFilter, ProjectFilter, UserFilter
+from .membership import is_project_member
+from .pagination import KeysetPagination, paginated_or_full
+from .perf import InstrumentedAPIView
 
 
-# Hàm tiện ích để tạo bản ghi nhật ký hoạt động
+# Hàm tiện ích để tạo bản ghi nhật ký hoạt động (ghi qua sink cấu hình trong settings.ACTIVITY_LOG)
 def create_activity_log(user, action_description, project=None, task=None):
-    ActivityLog.objects.create(
+    activity.record([ActivityLog(
         actor=user,
         action_description=action_description,
         project=project,
         task=task
-    )
+    )])
 
 
 # SIGNUP (đăng ký người dùng)
-class SignupView(APIView):
+class SignupView(InstrumentedAPIView):
     permission_classes = [AllowAny]
     def post(self, request):
         user = SignupSerializer(data=request.data)
@@ -54,7 +65,7 @@ class LoginView(TokenObtainPairView):
 
 
 # USER LIST VIEW (danh sách người dùng)
-class UserListView(APIView):
+class UserListView(InstrumentedAPIView):
     permission_classes = [IsAuthenticated]
 
     def get(self, request):
@@ -63,12 +74,32 @@ class UserListView(APIView):
         if filterset.is_valid():
             queryset = filterset.qs
 
-        serializer = UserBasicSerializer(queryset, many=True)
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        paginator = KeysetPagination(ordering_fields=('id',))
+        return paginated_or_full(paginator, queryset, request, UserBasicSerializer)
+
+
+# USER AUTOCOMPLETE VIEW (gợi ý người dùng khi gõ, dùng cho ô chọn thành viên)
+class UserAutocompleteView(InstrumentedAPIView):
+    """
+    GET /users/autocomplete/?q=<tiền tố>&limit=10
+    - Khớp tiền tố username, họ, tên, email (không phân biệt hoa thường), tốt nhất trước.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        limit = request.query_params.get('limit')
+        if limit is not None:
+            try:
+                limit = int(limit)
+            except ValueError:
+                limit = 0
+            if limit < 1:
+                return Response({"error": "limit phải là số nguyên dương."}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(autocomplete.suggest(request.query_params.get('q', ''), limit))
 
 
 # USER DETAIL VIEW (hiển thị chi tiết người dùng)
-class UserDetailView(APIView):
+class UserDetailView(InstrumentedAPIView):
     permission_classes = [IsAuthenticated]
     def get(self, request, pk):
         try:
@@ -80,17 +111,18 @@ class UserDetailView(APIView):
 
 
 # PROJECT LIST / CREATE VIEW (danh sách/tạo dự án)
-class ProjectListView(APIView):
+class ProjectListView(InstrumentedAPIView):
     permission_classes = [IsAuthenticated, CanViewProjectList]
     def get(self, request):
+        # select_related/prefetch_related theo ?fields=/?expand= (xem paginated_or_full)
         project = self.permission_classes[1]().filter_queryset(request)
-        
+
         filterset = ProjectFilter(request.GET, queryset=project, request=request)
         if filterset.is_valid():
             project = filterset.qs
-            
-        serializer = ProjectSerializer(project, many=True)
-        return Response(serializer.data, status=status.HTTP_200_OK)
+
+        paginator = KeysetPagination(ordering_fields=('created_at', 'updated_at'))
+        return conditional.conditional_list(paginator, project, request, ProjectSerializer)
 
     def post(self, request):
         serializer = ProjectSerializer(data=request.data)
@@ -107,24 +139,30 @@ class ProjectListView(APIView):
 
 
 # PROJECT DETAIL VIEW (chi tiết dự án)
-class ProjectDetailView(APIView):
+class ProjectDetailView(InstrumentedAPIView):
     permission_classes = [IsAuthenticated, IsProjectOwnerOrMember]
     def get(self, request, pk):
         try:
-            project = Project.objects.get(pk=pk)
+            options = ProjectSerializer.read_options(request)
+            project = ProjectSerializer.prepare_queryset(Project.objects.all(), **options).get(pk=pk)
         except Project.DoesNotExist:
             raise NotFound("Dự án không tồn tại.")
         # Kiểm tra object-level permission
         self.check_object_permissions(request, project)
-        serializer = ProjectSerializer(project)
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        validators = conditional.object_validators(project)
+        not_modified = conditional.evaluate(request, *validators)
+        if not_modified is not None:
+            return not_modified
+        serializer = ProjectSerializer(project, **options)
+        return conditional.with_validators(Response(serializer.data, status=status.HTTP_200_OK), *validators)
 
     def put(self, request, pk):
         try:
-            project = Project.objects.get(pk=pk)
+            project = Project.objects.select_related('owner').prefetch_related('members').get(pk=pk)
         except Project.DoesNotExist:
             raise NotFound("Dự án không tồn tại.")
         self.check_object_permissions(request, project)
+        conditional.check_write_preconditions(request, project)
         serializer = ProjectSerializer(project, data=request.data)
         if serializer.is_valid():
             serializer.save()
@@ -133,15 +171,17 @@ class ProjectDetailView(APIView):
                 f"đã cập nhật thông tin dự án '{project.name}'", 
                 project=project
             )
-            return Response(serializer.data, status=status.HTTP_200_OK)
+            return conditional.with_validators(
+                Response(serializer.data, status=status.HTTP_200_OK), *conditional.object_validators(project))
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
     def patch(self, request, pk):
         try:
-            project = Project.objects.get(pk=pk)
+            project = Project.objects.select_related('owner').prefetch_related('members').get(pk=pk)
         except Project.DoesNotExist:
             raise NotFound("Dự án không tồn tại.")
         self.check_object_permissions(request, project)
+        conditional.check_write_preconditions(request, project)
         serializer = ProjectSerializer(project, data=request.data, partial=True)
         if serializer.is_valid():
             serializer.save()
@@ -150,7 +190,8 @@ class ProjectDetailView(APIView):
                 f"đã cập nhật một phần dự án '{project.name}'", 
                 project=project
             )
-            return Response(serializer.data, status=status.HTTP_200_OK)
+            return conditional.with_validators(
+                Response(serializer.data, status=status.HTTP_200_OK), *conditional.object_validators(project))
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
     def delete(self, request, pk):
@@ -159,6 +200,7 @@ class ProjectDetailView(APIView):
         except Project.DoesNotExist:
             raise NotFound("Dự án không tồn tại.")
         self.check_object_permissions(request, project)
+        conditional.check_write_preconditions(request, project)
         project_name = project.name
         project.delete()
         create_activity_log(
@@ -168,8 +210,57 @@ class ProjectDetailView(APIView):
         return Response(status=status.HTTP_204_NO_CONTENT)
 
 
+# PROJECT STATS VIEW (thống kê công việc của dự án cho dashboard)
+class ProjectStatsView(InstrumentedAPIView):
+    permission_classes = [IsAuthenticated, IsProjectOwnerOrMember]
+    def get(self, request, pk):
+        try:
+            project = Project.objects.get(pk=pk)
+        except Project.DoesNotExist:
+            raise NotFound("Dự án không tồn tại.")
+        self.check_object_permissions(request, project)
+        return Response(stats.get_project_stats(project, request.user), status=status.HTTP_200_OK)
+
+
+# PROJECT EXPORT VIEW (xuất dữ liệu dự án dạng NDJSON/CSV theo luồng)
+class ProjectExportView(InstrumentedAPIView):
+    """
+    Query: ?fmt=ndjson|csv (không dùng ?format= vì DRF đã giữ tham số này),
+    ?resource=tasks,comments,attachments,activity (CSV chỉ nhận một loại), ?gzip=1 để nén.
+    """
+    permission_classes = [IsAuthenticated, IsProjectOwnerOrMember]
+    content_types = {'ndjson': 'application/x-ndjson', 'csv': 'text/csv'}
+
+    def get(self, request, pk):
+        try:
+            project = Project.objects.get(pk=pk)
+        except Project.DoesNotExist:
+            raise NotFound("Dự án không tồn tại.")
+        self.check_object_permissions(request, project)
+
+        fmt = request.query_params.get('fmt', 'ndjson')
+        if fmt not in export.FORMATS:
+            raise ValidationError({"fmt": f"Chỉ hỗ trợ: {', '.join(export.FORMATS)}."})
+        resources = [r for r in request.query_params.get('resource', '').split(',') if r] or list(export.RESOURCES)
+        unknown = [r for r in resources if r not in export.RESOURCES]
+        if unknown:
+            raise ValidationError({"resource": f"Không hỗ trợ: {', '.join(unknown)}."})
+        if fmt == 'csv' and len(resources) != 1:
+            raise ValidationError({"resource": "CSV chỉ xuất một loại dữ liệu mỗi lần."})
+
+        compress = request.query_params.get('gzip') in ('1', 'true')
+        lines = export.iter_export(project, fmt, resources)
+        response = StreamingHttpResponse(export.iter_blocks(lines, compress), content_type=self.content_types[fmt])
+        filename = f"project-{project.pk}{'-' + resources[0] if fmt == 'csv' else ''}.{fmt}"
+        if compress:
+            response['Content-Type'] = 'application/gzip'
+            filename += '.gz'
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+        return response
+
+
 #  ADD MEMBER VIEW (thêm thành viên vào dự án)
-class AddMemberView(APIView):
+class AddMemberView(InstrumentedAPIView):
     permission_classes = [IsAuthenticated, IsProjectOwnerOnly]
     def post(self, request, pk):
         try:
@@ -185,16 +276,17 @@ class AddMemberView(APIView):
         except User.DoesNotExist:
             return Response({"error": "Người dùng không tồn tại."}, status=status.HTTP_404_NOT_FOUND)
         
-        if user in project.members.all():
+        if project.members.filter(pk=user.pk).exists():
             return Response({"message": f"{user.username} đã là thành viên của dự án."}, status=status.HTTP_200_OK)
               
         project.members.add(user)
         create_activity_log(request.user, f"Thêm thành viên '{user.username}' vào dự án '{project.name}'", project=project)
+        realtime.publish(project.pk, 'member.added', realtime.member_payload(user))
         return Response({"message": f"Đã thêm {user.username} vào dự án."}, status=status.HTTP_200_OK)
 
 
 # REMOVE MEMBER VIEW (xóa thành viên khỏi dự án)
-class RemoveMemberView(APIView):
+class RemoveMemberView(InstrumentedAPIView):
     permission_classes = [IsAuthenticated, IsProjectOwnerOnly]
 
     def post(self, request, pk):
@@ -214,18 +306,19 @@ class RemoveMemberView(APIView):
         except User.DoesNotExist:
             return Response({"error": "Người dùng không tồn tại."}, status=status.HTTP_404_NOT_FOUND)
 
-        if user == project.owner:
+        if user.pk == project.owner_id:
             return Response({"error": "Không thể xóa chủ dự án."}, status=status.HTTP_400_BAD_REQUEST)
-        if user not in project.members.all():
+        if not project.members.filter(pk=user.pk).exists():
             return Response({"message": f"{user.username} không phải là thành viên của dự án."}, status=status.HTTP_200_OK)
 
         project.members.remove(user)
         create_activity_log(request.user, f"Xóa thành viên '{user.username}' khỏi dự án '{project.name}'", project=project)
+        realtime.publish(project.pk, 'member.removed', realtime.member_payload(user))
         return Response({"message": f"Đã xóa {user.username} khỏi dự án."}, status=status.HTTP_200_OK)
 
 
 # TASK LIST / CREATE VIEW (danh sách/tạo công việc)
-class TaskListView(APIView):
+class TaskListView(InstrumentedAPIView):
     permission_classes = [IsAuthenticated, CanViewTaskList]
     def get(self, request, pk):
         task = self.permission_classes[1]().filter_queryset(request, pk)
@@ -234,8 +327,8 @@ class TaskListView(APIView):
         if filterset.is_valid():
             task = filterset.qs
 
-        serializer = TaskSerializer(task, many=True)
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        paginator = KeysetPagination(ordering_fields=('created_at', 'due_date'))
+        return conditional.conditional_list(paginator, task, request, TaskSerializer)
     
     def post(self, request, pk):
         try:
@@ -251,29 +344,189 @@ class TaskListView(APIView):
                 project=project,
                 task=task
             )
+            realtime.publish(project.pk, 'task.created', realtime.task_payload(task))
             return Response(TaskSerializer(task).data, status=status.HTTP_201_CREATED)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
+# TASK BULK VIEW (tạo/cập nhật/xóa hàng loạt công việc trong một request)
+class TaskBulkView(InstrumentedAPIView):
+    """
+    Body: {"create": [{...}], "update": [{"id": 1, "status": "DONE"}], "delete": [2, 3]}
+    - create/update: owner hoặc member dự án (assignee được cập nhật task của mình)
+    - delete: chỉ owner dự án
+    Toàn bộ được ghi trong một transaction; kết quả trả về theo từng phần tử.
+    """
+    permission_classes = [IsAuthenticated]
+    max_items = 500
+    update_fields = ('status', 'priority', 'assignee_id', 'due_date')
+
+    def post(self, request, pk):
+        try:
+            project = Project.objects.get(pk=pk)
+        except Project.DoesNotExist:
+            raise NotFound("Dự án không tồn tại.")
+
+        data = request.data if isinstance(request.data, dict) else {}
+        creates, updates, deletes = data.get('create', []), data.get('update', []), data.get('delete', [])
+        if not all(isinstance(items, list) for items in (creates, updates, deletes)):
+            return Response({"error": "create, update, delete phải là danh sách."}, status=status.HTTP_400_BAD_REQUEST)
+        if not (creates or updates or deletes):
+            return Response({"error": "Không có thao tác nào."}, status=status.HTTP_400_BAD_REQUEST)
+        if len(creates) + len(updates) + len(deletes) > self.max_items:
+            return Response({"error": f"Tối đa {self.max_items} thao tác mỗi request."}, status=status.HTTP_400_BAD_REQUEST)
+
+        user = request.user
+        is_owner = user.is_staff or user.pk == project.owner_id
+        is_member = is_owner or is_project_member(user, project)
+        if not is_member and (creates or deletes):
+            raise PermissionDenied("Bạn không phải thành viên của dự án.")
+
+        # Nạp trước mọi assignee được tham chiếu bằng một query; giá trị sai kiểu để serializer báo lỗi từng phần tử
+        assignee_ids = {item.get('assignee_id') for item in creates + updates
+                        if isinstance(item, dict) and self.is_id(item.get('assignee_id'))}
+        self.serializer_context = {'users': User.objects.in_bulk(assignee_ids)}
+
+        logs = []
+        with transaction.atomic():
+            created = self.bulk_create(project, creates, logs) if creates else []
+            updated = self.bulk_update(project, updates, is_member, logs) if updates else []
+            deleted = self.bulk_delete(project, deletes, is_owner, logs) if deletes else []
+            activity.record(logs)
+        # bulk_create/bulk_update không phát signal nên bộ đếm thống kê (nếu cache) được tính lại
+        stats.invalidate(project.pk)
+
+        return Response({"created": created, "updated": updated, "deleted": deleted}, status=status.HTTP_200_OK)
+
+    @staticmethod
+    def is_id(value):
+        # bool là lớp con của int: true/false trong JSON không phải id
+        return isinstance(value, int) and not isinstance(value, bool)
+
+    def bulk_create(self, project, items, logs):
+        # Validate từng phần tử bằng child của TaskSerializer(many=True) để giữ lại các phần tử hợp lệ
+        child = TaskSerializer(many=True, context=self.serializer_context).child
+        results, tasks = [], []
+        for index, item in enumerate(items):
+            try:
+                validated = child.run_validation(item)
+            except ValidationError as exc:
+                results.append({"index": index, "status": status.HTTP_400_BAD_REQUEST, "errors": exc.detail})
+                continue
+            task = Task(project=project, **validated)
+            tasks.append(task)
+            results.append({"index": index, "status": status.HTTP_201_CREATED, "task": task})
+
+        Task.objects.bulk_create(tasks)
+        for result in results:
+            task = result.pop("task", None)
+            if task is not None:
+                result["data"] = TaskSerializer(task).data
+                logs.append(ActivityLog(actor=self.request.user, action_description=f"Tạo công việc '{task.title}'",
+                                        project=project, task=task))
+                realtime.publish(project.pk, 'task.created', realtime.task_payload(task))
+        return results
+
+    def bulk_update(self, project, items, is_member, logs):
+        ids = [item.get('id') for item in items if isinstance(item, dict)]
+        tasks = Task.objects.select_related('assignee').in_bulk(
+            [pk for pk in ids if self.is_id(pk)], field_name='pk')
+        tasks = {pk: task for pk, task in tasks.items() if task.project_id == project.pk}
+
+        results, changed, fields, seen = [], [], set(), set()
+        now = timezone.now()
+        for item in items:
+            pk = item.get('id') if isinstance(item, dict) else None
+            if not self.is_id(pk) or pk in seen:
+                results.append({"id": pk, "status": status.HTTP_400_BAD_REQUEST, "errors": {"id": "id không hợp lệ hoặc bị trùng."}})
+                continue
+            seen.add(pk)
+            task = tasks.get(pk)
+            if task is None:
+                results.append({"id": pk, "status": status.HTTP_404_NOT_FOUND, "errors": {"id": "Công việc không tồn tại."}})
+                continue
+            if not (is_member or task.assignee_id == self.request.user.pk):
+                results.append({"id": pk, "status": status.HTTP_403_FORBIDDEN, "errors": {"detail": "Không có quyền cập nhật."}})
+                continue
+            payload = {key: value for key, value in item.items() if key != 'id'}
+            unknown = set(payload) - set(self.update_fields)
+            if unknown:
+                results.append({"id": pk, "status": status.HTTP_400_BAD_REQUEST,
+                                "errors": {key: "Trường không được cập nhật hàng loạt." for key in sorted(unknown)}})
+                continue
+            serializer = TaskSerializer(task, data=payload, partial=True, context=self.serializer_context)
+            if not serializer.is_valid():
+                results.append({"id": pk, "status": status.HTTP_400_BAD_REQUEST, "errors": serializer.errors})
+                continue
+            for attr, value in serializer.validated_data.items():
+                setattr(task, attr, value)
+                fields.add(attr)
+            task.updated_at = now
+            changed.append(task)
+            results.append({"id": pk, "status": status.HTTP_200_OK, "task": task})
+
+        if changed:
+            Task.objects.bulk_update(changed, [*sorted(fields), 'updated_at'])
+        for result in results:
+            task = result.pop("task", None)
+            if task is not None:
+                result["data"] = TaskSerializer(task).data
+                logs.append(ActivityLog(actor=self.request.user,
+                                        action_description=f"đã cập nhật một phần công việc '{task.title}'",
+                                        project=project, task=task))
+                realtime.publish(project.pk, 'task.updated', realtime.task_payload(task))
+        return results
+
+    def bulk_delete(self, project, ids, is_owner, logs):
+        titles = dict(Task.objects.filter(project=project, pk__in=[pk for pk in ids if self.is_id(pk)])
+                      .values_list('pk', 'title'))
+        results, to_delete = [], []
+        for pk in ids:
+            if not self.is_id(pk) or pk in to_delete:
+                results.append({"id": pk, "status": status.HTTP_400_BAD_REQUEST, "errors": {"id": "id không hợp lệ hoặc bị trùng."}})
+            elif pk not in titles:
+                results.append({"id": pk, "status": status.HTTP_404_NOT_FOUND, "errors": {"id": "Công việc không tồn tại."}})
+            elif not is_owner:
+                results.append({"id": pk, "status": status.HTTP_403_FORBIDDEN, "errors": {"detail": "Chỉ chủ dự án được xóa."}})
+            else:
+                to_delete.append(pk)
+                results.append({"id": pk, "status": status.HTTP_204_NO_CONTENT})
+
+        if to_delete:
+            Task.objects.filter(pk__in=to_delete).delete()
+            logs.extend(ActivityLog(actor=self.request.user, action_description=f"đã xóa công việc '{titles[pk]}'",
+                                    project=project) for pk in to_delete)
+            for pk in to_delete:
+                realtime.publish(project.pk, 'task.deleted', {'task': {'id': pk}})
+        return results
+
+
 # TASK DETAIL VIEW (chi tiết công việc)
-class TaskDetailView(APIView):
+class TaskDetailView(InstrumentedAPIView):
     permission_classes = [IsAuthenticated, IsTaskPermission]
 
     def get(self, request, project_pk, pk):
         try:
-            task = Task.objects.get(pk=pk, project_id=project_pk)
+            options = TaskSerializer.read_options(request)
+            task = TaskSerializer.prepare_queryset(Task.objects.select_related('project__owner'), **options).get(
+                pk=pk, project_id=project_pk)
         except Task.DoesNotExist:
             raise NotFound("Công việc không tồn tại.")
         self.check_object_permissions(request, task)
-        serializer = TaskSerializer(task)
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        validators = conditional.object_validators(task)
+        not_modified = conditional.evaluate(request, *validators)
+        if not_modified is not None:
+            return not_modified
+        serializer = TaskSerializer(task, **options)
+        return conditional.with_validators(Response(serializer.data, status=status.HTTP_200_OK), *validators)
 
     def put(self, request, project_pk, pk):
         try:
-            task = Task.objects.get(pk=pk, project_id=project_pk)
+            task = Task.objects.select_related('assignee', 'project__owner').get(pk=pk, project_id=project_pk)
         except Task.DoesNotExist:
             raise NotFound("Công việc không tồn tại.")
         self.check_object_permissions(request, task)
+        conditional.check_write_preconditions(request, task)
         serializer = TaskSerializer(task, data=request.data)
         if serializer.is_valid():
             serializer.save()
@@ -283,15 +536,18 @@ class TaskDetailView(APIView):
                 project=task.project, 
                 task=task
             )
-            return Response(serializer.data, status=status.HTTP_200_OK)
+            realtime.publish(task.project_id, 'task.updated', realtime.task_payload(task))
+            return conditional.with_validators(
+                Response(serializer.data, status=status.HTTP_200_OK), *conditional.object_validators(task))
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
     def patch(self, request, project_pk, pk):
         try:
-            task = Task.objects.get(pk=pk, project_id=project_pk)
+            task = Task.objects.select_related('assignee', 'project__owner').get(pk=pk, project_id=project_pk)
         except Task.DoesNotExist:
             raise NotFound("Công việc không tồn tại.")
         self.check_object_permissions(request, task)
+        conditional.check_write_preconditions(request, task)
         serializer = TaskSerializer(task, data=request.data, partial=True)
         if serializer.is_valid():
             serializer.save()
@@ -301,15 +557,18 @@ class TaskDetailView(APIView):
                 project=task.project, 
                 task=task
             )
-            return Response(serializer.data, status=status.HTTP_200_OK)
+            realtime.publish(task.project_id, 'task.updated', realtime.task_payload(task))
+            return conditional.with_validators(
+                Response(serializer.data, status=status.HTTP_200_OK), *conditional.object_validators(task))
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
     def delete(self, request, project_pk, pk):
         try:
-            task = Task.objects.get(pk=pk, project_id=project_pk)
+            task = Task.objects.select_related('assignee', 'project__owner').get(pk=pk, project_id=project_pk)
         except Task.DoesNotExist:
             raise NotFound("Công việc không tồn tại.")
         self.check_object_permissions(request, task)
+        conditional.check_write_preconditions(request, task)
         task_title = task.title
         project = task.project
         task.delete()
@@ -318,11 +577,12 @@ class TaskDetailView(APIView):
             f"đã xóa công việc '{task_title}'", 
             project=project
         )
+        realtime.publish(project.pk, 'task.deleted', {'task': {'id': pk}})
         return Response(status=status.HTTP_204_NO_CONTENT)
 
 
 # COMMENT LIST / CREATE VIEW (danh sách/tạo bình luận)
-class CommentListView(APIView):
+class CommentListView(InstrumentedAPIView):
     permission_classes = [IsAuthenticated, CanViewCommentOrAttachmentList]
     def get(self, request, project_pk, task_pk):
         try:
@@ -330,8 +590,8 @@ class CommentListView(APIView):
         except Task.DoesNotExist:
             return Response({"error": "Công việc không tồn tại."}, status=status.HTTP_404_NOT_FOUND)
         comments = Comment.objects.filter(task=task)
-        serializer = CommentSerializer(comments, many=True)
-        return Response(serializer.data)
+        paginator = KeysetPagination(ordering_fields=('created_at',))
+        return conditional.conditional_list(paginator, comments, request, CommentSerializer)
 
     def post(self, request, project_pk, task_pk):
         try:
@@ -347,29 +607,38 @@ class CommentListView(APIView):
                 project=task.project, 
                 task=task
             )
+            realtime.publish(task.project_id, 'comment.created', realtime.comment_payload(comment))
             return Response(CommentSerializer(comment).data, status=status.HTTP_201_CREATED)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
 # COMMENT DETAIL VIEW (chi tiết bình luận)
-class CommentDetailView(APIView):
+class CommentDetailView(InstrumentedAPIView):
     permission_classes = [IsAuthenticated, IsCommentOrAttachmentOwner]
 
     def get(self, request, project_pk, task_pk, pk):
         try:
-            comment = Comment.objects.get(pk=pk, task__pk=task_pk, task__project_id=project_pk)
+            options = CommentSerializer.read_options(request)
+            comment = CommentSerializer.prepare_queryset(Comment.objects.select_related('task__project__owner'), **options).get(
+                pk=pk, task__pk=task_pk, task__project_id=project_pk)
         except Comment.DoesNotExist:
             raise NotFound("Bình luận không tồn tại trong công việc này.")
         self.check_object_permissions(request, comment)
-        serializer = CommentSerializer(comment)
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        validators = conditional.object_validators(comment)
+        not_modified = conditional.evaluate(request, *validators)
+        if not_modified is not None:
+            return not_modified
+        serializer = CommentSerializer(comment, **options)
+        return conditional.with_validators(Response(serializer.data, status=status.HTTP_200_OK), *validators)
 
     def put(self, request, project_pk, task_pk, pk):
         try:
-            comment = Comment.objects.get(pk=pk, task__pk=task_pk, task__project_id=project_pk)
+            comment = Comment.objects.select_related('author', 'task__project__owner').get(
+                pk=pk, task__pk=task_pk, task__project_id=project_pk)
         except Comment.DoesNotExist:
             raise NotFound("Bình luận không tồn tại trong công việc này.")
         self.check_object_permissions(request, comment)
+        conditional.check_write_preconditions(request, comment)
         serializer = CommentSerializer(comment, data=request.data)
         if serializer.is_valid():
             serializer.save()
@@ -382,15 +651,18 @@ class CommentDetailView(APIView):
                 )
             except Exception:
                 pass
-            return Response(serializer.data, status=status.HTTP_200_OK)
+            return conditional.with_validators(
+                Response(serializer.data, status=status.HTTP_200_OK), *conditional.object_validators(comment))
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
     def patch(self, request, project_pk, task_pk, pk):
         try:
-            comment = Comment.objects.get(pk=pk, task__pk=task_pk, task__project_id=project_pk)
+            comment = Comment.objects.select_related('author', 'task__project__owner').get(
+                pk=pk, task__pk=task_pk, task__project_id=project_pk)
         except Comment.DoesNotExist:
             raise NotFound("Bình luận không tồn tại trong công việc này.")
         self.check_object_permissions(request, comment)
+        conditional.check_write_preconditions(request, comment)
         serializer = CommentSerializer(comment, data=request.data, partial=True)
         if serializer.is_valid():
             serializer.save()
@@ -403,15 +675,18 @@ class CommentDetailView(APIView):
                 )
             except Exception:
                 pass
-            return Response(serializer.data, status=status.HTTP_200_OK)
+            return conditional.with_validators(
+                Response(serializer.data, status=status.HTTP_200_OK), *conditional.object_validators(comment))
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
     def delete(self, request, project_pk, task_pk, pk):
         try:
-            comment = Comment.objects.get(pk=pk, task__pk=task_pk, task__project_id=project_pk)
+            comment = Comment.objects.select_related('author', 'task__project__owner').get(
+                pk=pk, task__pk=task_pk, task__project_id=project_pk)
         except Comment.DoesNotExist:
             raise NotFound("Bình luận không tồn tại trong công việc này.")
         self.check_object_permissions(request, comment)
+        conditional.check_write_preconditions(request, comment)
         task = comment.task
         comment.delete()
         create_activity_log(
@@ -424,7 +699,7 @@ class CommentDetailView(APIView):
 
 
 # ATTACHMENT LIST / CREATE VIEW (danh sách/tạo tập tin đính kèm)
-class AttachmentListView(APIView):
+class AttachmentListView(InstrumentedAPIView):
     permission_classes = [IsAuthenticated, CanViewCommentOrAttachmentList]
     parser_classes = [MultiPartParser, FormParser]
     def get(self, request, project_pk, task_pk):
@@ -432,9 +707,9 @@ class AttachmentListView(APIView):
             task = Task.objects.get(pk=task_pk, project_id=project_pk)
         except Task.DoesNotExist:
             return Response({"error": "Công việc không tồn tại."}, status=status.HTTP_404_NOT_FOUND)
-        attachments = Attachment.objects.filter(task=task)
-        serializer = AttachmentSerializer(attachments, many=True)
-        return Response(serializer.data)
+        attachments = Attachment.objects.filter(task=task).select_related('uploader', 'task')
+        paginator = KeysetPagination(ordering_fields=('uploaded_at',))
+        return paginated_or_full(paginator, attachments, request, AttachmentSerializer)
     
     def post(self, request, project_pk, task_pk):
         try:
@@ -443,18 +718,23 @@ class AttachmentListView(APIView):
             return Response({"error": "Công việc không tồn tại."}, status=status.HTTP_404_NOT_FOUND)
         serializer = AttachmentSerializer(data=request.data)
         if serializer.is_valid():
-            attachment = serializer.save(uploader=request.user, task=task)
+            uploaded = serializer.validated_data['file']
+            with transaction.atomic():
+                blob = uploads.blob_for_file(uploaded)
+                attachment = serializer.save(
+                    uploader=request.user, task=task, blob=blob, file=blob.file.name, filename=uploaded.name)
             create_activity_log(request.user, f"Tải lên tệp cho '{task.title}'", project=task.project, task=task)
             return Response(AttachmentSerializer(attachment).data, status=status.HTTP_201_CREATED)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
 # ATTACHMENT DETAIL VIEW (chi tiết tệp đính kèm)
-class AttachmentDetailView(APIView):
+class AttachmentDetailView(InstrumentedAPIView):
     permission_classes = [IsAuthenticated, IsCommentOrAttachmentOwner]
     def get(self, request, project_pk, task_pk, pk):
         try:
-            attachment = Attachment.objects.get(pk=pk, task__pk=task_pk, task__project_id=project_pk)
+            attachment = Attachment.objects.select_related('uploader', 'task__project__owner').get(
+                pk=pk, task__pk=task_pk, task__project_id=project_pk)
         except Attachment.DoesNotExist:
             raise NotFound("Tệp đính kèm không tồn tại trong công việc này.")
         self.check_object_permissions(request, attachment)
@@ -463,14 +743,13 @@ class AttachmentDetailView(APIView):
 
     def delete(self, request, project_pk, task_pk, pk):
         try:
-            attachment = Attachment.objects.get(pk=pk, task__pk=task_pk, task__project_id=project_pk)
+            attachment = Attachment.objects.select_related('uploader', 'task__project__owner').get(
+                pk=pk, task__pk=task_pk, task__project_id=project_pk)
         except Attachment.DoesNotExist:
             raise NotFound("Tệp đính kèm không tồn tại trong công việc này.")
         self.check_object_permissions(request, attachment)
         task = attachment.task
-        if attachment.file:
-            attachment.file.delete(save=False)
-        attachment.delete()
+        uploads.delete_attachment(attachment)
         create_activity_log(
             request.user, 
             f"đã xóa một tệp đính kèm khỏi công việc '{task.title}'", 
@@ -480,8 +759,155 @@ class AttachmentDetailView(APIView):
         return Response(status=status.HTTP_204_NO_CONTENT)
 
 
+# ATTACHMENT DOWNLOAD VIEW (tải tệp đính kèm, hỗ trợ Range / X-Accel-Redirect / X-Sendfile)
+class AttachmentDownloadView(InstrumentedAPIView):
+    permission_classes = [IsAuthenticated, IsCommentOrAttachmentOwner]
+    def get(self, request, project_pk, task_pk, pk):
+        try:
+            attachment = Attachment.objects.select_related('blob', 'task__project').get(
+                pk=pk, task__pk=task_pk, task__project_id=project_pk)
+        except Attachment.DoesNotExist:
+            raise NotFound("Tệp đính kèm không tồn tại trong công việc này.")
+        self.check_object_permissions(request, attachment)
+        if not attachment.file:
+            raise NotFound("Tệp đính kèm không có nội dung.")
+        return downloads.serve(request, attachment)
+
+
+# ATTACHMENT THUMBNAIL VIEW (ảnh thu nhỏ của tệp đính kèm là ảnh)
+class AttachmentThumbnailView(InstrumentedAPIView):
+    permission_classes = [IsAuthenticated, IsCommentOrAttachmentOwner]
+    def get(self, request, project_pk, task_pk, pk):
+        try:
+            attachment = Attachment.objects.select_related('task__project').get(
+                pk=pk, task__pk=task_pk, task__project_id=project_pk)
+        except Attachment.DoesNotExist:
+            raise NotFound("Tệp đính kèm không tồn tại trong công việc này.")
+        self.check_object_permissions(request, attachment)
+        if not attachment.thumbnail:
+            raise NotFound("Chưa có ảnh thu nhỏ.")
+        return downloads.serve(request, attachment, thumbnail=True)
+
+
+# ATTACHMENT UPLOAD VIEWS (tải tệp lên theo từng phần, tiếp tục được khi rớt kết nối)
+class AttachmentUploadListView(InstrumentedAPIView):
+    """
+    POST {"filename", "size", "description"} -> tạo phiên tải lên.
+    Sau đó PUT từng đoạn vào uploads/<id>/ (Content-Range: bytes start-end/size) và POST uploads/<id>/complete/.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request, project_pk, task_pk):
+        try:
+            task = Task.objects.select_related('project').get(pk=task_pk, project_id=project_pk)
+        except Task.DoesNotExist:
+            raise NotFound("Công việc không tồn tại.")
+        if not (request.user.is_staff or is_project_member(request.user, task.project)):
+            raise PermissionDenied("Bạn không phải thành viên của dự án.")
+        serializer = UploadSessionSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        try:
+            session = uploads.create_session(task, request.user, **serializer.validated_data)
+        except uploads.UploadError as exc:
+            raise ValidationError({"size": str(exc)})
+        return Response(UploadSessionSerializer(session).data, status=status.HTTP_201_CREATED)
+
+
+class AttachmentUploadMixin:
+    permission_classes = [IsAuthenticated]
+    content_range = re.compile(r'^bytes (\d+)-(\d+)/(\d+|\*)$')
+
+    def get_session(self, request, project_pk, task_pk, upload_id):
+        try:
+            session = UploadSession.objects.select_related('task__project').get(
+                pk=upload_id, task_id=task_pk, task__project_id=project_pk)
+        except UploadSession.DoesNotExist:
+            raise NotFound("Phiên tải lên không tồn tại.")
+        if session.uploader_id != request.user.pk:
+            raise PermissionDenied("Bạn không phải người tạo phiên tải lên này.")
+        return session
+
+    def upload_error(self, session, exc):
+        offset = session.offset if exc.offset is None else exc.offset
+        return Response({"error": str(exc), "offset": offset}, status=status.HTTP_409_CONFLICT)
+
+
+class AttachmentUploadView(AttachmentUploadMixin, InstrumentedAPIView):
+    def get(self, request, project_pk, task_pk, upload_id):
+        session = self.get_session(request, project_pk, task_pk, upload_id)
+        return Response(UploadSessionSerializer(session).data, status=status.HTTP_200_OK)
+
+    def put(self, request, project_pk, task_pk, upload_id):
+        session = self.get_session(request, project_pk, task_pk, upload_id)
+        length = int(request.META.get('CONTENT_LENGTH') or 0)
+        match = self.content_range.match(request.META.get('HTTP_CONTENT_RANGE', ''))
+        if match:
+            start = int(match.group(1))
+            if int(match.group(2)) - start + 1 != length:
+                raise ValidationError({"Content-Range": "Không khớp với Content-Length."})
+        elif 'offset' in request.query_params and request.query_params['offset'].isdigit():
+            start = int(request.query_params['offset'])
+        else:
+            raise ValidationError({"Content-Range": "Cần header Content-Range hoặc ?offset=."})
+        # Đọc thẳng luồng request (không qua parser) để không phải giữ cả đoạn trong bộ nhớ
+        try:
+            session = uploads.append_chunk(session.pk, start, request.stream, length)
+        except uploads.UploadError as exc:
+            return self.upload_error(session, exc)
+        return Response(UploadSessionSerializer(session).data, status=status.HTTP_200_OK)
+
+    def delete(self, request, project_pk, task_pk, upload_id):
+        session = self.get_session(request, project_pk, task_pk, upload_id)
+        uploads.abort(session)
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+
+class AttachmentUploadCompleteView(AttachmentUploadMixin, InstrumentedAPIView):
+    def post(self, request, project_pk, task_pk, upload_id):
+        session = self.get_session(request, project_pk, task_pk, upload_id)
+        try:
+            attachment = uploads.finalize(session)
+        except uploads.UploadError as exc:
+            return self.upload_error(session, exc)
+        task = session.task
+        create_activity_log(request.user, f"Tải lên tệp cho '{task.title}'", project=task.project, task=task)
+        return Response(AttachmentSerializer(attachment).data, status=status.HTTP_201_CREATED)
+
+
+def activity_with_archived(request, logs, **scope):
+    """
+    Nhật ký gồm cả entry đã lưu trữ ra file (?include_archived=1):
+    - Không phân trang; nên giới hạn bằng ?since= / ?until= (ISO 8601) để chỉ đọc các tệp cần thiết.
+    - Entry trong CSDL (mới hơn) đứng trước, sau đó là entry đã lưu trữ, đều mới nhất trước.
+    - ?fields= / ?expand= áp dụng cho cả hai phần.
+    """
+    options = ActivityLogSerializer.read_options(request)
+    bounds = {}
+    for name in ('since', 'until'):
+        value = request.query_params.get(name)
+        if value:
+            parsed = parse_datetime(value)
+            if parsed is None:
+                return Response({"error": f"Tham số {name} không hợp lệ."}, status=status.HTTP_400_BAD_REQUEST)
+            bounds[name] = parsed if timezone.is_aware(parsed) else timezone.make_aware(parsed)
+    if 'since' in bounds:
+        logs = logs.filter(timestamp__gte=bounds['since'])
+    if 'until' in bounds:
+        logs = logs.filter(timestamp__lt=bounds['until'])
+    live = fastpath.serialize(ActivityLogSerializer, ActivityLogSerializer.prepare_queryset(logs, **options), **options)
+    if 'id' in options.get('fields', ['id']):
+        seen = {entry['id'] for entry in live}
+    else:
+        seen = set(logs.values_list('id', flat=True))
+    archived = [
+        ActivityLogSerializer.select(entry, **options) for entry in retention.read_archived(**scope, **bounds)
+        if entry['id'] not in seen
+    ]
+    return Response(live + archived)
+
+
 # ACTIVITY LOG VIEW (xem nhật ký hoạt động cho dự án cụ thể)
-class ActivityLogProjectView(APIView):
+class ActivityLogProjectView(InstrumentedAPIView):
     permission_classes = [IsAuthenticated, CanViewActivityLog]
     def get(self, request, project_pk):
         try:
@@ -490,11 +916,14 @@ class ActivityLogProjectView(APIView):
             return Response({"error": "Dự án không tồn tại."}, status=status.HTTP_404_NOT_FOUND)
         
         logs = ActivityLog.objects.filter(project=project).order_by('-timestamp')
-        return Response(ActivityLogSerializer(logs, many=True).data)
+        if request.query_params.get('include_archived') in ('1', 'true'):
+            return activity_with_archived(request, logs, project_id=project.pk)
+        paginator = KeysetPagination(ordering_fields=('timestamp',), default_ordering='-timestamp')
+        return conditional.conditional_list(paginator, logs, request, ActivityLogSerializer, field='timestamp')
 
 
 # ACTIVITY LOG VIEW (xem nhật ký hoạt động cho công việc cụ thể)
-class ActivityLogTaskView(APIView):
+class ActivityLogTaskView(InstrumentedAPIView):
     permission_classes = [IsAuthenticated, CanViewActivityLog]
     def get(self, request, project_pk, task_pk):
         try:
@@ -503,9 +932,167 @@ class ActivityLogTaskView(APIView):
             return Response({"error": "Công việc không tồn tại."}, status=status.HTTP_404_NOT_FOUND)
         
         logs = ActivityLog.objects.filter(task=task).order_by('-timestamp')
-        return Response(ActivityLogSerializer(logs, many=True).data)
+        if request.query_params.get('include_archived') in ('1', 'true'):
+            return activity_with_archived(request, logs, task_id=task.pk)
+        paginator = KeysetPagination(ordering_fields=('timestamp',), default_ordering='-timestamp')
+        return conditional.conditional_list(paginator, logs, request, ActivityLogSerializer, field='timestamp')
     
 
+# ASYNC READ VIEWS (bản async của các endpoint đọc nhiều nhất, URL dưới /async/, xem API/asyncviews.py)
+
+# PROJECT LIST VIEW (ASYNC)
+@async_api_view
+async def async_project_list(request):
+    project = CanViewProjectList().filter_queryset(request)
+    project = await filtered(ProjectFilter, request, project)
+    paginator = KeysetPagination(ordering_fields=('created_at', 'updated_at'))
+    return await conditional.aconditional_list(paginator, project, request, ProjectSerializer)
+
+
+# PROJECT DETAIL VIEW (ASYNC)
+@async_api_view
+async def async_project_detail(request, pk):
+    try:
+        options = ProjectSerializer.read_options(request)
+        project = await ProjectSerializer.prepare_queryset(Project.objects.all(), **options).aget(pk=pk)
+    except Project.DoesNotExist:
+        raise NotFound("Dự án không tồn tại.")
+    await check_object_permissions(request, IsProjectOwnerOrMember(), project)
+    validators = conditional.object_validators(project)
+    not_modified = conditional.evaluate(request, *validators)
+    if not_modified is not None:
+        return not_modified
+    serializer = ProjectSerializer(project, **options)
+    return conditional.with_validators(Response(serializer.data, status=status.HTTP_200_OK), *validators)
+
+
+# TASK LIST VIEW (ASYNC)
+@async_api_view
+async def async_task_list(request, pk):
+    task = await CanViewTaskList().afilter_queryset(request, pk)
+    task = await filtered(TaskFilter, request, task)
+    paginator = KeysetPagination(ordering_fields=('created_at', 'due_date'))
+    return await conditional.aconditional_list(paginator, task, request, TaskSerializer)
+
+
+# TASK DETAIL VIEW (ASYNC)
+@async_api_view
+async def async_task_detail(request, project_pk, pk):
+    try:
+        options = TaskSerializer.read_options(request)
+        task = await TaskSerializer.prepare_queryset(Task.objects.select_related('project__owner'), **options).aget(
+            pk=pk, project_id=project_pk)
+    except Task.DoesNotExist:
+        raise NotFound("Công việc không tồn tại.")
+    await check_object_permissions(request, IsTaskPermission(), task)
+    validators = conditional.object_validators(task)
+    not_modified = conditional.evaluate(request, *validators)
+    if not_modified is not None:
+        return not_modified
+    serializer = TaskSerializer(task, **options)
+    return conditional.with_validators(Response(serializer.data, status=status.HTTP_200_OK), *validators)
+
+
+# COMMENT LIST VIEW (ASYNC)
+@async_api_view
+async def async_comment_list(request, project_pk, task_pk):
+    try:
+        task = await Task.objects.aget(pk=task_pk, project_id=project_pk)
+    except Task.DoesNotExist:
+        return Response({"error": "Công việc không tồn tại."}, status=status.HTTP_404_NOT_FOUND)
+    comments = Comment.objects.filter(task=task)
+    paginator = KeysetPagination(ordering_fields=('created_at',))
+    return await conditional.aconditional_list(paginator, comments, request, CommentSerializer)
+
+
+# COMMENT DETAIL VIEW (ASYNC)
+@async_api_view
+async def async_comment_detail(request, project_pk, task_pk, pk):
+    try:
+        options = CommentSerializer.read_options(request)
+        comment = await CommentSerializer.prepare_queryset(
+            Comment.objects.select_related('task__project__owner'), **options).aget(
+            pk=pk, task__pk=task_pk, task__project_id=project_pk)
+    except Comment.DoesNotExist:
+        raise NotFound("Bình luận không tồn tại trong công việc này.")
+    await check_object_permissions(request, IsCommentOrAttachmentOwner(), comment)
+    validators = conditional.object_validators(comment)
+    not_modified = conditional.evaluate(request, *validators)
+    if not_modified is not None:
+        return not_modified
+    serializer = CommentSerializer(comment, **options)
+    return conditional.with_validators(Response(serializer.data, status=status.HTTP_200_OK), *validators)
+
+
+# ACTIVITY LOG VIEWS (ASYNC)
+@async_api_view
+async def async_activity_project(request, project_pk):
+    try:
+        project = await Project.objects.aget(pk=project_pk)
+    except Project.DoesNotExist:
+        return Response({"error": "Dự án không tồn tại."}, status=status.HTTP_404_NOT_FOUND)
+    logs = ActivityLog.objects.filter(project=project).order_by('-timestamp')
+    return await async_activity(request, logs, project_id=project.pk)
+
+
+@async_api_view
+async def async_activity_task(request, project_pk, task_pk):
+    try:
+        task = await Task.objects.aget(pk=task_pk, project_id=project_pk)
+    except Task.DoesNotExist:
+        return Response({"error": "Công việc không tồn tại."}, status=status.HTTP_404_NOT_FOUND)
+    logs = ActivityLog.objects.filter(task=task).order_by('-timestamp')
+    return await async_activity(request, logs, task_id=task.pk)
+
+
+async def async_activity(request, logs, **scope):
+    if request.query_params.get('include_archived') in ('1', 'true'):
+        # Đọc tệp lưu trữ (IO đồng bộ) ngoài event loop
+        return await sync_to_async(activity_with_archived)(request, logs, **scope)
+    paginator = KeysetPagination(ordering_fields=('timestamp',), default_ordering='-timestamp')
+    return await conditional.aconditional_list(paginator, logs, request, ActivityLogSerializer, field='timestamp')
+
+
+# PROJECT EVENTS VIEW (luồng sự kiện realtime của dự án, Server-Sent Events)
+async def project_events(request, pk):
+    """
+    GET /projects/{pk}/events/ (text/event-stream), chỉ owner/thành viên dự án.
+    - Xác thực bằng access token JWT: header Authorization hoặc ?token=.
+    - Sự kiện: task.created, task.updated, task.deleted, comment.created, member.added, member.removed;
+      'resync' khi client đọc không kịp (nên tải lại danh sách).
+    """
+    user = await sync_to_async(realtime.authenticate)(request)
+    if user is None:
+        return JsonResponse({"detail": "Token không hợp lệ hoặc đã hết hạn."}, status=401)
+    project = await Project.objects.filter(pk=pk).afirst()
+    if project is None:
+        return JsonResponse({"error": "Dự án không tồn tại."}, status=404)
+
+    async def still_allowed():
+        return user.is_staff or await sync_to_async(is_project_member)(user, project.pk)
+
+    if not await still_allowed():
+        return JsonResponse({"detail": "Bạn không phải thành viên của dự án."}, status=403)
+    response = StreamingHttpResponse(realtime.EventStream(project.pk, still_allowed), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'    # nginx: không gom buffer, đẩy sự kiện ngay
+    return response
+
+
+# METRICS VIEW (số liệu hiệu năng theo định dạng Prometheus)
+def metrics(request):
+    """
+    GET /metrics/ (text/plain của Prometheus), số liệu của tiến trình đang xử lý request.
+    - Prometheus: Authorization: Bearer <REQUEST_METRICS['METRICS_TOKEN']>.
+    - Hoặc access token JWT của tài khoản staff.
+    """
+    if not perf.metrics_token_matches(request):
+        user = realtime.authenticate(request)
+        if user is None:
+            return JsonResponse({"detail": "Token không hợp lệ hoặc đã hết hạn."}, status=401)
+        if not user.is_staff:
+            return JsonResponse({"detail": "Chỉ quản trị viên được xem số liệu."}, status=403)
+    return HttpResponse(perf.render_metrics(), content_type='text/plain; version=0.0.4; charset=utf-8')
 
 
 # # HOMEPAGE VIEW (trang chủ)
@@ -45,11 +45,21 @@ INSTALLED_APPS = [
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'API.authentication.CachedJWTAuthentication',   # JWT + cache user (API/authentication.py)
     ),
     'DEFAULT_PERMISSION_CLASSES': (
         'rest_framework.permissions.IsAuthenticated',
     ),
+    # JSON qua orjson nếu đã cài (pip install orjson), không thì như JSONRenderer/JSONParser gốc (API/renderers.py)
+    'DEFAULT_RENDERER_CLASSES': (
+        'API.renderers.ORJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ),
+    'DEFAULT_PARSER_CLASSES': (
+        'API.renderers.ORJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ),
     'DEFAULT_FILTER_BACKENDS': ['django_filters.rest_framework.DjangoFilterBackend'],
     'DEFAULT_SCHEMA_CLASS': 'drf_spectacular.openapi.AutoSchema',
 }
@@ -63,11 +73,140 @@ SIMPLE_JWT = {
     "BLACKLIST_AFTER_ROTATION": True,
 }
 
+# Cache user khi xác thực JWT (API/authentication.py)
+JWT_AUTH_CACHE = {
+    'USER_TTL': 60,                 # giây; user sửa bằng .update() (không phát signal) cập nhật chậm nhất sau chừng này
+    'USE_DJANGO_CACHE': False,      # True: dùng chung cache giữa các tiến trình (CACHES['default'])
+}
+
+# Đường đọc nhanh cho endpoint danh sách: .values() + ánh xạ biên dịch sẵn thay cho serializer (API/fastpath.py)
+FAST_READ_PATH = {
+    'ENABLED': True,
+    'MAX_COMPILED': 512,            # số bản biên dịch (serializer x tổ hợp ?fields=/?expand=) giữ trong bộ nhớ
+}
+
+# Đo hiệu năng endpoint (python manage.py bench_endpoints)
+ENDPOINT_BENCHMARK = {
+    'DIR': None,                    # None: <BASE_DIR>/benchmarks
+    'REQUESTS': 20,                 # số request đo cho mỗi endpoint
+    'LATENCY_THRESHOLD': 1.5,       # p95 được phép chậm tối đa 1.5 lần baseline
+    'LATENCY_MIN_DELTA_MS': 10.0,   # ...và chậm hơn ít nhất 10 ms mới tính là hồi quy
+    'QUERY_THRESHOLD': 0,           # số query được phép tăng
+    'BYTES_THRESHOLD': 1.1,         # response được phép lớn hơn tối đa 10%
+}
+
+# So sánh đường đọc đồng bộ (WSGI) với bản async dưới /async/ (ASGI) bằng lệnh loadtest_reads (API/loadtest.py)
+READ_LOADTEST = {
+    'CONCURRENCY': [1, 8, 32, 64],  # các mức số client đồng thời
+    'REQUESTS': 200,                # số request mỗi mức, mỗi đường
+    'THREADS': 8,                   # số thread của server WSGI (như gunicorn --threads)
+    'DB_LATENCY_MS': 0.0,           # độ trễ cộng thêm vào mỗi câu SQL (mô phỏng CSDL ở máy khác)
+    'SLO_MS': 250.0,                # headroom: mức đồng thời cao nhất mà p95 còn dưới ngưỡng này
+}
+
+# Đo hiệu năng từng request: header Server-Timing, GET /metrics/ cho Prometheus, log request chậm (API/perf.py)
+REQUEST_METRICS = {
+    'ENABLED': True,
+    'SERVER_TIMING': True,
+    'METRICS': True,
+    'METRICS_TOKEN': None,          # Prometheus: bearer_token; None: chỉ staff đăng nhập bằng JWT xem được
+    'SLOW_REQUEST_MS': 500,         # None: tắt log request chậm
+    'SLOW_SAMPLE_RATE': 1.0,        # tỉ lệ request giữ lại SQL để ghi log khi chậm
+    'SLOW_SQL_COUNT': 10,           # số câu SQL chậm nhất ghi kèm
+}
+
+# Phát hiện N+1 query: cùng một câu SQL (bỏ giá trị cụ thể) chạy quá THRESHOLD lần trong một request (API/nplusone.py)
+NPLUSONE = {
+    'MODE': 'auto',             # auto: raise khi chạy test, warn khi DEBUG, log (lấy mẫu) khi production
+    'THRESHOLD': 5,
+    'SAMPLE_RATE': 0.01,        # chế độ log: tỉ lệ request được theo dõi
+    'ALLOWLIST': {},            # {tên URL: [đoạn câu SQL đã chuẩn hóa | '*']}
+    'STACK_LIMIT': 12,
+}
+
 
 # Khai báo model User tùy chỉnh
 AUTH_USER_MODEL = 'API.User'
 
 
+# Cache kiểm tra thành viên dự án (API/membership.py)
+PROJECT_MEMBERSHIP_CACHE = {
+    'MAX_ENTRIES': 10000,       # số entry tối đa trong bộ nhớ mỗi worker (LRU)
+    'TTL': 60,                  # giây
+    'USE_DJANGO_CACHE': False,  # True: dùng thêm Django cache (Redis/Memcached) chia sẻ giữa các worker
+                                # False: thay đổi thành viên chỉ tới worker khác sau TTL -> bật khi chạy nhiều worker
+    'CACHE_ALIAS': 'default',
+}
+
+
+# Ghi nhật ký hoạt động (API/activity.py)
+ACTIVITY_LOG = {
+    'MODE': 'sync',                 # 'sync' | 'buffered' | 'on_commit'
+    'BUFFER_SIZE': 100,             # buffered: flush khi gom đủ số entry này
+    'FLUSH_INTERVAL': 2.0,          # buffered: hoặc sau số giây này
+    'FLUSH_ON_REQUEST_END': False,  # buffered: flush luôn ở cuối mỗi request
+    'MAX_BUFFER': 10000,            # buffered: vượt quá thì bỏ entry cũ nhất (đếm vào 'dropped')
+}
+
+# Phân vùng theo tháng (PostgreSQL) và lưu trữ nhật ký hoạt động cũ ra file (API/retention.py)
+ACTIVITY_RETENTION = {
+    'ARCHIVE_DIR': None,            # mặc định: <BASE_DIR>/archives/activity
+    'KEEP_DAYS': 180,               # archive_activity_logs giữ lại N ngày gần nhất trong CSDL
+    'PARTITION_MONTHS_AHEAD': 3,    # create_activity_partitions tạo trước phân vùng cho N tháng tới
+}
+
+# Gợi ý người dùng theo tiền tố, /users/autocomplete/ (API/autocomplete.py)
+USER_AUTOCOMPLETE = {
+    'DEFAULT_LIMIT': 10,
+    'MAX_RESULTS': 50,              # giới hạn cứng của ?limit=
+    'CACHE_TTL': 30,                # giây, kết quả các tiền tố vừa tra được giữ trong bộ nhớ
+    'CACHE_ENTRIES': 2000,
+}
+
+# Luồng sự kiện realtime theo dự án qua SSE, cần chạy dưới ASGI (API/realtime.py)
+REALTIME = {
+    'BROKER': 'API.realtime.InProcessBroker',   # nhiều tiến trình: 'API.realtime.RedisBroker'
+    'REDIS_URL': 'redis://localhost:6379/0',
+    'HEARTBEAT': 15,                # giây giữa các comment giữ kết nối
+    'QUEUE_SIZE': 256,              # sự kiện chờ tối đa mỗi subscriber trước khi gửi 'resync'
+    'QUERY_TOKEN': True,            # cho phép ?token=<access token> (EventSource không gửi được header)
+}
+
+# Tải tệp đính kèm theo từng phần + lưu theo SHA-256 (API/uploads.py)
+ATTACHMENT_UPLOADS = {
+    'TEMP_DIR': None,                   # None: <MEDIA_ROOT>/uploads/incoming
+    'MAX_SIZE': 2 * 1024 ** 3,          # byte, tối đa một tệp
+    'MAX_CHUNK_SIZE': 64 * 1024 ** 2,   # byte, tối đa một lần PUT
+    'SESSION_TTL': 24 * 3600,           # giây; phiên bỏ dở quá hạn bị xóa bởi lệnh cleanup_uploads
+    'CLAIM_TIMEOUT': 3600,              # giây; quyền ghi phiên của request chết giữa chừng hết hạn sau chừng này
+}
+
+# Tải tệp đính kèm .../attachments/<pk>/download/ (API/downloads.py)
+ATTACHMENT_DOWNLOAD = {
+    'BACKEND': None,                        # None (Django tự gửi) | 'x-accel' (nginx) | 'x-sendfile'
+    'X_ACCEL_PREFIX': '/protected-media/',  # nginx: location /protected-media/ { internal; alias <MEDIA_ROOT>/; }
+    'CACHE_CONTROL': 'private, max-age=3600',
+    'AS_ATTACHMENT': True,
+}
+
+# Ảnh thu nhỏ cho tệp đính kèm là ảnh (API/thumbnails.py)
+THUMBNAILS = {
+    'ENABLED': True,
+    'BACKGROUND': True,     # sinh trong ThreadPoolExecutor sau commit, ngoài luồng request
+    'SIZE': (320, 320),
+    'FORMAT': 'WEBP',       # 'WEBP' | 'JPEG'
+    'QUALITY': 80,
+    'WORKERS': 2,           # số thread sinh ảnh mỗi worker
+}
+
+# Thống kê dự án projects/<pk>/stats/ (API/stats.py)
+PROJECT_STATS = {
+    'CACHED': False,        # True: giữ bộ đếm trong cache, cập nhật theo từng lần tạo/sửa/xóa task
+    'TIMEOUT': 300,         # giây; giới hạn thời gian bộ đếm có thể lệch khi nhiều worker cùng ghi
+    'CACHE_ALIAS': 'default',
+}
+
+
 # Cấu hình drf-spectacular
 SPECTACULAR_SETTINGS = {
     'TITLE': 'Task Management System API',
@@ -92,6 +231,9 @@ STATICFILES_DIRS = [
 
 
 MIDDLEWARE = [
+    'API.perf.PerformanceMiddleware',   # Server-Timing, /metrics/, log request chậm (API/perf.py)
+    'API.nplusone.NPlusOneMiddleware',  # phát hiện N+1 query (API/nplusone.py)
+    'API.replicas.PrimaryPinMiddleware',    # GET đọc từ bản sao, ghim primary sau khi ghi (API/replicas.py)
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -136,6 +278,19 @@ DATABASES = {
     }
 }
 
+# Bản sao chỉ đọc (read replica) cho request GET (API/replicas.py). Khai báo alias rồi liệt kê trong READ_REPLICAS,
+# 'MIRROR' để khi chạy test alias này dùng chung CSDL test với default:
+# DATABASES["replica"] = {**DATABASES["default"], "HOST": "replica.internal", "TEST": {"MIRROR": "default"}}
+DATABASE_ROUTERS = ['API.replicas.ReplicaRouter']
+
+READ_REPLICAS = {
+    'ALIASES': [],                  # vd: ['replica']; rỗng: mọi truy vấn vào default
+    'PIN_SECONDS': 5,               # sau khi ghi, client đọc từ primary chừng này giây (lớn hơn độ trễ sao chép)
+    'COOKIE_NAME': 'primary_pin',   # ghim theo cookie (trình duyệt) và theo user đã xác thực (client API)
+    'CACHE_ALIAS': 'default',       # nhiều worker: dùng cache chung (Redis/Memcached) để ghim theo user
+    'RETRY_AFTER': 30,              # giây; bản sao lỗi kết nối bị bỏ qua, đọc từ primary
+}
+
 
 
 # Password validation